@@ -0,0 +1,227 @@
+"""
+Asterisk Audio Sync agent.
+
+This module exposes an aiohttp application running on the Asterisk host: it
+mirrors the audio files rendered by the GenerateAudio service into a local
+folder readable by Asterisk (see `audio_mirror`), so the playbacks read them
+from the disk instead of fetching them over HTTP.
+
+Key routes:
+- GET `/{ASTERISK_AUDIO_SYNC_ROUTE}?name=<file>[&fallback=wav]`: the local copy of a
+  file, downloaded or revalidated if needed (asked by `asterisk_caller` before a playback)
+- POST `/{ASTERISK_AUDIO_SYNC_ROUTE}`: mirrors new audio files in the background
+  (pushed by GenerateAudio once rendered)
+
+Environment/configuration is provided via `asterisk_audio_sync.constants`.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+
+if current_dir in sys.path:
+    sys.path.remove(current_dir)
+
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+
+from aiohttp import ClientSession, web
+
+from py_phone_caller_utils.audio_files import AUDIO_FILE_NAME
+from py_phone_caller_utils.telemetry import init_telemetry, instrument_aiohttp_app
+
+from asterisk_audio_sync.audio_mirror import AudioMirror, OriginUnavailable, sound_name
+from asterisk_audio_sync.constants import (
+    ASTERISK_AUDIO_SYNC_PORT,
+    ASTERISK_AUDIO_SYNC_ROUTE,
+    AUDIO_SYNC_CONCURRENCY,
+    AUDIO_SYNC_EVICT_GRACE_SECONDS,
+    AUDIO_SYNC_FLUSH_SECONDS,
+    AUDIO_SYNC_FORMATS,
+    AUDIO_SYNC_MAX_MB,
+    AUDIO_SYNC_TIMEOUT_SECONDS,
+    GENERATE_AUDIO_URL,
+    LOCAL_SOUNDS_FOLDER,
+    LOG_FORMATTER,
+    LOG_LEVEL,
+    SERVING_AUDIO_FOLDER,
+)
+
+logging.basicConfig(format=LOG_FORMATTER, level=LOG_LEVEL, force=True)
+
+init_telemetry("asterisk_audio_sync")
+
+
+async def local_audio(request):
+    """
+    Handles the requests for the local copy of an audio file, before its playback.
+
+    The file is downloaded from GenerateAudio if missing, revalidated with its ETag if it
+    may have changed (see `AudioMirror.ensure`), and played from the mirror as it is when
+    GenerateAudio can't be reached. When GenerateAudio has no such file (e.g. a telephony
+    variant whose encoding failed), the file of the same key in the 'fallback' format is
+    taken instead.
+
+    Args:
+        request: The incoming HTTP request containing the 'name' of the file (e.g. '<audio_key>.ulaw'),
+            and optionally the 'fallback' format (e.g. 'wav').
+
+    Returns:
+        aiohttp.web.Response: A JSON response with the 'sound' to play, the path of the file without
+            its extension.
+
+    Raises:
+        web.HTTPBadRequest: If the name is missing or is not the one of an audio file.
+        web.HTTPNotFound: If GenerateAudio has no such file.
+        web.HTTPServiceUnavailable: If GenerateAudio could not be reached and the file is not mirrored.
+    """
+    name = request.rel_url.query.get("name", "")
+    names = [name]
+    if "fallback" in request.rel_url.query:
+        names.append(f"{os.path.splitext(name)[0]}.{request.rel_url.query['fallback']}")
+    if not all(AUDIO_FILE_NAME.match(candidate) for candidate in names):
+        logging.error(f"No valid 'name' parameter passed on: '{request.rel_url}'")
+        raise web.HTTPBadRequest(
+            reason="Invalid audio file name", body=None, text=None, content_type=None
+        )
+
+    path = unavailable = None
+    for candidate in dict.fromkeys(names):
+        try:
+            path = await request.app["audio_mirror"].ensure(candidate)
+        except OriginUnavailable as err:
+            unavailable = err
+            continue
+        if path is not None:
+            break
+    if path is None and unavailable is not None:
+        logging.error(str(unavailable))
+        raise web.HTTPServiceUnavailable(reason=str(unavailable)) from unavailable
+    if path is None:
+        raise web.HTTPNotFound(reason=f"No audio file '{name}'")
+    return web.json_response({"status": 200, "sound": sound_name(path)})
+
+
+async def push_audio(request):
+    """
+    Handles the notifications of new audio files, mirroring them in the background.
+
+    GenerateAudio posts the files it wrote (the WAV file and its telephony variants); the
+    ones in the formats of `audio_sync_formats` are mirrored, so the first playback of a
+    message already finds it on the disk.
+
+    Args:
+        request: The incoming HTTP request, with the 'audio_files' in its JSON body.
+
+    Returns:
+        aiohttp.web.Response: A '202' JSON response with the number of files queued.
+
+    Raises:
+        web.HTTPBadRequest: If the body has no list of 'audio_files'.
+    """
+    try:
+        audio_files = (await request.json())["audio_files"]
+        if not isinstance(audio_files, list):
+            raise ValueError("'audio_files' is not a list")
+    except (ValueError, KeyError, TypeError) as err:
+        logging.exception(f"No list of 'audio_files' posted on: '{request.rel_url}'")
+        raise web.HTTPBadRequest(
+            reason=str(err), body=None, text=None, content_type=None
+        ) from err
+
+    names = [
+        name
+        for name in audio_files
+        if isinstance(name, str)
+        and AUDIO_FILE_NAME.match(name)
+        and name.rsplit(".", 1)[1] in AUDIO_SYNC_FORMATS
+    ]
+    task = asyncio.create_task(
+        request.app["audio_mirror"].sync(names, AUDIO_SYNC_CONCURRENCY)
+    )
+    request.app["audio_sync_tasks"].add(task)
+    task.add_done_callback(request.app["audio_sync_tasks"].discard)
+    return web.json_response({"status": 202, "queued": len(names)}, status=202)
+
+
+async def start_audio_mirror(app):
+    """
+    Loads the manifest of the mirror and starts its periodic eviction and flush.
+
+    The files kept over the size cap for their grace period are evicted once it is over.
+
+    Args:
+        app (aiohttp.web.Application): The application, where the mirror is stored as 'audio_mirror'.
+
+    Returns:
+        None
+    """
+    os.makedirs(LOCAL_SOUNDS_FOLDER, exist_ok=True)
+    app["audio_sync_session"] = ClientSession()
+    audio_mirror = AudioMirror(
+        LOCAL_SOUNDS_FOLDER,
+        f"{GENERATE_AUDIO_URL}/{SERVING_AUDIO_FOLDER}",
+        app["audio_sync_session"],
+        AUDIO_SYNC_MAX_MB * 1024 * 1024,
+        AUDIO_SYNC_TIMEOUT_SECONDS,
+        AUDIO_SYNC_EVICT_GRACE_SECONDS,
+    )
+    await asyncio.to_thread(audio_mirror.load)
+    app["audio_mirror"] = audio_mirror
+    app["audio_sync_tasks"] = set()
+
+    async def flush_audio_mirror():
+        while True:
+            await asyncio.sleep(AUDIO_SYNC_FLUSH_SECONDS)
+            audio_mirror.evict()
+            audio_mirror.flush()
+
+    app["audio_mirror_flush"] = asyncio.create_task(flush_audio_mirror())
+
+
+async def close_audio_mirror(app):
+    """
+    Stops the background downloads and the periodic flush, and writes the manifest of the mirror.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+
+    Returns:
+        None
+    """
+    app["audio_mirror_flush"].cancel()
+    for task in app["audio_sync_tasks"]:
+        task.cancel()
+    await asyncio.gather(*app["audio_sync_tasks"], return_exceptions=True)
+    await app["audio_sync_session"].close()
+    app["audio_mirror"].flush()
+
+
+async def init_app():
+    """
+    Initializes and configures the aiohttp web application of the audio sync agent.
+
+    Returns:
+        aiohttp.web.Application: The configured aiohttp web application instance.
+    """
+    app = web.Application()
+
+    instrument_aiohttp_app(app)
+
+    app.on_startup.append(start_audio_mirror)
+    app.on_cleanup.append(close_audio_mirror)
+
+    app.router.add_route("GET", f"/{ASTERISK_AUDIO_SYNC_ROUTE}", local_audio)
+    app.router.add_route("POST", f"/{ASTERISK_AUDIO_SYNC_ROUTE}", push_audio)
+    return app
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    app = loop.run_until_complete(init_app())
+    web.run_app(app, port=ASTERISK_AUDIO_SYNC_PORT)
@@ -0,0 +1,306 @@
+"""
+Local mirror of the audio files served by the GenerateAudio service.
+
+The mirror lives in a folder of the Asterisk host: once an audio file is in
+it, Asterisk plays it from the disk (`sound:<folder>/<name>`) instead of
+fetching it over HTTP at every playback, so starting a playback no longer
+depends on the availability or the latency of GenerateAudio.
+
+A file is downloaded once and then kept according to the `Cache-Control` of
+GenerateAudio: the files of a cache key never change (`immutable`) and are
+served from the mirror without asking again; the other ones (the
+`<msg_chk_sum>.wav` links, the files rendered by a fallback engine) are
+revalidated with their ETag, a '304' costing no transfer. When GenerateAudio
+can't be reached the local copy is played anyway.
+
+A JSON manifest, kept in the mirror folder, records the ETag, the size and
+the last access of every file: beyond the size cap the least recently played
+files are deleted, except the ones played within a grace period, which
+Asterisk may still be reading.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+
+from aiohttp import ClientError, ClientTimeout
+from py_phone_caller_utils.audio_files import AUDIO_FILE_NAME
+
+MANIFEST_FILE_NAME = ".sync_manifest.json"
+DOWNLOAD_CHUNK_BYTES = 1 << 16
+# Readable by Asterisk, running as another user
+AUDIO_FILE_MODE = 0o644
+
+
+class OriginUnavailable(Exception):
+    """
+    GenerateAudio could not be reached, and the file is not in the mirror.
+    """
+
+
+class AudioMirror:
+    """
+    The audio files mirrored from GenerateAudio, with their manifest.
+
+    The mirror is used from the event loop only; concurrent requests for the same
+    file share a single download.
+    """
+
+    def __init__(
+        self,
+        folder,
+        origin_url,
+        session,
+        max_bytes=0,
+        timeout_seconds=5,
+        evict_grace_seconds=0,
+    ):
+        """
+        Args:
+            folder (str): The folder of the mirrored files, readable by Asterisk.
+            origin_url (str): The URL of the audio files of GenerateAudio (e.g. 'http://host:8082/audio').
+            session (aiohttp.ClientSession): The session of the downloads.
+            max_bytes (int): The size cap of the mirror, 0 to disable the eviction.
+            timeout_seconds (float): The time allowed to a download.
+            evict_grace_seconds (float): The time a file played or downloaded is kept even over the cap.
+        """
+        self.folder = folder
+        self.origin_url = origin_url.rstrip("/")
+        self.session = session
+        self.max_bytes = int(max_bytes)
+        self.timeout = ClientTimeout(total=timeout_seconds)
+        self.evict_grace_seconds = evict_grace_seconds
+        self.manifest_path = os.path.join(folder, MANIFEST_FILE_NAME)
+        self.entries = {}
+        self.downloads = 0
+        self.revalidations = 0
+        self._syncing = {}
+        self._dirty = False
+
+    @property
+    def size(self):
+        return sum(entry["size"] for entry in self.entries.values())
+
+    def path(self, name):
+        return os.path.join(self.folder, name)
+
+    def load(self):
+        """
+        Loads the manifest, forgetting the files no longer present.
+
+        Returns:
+            None
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as manifest:
+                self.entries = json.load(manifest).get("entries", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as err:
+            logging.error(f"Invalid audio sync manifest, starting empty: {err}")
+        for name in [name for name in self.entries if not self._exists(name)]:
+            self.entries.pop(name)
+            self._dirty = True
+
+    def _exists(self, name):
+        return os.path.isfile(self.path(name))
+
+    async def ensure(self, name):
+        """
+        Returns the path of an audio file in the mirror, downloading or revalidating it if needed.
+
+        Args:
+            name (str): The name of the file (e.g. '<audio_key>.ulaw').
+
+        Returns:
+            str: The path of the file, or None if GenerateAudio has no such file.
+
+        Raises:
+            ValueError: If the name is not the one of an audio file.
+            OriginUnavailable: If GenerateAudio could not be reached and the file is not mirrored.
+        """
+        if not AUDIO_FILE_NAME.match(name):
+            raise ValueError(f"Not an audio file name: '{name}'")
+        entry = self.entries.get(name)
+        if entry is not None and entry["immutable"] and self._exists(name):
+            self._touch(name)
+            return self.path(name)
+
+        future = self._syncing.get(name)
+        if future is None:
+            future = asyncio.ensure_future(self._sync(name))
+            self._syncing[name] = future
+            future.add_done_callback(lambda _: self._syncing.pop(name, None))
+        return await asyncio.shield(future)
+
+    async def sync(self, names, concurrency=4):
+        """
+        Mirrors several audio files (e.g. pushed by GenerateAudio once rendered), logging the failures.
+
+        Args:
+            names (list): The names of the files.
+            concurrency (int): The downloads running at the same time.
+
+        Returns:
+            int: The number of files mirrored.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(name):
+            async with semaphore:
+                try:
+                    return await self.ensure(name) is not None
+                except (ValueError, OriginUnavailable) as err:
+                    logging.warning(f"Unable to mirror the audio file '{name}': {err}")
+                    return False
+
+        return sum(await asyncio.gather(*(bounded(name) for name in names)))
+
+    async def _sync(self, name):
+        entry = self.entries.get(name)
+        local = entry is not None and self._exists(name)
+        headers = {"If-None-Match": f'"{entry["etag"]}"'} if local else {}
+        try:
+            async with self.session.get(
+                f"{self.origin_url}/{name}", headers=headers, timeout=self.timeout
+            ) as response:
+                if response.status == 304:
+                    self.revalidations += 1
+                    entry["immutable"] = is_immutable(response)
+                    self._touch(name)
+                    return self.path(name)
+                if response.status == 404:
+                    if local:
+                        self._remove(name)
+                    return None
+                response.raise_for_status()
+                tmp_path = self.path(f".{name}.{uuid.uuid4().hex}.tmp")
+                try:
+                    size = await self._download(response, tmp_path)
+                    await asyncio.to_thread(os.replace, tmp_path, self.path(name))
+                finally:
+                    self._unlink(tmp_path)
+                self.entries[name] = {
+                    "etag": response.headers.get("ETag", "").strip('"'),
+                    "immutable": is_immutable(response),
+                    "size": size,
+                    "last_access": time.time(),
+                }
+                self.downloads += 1
+                self._dirty = True
+                self.evict(keep=name)
+                return self.path(name)
+        except (ClientError, asyncio.TimeoutError, OSError) as err:
+            if local:
+                logging.warning(
+                    f"Unable to revalidate the audio file '{name}', playing the local copy: {err}"
+                )
+                self._touch(name)
+                return self.path(name)
+            raise OriginUnavailable(
+                f"Unable to download the audio file '{name}': {err}"
+            ) from err
+
+    @staticmethod
+    async def _download(response, tmp_path):
+        # The disk is written in a thread, the event loop keeps serving the playbacks
+        audio_file = await asyncio.to_thread(open, tmp_path, "wb")
+        size = 0
+        try:
+            async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                await asyncio.to_thread(audio_file.write, chunk)
+                size += len(chunk)
+        finally:
+            await asyncio.to_thread(audio_file.close)
+        await asyncio.to_thread(os.chmod, tmp_path, AUDIO_FILE_MODE)
+        return size
+
+    def _touch(self, name):
+        self.entries[name]["last_access"] = time.time()
+        self._dirty = True
+
+    def evict(self, keep=None):
+        """
+        Deletes the least recently played files while the mirror is over its size cap.
+
+        The files played within `evict_grace_seconds` are kept, so a playback started right
+        after `ensure` never loses its file: the mirror may stay over its cap until they age.
+
+        Args:
+            keep (str): A file never evicted (e.g. the one just downloaded).
+
+        Returns:
+            list: The names of the evicted files.
+        """
+        if self.max_bytes <= 0:
+            return []
+        evicted = []
+        size = self.size
+        played_since = time.time() - self.evict_grace_seconds
+        for name in sorted(
+            self.entries, key=lambda name: self.entries[name]["last_access"]
+        ):
+            if size <= self.max_bytes or (
+                self.entries[name]["last_access"] > played_since
+            ):
+                break
+            if name == keep:
+                continue
+            size -= self.entries[name]["size"]
+            self._remove(name)
+            evicted.append(name)
+        return evicted
+
+    def _remove(self, name):
+        self.entries.pop(name, None)
+        self._unlink(self.path(name))
+        self._dirty = True
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            logging.warning(f"Unable to remove the mirrored audio '{path}': {err}")
+
+    def flush(self):
+        """
+        Writes the manifest, atomically, if it changed.
+
+        Returns:
+            None
+        """
+        if not self._dirty:
+            return
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as manifest:
+                json.dump({"entries": self.entries}, manifest)
+            os.replace(tmp_path, self.manifest_path)
+            self._dirty = False
+        except OSError as err:
+            logging.error(f"Unable to write the audio sync manifest: {err}")
+
+
+def is_immutable(response):
+    return "immutable" in response.headers.get("Cache-Control", "")
+
+
+def sound_name(path):
+    """
+    Returns the name Asterisk plays a mirrored file by: its path without the extension.
+
+    Asterisk picks the extension itself, among the formats of the file present in the folder.
+
+    Args:
+        path (str): The absolute path of the file.
+
+    Returns:
+        str: The sound, for a 'sound:<name>' media URI.
+    """
+    return os.path.splitext(path)[0]
@@ -0,0 +1,34 @@
+from py_phone_caller_utils.config import settings
+
+GENERATE_AUDIO_URL = f"{settings.generate_audio.generate_audio_http_scheme}://{settings.generate_audio.generate_audio_host}:{settings.generate_audio.generate_audio_port}"
+SERVING_AUDIO_FOLDER = settings.generate_audio.serving_audio_folder
+ASTERISK_AUDIO_FORMAT = settings.asterisk_call.get("asterisk_audio_format", "wav")
+ASTERISK_AUDIO_SYNC_PORT = int(
+    settings.asterisk_audio_sync.get("asterisk_audio_sync_port", 8089)
+)
+ASTERISK_AUDIO_SYNC_ROUTE = settings.asterisk_audio_sync.get(
+    "asterisk_audio_sync_route", "sync_audio"
+)
+LOCAL_SOUNDS_FOLDER = settings.asterisk_audio_sync.get(
+    "local_sounds_folder", "/var/lib/asterisk/sounds/py-phone-caller"
+)
+# The formats mirrored when GenerateAudio pushes a new audio file, the played one by default
+AUDIO_SYNC_FORMATS = list(
+    settings.asterisk_audio_sync.get("audio_sync_formats", [])
+) or [ASTERISK_AUDIO_FORMAT]
+AUDIO_SYNC_MAX_MB = float(settings.asterisk_audio_sync.get("audio_sync_max_mb", 512))
+AUDIO_SYNC_TIMEOUT_SECONDS = float(
+    settings.asterisk_audio_sync.get("audio_sync_timeout_seconds", 5)
+)
+AUDIO_SYNC_CONCURRENCY = int(
+    settings.asterisk_audio_sync.get("audio_sync_concurrency", 4)
+)
+# A file played this recently is kept over the size cap: Asterisk may still be reading it
+AUDIO_SYNC_EVICT_GRACE_SECONDS = float(
+    settings.asterisk_audio_sync.get("audio_sync_evict_grace_seconds", 600)
+)
+AUDIO_SYNC_FLUSH_SECONDS = float(
+    settings.asterisk_audio_sync.get("audio_sync_flush_seconds", 60)
+)
+LOG_FORMATTER = settings.logs.log_formatter
+LOG_LEVEL = settings.logs.log_level
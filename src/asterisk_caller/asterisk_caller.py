@@ -53,6 +53,13 @@ from asterisk_caller.constants import (
     CALL_QUEUE,
     ASTERISK_CALL_ERROR,
     ASTERISK_CALL_APP_ROUTE_PLAY,
+    ASTERISK_AUDIO_FORMAT,
+    ASTERISK_AUDIO_FORMATS,
+    AUDIO_VARIANT_FORMATS,
+    ASTERISK_AUDIO_SYNC_ENABLED,
+    ASTERISK_AUDIO_SYNC_ROUTE,
+    ASTERISK_AUDIO_SYNC_URL,
+    AUDIO_SYNC_PLAY_TIMEOUT_SECONDS,
     ASTERISK_ARI_PLAY,
     ASTERISK_ARI_CHANNELS,
     ASTERISK_PLAY_ERROR,
@@ -455,6 +462,88 @@ async def call_to_queue(request):
     return web.json_response({"status": 200})
 
 
+async def local_sound(audio_name):
+    """
+    Asks the audio sync agent of the Asterisk host for the local copy of an audio file.
+
+    The agent downloads the file from the GenerateAudio service if it doesn't have it yet, and
+    takes the WAV file when a telephony variant is missing. Any failure is logged and the file
+    is then played over HTTP, as without the agent.
+
+    Args:
+        audio_name (str): The name of the audio file (e.g. '<audio_key>.ulaw').
+
+    Returns:
+        str: The sound to play from the disk of Asterisk, or None if the agent is disabled or
+            has no local copy.
+    """
+    if not ASTERISK_AUDIO_SYNC_ENABLED:
+        return None
+    try:
+        async with ClientSession(
+            timeout=ClientTimeout(total=AUDIO_SYNC_PLAY_TIMEOUT_SECONDS)
+        ) as session:
+            async with session.get(
+                f"{ASTERISK_AUDIO_SYNC_URL}/{ASTERISK_AUDIO_SYNC_ROUTE}",
+                params={"name": audio_name, "fallback": "wav"},
+            ) as sync_resp:
+                if sync_resp.status == 200:
+                    return (await sync_resp.json())["sound"]
+                logging.warning(
+                    f"Audio sync agent response: {sync_resp.status}. Playing '{audio_name}' over HTTP"
+                )
+    except (client_exceptions.ClientError, asyncio.TimeoutError, KeyError) as err:
+        logging.warning(
+            f"Unable to get the local copy of '{audio_name}', playing it over HTTP: '{err}'"
+        )
+    return None
+
+
+async def playable_audio_name(audio_key, audio_format, variants=None):
+    """
+    Returns the name of the audio file of a key to play, in a format if available, as WAV otherwise.
+
+    A telephony variant may be missing (e.g. its encoding failed), and the WAV file, always written,
+    is then played instead. The formats of the variants written, returned by the GenerateAudio service
+    with the key, tell which one to play. Without them, the audio sync agent falls back to the WAV file
+    itself (see `local_sound`); only without the agent the GenerateAudio service is asked whether it
+    serves the variant. When it can't be asked, the variant is played as requested.
+
+    Args:
+        audio_key (str): The cache key of the audio file.
+        audio_format (str): The format to play ('wav', 'ulaw', 'alaw', 'sln').
+        variants (list): The formats of the variants written for the key, if known.
+
+    Returns:
+        str: The name of the audio file (e.g. '<audio_key>.ulaw').
+    """
+    audio_name = f"{audio_key}.{audio_format}"
+    if audio_format == "wav":
+        return audio_name
+    if variants is not None and audio_format not in variants:
+        logging.warning(
+            f"No audio file '{audio_name}', playing '{audio_key}.wav' instead"
+        )
+        return f"{audio_key}.wav"
+    if variants is not None or ASTERISK_AUDIO_SYNC_ENABLED:
+        return audio_name
+    try:
+        async with ClientSession(
+            timeout=ClientTimeout(total=CLIENT_TIMEOUT_TOTAL)
+        ) as session:
+            async with session.head(
+                f"{GENERATE_AUDIO_URL}/{SERVING_AUDIO_FOLDER}/{audio_name}"
+            ) as variant_resp:
+                if variant_resp.status == 404:
+                    logging.warning(
+                        f"No audio file '{audio_name}', playing '{audio_key}.wav' instead"
+                    )
+                    return f"{audio_key}.wav"
+    except (client_exceptions.ClientError, asyncio.TimeoutError) as err:
+        logging.warning(f"Unable to check the audio file '{audio_name}': '{err}'")
+    return audio_name
+
+
 async def asterisk_play(request):
     """
     Handles incoming requests to play an audio file to a specified Asterisk channel.
@@ -462,8 +551,24 @@ async def asterisk_play(request):
     This asynchronous function validates the required parameters, sends a request to play the audio file on the channel,
     and then sends a 'continue' command to restore call control to the PBX. It returns a JSON response with the play status.
 
+    The playbacks requested on a channel are queued by Asterisk: a message streamed as several audio chunks is
+    played by one request per chunk, all of them but the last with 'continue_dialplan=false'.
+
+    Asterisk plays the audio file in the format of its extension: with an 'audio_key', the 'audio_format'
+    parameter (or 'asterisk_audio_format') selects the telephony variant matching the codec of the trunk
+    ('ulaw', 'alaw', 'sln'), streamed without transcoding; the WAV file is played when the variant is
+    missing, according to the 'variants' returned by the GenerateAudio service with the key (see
+    `playable_audio_name`). The files addressed by message checksum only exist as WAV.
+
+    With 'asterisk_audio_sync_enabled' the file is played from the disk of Asterisk, mirrored by the
+    audio sync agent (see `local_sound`), so the start of the playback doesn't depend on the GenerateAudio
+    service; otherwise, or if the agent fails, Asterisk fetches it over HTTP.
+
     Args:
-        request: The incoming HTTP request containing 'asterisk_chan' and 'msg_chk_sum' parameters.
+        request: The incoming HTTP request containing 'asterisk_chan' and 'msg_chk_sum' parameters, and
+            optionally the 'audio_key' of the audio file returned by the GenerateAudio service, the
+            comma-separated formats of its 'variants', its 'audio_format' and the 'continue_dialplan'
+            flag (true by default).
 
     Returns:
         aiohttp.web.Response: A JSON response indicating the status of the play operation.
@@ -486,10 +591,27 @@ async def asterisk_play(request):
             content_type=None,
         ) from err
 
-    generate_audio_url = f"{GENERATE_AUDIO_URL}/{SERVING_AUDIO_FOLDER}"
+    audio_key = request.rel_url.query.get("audio_key")
+    audio_format = request.rel_url.query.get("audio_format", ASTERISK_AUDIO_FORMAT)
+    if audio_format not in ASTERISK_AUDIO_FORMATS:
+        logging.error(f"Unknown 'audio_format' passed on: '{request.rel_url}'")
+        raise web.HTTPBadRequest(
+            reason=ASTERISK_PLAY_ERROR, body=None, text=None, content_type=None
+        )
+    variants = request.rel_url.query.get("variants")
+    if variants is not None:
+        variants = [variant for variant in variants.split(",") if variant]
+    audio_name = (
+        await playable_audio_name(audio_key, audio_format, variants)
+        if audio_key
+        else f"{msg_chk_sum}.wav"
+    )
+    sound = await local_sound(audio_name)
+    if sound is None:
+        sound = f"{GENERATE_AUDIO_URL}/{SERVING_AUDIO_FOLDER}/{audio_name}"
     asterisk_play_addr = (
         f"{ASTERISK_URL}/{ASTERISK_ARI_CHANNELS}/{asterisk_chan}/"
-        + f"{ASTERISK_ARI_PLAY}:{generate_audio_url}/{msg_chk_sum}.wav"
+        + f"{ASTERISK_ARI_PLAY}:{sound}"
     )
     headers = await gen_headers(f"{ASTERISK_USER}:{ASTERISK_PASS}")
 
@@ -502,12 +624,12 @@ async def asterisk_play(request):
         if play_audio_resp.status == 201:  # Asterisk returns a '201' code
             logging.info(
                 f"Asterisk server '{ASTERISK_URL}' response: {play_audio_resp.status}. Playing audio"
-                + f" '{msg_chk_sum}.wav' to the channel '{asterisk_chan}'"
+                + f" '{audio_name}' to the channel '{asterisk_chan}'"
             )
         else:
             logging.error(
                 f"Asterisk server '{ASTERISK_URL}' response: {play_audio_resp.status}."
-                + f"Unable to play audio '{msg_chk_sum}.wav' to the channel '{asterisk_chan}'"
+                + f"Unable to play audio '{audio_name}' to the channel '{asterisk_chan}'"
             )
 
     except client_exceptions.ClientConnectorError as err:
@@ -516,6 +638,9 @@ async def asterisk_play(request):
             reason=str(err), body=None, text=None, content_type=None
         ) from err
 
+    if request.rel_url.query.get("continue_dialplan", "true").lower() == "false":
+        return web.json_response({"status": play_audio_resp.status})
+
     asterisk_play_addr = (
         f"{ASTERISK_URL}/{ASTERISK_ARI_CHANNELS}/{asterisk_chan}/continue"
     )
@@ -532,8 +657,20 @@ async def init_app():
 
     Returns:
         aiohttp.web.Application: The configured aiohttp web application instance.
+
+    Raises:
+        ValueError: If 'asterisk_audio_format' is a format the GenerateAudio service doesn't write.
     """
 
+    if (
+        ASTERISK_AUDIO_FORMAT != "wav"
+        and ASTERISK_AUDIO_FORMAT not in AUDIO_VARIANT_FORMATS
+    ):
+        raise ValueError(
+            f"Invalid 'asterisk_audio_format': '{ASTERISK_AUDIO_FORMAT}', "
+            + f"expected 'wav' or one of the 'audio_variant_formats' {AUDIO_VARIANT_FORMATS}"
+        )
+
     app = web.Application()
 
     instrument_aiohttp_app(app)
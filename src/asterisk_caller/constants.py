@@ -28,6 +28,26 @@ ASTERISK_CALL_APP_ROUTE_CALL_TO_QUEUE = (
     settings.asterisk_call.asterisk_call_app_route_call_to_queue
 )
 ASTERISK_CALL_APP_ROUTE_PLAY = settings.asterisk_call.asterisk_call_app_route_play
+# The formats of the audio files served by the GenerateAudio service
+ASTERISK_AUDIO_FORMATS = ("wav", "ulaw", "alaw", "sln")
+ASTERISK_AUDIO_FORMAT = settings.asterisk_call.get("asterisk_audio_format", "wav")
+# The telephony variants written by the GenerateAudio service next to the WAV files
+AUDIO_VARIANT_FORMATS = list(
+    settings.generate_audio.get("audio_variant_formats", ["ulaw", "alaw"])
+)
+# The agent mirroring the audio files on the Asterisk host, played from its disk when enabled
+# (a section of its own, possibly missing from the older settings files)
+AUDIO_SYNC_SETTINGS = settings.get("asterisk_audio_sync", {})
+ASTERISK_AUDIO_SYNC_ENABLED = bool(
+    AUDIO_SYNC_SETTINGS.get("asterisk_audio_sync_enabled", False)
+)
+ASTERISK_AUDIO_SYNC_URL = f"{AUDIO_SYNC_SETTINGS.get('asterisk_audio_sync_http_scheme', 'http')}://{AUDIO_SYNC_SETTINGS.get('asterisk_audio_sync_host', settings.commons.asterisk_host)}:{AUDIO_SYNC_SETTINGS.get('asterisk_audio_sync_port', 8089)}"
+ASTERISK_AUDIO_SYNC_ROUTE = AUDIO_SYNC_SETTINGS.get(
+    "asterisk_audio_sync_route", "sync_audio"
+)
+AUDIO_SYNC_PLAY_TIMEOUT_SECONDS = float(
+    AUDIO_SYNC_SETTINGS.get("audio_sync_play_timeout_seconds", 2)
+)
 ASTERISK_CALL_PORT = int(settings.asterisk_call.asterisk_call_port)
 WAIT_FOR_CALL_CYCLE = settings.asterisk_call.seconds_to_forget
 CLIENT_TIMEOUT_TOTAL = settings.asterisk_call.client_timeout_total
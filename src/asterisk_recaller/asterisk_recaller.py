@@ -11,10 +11,13 @@ It communicates with the Asterisk Caller service and the database via
 
 import asyncio
 import datetime
+import functools
 import logging
 import signal
 import sys
 import os
+import time
+import uuid
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.dirname(current_dir)
@@ -30,14 +33,33 @@ from aiohttp import ClientSession, client_exceptions, web_exceptions
 
 from py_phone_caller_utils.py_phone_caller_db.db_asterisk_recaller import (
     select_to_recall,
-    select_backup_calls,
-    increment_backup_call_count,
+    select_to_recall_by_id,
+    claim_recall,
+    claim_backup_calls,
+    complete_backup_call,
 )
-from py_phone_caller_utils.py_phone_caller_db.db_address_book import (
-    get_on_call_contacts,
+from py_phone_caller_utils.py_phone_caller_db.db_notify import (
+    CALL_ACKNOWLEDGED,
+    CALL_CYCLE_DONE,
+    CALLS_CHANNEL,
+    ADDRESS_BOOK_CHANNEL,
+    listen,
+)
+from py_phone_caller_utils.py_phone_caller_db.on_call_index import (
+    OnCallIndex,
+    load_on_call_index,
+    refresh_on_call_index,
+)
+from py_phone_caller_utils.telemetry import init_telemetry, serve_metrics
+
+from asterisk_recaller import recaller_metrics
+from asterisk_recaller.recall_scheduler import RecallScheduler
+from asterisk_recaller.escalation import (
+    default_escalation_policy,
+    parse_escalation_policies,
+    policy_for_message,
+    tier_contacts,
 )
-from py_phone_caller_utils.telemetry import init_telemetry
-
 from asterisk_recaller.constants import (
     ASTERISK_CALL_URL,
     ASTERISK_CALL_APP_ROUTE_PLACE_CALL,
@@ -48,11 +70,25 @@ from asterisk_recaller.constants import (
     SLEEP_AND_RETRY,
     SLEEP_BEFORE_QUERYING,
     CALL_BACKUP_CALLEE_MAX_TIMES,
+    RECALL_CONCURRENCY,
+    RECALL_SWEEP_SECONDS,
+    CLAIM_LEASE_SECONDS,
+    RECALLER_INSTANCE_ID,
+    RAW_ESCALATION_POLICIES,
+    METRICS_PORT,
 )
 
 logging.basicConfig(format=LOG_FORMATTER, level=LOG_LEVEL, force=True)
 
-init_telemetry("asterisk_recaller")
+TELEMETRY = init_telemetry("asterisk_recaller")
+
+ESCALATION_POLICIES = parse_escalation_policies(RAW_ESCALATION_POLICIES)
+DEFAULT_ESCALATION_POLICY = default_escalation_policy(
+    CALL_BACKUP_CALLEE_MAX_TIMES, SLEEP_AND_RETRY
+)
+MAX_ESCALATION_TIERS = max(
+    len(policy["tiers"]) for policy in [DEFAULT_ESCALATION_POLICY, *ESCALATION_POLICIES]
+)
 
 
 async def recall_post(phone, message, backup_callee="false"):
@@ -71,6 +107,8 @@ async def recall_post(phone, message, backup_callee="false"):
     """
     asterisk_call_url = ASTERISK_CALL_URL
     session_recall_post = ClientSession()
+    started = time.perf_counter()
+    outcome = "error"
     try:
         call_register_resp = await session_recall_post.post(
             url=asterisk_call_url
@@ -79,17 +117,78 @@ async def recall_post(phone, message, backup_callee="false"):
             data=None,
         )
         message = await call_register_resp.text()
+        outcome = str(call_register_resp.status)
     except client_exceptions.ClientConnectorError as err:
+        outcome = "connection_error"
         logging.exception(f"Unable to connect to the Asterisk Call service: '{err}'")
     finally:
         await session_recall_post.close()
+        recaller_metrics.ASTERISK_CALL_DURATION.record(
+            time.perf_counter() - started,
+            {"backup_callee": backup_callee, "outcome": outcome},
+        )
 
 
-async def asterisk_recaller():
+async def recall_row(item_to_recall):
+    """
+    Places a recall for a call record selected by `select_to_recall`.
+
+    The attempt is claimed first, so that it is placed by one recaller instance only.
+
+    Args:
+        item_to_recall (dict): The call record, with at least the 'id', 'dialed_times', 'phone'
+            and 'message' keys.
+
+    Returns:
+        None
+    """
+    claimed = await claim_recall(
+        item_to_recall.get("id"),
+        item_to_recall.get("dialed_times"),
+        RECALLER_INSTANCE_ID,
+        CLAIM_LEASE_SECONDS,
+    )
+    if not claimed:
+        logging.info(
+            f"Recall of the call '{item_to_recall.get('id')}' claimed by another instance"
+        )
+        return
+
+    await recall_post(
+        item_to_recall.get("phone"),
+        item_to_recall.get("message"),
+    )
+
+
+async def sweep_recalls(scheduler):
+    """
+    Synchronizes the whole schedule of the recalls with the database.
+
+    Args:
+        scheduler (RecallScheduler): The scheduler of the recalls.
+
+    Returns:
+        None
+    """
+    now_utc = datetime.datetime.now(datetime.timezone.utc)
+    lesser_seconds_to_forget = now_utc - datetime.timedelta(seconds=SECONDS_TO_FORGET)
+
+    select_recall = await select_to_recall(
+        TIMES_TO_DIAL,
+        lesser_seconds_to_forget.replace(tzinfo=None),
+    )
+    scheduler.refresh(select_recall or [])
+
+
+async def refresh_recalls(scheduler):
     """
-    Periodically checks for calls that need to be retried and initiates recall attempts.
+    Periodically runs a consistency sweep of the schedule of the recalls.
+
+    The schedule is kept up to date by the notifications of the caller register, this slow sweep
+    only catches what could have been missed (e.g. a notification sent while disconnected).
 
-    This asynchronous function queries the database for eligible calls, attempts to recall them, and handles timing and error logging.
+    Args:
+        scheduler (RecallScheduler): The scheduler of the recalls.
 
     Returns:
         None
@@ -97,70 +196,155 @@ async def asterisk_recaller():
 
     while True:
         try:
-            now_utc = datetime.datetime.now(datetime.timezone.utc)
-            lesser_seconds_to_forget = now_utc - datetime.timedelta(
-                seconds=SECONDS_TO_FORGET
-            )
-            greater_sleep_and_retry = now_utc - datetime.timedelta(
-                seconds=SLEEP_AND_RETRY
+            started = time.perf_counter()
+            await sweep_recalls(scheduler)
+            recaller_metrics.LOOP_DURATION.record(
+                time.perf_counter() - started, {"loop": "recall_sweep"}
             )
+            await asyncio.sleep(RECALL_SWEEP_SECONDS)
 
-            select_recall = await select_to_recall(
-                TIMES_TO_DIAL,
-                lesser_seconds_to_forget.replace(tzinfo=None),
-                greater_sleep_and_retry.replace(tzinfo=None),
-            )
+        except Exception as err:
+            logging.exception(f"Problem with the PostgreSQL connection: '{err}'")
+            logging.info("Retrying connection in 5 seconds...")
+            await asyncio.sleep(5)
 
-            if select_recall is not None:
-                for _, item_to_recall in enumerate(select_recall):
-                    phone = item_to_recall.get("phone")
-                    message = item_to_recall.get("message")
-                    on_db_seconds_to_forget = item_to_recall.get("seconds_to_forget")
-                    logging.info(
-                        f"Retry to call phone number: '{phone}' to play the message: "
-                        + f"'{message}' "
-                        + f"- Total retry period: '{on_db_seconds_to_forget}' seconds"
-                    )
 
-                    await recall_post(
-                        phone,
-                        message,
-                    )
+async def on_calls_notification(scheduler, payload):
+    """
+    Updates the schedule of the recalls for the calls changed by the caller register.
 
-                    await asyncio.sleep(SLEEP_AND_RETRY)
+    Args:
+        scheduler (RecallScheduler): The scheduler of the recalls.
+        payload (dict): The notification, with the 'event' and 'ids' keys.
 
+    Returns:
+        None
+    """
+    try:
+        call_ids = [uuid.UUID(call_id) for call_id in payload.get("ids", [])]
+    except (TypeError, ValueError) as err:
+        logging.error(f"Invalid IDs in the notification '{payload}': {err}")
+        return
+
+    if payload.get("event") in (CALL_ACKNOWLEDGED, CALL_CYCLE_DONE):
+        scheduler.discard(call_ids)
+        return
+
+    try:
+        now_utc = datetime.datetime.now(datetime.timezone.utc)
+        lesser_seconds_to_forget = now_utc - datetime.timedelta(
+            seconds=SECONDS_TO_FORGET
+        )
+        rows = await select_to_recall_by_id(
+            call_ids,
+            TIMES_TO_DIAL,
+            lesser_seconds_to_forget.replace(tzinfo=None),
+        )
+    except Exception as err:
+        logging.exception(f"Unable to select the notified calls: '{err}'")
+        return
+
+    eligible = {row.get("id") for row in rows}
+    scheduler.discard([call_id for call_id in call_ids if call_id not in eligible])
+    scheduler.upsert(rows)
+
+
+async def escalate_backup_call(call, on_call_contacts):
+    """
+    Runs the next tier of the escalation policy of an alert not acknowledged.
+
+    The contacts of the tier are called in parallel, then the progress is stored and the claim of the
+    record is kept until the tier expires, so the next tier starts only if nobody acknowledged it meanwhile.
+
+    Args:
+        call (dict): The call record claimed by `claim_backup_calls`.
+        on_call_contacts (list): The contacts on call, in priority order.
+
+    Returns:
+        None
+    """
+    call_id = call.get("id")
+    message = call.get("message")
+    original_phone = call.get("phone")
+    tier_index = call.get("call_backup_callee_number_calls")
+
+    policy = policy_for_message(ESCALATION_POLICIES, DEFAULT_ESCALATION_POLICY, message)
+    tiers = policy["tiers"]
+    if tier_index >= len(tiers):
+        logging.info(
+            f"Escalation policy '{policy['name']}' exhausted for '{original_phone}'."
+        )
+        await complete_backup_call(
+            call_id, RECALLER_INSTANCE_ID, 0, MAX_ESCALATION_TIERS
+        )
+        return
+
+    tier = tiers[tier_index]
+    backup_phones = [
+        contact.get("phone_number")
+        for contact in tier_contacts(on_call_contacts, tiers, tier_index)
+    ]
+    logging.info(
+        f"Call not acknowledged for '{original_phone}'. "
+        f"Escalation policy '{policy['name']}', tier {tier_index + 1} of {len(tiers)}. "
+        f"Initiating backup calls to {backup_phones}."
+    )
+
+    await asyncio.gather(
+        *(
+            recall_post(backup_phone, message, backup_callee="true")
+            for backup_phone in backup_phones
+        )
+    )
+    await complete_backup_call(
+        call_id,
+        RECALLER_INSTANCE_ID,
+        tier["escalate_after_seconds"],
+        tier_index + 1,
+    )
+
+
+async def backup_calls_loop(on_call_index):
+    """
+    Periodically escalates the alerts not acknowledged to the on-call contacts.
+
+    This asynchronous function claims the on-call records whose main retry window expired without an
+    acknowledgement, and runs the next tier of their escalation policy, for all of them concurrently.
+    The claim leases the records to this instance, the lease is then kept until the tier expires.
+
+    Args:
+        on_call_index (OnCallIndex): The index of the on-call contacts, kept up to date with the address book.
+
+    Returns:
+        None
+    """
+
+    while True:
+        try:
+            started = time.perf_counter()
             # Backup calls logic - only selects calls where the main retry window has expired
-            backup_calls = await select_backup_calls(
-                CALL_BACKUP_CALLEE_MAX_TIMES,
+            backup_calls = await claim_backup_calls(
+                MAX_ESCALATION_TIERS,
+                RECALLER_INSTANCE_ID,
+                CLAIM_LEASE_SECONDS,
             )
+            recaller_metrics.set_backup_queue_size(len(backup_calls))
 
             if backup_calls:
-                on_call_contacts = await get_on_call_contacts()
+                on_call_contacts = on_call_index.on_call_contacts()
                 if on_call_contacts:
-                    for call in backup_calls:
-                        call_id = call.get("id")
-                        message = call.get("message")
-                        original_phone = call.get("phone")
-                        backup_count = call.get("call_backup_callee_number_calls")
-
-                        # Primary was contacts[0], so backup 1 is contacts[1], etc.
-                        # We use modulo to cycle through available backup contacts.
-                        backup_idx = (backup_count + 1) % len(on_call_contacts)
-                        backup_contact = on_call_contacts[backup_idx]
-                        backup_phone = backup_contact.get("phone_number")
-
-                        logging.info(
-                            f"Call not acknowledged for '{original_phone}'. "
-                            f"Backup attempt {backup_count + 1}. "
-                            f"Initiating backup call to '{backup_phone}'."
+                    await asyncio.gather(
+                        *(
+                            escalate_backup_call(call, on_call_contacts)
+                            for call in backup_calls
                         )
-
-                        await recall_post(backup_phone, message, backup_callee="true")
-                        await increment_backup_call_count(call_id)
-                        await asyncio.sleep(SLEEP_AND_RETRY)
+                    )
                 else:
                     logging.warning("No on-call contacts found for backup calls.")
 
+            recaller_metrics.LOOP_DURATION.record(
+                time.perf_counter() - started, {"loop": "backup_calls"}
+            )
             await asyncio.sleep(SLEEP_BEFORE_QUERYING)
 
         except Exception as err:
@@ -169,6 +353,53 @@ async def asterisk_recaller():
             await asyncio.sleep(5)
 
 
+async def asterisk_recaller():
+    """
+    Retries the calls not acknowledged and escalates them to the backup contacts.
+
+    This asynchronous function runs the scheduler of the recalls, which places every recall at its
+    next-due time (up to `RECALL_CONCURRENCY` at once), along with the listener of the caller register
+    notifications that keeps its schedule up to date, the slow consistency sweep and the backup calls loop
+    (which reads the on-call contacts from an in-memory index, following the address book notifications).
+
+    Returns:
+        None
+    """
+    on_call_index = OnCallIndex()
+    try:
+        await load_on_call_index(on_call_index)
+    except Exception as err:
+        logging.exception(f"Unable to load the on-call contacts: '{err}'")
+
+    scheduler = RecallScheduler(
+        recall_row,
+        SLEEP_AND_RETRY,
+        SECONDS_TO_FORGET,
+        TIMES_TO_DIAL,
+        concurrency=RECALL_CONCURRENCY,
+        observe_lateness=recaller_metrics.RECALL_LATENESS.record,
+    )
+    recaller_metrics.observe_scheduler(scheduler)
+    if TELEMETRY is not None:
+        serve_metrics(METRICS_PORT)
+
+    await asyncio.gather(
+        listen(
+            CALLS_CHANNEL,
+            functools.partial(on_calls_notification, scheduler),
+            on_connect=functools.partial(sweep_recalls, scheduler),
+        ),
+        listen(
+            ADDRESS_BOOK_CHANNEL,
+            functools.partial(refresh_on_call_index, on_call_index),
+            on_connect=functools.partial(load_on_call_index, on_call_index),
+        ),
+        refresh_recalls(scheduler),
+        scheduler.run(),
+        backup_calls_loop(on_call_index),
+    )
+
+
 def receive_signal(signal_number, frame):
     """
     Handles received system signals and exits the program gracefully.
@@ -1,3 +1,6 @@
+import os
+import socket
+
 from py_phone_caller_utils.config import settings
 
 ASTERISK_CALL_URL = f"{settings.asterisk_call.asterisk_call_http_scheme}://{settings.asterisk_call.asterisk_call_host}:{settings.asterisk_call.asterisk_call_port}"
@@ -9,5 +12,11 @@ TIMES_TO_DIAL = settings.asterisk_recaller.times_to_dial
 CALL_BACKUP_CALLEE_MAX_TIMES = settings.asterisk_recaller.call_backup_callee_max_times
 SECONDS_TO_FORGET = settings.asterisk_call.seconds_to_forget
 SLEEP_AND_RETRY = SECONDS_TO_FORGET / (TIMES_TO_DIAL + 1)
+RECALL_CONCURRENCY = int(settings.asterisk_recaller.get("recall_concurrency", 4))
+RECALL_SWEEP_SECONDS = int(settings.asterisk_recaller.get("recall_sweep_seconds", 300))
+CLAIM_LEASE_SECONDS = int(settings.asterisk_recaller.get("claim_lease_seconds", 60))
+RECALLER_INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+RAW_ESCALATION_POLICIES = settings.asterisk_recaller.get("escalation_policies", [])
+METRICS_PORT = int(settings.asterisk_recaller.get("metrics_port", 8090))
 LOG_FORMATTER = settings.logs.log_formatter
 LOG_LEVEL = settings.logs.log_level
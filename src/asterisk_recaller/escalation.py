@@ -0,0 +1,118 @@
+"""
+Escalation policies of the backup calls.
+
+A policy is matched against the message of the alert and lists the tiers of the
+escalation: every tier rings some on-call contacts in parallel, then waits before
+escalating to the next tier. The progress of an alert (the number of tiers done)
+is stored in the 'call_backup_callee_number_calls' column of its call record, so
+the escalation survives a restart and can be shared among recaller instances.
+"""
+
+import logging
+import re
+
+
+def default_escalation_policy(max_times, escalate_after_seconds):
+    """
+    Builds the policy matching the historical behaviour: one backup contact at a time.
+
+    Args:
+        max_times (int): The number of backup calls (tiers).
+        escalate_after_seconds (float): The seconds between two backup calls.
+
+    Returns:
+        dict: The default escalation policy.
+    """
+    return {
+        "name": "default",
+        "match": None,
+        "tiers": [
+            {"parallel": 1, "escalate_after_seconds": escalate_after_seconds}
+            for _ in range(int(max_times))
+        ],
+    }
+
+
+def parse_escalation_policies(raw_policies):
+    """
+    Validates the escalation policies read from the settings.
+
+    Each policy is a table with a 'name', a 'match' regular expression (searched in the
+    message of the alert, case-insensitive) and a list of 'tiers', each of them with the
+    number of contacts to ring in 'parallel' and the 'escalate_after_seconds'. The invalid
+    policies are logged and skipped.
+
+    Args:
+        raw_policies (list): The policies, as read from the settings.
+
+    Returns:
+        list: The valid policies, in the configured order.
+    """
+    policies = []
+    for raw_policy in raw_policies or []:
+        name = raw_policy.get("name", "")
+        try:
+            tiers = [
+                {
+                    "parallel": max(1, int(tier.get("parallel", 1))),
+                    "escalate_after_seconds": max(
+                        0.0, float(tier.get("escalate_after_seconds", 0))
+                    ),
+                }
+                for tier in raw_policy.get("tiers", [])
+            ]
+            if not tiers:
+                raise ValueError("no tiers")
+            policies.append(
+                {
+                    "name": name,
+                    "match": re.compile(raw_policy.get("match", ""), re.IGNORECASE),
+                    "tiers": tiers,
+                }
+            )
+        except (AttributeError, TypeError, ValueError, re.error) as err:
+            logging.error(f"Invalid escalation policy '{name}', skipped: {err}")
+    return policies
+
+
+def policy_for_message(policies, default_policy, message):
+    """
+    Selects the escalation policy of an alert: the first one matching its message.
+
+    Args:
+        policies (list): The policies returned by `parse_escalation_policies`.
+        default_policy (dict): The policy used when none matches.
+        message (str): The message of the alert.
+
+    Returns:
+        dict: The escalation policy to apply.
+    """
+    for policy in policies:
+        if policy["match"].search(message or ""):
+            return policy
+    return default_policy
+
+
+def tier_contacts(on_call_contacts, tiers, tier_index):
+    """
+    Selects the on-call contacts to ring for a tier of the escalation.
+
+    The primary contact (the first on-call one) has already been called by the main call
+    cycle, so the tiers go on from the second contact, cycling through the available ones.
+
+    Args:
+        on_call_contacts (list): The contacts on call, in priority order.
+        tiers (list): The tiers of the escalation policy.
+        tier_index (int): The index of the tier to ring.
+
+    Returns:
+        list: The contacts to ring in parallel (without duplicates).
+    """
+    if not on_call_contacts:
+        return []
+    offset = 1 + sum(tier["parallel"] for tier in tiers[:tier_index])
+    parallel = min(tiers[tier_index]["parallel"], len(on_call_contacts))
+    return [
+        on_call_contacts[(offset + number) % len(on_call_contacts)]
+        for number in range(parallel)
+    ]
@@ -0,0 +1,271 @@
+"""
+Recall scheduler for the Asterisk Recaller service.
+
+Keeps the pending recalls in a min-heap ordered by their next-due time, sleeps
+exactly until the earliest one is due, and places the due calls concurrently
+(bounded by a semaphore), so the timing of a recall does not depend on how many
+other recalls are pending.
+"""
+
+import asyncio
+import datetime
+import heapq
+import itertools
+import logging
+
+
+def utc_now():
+    """
+    Returns the current time as a naive UTC datetime, the format stored in the 'calls' table.
+
+    Returns:
+        datetime: The current naive UTC datetime.
+    """
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def next_due_time(first_dial, last_dial, dialed_times, sleep_and_retry):
+    """
+    Computes when the next recall of a call is due.
+
+    The attempts are spread every `sleep_and_retry` seconds from the first dial, but a new
+    attempt is never placed less than `sleep_and_retry` seconds after the last one.
+
+    Args:
+        first_dial (datetime): When the call was first placed.
+        last_dial (datetime): When the call was last placed again (datetime.min if never).
+        dialed_times (int): How many times the call has been placed so far.
+        sleep_and_retry (float): The seconds between two attempts.
+
+    Returns:
+        datetime: The naive UTC datetime when the next attempt is due.
+    """
+    interval = datetime.timedelta(seconds=sleep_and_retry)
+    due = first_dial + max(int(dialed_times), 1) * interval
+    if last_dial is not None and last_dial > datetime.datetime.min + interval:
+        due = max(due, last_dial + interval)
+    return due
+
+
+class RecallScheduler:
+    """
+    Schedules the recalls of the calls not yet acknowledged.
+
+    The pending recalls are refreshed from the database by `refresh` (all of them) or by `upsert`
+    and `discard` (some of them, e.g. on a notification): an entry is re-scheduled only when its
+    due time changes. A recall is dispatched once per dial count, and the same attempt is not
+    dispatched again until the caller register records it (or `sleep_and_retry` seconds have
+    passed without that).
+    """
+
+    def __init__(
+        self,
+        place_call,
+        sleep_and_retry,
+        seconds_to_forget,
+        times_to_dial,
+        concurrency=4,
+        now=utc_now,
+        observe_lateness=None,
+    ):
+        """
+        Args:
+            place_call (callable): Coroutine function called with the row of the call to recall.
+            sleep_and_retry (float): The seconds between two attempts of the same call.
+            seconds_to_forget (int): The seconds after the first dial when a call is no longer recalled.
+            times_to_dial (int): The maximum number of attempts of a call.
+            concurrency (int): The maximum number of recalls placed at the same time.
+            now (callable): Returns the current naive UTC datetime.
+            observe_lateness (callable): Called with the lateness (in seconds) of every recall placed, optional.
+        """
+        self.place_call = place_call
+        self.sleep_and_retry = sleep_and_retry
+        self.seconds_to_forget = seconds_to_forget
+        self.times_to_dial = times_to_dial
+        self.now = now
+        self.observe_lateness = observe_lateness
+        self._semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+        self._heap = []
+        self._counter = itertools.count()
+        self._pending = {}
+        self._dispatched = {}
+        self._tasks = set()
+        self._wake_up = asyncio.Event()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def next_due(self):
+        """
+        Returns the due time of the earliest pending recall.
+
+        Returns:
+            datetime or None: The earliest due time, None when nothing is pending.
+        """
+        self._drop_stale_heads()
+        return self._heap[0][0] if self._heap else None
+
+    def refresh(self, rows):
+        """
+        Synchronizes the whole schedule with the calls currently eligible for a recall.
+
+        Args:
+            rows (list): The rows returned by `select_to_recall` (with the 'id', 'phone', 'message',
+                'first_dial', 'last_dial' and 'dialed_times' keys).
+
+        Returns:
+            None
+        """
+        seen = {row.get("id") for row in rows}
+        # Acknowledged, done or forgotten in the meantime.
+        self.discard(
+            [
+                call_id
+                for call_id in set(self._pending) | set(self._dispatched)
+                if call_id not in seen
+            ]
+        )
+        self.upsert(rows)
+
+    def upsert(self, rows):
+        """
+        Schedules (or re-schedules) the recalls of some eligible calls, leaving the others untouched.
+
+        Args:
+            rows (list): The rows of the eligible calls, as returned by `select_to_recall`.
+
+        Returns:
+            None
+        """
+        earliest_before = self.next_due()
+        for row in rows:
+            self._schedule(row)
+
+        earliest_after = self.next_due()
+        if earliest_after is not None and (
+            earliest_before is None or earliest_after < earliest_before
+        ):
+            self._wake_up.set()
+
+    def discard(self, call_ids):
+        """
+        Removes the recalls of some calls from the schedule (e.g. acknowledged ones).
+
+        Args:
+            call_ids (list): The IDs of the calls to forget.
+
+        Returns:
+            None
+        """
+        for call_id in call_ids:
+            self._pending.pop(call_id, None)
+            self._dispatched.pop(call_id, None)
+
+    def _schedule(self, row):
+        call_id = row.get("id")
+        dialed_times = row.get("dialed_times") or 0
+
+        dispatched = self._dispatched.get(call_id)
+        if dispatched is not None and dispatched[0] != dialed_times:
+            # The attempt has been recorded by the caller register.
+            del self._dispatched[call_id]
+            dispatched = None
+
+        due = next_due_time(
+            row.get("first_dial"),
+            row.get("last_dial"),
+            dialed_times,
+            self.sleep_and_retry,
+        )
+        if dispatched is not None:
+            due = max(
+                due,
+                dispatched[1] + datetime.timedelta(seconds=self.sleep_and_retry),
+            )
+
+        forget_at = row.get("first_dial") + datetime.timedelta(
+            seconds=self.seconds_to_forget
+        )
+        if dialed_times >= self.times_to_dial or due > forget_at:
+            self._pending.pop(call_id, None)
+            return
+
+        current = self._pending.get(call_id)
+        self._pending[call_id] = (due, row)
+        if current is None or current[0] != due:
+            heapq.heappush(self._heap, (due, next(self._counter), call_id))
+
+    def pop_due(self):
+        """
+        Removes and returns the rows of the recalls due by now.
+
+        Returns:
+            list: The rows of the calls to recall.
+        """
+        now = self.now()
+        due_rows = []
+        while self.next_due() is not None and self._heap[0][0] <= now:
+            _, _, call_id = heapq.heappop(self._heap)
+            _, row = self._pending.pop(call_id)
+            self._dispatched[call_id] = (row.get("dialed_times") or 0, now)
+            due_rows.append(row)
+        return due_rows
+
+    async def run(self):
+        """
+        Places the recalls when they are due, forever.
+
+        Returns:
+            None
+        """
+        while True:
+            for row in self.pop_due():
+                task = asyncio.create_task(self._place(row))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            next_due = self.next_due()
+            timeout = (
+                None
+                if next_due is None
+                else max(0.0, (next_due - self.now()).total_seconds())
+            )
+            self._wake_up.clear()
+            try:
+                await asyncio.wait_for(self._wake_up.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _place(self, row):
+        async with self._semaphore:
+            lateness = (
+                self.now()
+                - next_due_time(
+                    row.get("first_dial"),
+                    row.get("last_dial"),
+                    row.get("dialed_times") or 0,
+                    self.sleep_and_retry,
+                )
+            ).total_seconds()
+            logging.info(
+                f"Retry to call phone number: '{row.get('phone')}' to play the message: "
+                + f"'{row.get('message')}' "
+                + f"- Total retry period: '{row.get('seconds_to_forget')}' seconds "
+                + f"- Late by: '{lateness:.3f}' seconds"
+            )
+            if self.observe_lateness is not None:
+                self.observe_lateness(lateness)
+            try:
+                await self.place_call(row)
+            except Exception as err:
+                logging.exception(
+                    f"Unable to recall the phone number '{row.get('phone')}': '{err}'"
+                )
+
+    def _drop_stale_heads(self):
+        while self._heap:
+            due, _, call_id = self._heap[0]
+            current = self._pending.get(call_id)
+            if current is not None and current[0] == due:
+                return
+            heapq.heappop(self._heap)
@@ -0,0 +1,75 @@
+"""
+Metrics of the Asterisk Recaller service.
+
+The instruments are created on the OpenTelemetry meter, exported through the
+Prometheus reader set up by `init_telemetry` (they are no-ops when the telemetry
+is disabled).
+"""
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+meter = metrics.get_meter("asterisk_recaller")
+
+RECALL_LATENESS = meter.create_histogram(
+    "recaller_recall_lateness_seconds",
+    unit="s",
+    description="Delay between the intended time of a recall and the time it is placed",
+)
+LOOP_DURATION = meter.create_histogram(
+    "recaller_loop_duration_seconds",
+    unit="s",
+    description="Duration of a pass of the recaller loops",
+)
+ASTERISK_CALL_DURATION = meter.create_histogram(
+    "recaller_asterisk_call_request_duration_seconds",
+    unit="s",
+    description="Latency of the requests to the Asterisk Caller service",
+)
+
+_backup_queue = {"size": 0}
+
+
+def observe_scheduler(scheduler):
+    """
+    Registers the gauge of the recalls pending in the scheduler.
+
+    Args:
+        scheduler (RecallScheduler): The scheduler of the recalls.
+
+    Returns:
+        None
+    """
+
+    def pending_recalls(_options):
+        yield Observation(len(scheduler))
+
+    meter.create_observable_gauge(
+        "recaller_pending_recalls",
+        callbacks=[pending_recalls],
+        description="Recalls scheduled and not yet placed",
+    )
+
+
+def set_backup_queue_size(size):
+    """
+    Records the number of alerts claimed by the last pass of the backup calls loop.
+
+    Args:
+        size (int): The number of claimed alerts.
+
+    Returns:
+        None
+    """
+    _backup_queue["size"] = size
+
+
+def _backup_queue_size(_options):
+    yield Observation(_backup_queue["size"])
+
+
+meter.create_observable_gauge(
+    "recaller_backup_queue_size",
+    callbacks=[_backup_queue_size],
+    description="Alerts escalated by the last pass of the backup calls loop",
+)
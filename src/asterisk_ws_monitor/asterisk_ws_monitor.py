@@ -25,9 +25,13 @@ if src_dir not in sys.path:
     sys.path.append(src_dir)
 
 
-from aiohttp import ClientSession, client_exceptions, web, web_exceptions
+from aiohttp import BasicAuth, ClientSession, client_exceptions, web, web_exceptions
+from py_phone_caller_utils.backoff import backoff_delay
 from py_phone_caller_utils.py_phone_caller_db.db_asterisk_ws_monitor import (
+    insert_play_request,
     insert_ws_event,
+    rollup_ws_events,
+    select_played_channels,
 )
 from py_phone_caller_utils.telemetry import init_telemetry
 
@@ -42,10 +46,22 @@ from asterisk_ws_monitor.constants import (
     ASTERISK_HOST,
     ASTERISK_WEB_PORT,
     ASTERISK_USER,
+    ASTERISK_PASS,
+    ASTERISK_URL,
     ASTERISK_CALL_URL,
     ASTERISK_CALL_APP_ROUTE_PLAY,
     ASTERISK_STASIS_APP,
     WS_URL,
+    RECONNECT_BACKOFF_BASE_SECONDS,
+    RECONNECT_BACKOFF_MAX_SECONDS,
+    RECONNECT_STABLE_SECONDS,
+    WS_EVENTS_RETENTION_DAYS,
+    WS_EVENTS_ROLLUP_INTERVAL_SECONDS,
+    STREAM_AUDIO_MIN_CHARS,
+    STREAM_CHUNK_READY_RETRIES,
+    STREAM_CHUNK_WAIT_SECONDS,
+    GENERATE_AUDIO_BUSY_RETRIES,
+    GENERATE_AUDIO_BUSY_MAX_WAIT_SECONDS,
     LOG_FORMATTER,
     LOG_LEVEL,
 )
@@ -54,6 +70,16 @@ logging.basicConfig(format=LOG_FORMATTER, level=LOG_LEVEL, force=True)
 
 init_telemetry("asterisk_ws_monitor")
 
+# The channels whose message this process is playing, by the live events or by the
+# recovery, until they leave the Stasis application
+claimed_channels = set()
+
+
+class GenerateAudioBusy(Exception):
+    """
+    GenerateAudio kept rejecting a message, its render queue being full.
+    """
+
 
 async def get_asterisk_chan(response_json):
     """
@@ -106,6 +132,57 @@ async def querying_call_register(asterisk_chan):
         await call_register_session.close()
 
 
+def retry_after_seconds(response):
+    """
+    Returns the delay asked by the 'Retry-After' header of a response, capped.
+
+    Args:
+        response (aiohttp.ClientResponse): The response.
+
+    Returns:
+        float: The delay in seconds, 1 when the header is missing or not a number of seconds.
+    """
+    try:
+        delay = float(response.headers.get("Retry-After", 1))
+    except ValueError:
+        delay = 1
+    return min(max(delay, 0), GENERATE_AUDIO_BUSY_MAX_WAIT_SECONDS)
+
+
+async def post_create_audio(session, params):
+    """
+    Asks GenerateAudio to render a message, waiting while its render queue is full.
+
+    A '503' response (too many renderings in progress) is retried after its 'Retry-After'
+    delay, `generate_audio_busy_retries` times at most.
+
+    Args:
+        session (aiohttp.ClientSession): The session towards the GenerateAudio service.
+        params (dict): The query parameters of the request ('message', 'msg_chk_sum', ...).
+
+    Returns:
+        dict: The JSON response of GenerateAudio.
+
+    Raises:
+        GenerateAudioBusy: If the message is still rejected after the retries.
+    """
+    for attempt in range(GENERATE_AUDIO_BUSY_RETRIES + 1):
+        async with session.post(
+            url=GENERATE_AUDIO_URL + f"/{GENERATE_AUDIO_APP_ROUTE}", params=params
+        ) as generate_audio_resp:
+            if generate_audio_resp.status != 503:
+                return await generate_audio_resp.json()
+            delay = retry_after_seconds(generate_audio_resp)
+        if attempt < GENERATE_AUDIO_BUSY_RETRIES:
+            logging.warning(
+                f"GenerateAudio busy for {params.get('msg_chk_sum')}, retrying in {delay:.1f} seconds"
+            )
+            await asyncio.sleep(delay)
+    raise GenerateAudioBusy(
+        f"GenerateAudio busy for {params.get('msg_chk_sum')} after {GENERATE_AUDIO_BUSY_RETRIES} retries"
+    )
+
+
 async def generate_the_audio_file(response_data):
     """
     Generates an audio file for a given message and waits until the file is ready.
@@ -121,19 +198,23 @@ async def generate_the_audio_file(response_data):
 
     Raises:
         web.HTTPBadRequest: If there is a connection error with the audio generation process.
+        GenerateAudioBusy: If the render queue of GenerateAudio stayed full (see `post_create_audio`).
     """
+    generate_audio_session = ClientSession()
     try:
-        generate_audio_session = ClientSession()
-
-        generate_audio_resp = await generate_audio_session.post(
-            url=GENERATE_AUDIO_URL
-            + f"/{GENERATE_AUDIO_APP_ROUTE}"
-            + f"?message={response_data.get('message')}"
-            + f"&msg_chk_sum={response_data.get('msg_chk_sum')}"
+        generate_audio_resp_json = await post_create_audio(
+            generate_audio_session,
+            {
+                "message": response_data.get("message"),
+                "msg_chk_sum": response_data.get("msg_chk_sum"),
+            },
         )
-        generate_audio_resp_json = await generate_audio_resp.json()
 
         msg_chk_sum = response_data.get("msg_chk_sum")
+        audio_key = generate_audio_resp_json.get("audio_key")
+        audio_query = (
+            f"?audio_key={audio_key}" if audio_key else f"?msg_chk_sum={msg_chk_sum}"
+        )
         audio_ready = False
         max_retries = 12
         retry_count = 0
@@ -141,9 +222,7 @@ async def generate_the_audio_file(response_data):
         while not audio_ready and retry_count < max_retries:
             try:
                 audio_ready_resp = await generate_audio_session.get(
-                    url=GENERATE_AUDIO_URL
-                    + f"/{IS_AUDIO_READY_ENDPOINT}"
-                    + f"?msg_chk_sum={msg_chk_sum}"
+                    url=GENERATE_AUDIO_URL + f"/{IS_AUDIO_READY_ENDPOINT}" + audio_query
                 )
                 audio_ready_json = await audio_ready_resp.json()
 
@@ -202,7 +281,33 @@ async def audio_play_status_log(response_data, asterisk_chan, audio_play_resp_me
     )
 
 
-async def play_audio_to_channel(asterisk_chan, response_data):
+async def record_play_request(asterisk_chan, audio_key):
+    """
+    Records that a playback is about to be requested on a channel.
+
+    The recovery of the channels after a disconnection skips the channels with a recorded
+    request (see `select_played_channels`): a request sent just before the connection was
+    lost, whose 'PlaybackStarted' event never arrived, is not played a second time. A failure
+    is only logged, the playback goes on.
+
+    Args:
+        asterisk_chan (str): The identifier of the Asterisk channel.
+        audio_key (str): The cache key of the audio file to play, if any.
+
+    Returns:
+        None
+    """
+    try:
+        await insert_play_request(asterisk_chan, audio_key)
+    except Exception as err:
+        logging.exception(
+            f"Unable to record the playback request on '{asterisk_chan}': '{err}'"
+        )
+
+
+async def play_audio_to_channel(
+    asterisk_chan, response_data, audio_key=None, continue_dialplan=True, variants=None
+):
     """
     Plays an audio message to a specified Asterisk channel.
 
@@ -212,17 +317,25 @@ async def play_audio_to_channel(asterisk_chan, response_data):
     Args:
         asterisk_chan (str): The identifier of the Asterisk channel.
         response_data (dict): The data containing the message checksum.
+        audio_key (str): The cache key of the audio file returned by the GenerateAudio service, if any.
+        continue_dialplan (bool): Whether to give the call control back to the PBX after queuing the playback.
+        variants (list): The formats of the telephony variants written for the audio file, if known: the
+            caller plays one of them without asking the GenerateAudio service.
 
     Returns:
         None
     """
+    await record_play_request(asterisk_chan, audio_key)
     asterisk_call_session = ClientSession()
     try:
         audio_play_resp = await asterisk_call_session.post(
             url=ASTERISK_CALL_URL
             + f"/{ASTERISK_CALL_APP_ROUTE_PLAY}"
             + f"?asterisk_chan={asterisk_chan}"
-            + f"&msg_chk_sum={response_data.get('msg_chk_sum')}",
+            + f"&msg_chk_sum={response_data.get('msg_chk_sum')}"
+            + (f"&audio_key={audio_key}" if audio_key else "")
+            + (f"&variants={','.join(variants)}" if variants is not None else "")
+            + ("" if continue_dialplan else "&continue_dialplan=false"),
             data=None,
         )
         audio_play_resp_message = await audio_play_resp.text()
@@ -237,6 +350,35 @@ async def play_audio_to_channel(asterisk_chan, response_data):
         await asterisk_call_session.close()
 
 
+async def continue_channel(asterisk_chan):
+    """
+    Gives the call control of a channel back to the PBX, without any playback.
+
+    Used when the message of the channel can't be rendered, so the call goes on in the
+    dialplan instead of staying parked in the Stasis application.
+
+    Args:
+        asterisk_chan (str): The identifier of the Asterisk channel.
+
+    Returns:
+        None
+    """
+    ari_session = ClientSession(auth=BasicAuth(ASTERISK_USER, ASTERISK_PASS))
+    try:
+        continue_resp = await ari_session.post(
+            url=f"{ASTERISK_URL}/ari/channels/{asterisk_chan}/continue"
+        )
+        if continue_resp.status != 204:
+            logging.error(
+                f"Unable to continue the channel '{asterisk_chan}': "
+                + f"Asterisk response {continue_resp.status}"
+            )
+    except client_exceptions.ClientConnectorError as err:
+        logging.exception(f"Unable to connect to the Asterisk ARI: '{err}'")
+    finally:
+        await ari_session.close()
+
+
 async def audio_operations(generate_audio_resp_json, asterisk_chan, response_data):
     """
     Handles the process of playing an audio message to a callee through the Stasis application.
@@ -254,7 +396,12 @@ async def audio_operations(generate_audio_resp_json, asterisk_chan, response_dat
     # Try to play the audio message to the callee through the Stasis application...
     if generate_audio_resp_json["status"] == 200:
         # Try to play the audio file to the channel
-        await play_audio_to_channel(asterisk_chan, response_data)
+        await play_audio_to_channel(
+            asterisk_chan,
+            response_data,
+            generate_audio_resp_json.get("audio_key"),
+            variants=generate_audio_resp_json.get("variants"),
+        )
 
 
 async def take_control_of_dialplan(event_type, response_json, asterisk_chan):
@@ -276,12 +423,268 @@ async def take_control_of_dialplan(event_type, response_json, asterisk_chan):
         event_type == EVENT_TYPE
         and response_json.get("channel", {}).get("state") == CHANNEL_STATE
     ):
-        # Get the message text and the ID
-        response_data = await querying_call_register(asterisk_chan)
+        await play_message_to_channel(asterisk_chan)
+
+
+async def play_message_to_channel(asterisk_chan):
+    """
+    Retrieves the message registered for a channel, generates its audio and plays it.
+
+    This asynchronous function is shared by the live event flow and by the recovery of the channels
+    that were answered while the WebSocket connection was down. Both of them may pick the same
+    channel: the first one claims it, before any await, and the other one skips it. When GenerateAudio
+    keeps rejecting the message (its render queue being full), the call control goes back to the
+    PBX without it.
+
+    Args:
+        asterisk_chan (str): The identifier of the Asterisk channel.
+
+    Returns:
+        None
+    """
+    if asterisk_chan in claimed_channels:
+        logging.info(f"The message of the channel '{asterisk_chan}' is already playing")
+        return
+    claimed_channels.add(asterisk_chan)
+
+    # Get the message text and the ID
+    response_data = await querying_call_register(asterisk_chan)
+
+    message = response_data.get("message") or ""
+    try:
+        if STREAM_AUDIO_MIN_CHARS and len(message) >= STREAM_AUDIO_MIN_CHARS:
+            await stream_message_to_channel(asterisk_chan, response_data)
+            return
 
         generate_audio_resp_json = await generate_the_audio_file(response_data)
+    except GenerateAudioBusy as err:
+        logging.error(f"No message played to the channel '{asterisk_chan}': {err}")
+        await continue_channel(asterisk_chan)
+        return
+
+    await audio_operations(generate_audio_resp_json, asterisk_chan, response_data)
+
+
+async def wait_audio_chunk(session, audio_key):
+    """
+    Waits for an audio chunk to be rendered, through the long-polling of the audio readiness endpoint.
+
+    Args:
+        session (aiohttp.ClientSession): The session towards the GenerateAudio service.
+        audio_key (str): The cache key of the audio chunk.
+
+    Returns:
+        bool: True if the audio chunk is ready.
+    """
+    for _ in range(STREAM_CHUNK_READY_RETRIES):
+        try:
+            audio_ready_resp = await session.get(
+                url=GENERATE_AUDIO_URL + f"/{IS_AUDIO_READY_ENDPOINT}",
+                params={"audio_key": audio_key, "wait": STREAM_CHUNK_WAIT_SECONDS},
+            )
+            if (await audio_ready_resp.json()).get("exists", False):
+                return True
+        except client_exceptions.ClientConnectorError as err:
+            logging.warning(f"Error checking audio readiness: {err}")
+            await asyncio.sleep(1)
+    return False
+
+
+async def play_audio_chunks(session, asterisk_chan, response_data, first_chunk=0):
+    """
+    Renders a long message as sentence chunks and plays each one as soon as it is rendered.
 
+    The GenerateAudio service splits the message into sentence chunks and renders them in
+    the background; every chunk is queued for playback on the channel once ready, so the
+    callee hears the first sentence while the next ones are still rendering. The last
+    playback request gives the call control back to the PBX.
+
+    Asking again for the same message submits again the chunks not rendered yet, and returns
+    the same chunks: `first_chunk` resumes a sequence stopped by a late chunk.
+
+    Args:
+        session (aiohttp.ClientSession): The session towards the GenerateAudio service.
+        asterisk_chan (str): The identifier of the Asterisk channel.
+        response_data (dict): The data containing the message and its checksum.
+        first_chunk (int): The number of the first chunk to play, the previous ones being already queued.
+
+    Returns:
+        tuple: The number of chunks queued on the channel so far, `first_chunk` included, and the
+            number of chunks of the message (0 if GenerateAudio did not split it). The sequence
+            stops at a chunk not rendered in time, which is never played.
+
+    Raises:
+        GenerateAudioBusy: If the render queue of GenerateAudio stayed full (see `post_create_audio`).
+    """
+    try:
+        generate_audio_resp_json = await post_create_audio(
+            session,
+            {
+                "message": response_data.get("message"),
+                "msg_chk_sum": response_data.get("msg_chk_sum"),
+                "stream": "true",
+            },
+        )
+    except (client_exceptions.ClientError, ValueError) as err:
+        logging.exception(f"Unable to stream the message to '{asterisk_chan}': {err}")
+        return first_chunk, 0
+    audio_keys = generate_audio_resp_json.get("audio_keys", [])
+    if generate_audio_resp_json.get("status") != 200 or first_chunk >= len(audio_keys):
+        logging.error(
+            f"Unable to stream the message to the channel '{asterisk_chan}': "
+            + f"{generate_audio_resp_json}"
+        )
+        return first_chunk, 0
+
+    for number in range(first_chunk, len(audio_keys)):
+        try:
+            ready = await wait_audio_chunk(session, audio_keys[number])
+        except (client_exceptions.ClientError, ValueError) as err:
+            logging.exception(f"Unable to wait for the audio chunk: {err}")
+            ready = False
+        if not ready:
+            logging.error(
+                f"Audio chunk {audio_keys[number]} for the channel '{asterisk_chan}' not ready"
+            )
+            return number, len(audio_keys)
+        await play_audio_to_channel(
+            asterisk_chan,
+            response_data,
+            audio_keys[number],
+            continue_dialplan=number == len(audio_keys) - 1,
+        )
+    return len(audio_keys), len(audio_keys)
+
+
+async def stream_message_to_channel(asterisk_chan, response_data):
+    """
+    Plays a long message as a sequence of audio chunks, each one as soon as it is rendered.
+
+    When a chunk is not rendered in time, the message is asked again once and the sequence
+    resumes from that chunk, so the chunks already queued are never heard twice. When the
+    sequence still can't be played to its end, the whole message is rendered and played
+    instead if no chunk was queued yet; otherwise the rest of the message is dropped and the
+    call control goes back to the PBX.
+
+    Args:
+        asterisk_chan (str): The identifier of the Asterisk channel.
+        response_data (dict): The data containing the message and its checksum.
+
+    Returns:
+        None
+
+    Raises:
+        GenerateAudioBusy: If the render queue of GenerateAudio stayed full (see `post_create_audio`).
+    """
+    generate_audio_session = ClientSession()
+    try:
+        queued, chunks = await play_audio_chunks(
+            generate_audio_session, asterisk_chan, response_data
+        )
+        if 0 < queued < chunks:
+            logging.warning(
+                f"Resuming the message of the channel '{asterisk_chan}' from the chunk {queued}"
+            )
+            queued, _ = await play_audio_chunks(
+                generate_audio_session, asterisk_chan, response_data, queued
+            )
+    finally:
+        await generate_audio_session.close()
+
+    if chunks and queued == chunks:
+        return
+    if queued == 0:
+        logging.warning(
+            f"Playing the whole message to the channel '{asterisk_chan}' instead"
+        )
+        generate_audio_resp_json = await generate_the_audio_file(response_data)
         await audio_operations(generate_audio_resp_json, asterisk_chan, response_data)
+        return
+    logging.error(
+        f"Only {queued} of the {chunks} chunks played to the channel '{asterisk_chan}'"
+    )
+    await continue_channel(asterisk_chan)
+
+
+async def get_stasis_app_channels():
+    """
+    Lists the channels currently controlled by our Stasis application through the ARI REST API.
+
+    This asynchronous function reads the channel identifiers subscribed to the Stasis application
+    and then retrieves the details (including the state) of each one of them.
+
+    Returns:
+        list: The ARI channel objects; an empty list if Asterisk can't be queried.
+    """
+    auth = BasicAuth(ASTERISK_USER, ASTERISK_PASS)
+    ari_session = ClientSession(auth=auth)
+    channels = []
+    try:
+        app_resp = await ari_session.get(
+            url=f"{ASTERISK_URL}/ari/applications/{ASTERISK_STASIS_APP}"
+        )
+        if app_resp.status != 200:
+            logging.error(
+                f"Unable to list the channels of the '{ASTERISK_STASIS_APP}' Stasis App: "
+                + f"Asterisk response {app_resp.status}"
+            )
+            return channels
+
+        app_json = await app_resp.json()
+        for channel_id in app_json.get("channel_ids", []):
+            channel_resp = await ari_session.get(
+                url=f"{ASTERISK_URL}/ari/channels/{channel_id}"
+            )
+            # The channel may have been hung up in the meantime
+            if channel_resp.status == 200:
+                channels.append(await channel_resp.json())
+    except client_exceptions.ClientConnectorError as err:
+        logging.exception(f"Unable to connect to the Asterisk ARI: '{err}'")
+    finally:
+        await ari_session.close()
+
+    return channels
+
+
+async def recover_unplayed_channels():
+    """
+    Reconciles the events lost while the WebSocket connection to Asterisk was down.
+
+    This asynchronous function takes control again of the channels that are in our Stasis application,
+    already answered, and without any recorded playback, playing to them their message.
+
+    Returns:
+        None
+    """
+    try:
+        channels = await get_stasis_app_channels()
+        up_channels = [
+            channel.get("id")
+            for channel in channels
+            if channel.get("state") == CHANNEL_STATE
+        ]
+        if not up_channels:
+            return
+
+        played_channels = await select_played_channels(up_channels)
+        unplayed_channels = [
+            chan for chan in up_channels if chan not in played_channels
+        ]
+
+        for asterisk_chan in unplayed_channels:
+            logging.info(
+                f"Resuming the control of the channel '{asterisk_chan}', "
+                + "answered while the connection to the Asterisk PBX was down"
+            )
+
+        await asyncio.gather(
+            *(play_message_to_channel(chan) for chan in unplayed_channels),
+            return_exceptions=True,
+        )
+    except Exception as err:
+        logging.exception(
+            f"Unable to recover the channels answered during the gap: '{err}'"
+        )
 
 
 async def ws_connection_log(
@@ -315,13 +718,23 @@ async def asterisk_ws_client():
 
     This asynchronous function connects to the Asterisk PBX via WebSocket, logs connection details, receives events,
     stores them in the database, and triggers dialplan control logic for each event.
+    Lost connections are retried with exponential backoff and jitter and, once connected again,
+    the channels answered in the meantime are recovered. The backoff is reset only by a connection
+    that stayed up `reconnect_stable_seconds`: a connection dropped right after the handshake is
+    retried with a growing delay.
 
     Returns:
         None
     """
+    loop = asyncio.get_running_loop()
+    failed_attempts = 0
+    recovery_task = None
+
     while True:
+        connected_at = None
         try:
             async with websockets.connect(WS_URL) as websocket:
+                connected_at = loop.time()
                 await ws_connection_log(
                     ASTERISK_HOST,
                     ASTERISK_WEB_PORT,
@@ -329,11 +742,17 @@ async def asterisk_ws_client():
                     ASTERISK_STASIS_APP,
                 )
 
+                # Subscribed again, now look for what happened while we were away
+                if recovery_task is None or recovery_task.done():
+                    recovery_task = asyncio.create_task(recover_unplayed_channels())
+
                 while True:
                     response = await websocket.recv()
                     response_json = json.loads(response)
                     asterisk_chan = await get_asterisk_chan(response_json)
                     event_type = response_json["type"]
+                    if event_type == "StasisEnd":
+                        claimed_channels.discard(asterisk_chan)
 
                     # Insert the Asterisk WebSocket events into the DB
                     try:
@@ -352,18 +771,50 @@ async def asterisk_ws_client():
 
         except websockets.exceptions.ConnectionClosedError as err:
             logging.exception(f"Connection to the Asterisk PBX lost!: '{err}'")
-            logging.info("Retrying connection in 5 seconds...")
-            await asyncio.sleep(5)
         except ConnectionRefusedError as err:
             logging.exception(
                 f"Unable to establish a connection with the Asterisk PBX: '{err}'"
             )
-            logging.info("Retrying connection in 5 seconds...")
-            await asyncio.sleep(5)
         except Exception as err:
             logging.exception(f"Unexpected error in WebSocket client: '{err}'")
-            logging.info("Retrying connection in 5 seconds...")
-            await asyncio.sleep(5)
+
+        if (
+            connected_at is not None
+            and loop.time() - connected_at >= RECONNECT_STABLE_SECONDS
+        ):
+            failed_attempts = 0
+        delay = backoff_delay(
+            failed_attempts,
+            RECONNECT_BACKOFF_BASE_SECONDS,
+            RECONNECT_BACKOFF_MAX_SECONDS,
+        )
+        failed_attempts += 1
+        logging.info(f"Retrying connection in {delay:.1f} seconds...")
+        await asyncio.sleep(delay)
+
+
+async def ws_events_retention():
+    """
+    Periodically compacts the old Asterisk WebSocket events into per-channel summaries.
+
+    This asynchronous function keeps the events table small, so the time-range queries
+    done by the UI stay driven by the index on the event timestamp.
+
+    Returns:
+        None
+    """
+    if WS_EVENTS_RETENTION_DAYS <= 0:
+        logging.info("Retention of the Asterisk WebSocket events disabled")
+        return
+
+    while True:
+        try:
+            await rollup_ws_events(WS_EVENTS_RETENTION_DAYS)
+        except Exception as err:
+            logging.exception(
+                f"Unable to compact the old Asterisk WebSocket events: '{err}'"
+            )
+        await asyncio.sleep(WS_EVENTS_ROLLUP_INTERVAL_SECONDS)
 
 
 def receive_signal(signal_number, frame):
@@ -394,6 +845,7 @@ async def main():
 
     ```python
     async def main() -> None:
+        retention_task = asyncio.create_task(ws_events_retention())
         task = asyncio.create_task(asterisk_ws_client())
 
         try:
@@ -407,13 +859,17 @@ async def main():
                 await task
             except asyncio.CancelledError:
                 logging.info("The task was cancelled.")
+
+        retention_task.cancel()
     ```
 
-    This is the main function of the program. It is an asynchronous function that orchestrates the execution of the `asterisk_ws_client` function.
+    This is the main function of the program. It is an asynchronous function that orchestrates the execution of the
+    `asterisk_ws_client` function, along with the retention job of the stored events.
 
     Returns:
         None
     """
+    retention_task = asyncio.create_task(ws_events_retention())
     task = asyncio.create_task(asterisk_ws_client())
 
     try:
@@ -428,6 +884,8 @@ async def main():
         except asyncio.CancelledError:
             logging.info("The task was cancelled.")
 
+    retention_task.cancel()
+
 
 if __name__ == "__main__":
     try:
@@ -26,9 +26,40 @@ ASTERISK_WEB_PORT = int(settings.commons.asterisk_web_port)
 ASTERISK_USER = settings.commons.asterisk_user
 ASTERISK_PASS = settings.commons.asterisk_pass
 ASTERISK_STASIS_APP = settings.asterisk_ws_monitor.asterisk_stasis_app
+ASTERISK_URL = (
+    f"{settings.commons.asterisk_http_scheme}://{ASTERISK_HOST}:{ASTERISK_WEB_PORT}"
+)
+RECONNECT_BACKOFF_BASE_SECONDS = float(
+    settings.asterisk_ws_monitor.get("reconnect_backoff_base_seconds", 1)
+)
+RECONNECT_BACKOFF_MAX_SECONDS = float(
+    settings.asterisk_ws_monitor.get("reconnect_backoff_max_seconds", 60)
+)
+# A connection lasting less than this counts as a failed attempt: the backoff keeps growing
+RECONNECT_STABLE_SECONDS = float(
+    settings.asterisk_ws_monitor.get("reconnect_stable_seconds", 30)
+)
 WS_URL = (
     f"ws://{ASTERISK_HOST}:{ASTERISK_WEB_PORT}/ari/events"
     + f"?api_key={ASTERISK_USER}:{ASTERISK_PASS}&app={ASTERISK_STASIS_APP}"
 )
+WS_EVENTS_RETENTION_DAYS = int(
+    settings.asterisk_ws_monitor.get("ws_events_retention_days", 30)
+)
+WS_EVENTS_ROLLUP_INTERVAL_SECONDS = int(
+    settings.asterisk_ws_monitor.get("ws_events_rollup_interval_seconds", 3600)
+)
+STREAM_AUDIO_MIN_CHARS = int(
+    settings.asterisk_ws_monitor.get("stream_audio_min_chars", 0)
+)
+# A full render queue of GenerateAudio ('503') is retried after its 'Retry-After', this many times
+GENERATE_AUDIO_BUSY_RETRIES = int(
+    settings.asterisk_ws_monitor.get("generate_audio_busy_retries", 3)
+)
+GENERATE_AUDIO_BUSY_MAX_WAIT_SECONDS = float(
+    settings.asterisk_ws_monitor.get("generate_audio_busy_max_wait_seconds", 5)
+)
+STREAM_CHUNK_WAIT_SECONDS = 10
+STREAM_CHUNK_READY_RETRIES = 6
 LOG_FORMATTER = settings.logs.log_formatter
 LOG_LEVEL = settings.logs.log_level
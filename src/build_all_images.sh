@@ -17,6 +17,7 @@ SERVICES=(
     "asterisk_caller"
     "asterisk_recaller"
     "asterisk_ws_monitor"
+    "asterisk_audio_sync"
     "caller_prometheus_webhook"
     "caller_register"
     "caller_scheduler"
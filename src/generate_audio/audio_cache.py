@@ -0,0 +1,455 @@
+"""
+Content-addressed cache of the rendered audio files.
+
+An audio file is named after the key of its content: the message, the TTS
+engine, the voice and the sample rate. Switching engine or voice therefore
+renders new files instead of serving the ones of the previous voice.
+
+A JSON manifest, kept in the cache folder, records the size and the last
+access of every file: when the cache grows over its size cap the least
+recently used files are deleted. For the clients still addressing the audio
+by message checksum, `<msg_chk_sum>.wav` is a hard link to the last file
+rendered for that message.
+
+The telephony variants of a file (`<key>.ulaw`, `<key>.alaw`, ...) are part of
+its entry: they count in the size of the cache and are evicted with it.
+
+An entry also records the engine and voice that actually rendered the file,
+and how long it took. A file rendered by a fallback engine (see
+`engine_fallback`) is served to the request that needed it, but is a miss for
+the next ones: it is rendered again by the requested voice.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from hashlib import blake2b
+
+KEY_DIGEST_SIZE = 16
+MANIFEST_FILE_NAME = ".manifest.json"
+AUDIO_EXTENSION = ".wav"
+
+
+def audio_key(message, engine, voice, sample_rate):
+    """
+    Computes the cache key of an audio file.
+
+    Args:
+        message (str): The text of the message.
+        engine (str): The TTS engine rendering the message.
+        voice (str): The voice (model, language) of the engine.
+        sample_rate (int): The sample rate of the audio file.
+
+    Returns:
+        str: The key, as hexadecimal string.
+    """
+    content = json.dumps(
+        [message, engine, voice, int(sample_rate)], ensure_ascii=False
+    ).encode("utf-8")
+    return blake2b(content, digest_size=KEY_DIGEST_SIZE).hexdigest()
+
+
+class AudioCache:
+    """
+    The audio files of the serving folder, with their manifest.
+
+    The cache is used from the event loop only, without blocking it: the entries
+    are reconciled with the files by `load`, then trusted (the cache is the only
+    one deleting its files), and the manifest is written periodically by `save`,
+    in a thread.
+    """
+
+    def __init__(self, folder, max_bytes):
+        """
+        Args:
+            folder (str): The folder of the audio files.
+            max_bytes (int): The size cap of the cache, 0 to disable the eviction.
+        """
+        self.folder = folder
+        self.max_bytes = int(max_bytes)
+        self.manifest_path = os.path.join(folder, MANIFEST_FILE_NAME)
+        self.entries = {}
+        self.aliases = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+
+    @property
+    def size(self):
+        return sum(self._entry_size(entry) for entry in self.entries.values())
+
+    @staticmethod
+    def _entry_size(entry):
+        return entry["size"] + sum(entry.get("variants", {}).values())
+
+    def path(self, name):
+        """
+        Returns the path of an audio file of the cache.
+
+        Args:
+            name (str): The key of the file, or a message checksum.
+
+        Returns:
+            str: The path of the file.
+        """
+        return os.path.join(self.folder, f"{name}{AUDIO_EXTENSION}")
+
+    def variant_path(self, name, audio_format):
+        """
+        Returns the path of a telephony variant of an audio file of the cache.
+
+        Args:
+            name (str): The key of the file.
+            audio_format (str): The format of the variant (e.g. 'ulaw').
+
+        Returns:
+            str: The path of the variant.
+        """
+        return os.path.join(self.folder, f"{name}.{audio_format}")
+
+    def load(self):
+        """
+        Loads the manifest, reconciling it with the files actually present.
+
+        The files unknown to the manifest (e.g. rendered before the cache existed)
+        are added with their modification time as last access, so they are evicted
+        first.
+
+        Returns:
+            None
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as manifest:
+                content = json.load(manifest)
+            self.entries = content.get("entries", {})
+            self.aliases = content.get("aliases", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as err:
+            logging.error(f"Invalid audio cache manifest, rebuilding it: {err}")
+
+        self.entries = {
+            key: entry
+            for key, entry in self.entries.items()
+            if os.path.isfile(self.path(key))
+        }
+        self.aliases = {
+            alias: key
+            for alias, key in self.aliases.items()
+            if key in self.entries and os.path.isfile(self.path(alias))
+        }
+
+        for entry_key, entry in self.entries.items():
+            entry["variants"] = {
+                audio_format: size
+                for audio_format, size in entry.get("variants", {}).items()
+                if os.path.isfile(self.variant_path(entry_key, audio_format))
+            }
+
+        file_names = os.listdir(self.folder)
+        for file_name in file_names:
+            name, extension = os.path.splitext(file_name)
+            if (
+                file_name.startswith(".")
+                or extension != AUDIO_EXTENSION
+                or name in self.entries
+                or name in self.aliases
+            ):
+                continue
+            stat = os.stat(self.path(name))
+            self.entries[name] = {
+                "size": stat.st_size,
+                "last_access": stat.st_mtime,
+                "voice_id": None,
+                "variants": {},
+            }
+
+        # The variants written but not recorded (e.g. before a crash)
+        for file_name in file_names:
+            name, extension = os.path.splitext(file_name)
+            audio_format = extension[1:]
+            entry = self.entries.get(name)
+            if (
+                entry is None
+                or file_name.startswith(".")
+                or extension == AUDIO_EXTENSION
+                or audio_format in entry["variants"]
+            ):
+                continue
+            entry["variants"][audio_format] = os.path.getsize(
+                self.variant_path(name, audio_format)
+            )
+
+        self._dirty = True
+        self.evict()
+        self.flush()
+        logging.info(
+            f"Audio cache loaded: {len(self.entries)} files, {self.size} bytes"
+        )
+
+    def lookup(self, key):
+        """
+        Checks whether an audio file is cached, recording the access.
+
+        The manifest is trusted, the file is not checked on the disk.
+
+        Args:
+            key (str): The key of the audio file.
+
+        Returns:
+            bool: True on a cache hit, False if missing or rendered by a fallback voice.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return False
+        if entry.get("rendered_by", entry.get("voice_id")) != entry.get("voice_id"):
+            self.misses += 1
+            return False
+        entry["last_access"] = time.time()
+        self._dirty = True
+        self.hits += 1
+        return True
+
+    def add(
+        self,
+        key,
+        voice_id,
+        msg_chk_sum=None,
+        variants=None,
+        rendered_by=None,
+        render_seconds=None,
+    ):
+        """
+        Records an audio file just rendered at `path(key)`, then enforces the size cap.
+
+        The manifest is only marked as changed, to be written by the next `save`.
+
+        Args:
+            key (str): The key of the audio file.
+            voice_id (str): The engine and voice of the key.
+            msg_chk_sum (str): The checksum of the message, linked to the file if given.
+            variants (dict): The size of its telephony variants, by format.
+            rendered_by (str): The engine and voice that rendered it, `voice_id` by default.
+            render_seconds (float): The time it took to render it.
+
+        Returns:
+            list: The keys of the evicted files.
+        """
+        self.entries[key] = {
+            "size": os.path.getsize(self.path(key)),
+            "last_access": time.time(),
+            "voice_id": voice_id,
+            "rendered_by": rendered_by or voice_id,
+            "render_seconds": render_seconds,
+            "variants": dict(variants or {}),
+        }
+        if msg_chk_sum:
+            self.link(msg_chk_sum, key)
+        self._dirty = True
+        return self.evict(keep=key)
+
+    def missing_variants(self, key, audio_formats):
+        """
+        Lists the telephony variants not written yet for a cached audio file.
+
+        Args:
+            key (str): The key of the audio file.
+            audio_formats (Iterable[str]): The expected formats.
+
+        Returns:
+            list: The missing formats.
+        """
+        variants = self.entries.get(key, {}).get("variants", {})
+        return [
+            audio_format
+            for audio_format in audio_formats
+            if audio_format not in variants
+        ]
+
+    def variant_formats(self, key):
+        """
+        Lists the telephony variants written for a cached audio file.
+
+        Args:
+            key (str): The key of the audio file.
+
+        Returns:
+            list: The formats of the variants, sorted.
+        """
+        return sorted(self.entries.get(key, {}).get("variants", {}))
+
+    def add_variants(self, key, variants):
+        """
+        Records the telephony variants written for a cached audio file.
+
+        Args:
+            key (str): The key of the audio file.
+            variants (dict): The size of the variants, by format.
+
+        Returns:
+            list: The keys of the evicted files.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return []
+        entry.setdefault("variants", {}).update(variants)
+        self._dirty = True
+        return self.evict(keep=key)
+
+    def link(self, msg_chk_sum, key):
+        """
+        Points `<msg_chk_sum>.wav` to a cached audio file.
+
+        Args:
+            msg_chk_sum (str): The checksum of the message.
+            key (str): The key of the audio file.
+
+        Returns:
+            None
+        """
+        if msg_chk_sum == key or self.aliases.get(msg_chk_sum) == key:
+            return
+        # A file rendered before the cache existed is replaced by the link.
+        self.entries.pop(msg_chk_sum, None)
+        tmp_path = os.path.join(self.folder, f".{msg_chk_sum}.{key}.link")
+        try:
+            os.link(self.path(key), tmp_path)
+            os.replace(tmp_path, self.path(msg_chk_sum))
+        except OSError as err:
+            logging.warning(f"Unable to link '{msg_chk_sum}' to '{key}': {err}")
+            return
+        self.aliases[msg_chk_sum] = key
+        self._dirty = True
+
+    def is_immutable(self, name):
+        """
+        Tells whether an audio file of the cache will keep its content.
+
+        Args:
+            name (str): The key of the file, or a message checksum.
+
+        Returns:
+            bool: True for a key rendered by its own voice, False for a message checksum (linked
+                to the next rendering of the message) or a file rendered by a fallback voice.
+        """
+        entry = self.entries.get(name)
+        return (
+            entry is not None
+            and name not in self.aliases
+            and entry.get("rendered_by", entry.get("voice_id")) == entry.get("voice_id")
+        )
+
+    def alias_key(self, msg_chk_sum, voice_id):
+        """
+        Returns the key of the audio file linked to a message checksum, for a voice.
+
+        Args:
+            msg_chk_sum (str): The checksum of the message.
+            voice_id (str): The current engine and voice.
+
+        Returns:
+            str: The key, or None if no file of this voice is linked.
+        """
+        key = self.aliases.get(msg_chk_sum)
+        if key is None or self.entries.get(key, {}).get("voice_id") != voice_id:
+            return None
+        return key
+
+    def evict(self, keep=None):
+        """
+        Deletes the least recently used files until the cache fits its size cap.
+
+        Args:
+            keep (str): A key never to evict (e.g. the file just rendered).
+
+        Returns:
+            list: The keys of the evicted files.
+        """
+        if self.max_bytes <= 0:
+            return []
+
+        evicted = []
+        size = self.size
+        by_access = sorted(
+            self.entries.items(), key=lambda item: item[1]["last_access"]
+        )
+        for key, entry in by_access:
+            if size <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._remove(key)
+            size -= self._entry_size(entry)
+            evicted.append(key)
+
+        self.evictions += len(evicted)
+        return evicted
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None) or {}
+        for audio_format in entry.get("variants", {}):
+            self._unlink(self.variant_path(key, audio_format))
+        for alias in [alias for alias, target in self.aliases.items() if target == key]:
+            self.aliases.pop(alias)
+            self._unlink(self.path(alias))
+        self._unlink(self.path(key))
+        self._dirty = True
+
+    @staticmethod
+    def _unlink(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as err:
+            logging.warning(f"Unable to remove the cached audio '{path}': {err}")
+
+    def flush(self):
+        """
+        Writes the manifest, atomically, if it changed.
+
+        Returns:
+            None
+        """
+        if not self._dirty:
+            return
+        self._dirty = False
+        if not self._write_manifest(self._manifest()):
+            self._dirty = True
+
+    async def save(self):
+        """
+        Writes the manifest like `flush`, in a thread: the event loop only copies the entries.
+
+        Returns:
+            None
+        """
+        if not self._dirty:
+            return
+        self._dirty = False
+        if not await asyncio.to_thread(self._write_manifest, self._manifest()):
+            self._dirty = True
+
+    def _manifest(self):
+        return {
+            "entries": {
+                key: dict(entry, variants=dict(entry.get("variants", {})))
+                for key, entry in self.entries.items()
+            },
+            "aliases": dict(self.aliases),
+        }
+
+    def _write_manifest(self, manifest_data):
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as manifest:
+                json.dump(manifest_data, manifest)
+            os.replace(tmp_path, self.manifest_path)
+            return True
+        except OSError as err:
+            logging.error(f"Unable to write the audio cache manifest: {err}")
+            return False
@@ -0,0 +1,325 @@
+"""
+Serving of the rendered audio files to Asterisk and the other clients.
+
+The files of the cache are addressed by content (`<audio_key>.wav` and its
+telephony variants): once rendered they do not change, so they are served with
+a strong ETag, the hash of their content, and a long-lived `Cache-Control`.
+The names that can point to other content later (`<msg_chk_sum>.wav`, the
+files rendered by a fallback engine) are served with `no-cache`, to be
+revalidated with their ETag.
+
+The files are sent with sendfile, ranges included. The most played ones (e.g.
+fetched again by Asterisk at every retry of a call) are kept in a hot set in
+memory, bounded in bytes, and answered without touching the disk.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from hashlib import blake2b
+
+from aiohttp import hdrs, web
+from py_phone_caller_utils.audio_files import AUDIO_FILE_NAME
+
+AUDIO_CONTENT_TYPES = {
+    "wav": "audio/wav",
+    "ulaw": "audio/basic",
+    "alaw": "audio/x-alaw-basic",
+    "sln": "audio/L16;rate=8000",
+}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+ETAG_DIGEST_SIZE = 16
+HASH_CHUNK_BYTES = 1 << 16
+
+
+def content_etag(path):
+    """
+    Computes the ETag of a file from its content.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        str: The hash of the content, as hexadecimal string.
+    """
+    digest = blake2b(digest_size=ETAG_DIGEST_SIZE)
+    with open(path, "rb") as audio_file:
+        for chunk in iter(lambda: audio_file.read(HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_hot(path):
+    with open(path, "rb") as audio_file:
+        content = audio_file.read()
+    return blake2b(content, digest_size=ETAG_DIGEST_SIZE).hexdigest(), content
+
+
+class AudioFile:
+    """
+    An audio file to serve, with its ETag and, if in the hot set, its content.
+    """
+
+    def __init__(self, path, etag, size, content=None):
+        self.path = path
+        self.etag = etag
+        self.size = size
+        self.content = content
+
+
+class AudioFiles:
+    """
+    The audio files of the serving folder: their ETags, and the hot set of the most played ones.
+
+    A file is known by its name and its signature (inode, modification time and size):
+    a file replaced by a new rendering gets a new ETag.
+    """
+
+    def __init__(self, folder, hot_set_bytes=0, hot_min_plays=2, max_etags=65536):
+        """
+        Args:
+            folder (str): The folder of the audio files.
+            hot_set_bytes (int): The memory of the hot set, 0 to disable it.
+            hot_min_plays (int): The plays of a file before it joins the hot set.
+            max_etags (int): The number of ETags remembered.
+        """
+        self.folder = folder
+        self.hot_set_bytes = int(hot_set_bytes)
+        self.hot_min_plays = max(1, int(hot_min_plays))
+        self.max_etags = max_etags
+        self._etags = OrderedDict()
+        self._plays = {}
+        self._hot = OrderedDict()
+        self._hot_size = 0
+
+    @property
+    def hot_size(self):
+        return self._hot_size
+
+    def path(self, file_name):
+        return os.path.join(self.folder, file_name)
+
+    async def get(self, file_name):
+        """
+        Returns an audio file to serve, recording the play.
+
+        Args:
+            file_name (str): The name of the file, validated by `AUDIO_FILE_NAME`.
+
+        Returns:
+            AudioFile: The file, or None if missing.
+        """
+        path = self.path(file_name)
+        try:
+            stat = await asyncio.to_thread(os.stat, path)
+        except OSError:
+            self._forget(file_name)
+            return None
+        signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+        hot = self._hot.get(file_name)
+        if hot is not None and hot[0] == signature:
+            self._hot.move_to_end(file_name)
+            return AudioFile(path, hot[1], stat.st_size, hot[2])
+
+        plays = self._plays[file_name] = self._plays.get(file_name, 0) + 1
+        if (
+            self.hot_set_bytes > 0
+            and plays >= self.hot_min_plays
+            and stat.st_size <= self.hot_set_bytes // 4
+        ):
+            etag, content = await asyncio.to_thread(read_hot, path)
+            self._add_hot(file_name, signature, etag, content)
+            return AudioFile(path, etag, len(content), content)
+
+        known = self._etags.get(file_name)
+        if known is not None and known[0] == signature:
+            self._etags.move_to_end(file_name)
+            return AudioFile(path, known[1], stat.st_size)
+        etag = await asyncio.to_thread(content_etag, path)
+        self._etags[file_name] = (signature, etag)
+        while len(self._etags) > self.max_etags:
+            self._etags.popitem(last=False)
+        return AudioFile(path, etag, stat.st_size)
+
+    def _add_hot(self, file_name, signature, etag, content):
+        self._drop_hot(file_name)
+        self._hot[file_name] = (signature, etag, content)
+        self._hot_size += len(content)
+        while self._hot_size > self.hot_set_bytes:
+            _, (_, _, evicted) = self._hot.popitem(last=False)
+            self._hot_size -= len(evicted)
+
+    def _drop_hot(self, file_name):
+        hot = self._hot.pop(file_name, None)
+        if hot is not None:
+            self._hot_size -= len(hot[2])
+
+    def _forget(self, file_name):
+        self._drop_hot(file_name)
+        self._etags.pop(file_name, None)
+        self._plays.pop(file_name, None)
+
+
+class AudioFileResponse(web.FileResponse):
+    """
+    A file response (sendfile, ranges) of an audio file, whose conditional requests are
+    answered by `serve_audio` with the content ETag.
+
+    `FileResponse` evaluates the validators against an ETag made of the modification
+    time and the size: the ETag ones are removed from the request it sees, with the
+    range when `If-Range` did not match. The ETag header is set by `set_audio_etag`, see `add_audio_routes`.
+    """
+
+    def __init__(self, path, content_etag, use_range=True, **kwargs):
+        super().__init__(path, **kwargs)
+        self.content_etag = content_etag
+        self.use_range = use_range
+
+    async def prepare(self, request):
+        headers = request.headers.copy()
+        for etag_header, date_header in (
+            (hdrs.IF_MATCH, hdrs.IF_UNMODIFIED_SINCE),
+            (hdrs.IF_NONE_MATCH, hdrs.IF_MODIFIED_SINCE),
+        ):
+            if etag_header in headers:
+                headers.popall(etag_header)
+                headers.popall(date_header, None)
+        headers.popall(hdrs.IF_RANGE, None)
+        if not self.use_range:
+            headers.popall(hdrs.RANGE, None)
+        return await super().prepare(request.clone(headers=headers))
+
+
+async def set_audio_etag(request, response):
+    """
+    Sets the content ETag on the audio file responses, in place of the one of `FileResponse`.
+
+    Args:
+        request: The incoming HTTP request.
+        response: The response about to be sent.
+    """
+    if isinstance(response, AudioFileResponse):
+        response.headers[hdrs.ETAG] = f'"{response.content_etag}"'
+
+
+def etag_matches(etags, etag, weak=True):
+    return any(
+        candidate.value in ("*", etag) and (weak or not candidate.is_weak)
+        for candidate in etags or ()
+    )
+
+
+def if_range_matches(request, etag):
+    if_range = request.headers.get(hdrs.IF_RANGE)
+    return if_range is None or if_range == f'"{etag}"'
+
+
+def hot_response(request, audio_file, headers, use_range=True):
+    """
+    Answers an audio file of the hot set from memory, honoring a single byte range.
+
+    Args:
+        request: The incoming HTTP request.
+        audio_file (AudioFile): The file, with its content.
+        headers (dict): The headers of the response.
+        use_range (bool): Whether the range is honored, False when `If-Range` did not match.
+
+    Returns:
+        aiohttp.web.Response: The '200' or '206' response.
+
+    Raises:
+        web.HTTPRequestRangeNotSatisfiable: If the range is invalid or past the end of the file.
+    """
+    content = audio_file.content
+    size = len(content)
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    if not use_range:
+        return web.Response(body=content, headers=headers)
+    try:
+        byte_range = request.http_range
+    except ValueError as err:
+        raise web.HTTPRequestRangeNotSatisfiable(
+            headers={"Content-Range": f"bytes */{size}"}
+        ) from err
+
+    if byte_range.start is None and byte_range.stop is None:
+        return web.Response(body=content, headers=headers)
+
+    start, stop, _ = byte_range.indices(size)
+    if start >= stop:
+        raise web.HTTPRequestRangeNotSatisfiable(
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    return web.Response(body=content[start:stop], status=206, headers=headers)
+
+
+async def serve_audio(request):
+    """
+    Serves an audio file of the cache (`<audio_key>.wav`, its variants, or `<msg_chk_sum>.wav`).
+
+    The response carries a strong ETag, the hash of the content: `If-None-Match` is
+    answered with a '304', `If-Match` with a '412', and a range is served only if
+    `If-Range` matches, the whole file otherwise. The files of the cache keys never change and are
+    cached for a year by the clients; the other ones are revalidated. The files are sent
+    with sendfile (ranges included), or from memory for the most played ones (see
+    `audio_hot_set_mb`). HEAD requests are answered with the headers only. The folder is
+    never listed.
+
+    The application holds the 'audio_files' and the 'audio_cache', telling the files that
+    never change.
+
+    Args:
+        request: The incoming HTTP request, with the 'file_name' in its path.
+
+    Returns:
+        aiohttp.web.StreamResponse: The audio file, or a '304' response.
+
+    Raises:
+        web.HTTPNotFound: If the name is not the one of an audio file, or the file is missing.
+        web.HTTPPreconditionFailed: If `If-Match` does not match the file.
+    """
+    file_name = request.match_info["file_name"]
+    if not AUDIO_FILE_NAME.match(file_name):
+        raise web.HTTPNotFound()
+    audio_file = await request.app["audio_files"].get(file_name)
+    if audio_file is None:
+        raise web.HTTPNotFound()
+
+    name, audio_format = file_name.rsplit(".", 1)
+    headers = {
+        "ETag": f'"{audio_file.etag}"',
+        "Cache-Control": (
+            IMMUTABLE_CACHE_CONTROL
+            if request.app["audio_cache"].is_immutable(name)
+            else REVALIDATE_CACHE_CONTROL
+        ),
+    }
+    if request.if_match is not None and not etag_matches(
+        request.if_match, audio_file.etag, weak=False
+    ):
+        raise web.HTTPPreconditionFailed(headers=headers)
+    if etag_matches(request.if_none_match, audio_file.etag):
+        return web.Response(status=304, headers=headers)
+
+    headers["Content-Type"] = AUDIO_CONTENT_TYPES[audio_format]
+    use_range = if_range_matches(request, audio_file.etag)
+    if audio_file.content is not None:
+        return hot_response(request, audio_file, headers, use_range)
+    return AudioFileResponse(
+        audio_file.path, audio_file.etag, use_range, headers=headers
+    )
+
+
+def add_audio_routes(app):
+    """
+    Adds the `/audio` routes (GET and HEAD) to the application, with the content ETag hook.
+
+    Args:
+        app (aiohttp.web.Application): The application, holding the 'audio_files' and the 'audio_cache'.
+    """
+    app.router.add_route("GET", "/audio/{file_name}", serve_audio)
+    app.router.add_route("HEAD", "/audio/{file_name}", serve_audio)
+    app.on_response_prepare.append(set_audio_etag)
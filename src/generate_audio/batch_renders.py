@@ -0,0 +1,137 @@
+"""
+Batch pre-rendering of the audio files, to warm the cache.
+
+A batch is a list of messages (e.g. all the alert descriptions of the
+Prometheus rules) rendered in the background, while its progress is polled
+by the client (see `prerender`). The batches share the TTS engine with the
+calls: they never take more than a part of the rendering jobs allowed in
+flight, so a call is not rejected because of a deploy warming the cache.
+"""
+
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+
+class BatchRender:
+    """
+    The progress of a batch of messages being rendered.
+    """
+
+    def __init__(self, messages):
+        """
+        Args:
+            messages (list): The distinct messages of the batch.
+        """
+        self.batch_id = uuid.uuid4().hex
+        self.messages = messages
+        self.total = len(messages)
+        self.cached = 0
+        self.rendered = 0
+        self.failed = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def done(self):
+        return self.cached + self.rendered + len(self.failed)
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def progress(self):
+        """
+        Returns the progress of the batch.
+
+        Returns:
+            dict: The counts of the messages done, cached, rendered and failed, and the failed messages.
+        """
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "batch_id": self.batch_id,
+            "total": self.total,
+            "done": self.done,
+            "cached": self.cached,
+            "rendered": self.rendered,
+            "failed": len(self.failed),
+            "failed_messages": self.failed,
+            "finished": self.finished,
+            "elapsed_seconds": round(elapsed, 3),
+        }
+
+
+class BatchRenders:
+    """
+    The batches in progress, and the last finished ones.
+
+    The running batches share a budget of rendering jobs (see `reserve`): however many of
+    them run, they never hold more than `max_jobs` jobs at the same time.
+    """
+
+    def __init__(self, max_finished=16, max_jobs=1):
+        """
+        Args:
+            max_finished (int): The number of finished batches whose progress is kept.
+            max_jobs (int): The rendering jobs the running batches may hold at the same time.
+        """
+        self.max_finished = max_finished
+        self.max_jobs = max(1, int(max_jobs))
+        self.jobs_in_use = 0
+        self._batches = {}
+        self._jobs_released = asyncio.Condition()
+
+    def __len__(self):
+        return len(self._batches)
+
+    def create(self, messages):
+        """
+        Records a new batch.
+
+        Args:
+            messages (Iterable[str]): The messages of the batch, de-duplicated in order.
+
+        Returns:
+            BatchRender: The batch.
+        """
+        batch = BatchRender(list(dict.fromkeys(messages)))
+        self._batches[batch.batch_id] = batch
+        self._forget_finished()
+        return batch
+
+    @asynccontextmanager
+    async def reserve(self, jobs):
+        """
+        Holds rendering jobs of the budget shared by the batches, waiting for them to be free.
+
+        Args:
+            jobs (int): The number of jobs (e.g. the messages of a batched inference), at most `max_jobs`.
+        """
+        jobs = min(max(1, jobs), self.max_jobs)
+        async with self._jobs_released:
+            await self._jobs_released.wait_for(
+                lambda: self.jobs_in_use + jobs <= self.max_jobs
+            )
+            self.jobs_in_use += jobs
+        try:
+            yield
+        finally:
+            self.jobs_in_use -= jobs
+            async with self._jobs_released:
+                self._jobs_released.notify_all()
+
+    def get(self, batch_id):
+        return self._batches.get(batch_id)
+
+    def running(self):
+        return [batch for batch in self._batches.values() if not batch.finished]
+
+    def _forget_finished(self):
+        finished = sorted(
+            (batch for batch in self._batches.values() if batch.finished),
+            key=lambda batch: batch.finished_at,
+        )
+        for batch in finished[: max(0, len(finished) - self.max_finished)]:
+            self._batches.pop(batch.batch_id)
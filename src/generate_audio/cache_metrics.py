@@ -0,0 +1,66 @@
+"""
+Metrics of the audio cache of the GenerateAudio service.
+
+The instruments are created on the OpenTelemetry meter, exported through the
+Prometheus reader set up by `init_telemetry` (they are no-ops when the telemetry
+is disabled).
+"""
+
+from opentelemetry import metrics
+from opentelemetry.metrics import Observation
+
+meter = metrics.get_meter("generate_audio")
+
+
+def observe_audio_cache(cache):
+    """
+    Registers the instruments reading the counters and the size of the audio cache.
+
+    Args:
+        cache (AudioCache): The audio cache.
+
+    Returns:
+        None
+    """
+
+    def hits(_options):
+        yield Observation(cache.hits)
+
+    def misses(_options):
+        yield Observation(cache.misses)
+
+    def evictions(_options):
+        yield Observation(cache.evictions)
+
+    def size(_options):
+        yield Observation(cache.size)
+
+    def files(_options):
+        yield Observation(len(cache.entries))
+
+    meter.create_observable_counter(
+        "generate_audio_cache_hits",
+        callbacks=[hits],
+        description="Audio requests served from the cache",
+    )
+    meter.create_observable_counter(
+        "generate_audio_cache_misses",
+        callbacks=[misses],
+        description="Audio requests that needed a rendering",
+    )
+    meter.create_observable_counter(
+        "generate_audio_cache_evictions",
+        callbacks=[evictions],
+        description="Audio files evicted to keep the cache under its size cap",
+    )
+    meter.create_observable_gauge(
+        "generate_audio_cache_size_bytes",
+        callbacks=[size],
+        unit="By",
+        description="Size of the cached audio files",
+    )
+    meter.create_observable_gauge(
+        "generate_audio_cache_files",
+        callbacks=[files],
+        description="Number of cached audio files",
+    )
@@ -1,13 +1,15 @@
 import sys
 from py_phone_caller_utils.config import settings
 
-
 SERVING_AUDIO_FOLDER = settings.generate_audio.serving_audio_folder
 IS_AUDIO_READY_ENDPOINT = settings.generate_audio.is_audio_ready_endpoint
 NUM_OF_CPUS = settings.generate_audio.num_of_cpus
 PRE_TRAINED_MODELS_FOLDER = settings.generate_audio.pre_trained_models_folder
 FACEBOOK_MMS_MODELS_FOLDER = settings.generate_audio.facebook_mms_models_folder
 FACEBOOK_MMS_LANGUAGE_CODE = settings.generate_audio.facebook_mms_language_code
+FACEBOOK_MMS_EXTRA_LANGUAGE_CODES = list(
+    settings.generate_audio.get("facebook_mms_extra_language_codes", [])
+)
 PIPER_MODELS_FOLDER = settings.generate_audio.piper_models_folder
 PIPER_LANGUAGE_CODE = settings.generate_audio.piper_language_code
 CONFIG_TTS_ENGINE = settings.generate_audio.tts_engine
@@ -25,6 +27,82 @@ KOKORO_VOICES_BASE_URL = settings.generate_audio.kokoro_voices_base_url
 if KOKORO_PYTHON_INTERPRETER in ["python", "python3"]:
     KOKORO_PYTHON_INTERPRETER = sys.executable
 
+GCLOUD_TTS_LANGUAGE_CODE = settings.generate_audio.gcloud_tts_language_code
+AWS_POLLY_VOICE = settings.generate_audio.aws_polly_voice
+# All the engines render 8 kHz audio, as played by Asterisk
+AUDIO_SAMPLE_RATE = 8000
+AUDIO_CACHE_MAX_MB = int(settings.generate_audio.get("audio_cache_max_mb", 1024))
+AUDIO_CACHE_FLUSH_SECONDS = float(
+    settings.generate_audio.get("audio_cache_flush_seconds", 60)
+)
+AUDIO_HOT_SET_MB = float(settings.generate_audio.get("audio_hot_set_mb", 16))
+AUDIO_HOT_SET_MIN_PLAYS = int(settings.generate_audio.get("audio_hot_set_min_plays", 2))
+# The longest wait allowed to the clients of the audio readiness endpoint
+IS_AUDIO_READY_MAX_WAIT_SECONDS = 30
+# The telephony variants written next to every WAV file (see 'telephony_formats')
+AUDIO_VARIANT_FORMATS = list(
+    settings.generate_audio.get("audio_variant_formats", ["ulaw", "alaw"])
+)
+STREAM_CHUNK_MIN_CHARS = int(settings.generate_audio.get("stream_chunk_min_chars", 40))
+SEGMENT_AUDIO = bool(settings.generate_audio.get("segment_audio", False))
+SEGMENT_MAX_COUNT = int(settings.generate_audio.get("segment_max_count", 8))
+SEGMENT_CROSSFADE_MS = float(settings.generate_audio.get("segment_crossfade_ms", 10))
+SEGMENT_SILENCE_MS = float(settings.generate_audio.get("segment_silence_ms", 40))
+GENERATE_AUDIO_BATCH_ROUTE = settings.generate_audio.get(
+    "generate_audio_batch_route", "generate_audio_batch"
+)
+BATCH_RENDER_CONCURRENCY = int(
+    settings.generate_audio.get("batch_render_concurrency", NUM_OF_CPUS)
+)
+BATCH_INFERENCE_SIZE = int(settings.generate_audio.get("batch_inference_size", 8))
+BATCH_MAX_MESSAGES = int(settings.generate_audio.get("batch_max_messages", 10000))
+# How long a batch waits for room among the rendering jobs in flight
+BATCH_RETRY_SECONDS = 1
+RENDER_MODE = settings.generate_audio.get("render_mode", "thread")
+PIN_RENDER_WORKERS = bool(settings.generate_audio.get("pin_render_workers", True))
+MAX_PENDING_RENDERS = int(settings.generate_audio.get("max_pending_renders", 32))
+FACEBOOK_MMS_PRELOAD = bool(settings.generate_audio.get("facebook_mms_preload", True))
+TTS_WORKER_POOL_SIZE = int(
+    settings.generate_audio.get("tts_worker_pool_size", NUM_OF_CPUS)
+)
+TTS_WORKER_JOB_TIMEOUT_SECONDS = float(
+    settings.generate_audio.get("tts_worker_job_timeout_seconds", 60)
+)
+TTS_WORKER_START_TIMEOUT_SECONDS = float(
+    settings.generate_audio.get("tts_worker_start_timeout_seconds", 300)
+)
+TTS_WORKER_HEALTH_CHECK_SECONDS = float(
+    settings.generate_audio.get("tts_worker_health_check_seconds", 30)
+)
+# The engines tried in turn when the one of the request fails or exceeds its budget
+TTS_FALLBACK_ENGINES = list(settings.generate_audio.get("tts_fallback_engines", []))
+TTS_DEFAULT_BUDGET_SECONDS = float(
+    settings.generate_audio.get("tts_default_budget_seconds", 4)
+)
+TTS_ENGINE_BUDGET_SECONDS = {
+    engine: float(seconds)
+    for engine, seconds in dict(
+        settings.generate_audio.get("tts_engine_budget_seconds", {})
+    ).items()
+}
+TTS_MAX_WARM_VOICES = int(settings.generate_audio.get("tts_max_warm_voices", 2))
+GENERATE_AUDIO_ENGINES_ROUTE = settings.generate_audio.get(
+    "generate_audio_engines_route", "engines"
+)
+
+# The agent mirroring the audio files on the Asterisk host, notified of the new files when enabled
+# (a section of its own, possibly missing from the older settings files)
+AUDIO_SYNC_SETTINGS = settings.get("asterisk_audio_sync", {})
+ASTERISK_AUDIO_SYNC_ENABLED = bool(
+    AUDIO_SYNC_SETTINGS.get("asterisk_audio_sync_enabled", False)
+)
+ASTERISK_AUDIO_SYNC_URL = f"{AUDIO_SYNC_SETTINGS.get('asterisk_audio_sync_http_scheme', 'http')}://{AUDIO_SYNC_SETTINGS.get('asterisk_audio_sync_host', settings.commons.asterisk_host)}:{AUDIO_SYNC_SETTINGS.get('asterisk_audio_sync_port', 8089)}"
+ASTERISK_AUDIO_SYNC_ROUTE = AUDIO_SYNC_SETTINGS.get(
+    "asterisk_audio_sync_route", "sync_audio"
+)
+AUDIO_SYNC_TIMEOUT_SECONDS = float(
+    AUDIO_SYNC_SETTINGS.get("audio_sync_timeout_seconds", 5)
+)
 GENERATE_AUDIO_APP_ROUTE = settings.generate_audio.generate_audio_app_route
 GENERATE_AUDIO_PORT = int(settings.generate_audio.generate_audio_port)
 GENERATE_AUDIO_ERROR = settings.logs.generate_audio_error
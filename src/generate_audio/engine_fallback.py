@@ -0,0 +1,135 @@
+"""
+Fallback chain of the TTS engines, with a latency budget per engine.
+
+A message is rendered by the engine of its request first. If the engine fails,
+the next engine of the chain starts at once; if it is still rendering once its
+budget is spent, the next engine starts too and they race: the first valid
+audio file wins. Whenever the last engine started fails, the next one starts at
+once, even if the previous ones are still rendering. The last engine of the chain has no budget, so a chain ending
+with a fast local engine (e.g. Piper) bounds the time a call waits for its
+audio even when a remote engine is throttled or down.
+
+The renderings left behind are not cancelled (a cancelled Piper job restarts
+its worker, a thread of the executor can't be stopped): they end in the
+background, and their files are deleted.
+"""
+
+import asyncio
+import logging
+import os
+
+from generate_audio.render_jobs import temporary_path
+
+# The renderings left behind, referenced until they end
+_abandoned = set()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as err:
+        logging.warning(f"Unable to remove '{path}': {err}")
+
+
+def _abandon(pending):
+    for task, (attempt, tmp_path) in pending.items():
+        attempt["outcome"] = "abandoned"
+        _abandoned.add(task)
+
+        def done(task, tmp_path=tmp_path):
+            _abandoned.discard(task)
+            if not task.cancelled():
+                # Retrieved, so it is not reported as never retrieved
+                task.exception()
+            _remove(tmp_path)
+
+        task.add_done_callback(done)
+    pending.clear()
+
+
+async def render_with_fallback(candidates, render, output_path, is_valid):
+    """
+    Renders an audio file with the first candidate succeeding within its budget.
+
+    Every candidate renders to its own temporary file; the file of the winner is
+    moved to `output_path`.
+
+    Args:
+        candidates (list): The (candidate, budget_seconds) pairs, in order of preference. The
+            budget of the last candidate is ignored: it has all the time it needs.
+        render (Callable[[object, str], Awaitable]): Renders the message with a candidate to a path.
+        output_path (str): The path of the audio file.
+        is_valid (Callable[[str], bool]): Validates a rendered file.
+
+    Returns:
+        dict: The 'candidate' that rendered the file, the 'seconds' since the first attempt,
+            whether it is a 'fallback' (not the first candidate), and the 'attempts': the
+            'candidate', 'outcome' ('rendered', 'failed', 'abandoned') and 'seconds' of each one.
+
+    Raises:
+        RuntimeError: If no candidate rendered a valid audio file.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    attempts = []
+    pending = {}
+
+    try:
+        for index, (candidate, budget) in enumerate(candidates):
+            tmp_path = temporary_path(output_path)
+            attempt = {"candidate": candidate, "outcome": None, "seconds": None}
+            attempts.append(attempt)
+            current = asyncio.ensure_future(render(candidate, tmp_path))
+            pending[current] = (attempt, tmp_path)
+            deadline = None if index == len(candidates) - 1 else loop.time() + budget
+
+            while pending:
+                timeout = None if deadline is None else max(0, deadline - loop.time())
+                done, _ = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # Budget spent: the next candidate races this one
+                    logging.warning(
+                        f"TTS {candidate} over its {budget}s budget, "
+                        + "starting the next engine"
+                    )
+                    break
+                for task in done:
+                    attempt, tmp_path = pending.pop(task)
+                    attempt["seconds"] = round(loop.time() - started, 3)
+                    error = (
+                        asyncio.CancelledError()
+                        if task.cancelled()
+                        else task.exception()
+                    )
+                    if error is None and await asyncio.to_thread(is_valid, tmp_path):
+                        os.replace(tmp_path, output_path)
+                        attempt["outcome"] = "rendered"
+                        _abandon(pending)
+                        return {
+                            "candidate": attempt["candidate"],
+                            "seconds": attempt["seconds"],
+                            "fallback": attempt is not attempts[0],
+                            "attempts": attempts,
+                        }
+                    attempt["outcome"] = "failed"
+                    logging.warning(
+                        f"TTS {attempt['candidate']} failed: "
+                        + f"{error or 'no valid audio file rendered'}"
+                    )
+                    _remove(tmp_path)
+                if current in done and deadline is not None:
+                    # Failed: the next candidate starts without waiting for the budget
+                    break
+    finally:
+        _abandon(pending)
+
+    raise RuntimeError(
+        f"No TTS engine rendered '{output_path}': "
+        + ", ".join(
+            f"{attempt['candidate']} {attempt['outcome']}" for attempt in attempts
+        )
+    )
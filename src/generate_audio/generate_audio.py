@@ -3,18 +3,17 @@ Generate Audio service.
 
 Provides endpoints to generate and serve audio files from text using various
 TTS engines (Google gTTS, Facebook MMS, Piper, AWS Polly, Kokoro) and to verify
-when an audio file is ready to be played.
+when an audio file is ready to be played. Every request can pick the engine and
+the voice (or the language) of its audio, see `request_voice`; the engines and
+their voices are listed by `list_engines`.
 """
 
 import asyncio
-import importlib
-import importlib.util
 import logging
 import os
 import sys
 import pathlib
-import site
-import subprocess
+import time
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 src_dir = os.path.dirname(current_dir)
@@ -27,18 +26,44 @@ if src_dir not in sys.path:
 
 
 from concurrent.futures.thread import ThreadPoolExecutor
-from enum import Enum
 
-from aiohttp import web
-from py_phone_caller_utils.py_phone_caller_voices.aws_polly import (
-    aws_polly_text_to_wave,
-)
-from py_phone_caller_utils.py_phone_caller_voices.facebook_mms import (
-    text_to_speech_facebook_mms,
-)
-from py_phone_caller_utils.py_phone_caller_voices.google_gtts import create_audio_file
+from aiohttp import ClientError, ClientSession, ClientTimeout, web
 from py_phone_caller_utils.telemetry import init_telemetry, instrument_aiohttp_app
 
+from generate_audio.audio_cache import AudioCache, audio_key
+from generate_audio.audio_serving import AudioFiles, add_audio_routes
+from generate_audio.batch_renders import BatchRenders
+from generate_audio.cache_metrics import observe_audio_cache
+from generate_audio.engine_fallback import render_with_fallback
+from generate_audio.message_segments import join_segment_files, split_segments
+from generate_audio.render_jobs import (
+    RenderJobs,
+    RenderQueueFull,
+    render_atomically,
+    temporary_path,
+)
+from generate_audio.render_metrics import record_render
+from generate_audio.sentence_chunks import split_sentences
+from generate_audio.synthesis_worker import (
+    create_synthesis_pool,
+    render as render_in_worker,
+    render_batch as render_batch_in_worker,
+    worker_ready,
+)
+from generate_audio.telephony_formats import TELEPHONY_FORMATS, write_variants
+from generate_audio.tts_engines import Voice
+from generate_audio.tts_renderers import (
+    DEFAULT_VOICE,
+    TTS_ENGINE,
+    TTS_ENGINES,
+    TTSEngine,
+    generate_tts_audio,
+    generate_tts_audio_batch,
+    kokoro_tts_command,
+    piper_tts_command,
+    preload_facebook_mms_models,
+)
+from generate_audio.tts_worker_pool import TTSWorkerPool, TTSWorkerPools
 from generate_audio.constants import (
     GENERATE_AUDIO_APP_ROUTE,
     GENERATE_AUDIO_PORT,
@@ -52,12 +77,42 @@ from generate_audio.constants import (
     FACEBOOK_MMS_LANGUAGE_CODE,
     PIPER_MODELS_FOLDER,
     PIPER_LANGUAGE_CODE,
-    CONFIG_TTS_ENGINE,
-    PIPER_PYTHON_INTERPRETER,
     GENERATE_AUDIO_ERROR,
     KOKORO_MODELS_FOLDER,
-    KOKORO_LANG,
-    KOKORO_PYTHON_INTERPRETER,
+    TTS_WORKER_POOL_SIZE,
+    TTS_WORKER_JOB_TIMEOUT_SECONDS,
+    TTS_WORKER_START_TIMEOUT_SECONDS,
+    TTS_WORKER_HEALTH_CHECK_SECONDS,
+    TTS_MAX_WARM_VOICES,
+    TTS_FALLBACK_ENGINES,
+    TTS_DEFAULT_BUDGET_SECONDS,
+    TTS_ENGINE_BUDGET_SECONDS,
+    FACEBOOK_MMS_PRELOAD,
+    MAX_PENDING_RENDERS,
+    RENDER_MODE,
+    PIN_RENDER_WORKERS,
+    AUDIO_CACHE_MAX_MB,
+    AUDIO_CACHE_FLUSH_SECONDS,
+    AUDIO_HOT_SET_MB,
+    AUDIO_HOT_SET_MIN_PLAYS,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_VARIANT_FORMATS,
+    ASTERISK_AUDIO_SYNC_ENABLED,
+    ASTERISK_AUDIO_SYNC_ROUTE,
+    ASTERISK_AUDIO_SYNC_URL,
+    AUDIO_SYNC_TIMEOUT_SECONDS,
+    SEGMENT_AUDIO,
+    GENERATE_AUDIO_BATCH_ROUTE,
+    GENERATE_AUDIO_ENGINES_ROUTE,
+    BATCH_RENDER_CONCURRENCY,
+    BATCH_INFERENCE_SIZE,
+    BATCH_MAX_MESSAGES,
+    BATCH_RETRY_SECONDS,
+    SEGMENT_MAX_COUNT,
+    SEGMENT_CROSSFADE_MS,
+    SEGMENT_SILENCE_MS,
+    STREAM_CHUNK_MIN_CHARS,
+    IS_AUDIO_READY_MAX_WAIT_SECONDS,
 )
 
 logging.basicConfig(format=LOG_FORMATTER, level=LOG_LEVEL, force=True)
@@ -65,392 +120,1098 @@ logging.basicConfig(format=LOG_FORMATTER, level=LOG_LEVEL, force=True)
 init_telemetry("generate_audio")
 
 
-class TTSEngine(Enum):
+async def create_audio_folder(folder_name):
     """
-    Enumeration of supported Text-to-Speech (TTS) engines for audio generation.
+    Creates the specified folder for storing audio files if it does not already exist.
 
-    This enum provides a method to convert a string configuration value to a TTSEngine member.
+    This asynchronous function attempts to create the folder and logs an exception if the operation fails.
+
+    Args:
+        folder_name (str): The path of the folder to create.
 
-    Attributes:
-        GOOGLE_GTTS: Google Text-to-Speech engine.
-        FACEBOOK_MMS: Facebook MMS TTS engine.
-        PIPER: Piper TTS engine.
-        AWS_POLLY: Amazon Polly TTS engine.
-        KOKORO: Kokoro TTS engine (on-premise ONNX model).
+    Returns:
+        None
     """
+    try:
+        pathlib.Path(folder_name).mkdir(parents=True, exist_ok=True)
+    except Exception as err:
+        logging.exception(f"Unable to create the folder '{folder_name}': '{err}'")
 
-    GOOGLE_GTTS = "google_gtts"
-    FACEBOOK_MMS = "facebook_mms"
-    PIPER = "piper_tts"
-    AWS_POLLY = "aws_polly"
-    KOKORO = "kokoro_tts"
 
-    @classmethod
-    def from_string(cls, value: str):
-        """
-        Converts a string configuration value to a TTSEngine enum member.
+for unknown_engine in set(TTS_FALLBACK_ENGINES) - set(TTS_ENGINES.names()):
+    logging.error(f"Invalid TTS fallback engine configuration: {unknown_engine}")
+    TTS_FALLBACK_ENGINES.remove(unknown_engine)
 
-        This class method matches the provided string to a supported TTS engine, raising a ValueError if the value is invalid.
 
-        Args:
-            value (str): The string representation of the TTS engine.
+def voice_id(voice):
+    """
+    Identifies the engine, the voice and the sample rate of the cached audio files.
 
-        Returns:
-            TTSEngine: The corresponding TTSEngine enum member.
+    Args:
+        voice (Voice): The engine and voice.
 
-        Raises:
-            ValueError: If the provided value does not match any supported TTS engine.
-        """
-        try:
-            return next(engine for engine in cls if engine.value == value.lower())
-        except StopIteration:
-            raise ValueError(
-                f"Invalid TTS engine: {value}. Valid options are: {[e.value for e in cls]}"
-            )
+    Returns:
+        str: The identifier, e.g. 'piper_tts:it_IT:8000'.
+    """
+    return f"{voice.engine}:{voice.name}:{AUDIO_SAMPLE_RATE}"
 
 
-try:
-    TTS_ENGINE = TTSEngine.from_string(CONFIG_TTS_ENGINE)
-except ValueError as e:
-    logging.error(f"Invalid TTS engine configuration: {e}")
-    TTS_ENGINE = TTSEngine.GOOGLE_GTTS
+def message_key(message, voice):
+    return audio_key(message, voice.engine, voice.name, AUDIO_SAMPLE_RATE)
 
 
-async def create_audio_folder(folder_name):
+def request_voice(params):
     """
-    Creates the specified folder for storing audio files if it does not already exist.
+    Returns the engine and voice asked by a request, the configured ones by default.
 
-    This asynchronous function attempts to create the folder and logs an exception if the operation fails.
+    The 'engine' parameter names a registered engine, the 'voice' parameter one of its
+    voices; without a voice, the 'language' parameter picks the voice of the engine
+    speaking it (the language codes are the ones of the engine, see `list_engines`).
 
     Args:
-        folder_name (str): The path of the folder to create.
+        params (Mapping): The parameters of the request: its query or its JSON body.
 
     Returns:
-        None
+        Voice: The engine and voice.
+
+    Raises:
+        web.HTTPBadRequest: If the engine, the voice or the language is not available.
     """
     try:
-        pathlib.Path(folder_name).mkdir(parents=True, exist_ok=True)
-    except Exception as err:
-        logging.exception(f"Unable to create the folder '{folder_name}': '{err}'")
+        engine = TTS_ENGINES.get(params.get("engine") or TTS_ENGINE.value)
+    except ValueError as err:
+        raise web.HTTPBadRequest(
+            reason=str(err), body=None, text=None, content_type=None
+        ) from err
+
+    voice = params.get("voice")
+    language = params.get("language")
+    if not voice and language:
+        voice = engine.voice_for_language(language)
+        if voice is None:
+            raise web.HTTPBadRequest(
+                reason=f"No voice of {engine.name} for the language '{language}'",
+                body=None,
+                text=None,
+                content_type=None,
+            )
+    voice = voice or engine.default_voice
+    if not engine.accepts_voice(voice):
+        raise web.HTTPBadRequest(
+            reason=f"Unknown voice of {engine.name}: '{voice}'",
+            body=None,
+            text=None,
+            content_type=None,
+        )
+    return Voice(engine.name, voice, language)
 
 
-def generate_tts_audio(
-    message: str, output_path: str, engine: TTSEngine = None
-) -> None:
+def fallback_voices(voice):
     """
-    Generate audio file using the specified TTS engine
+    Returns the fallback chain of a voice: the voice, then a voice of every fallback engine.
+
+    The voice of a fallback engine speaks the language of the request when given (the
+    engines without a voice for it are skipped), otherwise it is its default voice.
 
     Args:
-        message: Text to convert to speech
-        output_path: Path where to save the audio file
-        engine: TTS engine to use (defaults to configured TTS_ENGINE)
+        voice (Voice): The engine and voice of the request.
+
+    Returns:
+        list: The voices, in order of preference.
     """
-    engine = engine or TTS_ENGINE
+    voices = [voice]
+    for engine_name in TTS_FALLBACK_ENGINES:
+        if engine_name == voice.engine:
+            continue
+        engine = TTS_ENGINES.get(engine_name)
+        name = (
+            engine.voice_for_language(voice.language)
+            if voice.language
+            else engine.default_voice
+        )
+        if name is not None and engine.accepts_voice(name):
+            voices.append(Voice(engine.name, name, voice.language))
+    return voices
+
+
+def engine_budget(voice):
+    return TTS_ENGINE_BUDGET_SECONDS.get(voice.engine, TTS_DEFAULT_BUDGET_SECONDS)
+
+
+async def list_engines(request):
+    """
+    Answers the TTS engines a request can ask for, with their voices and features.
+
+    Args:
+        request: The incoming HTTP request.
 
-    if engine == TTSEngine.GOOGLE_GTTS:
-        msg_chk_sum = output_path.split("/")[-1].replace(".wav", "")
-        create_audio_file(message, msg_chk_sum)
-    elif engine == TTSEngine.FACEBOOK_MMS:
-        text_to_speech_facebook_mms(message, FACEBOOK_MMS_LANGUAGE_CODE, output_path)
-    elif engine == TTSEngine.PIPER:
-        text_to_speech_piper_tts(message, output_path)
-    elif engine == TTSEngine.AWS_POLLY:
-        aws_polly_text_to_wave(message, output_path)
-    elif engine == TTSEngine.KOKORO:
-        text_to_speech_kokoro_tts(message, output_path)
+    Returns:
+        aiohttp.web.Response: A JSON response with the default engine and voice, and the capabilities
+            of every engine (see `TTSEngineSpec.capabilities`).
+    """
+    return web.json_response(
+        {
+            "default_engine": DEFAULT_VOICE.engine,
+            "default_voice": DEFAULT_VOICE.name,
+            "engines": await asyncio.to_thread(TTS_ENGINES.capabilities),
+        }
+    )
+
+
+def create_tts_worker_pool(voice):
+    """
+    Creates the pool of warm TTS worker processes of a Piper or Kokoro voice, not started.
+
+    Args:
+        voice (Voice): The engine and voice of the workers.
+
+    Returns:
+        TTSWorkerPool: The pool.
+
+    Raises:
+        FileNotFoundError: If the script or the model of the voice is missing.
+    """
+    if voice.engine == TTSEngine.PIPER.value:
+        command = piper_tts_command(voice.name)
     else:
-        raise ValueError(f"Unsupported TTS engine: {engine}")
+        command = kokoro_tts_command(voice.name)
+    return TTSWorkerPool(
+        f"{voice.engine}-{voice.name}",
+        command + ["--serve"],
+        TTS_WORKER_POOL_SIZE,
+        job_timeout=TTS_WORKER_JOB_TIMEOUT_SECONDS,
+        start_timeout=TTS_WORKER_START_TIMEOUT_SECONDS,
+        health_check_seconds=TTS_WORKER_HEALTH_CHECK_SECONDS,
+    )
+
+
+async def start_tts_worker_pools(app):
+    """
+    Starts the pools of warm TTS worker processes of the engines running as a script.
+
+    The Piper and Kokoro workers load their model once and then serve the synthesis jobs, so the
+    rendering time is the inference time only. Every voice has its own pool, started by its first
+    message (the one of the configured voice now); the pools of the `tts_max_warm_voices` most
+    recently used voices are kept running. The pools are disabled with `tts_worker_pool_size = 0`.
+
+    Args:
+        app (aiohttp.web.Application): The application, where the pools are stored as 'tts_worker_pools'.
+
+    Returns:
+        None
+    """
+    app["tts_worker_pools"] = None
+    if TTS_WORKER_POOL_SIZE <= 0:
+        return
+
+    app["tts_worker_pools"] = TTSWorkerPools(
+        create_tts_worker_pool, TTS_MAX_WARM_VOICES
+    )
+    if TTS_ENGINES.get(DEFAULT_VOICE.engine).runs_as_script:
+        try:
+            await app["tts_worker_pools"].get(DEFAULT_VOICE)
+        except FileNotFoundError as err:
+            logging.error(f"Unable to start the TTS worker pool: {err}")
 
 
-def file_not_found_error(error_text, file_location):
+async def preload_tts_models(app):
     """
-    Raises a FileNotFoundError with a formatted error message and logs the error.
+    Loads the in-process TTS models before serving the first message.
+
+    The Facebook MMS models are kept in the process-wide registry of
+    `py_phone_caller_voices`, so the loading cost is paid here once instead of
+    by the first message.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+
+    Returns:
+        None
+    """
+    inner_loop = asyncio.get_running_loop()
+    if RENDER_MODE == "process":
+        # Starts all the worker processes, each one loading its models.
+        await asyncio.gather(
+            *(
+                inner_loop.run_in_executor(app["tts_executor"], worker_ready)
+                for _ in range(NUM_OF_CPUS)
+            )
+        )
+    elif TTS_ENGINE == TTSEngine.FACEBOOK_MMS and FACEBOOK_MMS_PRELOAD:
+        await inner_loop.run_in_executor(
+            app["tts_executor"], preload_facebook_mms_models
+        )
+
 
-    This function constructs an error message from the provided text and file location, logs it, and raises the exception.
+async def close_tts_worker_pools(app):
+    """
+    Stops the pools of warm TTS worker processes, if started.
 
     Args:
-        error_text (str): The error message prefix.
-        file_location (str): The file path or location related to the error.
+        app (aiohttp.web.Application): The application.
 
     Returns:
         None
+    """
+    pools = app.get("tts_worker_pools")
+    if pools is not None:
+        await pools.close()
+
+
+def wave_file_exists(file_path: str) -> bool:
+    """
+    Check if a wave file exists and is valid
+
+    Args:
+        file_path: Path to the wave file
+    Returns:
+        bool: True if file exists and is valid
+    """
+    try:
+        if not os.path.isfile(file_path):
+            return False
+
+        if os.path.getsize(file_path) == 0:
+            return False
+
+        with open(file_path, "rb") as f:
+            header = f.read(44)  # Read WAV header
+            if len(header) < 44 or not header.startswith(b"RIFF"):
+                return False
+
+        return True
+    except (OSError, IOError):
+        return False
+
+
+async def is_audio_ready(request):
+    """
+    Checks if the audio file for the given cache key or message checksum exists and is ready to be served.
+
+    This asynchronous function retrieves the 'audio_key' parameter (returned by `create_audio`) or, for the
+    older clients, the 'msg_chk_sum' parameter from the request, checks for the existence and validity of the
+    corresponding audio file, and returns a JSON response. A message checksum only matches an audio file
+    rendered with the engine and voice of the request (see `request_voice`). With the 'wait' parameter, the
+    answer is delayed up to that many seconds while the audio file is being rendered.
+
+    Args:
+        request: The incoming HTTP request containing the 'audio_key' or the 'msg_chk_sum' parameter, and the
+            optional 'wait', 'engine', 'voice' and 'language' parameters.
+
+    Returns:
+        aiohttp.web.Response: A JSON response indicating whether the audio file exists.
 
     Raises:
-        FileNotFoundError: Always raised with the constructed error message.
+        web.HTTPBadRequest: If both the 'audio_key' and 'msg_chk_sum' parameters are missing from the request,
+            or the engine or voice is not available.
     """
-    error_msg = f"{error_text}{file_location}"
-    logging.error(error_msg)
-    raise FileNotFoundError(error_msg)
+    audio_cache = request.app["audio_cache"]
+    key = request.rel_url.query.get("audio_key")
+    if key is None:
+        try:
+            msg_chk_sum = request.rel_url.query["msg_chk_sum"]
+        except KeyError as err:
+            logging.exception(
+                f"No 'audio_key' or 'msg_chk_sum' parameter passed on: '{request.rel_url}'"
+            )
+            raise web.HTTPBadRequest(
+                reason="Missing msg_chk_sum parameter",
+                body=None,
+                text=None,
+                content_type=None,
+            ) from err
+        key = audio_cache.alias_key(
+            msg_chk_sum, voice_id(request_voice(request.rel_url.query))
+        )
 
+    try:
+        wait_seconds = min(
+            float(request.rel_url.query.get("wait", 0)), IS_AUDIO_READY_MAX_WAIT_SECONDS
+        )
+    except ValueError:
+        wait_seconds = 0
+    if key is not None and wait_seconds > 0:
+        await request.app["render_jobs"].wait(key, wait_seconds)
 
-def text_to_speech_piper_tts(message, output_path):
+    exists = key is not None and await asyncio.to_thread(
+        wave_file_exists, audio_cache.path(key)
+    )
+
+    return web.json_response({"exists": exists})
+
+
+async def render_with_engine(app, message, output_path, voice):
     """
-    Generates an audio file from text using the Piper TTS engine.
+    Renders a message to an audio file with a TTS engine and voice.
 
-    This function constructs the command to run the Piper TTS script with the appropriate model and configuration files,
-    executes the command, and logs the process. It raises an error if any required file is missing or if the TTS process fails.
+    A message of a Piper or Kokoro voice goes to the warm worker pool of the voice when
+    enabled, the other ones to the shared executor of the application (threads or
+    processes, see `render_mode`).
 
     Args:
+        app (aiohttp.web.Application): The application.
         message (str): The text to convert to speech.
         output_path (str): The path where the generated audio file will be saved.
+        voice (Voice): The engine and voice.
 
     Returns:
         None
+    """
+    tts_worker_pools = app.get("tts_worker_pools")
+    if tts_worker_pools is not None and TTS_ENGINES.get(voice.engine).runs_as_script:
+        await tts_worker_pools.synthesize(voice, message, output_path)
+    else:
+        render = render_in_worker if RENDER_MODE == "process" else generate_tts_audio
+        await asyncio.get_running_loop().run_in_executor(
+            app["tts_executor"], render, message, output_path, voice
+        )
+
+
+async def render_audio(app, message, output_path, voice=None):
+    """
+    Renders a message to an audio file, falling back to the next engines of the chain.
+
+    The voice of the request renders first; past the budget of its engine
+    (`tts_engine_budget_seconds`) or on failure, the voices of `tts_fallback_engines`
+    are tried in turn, racing the slow ones (see `render_with_fallback`). The engine
+    that rendered the file and the latency are logged and exported as metrics.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+        message (str): The text to convert to speech.
+        output_path (str): The path where the generated audio file will be saved.
+        voice (Voice): The engine and voice, the configured ones by default.
+
+    Returns:
+        dict: The outcome of the rendering, see `render_with_fallback`.
 
     Raises:
-        FileNotFoundError: If the Python interpreter, Piper script, model, or config file is missing.
-        RuntimeError: If the Piper TTS process fails to execute successfully.
-    """
-    python_interpreter = PIPER_PYTHON_INTERPRETER
-    current_file_dir = os.path.dirname(os.path.abspath(__file__))
-    local_script = os.path.join(
-        current_file_dir,
-        "..",
-        "py_phone_caller_utils",
-        "py_phone_caller_voices",
-        "piper_tts.py",
+        RuntimeError: If no engine of the chain rendered the message.
+    """
+    voice = voice or DEFAULT_VOICE
+    outcome = await render_with_fallback(
+        [(candidate, engine_budget(candidate)) for candidate in fallback_voices(voice)],
+        lambda candidate, path: render_with_engine(app, message, path, candidate),
+        output_path,
+        wave_file_exists,
     )
+    record_render(outcome)
+    log = logging.warning if outcome["fallback"] else logging.info
+    log(f"Rendered with {outcome['candidate']} in {outcome['seconds']}s")
+    return outcome
+
 
-    if os.path.exists(local_script):
-        piper_script = os.path.abspath(local_script)
+async def start_tts_executor(app):
+    """
+    Creates the executor running the TTS engines, shared by all the requests.
+
+    With `render_mode = "process"` the engines run in a pool of `num_of_cpus` worker
+    processes (see `synthesis_worker`), otherwise in a pool of threads.
+
+    Args:
+        app (aiohttp.web.Application): The application, where the executor is stored as 'tts_executor'.
+
+    Returns:
+        None
+    """
+    if RENDER_MODE == "process":
+        app["tts_executor"] = create_synthesis_pool(
+            NUM_OF_CPUS,
+            PIN_RENDER_WORKERS,
+            TTS_ENGINE == TTSEngine.FACEBOOK_MMS and FACEBOOK_MMS_PRELOAD,
+        )
     else:
-        spec = importlib.util.find_spec(
-            "py_phone_caller_utils.py_phone_caller_voices.piper_tts"
+        app["tts_executor"] = ThreadPoolExecutor(
+            max_workers=NUM_OF_CPUS, thread_name_prefix="tts"
         )
-        if spec and spec.origin:
-            piper_script = spec.origin
-        else:
-            piper_script = os.path.join(
-                site.getsitepackages()[0],
-                "py_phone_caller_utils",
-                "py_phone_caller_voices",
-                "piper_tts.py",
-            )
+    app["render_jobs"] = RenderJobs(MAX_PENDING_RENDERS)
+    # Every message in flight renders at most 'segment_max_count' segments
+    app["segment_jobs"] = RenderJobs(MAX_PENDING_RENDERS * SEGMENT_MAX_COUNT)
+
+
+async def close_tts_executor(app):
+    """
+    Shuts the executor of the TTS engines down.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+
+    Returns:
+        None
+    """
+    app["tts_executor"].shutdown(wait=False, cancel_futures=True)
+
+
+async def start_audio_cache(app):
+    """
+    Loads the manifest of the audio cache and starts its periodic flush.
+
+    Args:
+        app (aiohttp.web.Application): The application, where the cache is stored as 'audio_cache'.
+
+    Returns:
+        None
 
-    if not os.path.exists(piper_script):
-        file_not_found_error("Piper TTS script not found at: ", piper_script)
+    Raises:
+        ValueError: If an unknown telephony format is configured.
+    """
+    unknown_formats = set(AUDIO_VARIANT_FORMATS) - set(TELEPHONY_FORMATS)
+    if unknown_formats:
+        raise ValueError(
+            f"Unknown 'audio_variant_formats': {sorted(unknown_formats)}, "
+            + f"expected some of {list(TELEPHONY_FORMATS)}"
+        )
 
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    model_dir = os.path.join(
-        script_dir, PRE_TRAINED_MODELS_FOLDER, PIPER_MODELS_FOLDER, PIPER_LANGUAGE_CODE
+    audio_cache = AudioCache(
+        os.path.join(script_dir, SERVING_AUDIO_FOLDER),
+        AUDIO_CACHE_MAX_MB * 1024 * 1024,
     )
-    model_path = os.path.join(model_dir, f"{PIPER_LANGUAGE_CODE}.onnx")
-    config_path = os.path.join(model_dir, f"{PIPER_LANGUAGE_CODE}.onnx.json")
-
-    if not os.path.exists(model_path):
-        file_not_found_error("Piper model file not found at: ", model_path)
-    if not os.path.exists(config_path):
-        file_not_found_error("Piper config file not found at: ", config_path)
-
-    cmd = [
-        python_interpreter,
-        piper_script,
-        message,
-        "--model",
-        model_path,
-        "--config",
-        config_path,
-        "--output",
-        output_path,
+    await asyncio.to_thread(audio_cache.load)
+    observe_audio_cache(audio_cache)
+    app["audio_cache"] = audio_cache
+    app["audio_files"] = AudioFiles(
+        audio_cache.folder, AUDIO_HOT_SET_MB * 1024 * 1024, AUDIO_HOT_SET_MIN_PLAYS
+    )
+
+    async def flush_audio_cache():
+        while True:
+            await asyncio.sleep(AUDIO_CACHE_FLUSH_SECONDS)
+            await audio_cache.save()
+
+    app["audio_cache_flush"] = asyncio.create_task(flush_audio_cache())
+
+
+async def close_audio_cache(app):
+    """
+    Stops the periodic flush of the audio cache and writes its manifest.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+
+    Returns:
+        None
+    """
+    app["audio_cache_flush"].cancel()
+    await app["audio_cache"].save()
+
+
+async def start_audio_sync(app):
+    """
+    Opens the session notifying the audio sync agent of the new audio files, when enabled.
+
+    Args:
+        app (aiohttp.web.Application): The application, where the session is stored as 'audio_sync_session'.
+
+    Returns:
+        None
+    """
+    app["audio_sync_pushes"] = set()
+    app["audio_sync_session"] = (
+        ClientSession(timeout=ClientTimeout(total=AUDIO_SYNC_TIMEOUT_SECONDS))
+        if ASTERISK_AUDIO_SYNC_ENABLED
+        else None
+    )
+
+
+async def close_audio_sync(app):
+    """
+    Waits for the pending notifications of the audio sync agent and closes its session.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+
+    Returns:
+        None
+    """
+    await asyncio.gather(*app["audio_sync_pushes"], return_exceptions=True)
+    if app["audio_sync_session"] is not None:
+        await app["audio_sync_session"].close()
+
+
+def push_audio_sync(app, audio_keys):
+    """
+    Notifies the audio sync agent of the Asterisk host of new audio files, in the background.
+
+    The agent downloads them at once, so the first playback already reads them from the disk
+    of Asterisk. Only the files recorded in the cache are pushed: the WAV file and the
+    telephony variants actually written. A failure is only logged: the agent fetches a file
+    missed at its playback.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+        audio_keys (list): The keys of the new audio files.
+
+    Returns:
+        None
+    """
+    session = app.get("audio_sync_session")
+    if session is None:
+        return
+    audio_cache = app["audio_cache"]
+    audio_files = [
+        f"{key}.{audio_format}"
+        for key in audio_keys
+        if key in audio_cache.entries
+        for audio_format in ["wav", *audio_cache.variant_formats(key)]
     ]
+    if not audio_files:
+        return
 
-    logging.info(f"Running Piper TTS with command: {' '.join(cmd)}")
+    async def push():
+        try:
+            async with session.post(
+                f"{ASTERISK_AUDIO_SYNC_URL}/{ASTERISK_AUDIO_SYNC_ROUTE}",
+                json={"audio_files": audio_files},
+            ) as response:
+                if response.status != 202:
+                    logging.warning(
+                        f"Audio sync agent response: {response.status} for {audio_files}"
+                    )
+        except (ClientError, asyncio.TimeoutError) as err:
+            logging.warning(f"Unable to notify the audio sync agent: '{err}'")
+
+    task = asyncio.create_task(push())
+    app["audio_sync_pushes"].add(task)
+    task.add_done_callback(app["audio_sync_pushes"].discard)
+
+
+async def write_audio_variants(wav_path, output_path=None, audio_formats=None):
+    """
+    Writes the telephony variants of an audio file (see `audio_variant_formats`).
+
+    A failure is logged without failing the rendering: the WAV file can still be played.
+
+    Args:
+        wav_path (str): The path of the WAV file to encode.
+        output_path (str): The path the variants are named after, `wav_path` by default.
+        audio_formats (list): The formats to write, all the configured ones by default.
 
+    Returns:
+        dict: The size of the variants written, by format.
+    """
+    audio_formats = AUDIO_VARIANT_FORMATS if audio_formats is None else audio_formats
+    if not audio_formats:
+        return {}
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        logging.info(f"Piper TTS completed successfully for output: {output_path}")
-        if result.stdout:
-            logging.debug(f"Piper TTS output: {result.stdout}")
-    except subprocess.CalledProcessError as e:
-        error_msg = (
-            f"Piper TTS process failed with exit code {e.returncode}: {e.stderr}"
+        return await asyncio.to_thread(
+            write_variants, wav_path, audio_formats, output_path
         )
-        logging.error(error_msg)
-        raise RuntimeError(error_msg) from e
-    except Exception as e:
-        error_msg = f"Error running Piper TTS: {str(e)}"
-        logging.error(error_msg)
-        raise RuntimeError(error_msg) from e
+    except Exception as err:
+        logging.exception(f"Unable to write the variants of '{output_path}': '{err}'")
+        return {}
 
 
-def text_to_speech_kokoro_tts(message, output_path):
+async def add_missing_variants(app, key):
     """
-    Generates an audio file from text using the Kokoro TTS engine.
+    Writes the telephony variants missing for a cached audio file (e.g. rendered before they were configured).
 
-    This function constructs the command to run the Kokoro TTS script with the appropriate model and voices files,
-    executes the command, and logs the process. It raises an error if any required file is missing or if the TTS process fails.
+    Run as the rendering job of the key, so concurrent requests for the file write its variants once.
 
-    Supported language codes (configured via kokoro_lang in settings.toml):
-        'a' => American English
-        'b' => British English
-        'e' => Spanish (es)
-        'f' => French (fr-fr)
-        'h' => Hindi (hi)
-        'i' => Italian (it)
-        'j' => Japanese (requires: pip install misaki[ja])
-        'p' => Brazilian Portuguese (pt-br)
-        'z' => Mandarin Chinese (requires: pip install misaki[zh])
+    Args:
+        app (aiohttp.web.Application): The application.
+        key (str): The cache key of the audio file.
+
+    Returns:
+        None
+    """
+    audio_cache = app["audio_cache"]
+    missing_variants = audio_cache.missing_variants(key, AUDIO_VARIANT_FORMATS)
+    if missing_variants:
+        audio_cache.add_variants(
+            key,
+            await write_audio_variants(
+                audio_cache.path(key), audio_formats=missing_variants
+            ),
+        )
+
+
+async def render_segments(app, segments, output_path, voice):
+    """
+    Renders a message as the concatenation of its cached segments.
+
+    Only the segments missing from the cache are rendered (concurrently, each of them once
+    even when shared by several messages in flight), then their audio is joined with a
+    crossfade at each junction.
 
     Args:
+        app (aiohttp.web.Application): The application.
+        segments (list): The static and variable segments of the message, in order.
+        output_path (str): The path where the generated audio file will be saved.
+        voice (Voice): The engine and voice.
+
+    Returns:
+        None
+    """
+    audio_cache = app["audio_cache"]
+    keys = [message_key(segment, voice) for segment in segments]
+    missing = {
+        key: segment
+        for segment, key in zip(segments, keys)
+        if not audio_cache.lookup(key)
+    }
+    await asyncio.gather(
+        *(
+            app["segment_jobs"].run(
+                key,
+                lambda segment=segment, key=key: render_and_cache(
+                    app, segment, key, voice, as_segment=True
+                ),
+            )
+            for key, segment in missing.items()
+        )
+    )
+    await asyncio.to_thread(
+        join_segment_files,
+        [audio_cache.path(key) for key in keys],
+        output_path,
+        int(AUDIO_SAMPLE_RATE * SEGMENT_CROSSFADE_MS / 1000),
+        int(AUDIO_SAMPLE_RATE * SEGMENT_SILENCE_MS / 1000),
+    )
+    logging.info(
+        f"Rendered a message from {len(keys)} segments, {len(missing)} not cached"
+    )
+
+
+async def render_message(app, message, output_path, voice):
+    """
+    Renders a message, from its cached segments when `segment_audio` is set.
+
+    The messages without variable token, or split into more than `segment_max_count`
+    segments, are rendered whole; so are the segmented ones failing to render.
+
+    Args:
+        app (aiohttp.web.Application): The application.
         message (str): The text to convert to speech.
         output_path (str): The path where the generated audio file will be saved.
+        voice (Voice): The engine and voice.
+
+    Returns:
+        dict: The outcome of the rendering of the whole message (see `render_audio`), None
+            if joined from its segments.
+    """
+    segments = split_segments(message) if SEGMENT_AUDIO else [message]
+    if 1 < len(segments) <= SEGMENT_MAX_COUNT:
+        try:
+            await render_segments(app, segments, output_path, voice)
+            return None
+        except Exception as err:
+            logging.exception(
+                f"Unable to render the message from its segments, rendering it whole: '{err}'"
+            )
+    return await render_audio(app, message, output_path, voice)
+
+
+async def render_and_cache(
+    app, message, key, voice=None, msg_chk_sum=None, as_segment=False
+):
+    """
+    Renders a message to its audio file in the cache, with its telephony variants.
+
+    The variants are written before the WAV file is moved to its final path: once the
+    WAV file is ready, so are the variants. The cache entry records the voice that
+    rendered the file (a fallback one, possibly) and the rendering time.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+        message (str): The text to convert to speech.
+        key (str): The cache key of the audio file.
+        voice (Voice): The engine and voice, the configured ones by default.
+        msg_chk_sum (str): The checksum of the message, linked to the audio file if given.
+        as_segment (bool): Whether the message is a segment of another one: rendered whole,
+            without telephony variants.
 
     Returns:
         None
+    """
+    voice = voice or DEFAULT_VOICE
+    audio_cache = app["audio_cache"]
+    output_path = audio_cache.path(key)
+    variants = {}
+    outcomes = []
+
+    async def render(tmp_path):
+        if as_segment:
+            outcomes.append(await render_audio(app, message, tmp_path, voice))
+            return
+        outcomes.append(await render_message(app, message, tmp_path, voice))
+        if await asyncio.to_thread(wave_file_exists, tmp_path):
+            variants.update(await write_audio_variants(tmp_path, output_path))
+
+    await render_atomically(render, output_path, wave_file_exists)
+    outcome = outcomes[0] if outcomes else None
+    audio_cache.add(
+        key,
+        voice_id(voice),
+        msg_chk_sum,
+        variants,
+        rendered_by=outcome and voice_id(outcome["candidate"]),
+        render_seconds=outcome and outcome["seconds"],
+    )
+    if not as_segment:
+        push_audio_sync(app, [key])
+
+
+async def render_chunk(app, chunk, key, voice):
+    try:
+        await render_and_cache(app, chunk, key, voice)
+    except Exception as err:
+        logging.exception(f"Unable to generate the audio chunk {key}: '{err}'")
+        raise
+
+
+async def create_audio_stream(app, message, voice):
+    """
+    Starts the rendering of a message split into sentence chunks, without waiting for it.
+
+    Every chunk is an audio file of the cache: the chunks are rendered in order in the
+    background, so the first one can be played while the next ones are still rendering
+    (see the 'wait' parameter of `is_audio_ready`).
+
+    Args:
+        app (aiohttp.web.Application): The application.
+        message (str): The text to convert to speech.
+        voice (Voice): The engine and voice.
+
+    Returns:
+        aiohttp.web.Response: A JSON response with the status, whether all the chunks were cached
+            and the 'audio_keys' of the chunks, in playback order.
 
     Raises:
-        FileNotFoundError: If the Python interpreter, Kokoro script, model, or voices file is missing.
-        RuntimeError: If the Kokoro TTS process fails to execute successfully.
-    """
-    python_interpreter = KOKORO_PYTHON_INTERPRETER
-    current_file_dir = os.path.dirname(os.path.abspath(__file__))
-    local_script = os.path.join(
-        current_file_dir,
-        "..",
-        "py_phone_caller_utils",
-        "py_phone_caller_voices",
-        "kokoro_tts.py",
-    )
+        web.HTTPServiceUnavailable: If too many renderings are already in progress.
+    """
+    audio_cache = app["audio_cache"]
+    render_jobs = app["render_jobs"]
+    chunks = split_sentences(message, STREAM_CHUNK_MIN_CHARS)
+    keys = [message_key(chunk, voice) for chunk in chunks]
+    missing = {
+        key: chunk for chunk, key in zip(chunks, keys) if not audio_cache.lookup(key)
+    }
 
-    if os.path.exists(local_script):
-        kokoro_script = os.path.abspath(local_script)
-    else:
-        spec = importlib.util.find_spec(
-            "py_phone_caller_utils.py_phone_caller_voices.kokoro_tts"
+    if not render_jobs.has_room(len(missing)):
+        logging.warning(f"Audio generation of {len(missing)} chunks rejected")
+        raise web.HTTPServiceUnavailable(
+            reason="Too many audio renderings in progress",
+            headers={"Retry-After": "1"},
+        )
+    # The executor runs the jobs in submission order: the first chunk is ready first.
+    for key, chunk in missing.items():
+        render_jobs.submit(
+            key, lambda chunk=chunk, key=key: render_chunk(app, chunk, key, voice)
         )
-        if spec and spec.origin:
-            kokoro_script = spec.origin
-        else:
-            # Fallback to the old method
-            kokoro_script = os.path.join(
-                site.getsitepackages()[0],
-                "py_phone_caller_utils",
-                "py_phone_caller_voices",
-                "kokoro_tts.py",
-            )
 
-    if not os.path.exists(kokoro_script):
-        file_not_found_error("Kokoro TTS script not found at: ", kokoro_script)
-
-    # Voice name mapping based on language code (matches get_kokoro_tts_model.py)
-    voice_name_map = {
-        "a": "af_heart",  # American English
-        "b": "bf_emma",  # British English
-        "e": "ef_dora",  # Spanish
-        "f": "ff_siwis",  # French
-        "h": "hf_alpha",  # Hindi
-        "i": "if_sara",  # Italian
-        "j": "jf_alpha",  # Japanese
-        "p": "pf_dora",  # Brazilian Portuguese
-        "z": "zf_xiaobei",  # Mandarin Chinese
-    }
-    voice_name = voice_name_map.get(KOKORO_LANG, "af_heart")
-
-    cmd = [
-        python_interpreter,
-        kokoro_script,
-        message,
-        "--voice-name",
-        voice_name,
-        "--lang",
-        KOKORO_LANG,
-        "--output",
-        output_path,
-    ]
+    logging.info(f"Streaming a message in {len(keys)} chunks, {len(missing)} to render")
+    return web.json_response(
+        {
+            "status": 200,
+            "cached": not missing,
+            "audio_key": keys[0],
+            "audio_keys": keys,
+        }
+    )
+
+
+def supports_batched_inference(voice):
+    """
+    Tells whether the engine of a voice renders several messages in one inference.
+
+    Args:
+        voice (Voice): The engine and voice.
+
+    Returns:
+        bool: True with the Facebook MMS engine.
+    """
+    return TTS_ENGINES.get(voice.engine).batch_target is not None
+
 
-    logging.info(f"Running Kokoro TTS with command: {' '.join(cmd)}")
+async def render_batch_and_cache(app, messages_by_key, voice):
+    """
+    Renders several messages with one batched inference, to their audio files in the cache.
+
+    Every audio file is rendered to a temporary file, then moved to its final path
+    with its telephony variants, like `render_and_cache` does.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+        messages_by_key (dict): The messages to render, by cache key.
+        voice (Voice): The engine and voice.
 
+    Returns:
+        list: The keys of the messages without a valid audio file.
+    """
+    audio_cache = app["audio_cache"]
+    tmp_paths = {key: temporary_path(audio_cache.path(key)) for key in messages_by_key}
+    render = (
+        render_batch_in_worker if RENDER_MODE == "process" else generate_tts_audio_batch
+    )
+    failed = []
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        logging.info(f"Kokoro TTS completed successfully for output: {output_path}")
-        if result.stdout:
-            logging.debug(f"Kokoro TTS output: {result.stdout}")
-    except subprocess.CalledProcessError as e:
-        error_msg = (
-            f"Kokoro TTS process failed with exit code {e.returncode}: {e.stderr}"
+        await asyncio.get_running_loop().run_in_executor(
+            app["tts_executor"],
+            render,
+            list(messages_by_key.values()),
+            list(tmp_paths.values()),
+            voice,
         )
-        logging.error(error_msg)
-        raise RuntimeError(error_msg) from e
-    except Exception as e:
-        error_msg = f"Error running Kokoro TTS: {str(e)}"
-        logging.error(error_msg)
-        raise RuntimeError(error_msg) from e
+        for key, tmp_path in tmp_paths.items():
+            if not await asyncio.to_thread(wave_file_exists, tmp_path):
+                failed.append(key)
+                continue
+            output_path = audio_cache.path(key)
+            variants = await write_audio_variants(tmp_path, output_path)
+            os.replace(tmp_path, output_path)
+            audio_cache.add(key, voice_id(voice), variants=variants)
+        push_audio_sync(app, [key for key in messages_by_key if key not in failed])
+    finally:
+        for tmp_path in tmp_paths.values():
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError as err:
+                    logging.warning(f"Unable to remove '{tmp_path}': {err}")
+    return failed
+
+
+async def render_batch_message(app, batch, key, message, voice):
+    """
+    Renders a message of a batch, sharing the rendering of the requests for the same audio.
 
+    Args:
+        app (aiohttp.web.Application): The application.
+        batch (BatchRender): The batch of the message.
+        key (str): The cache key of the audio file.
+        message (str): The text to convert to speech.
+        voice (Voice): The engine and voice.
 
-def wave_file_exists(file_path: str) -> bool:
+    Returns:
+        None
     """
-    Check if a wave file exists and is valid
+    while True:
+        try:
+            await app["render_jobs"].run(
+                key, lambda: render_and_cache(app, message, key, voice)
+            )
+            batch.rendered += 1
+            return
+        except RenderQueueFull:
+            await asyncio.sleep(BATCH_RETRY_SECONDS)
+        except Exception as err:
+            logging.exception(f"Unable to pre-render the message '{message}': '{err}'")
+            batch.failed.append(message)
+            return
+
+
+async def render_batch_group(app, batch, messages_by_key, voice):
+    """
+    Renders a group of messages of a batch with one batched inference.
+
+    The messages are rendering jobs (see `RenderJobs.run_batch`): the requests for one of them
+    wait for the batch instead of rendering it again, and the messages already being rendered
+    are left out of the inference.
 
     Args:
-        file_path: Path to the wave file
+        app (aiohttp.web.Application): The application.
+        batch (BatchRender): The batch of the messages.
+        messages_by_key (dict): The messages to render, by cache key.
+        voice (Voice): The engine and voice.
+
     Returns:
-        bool: True if file exists and is valid
+        None
     """
+
+    def render(keys):
+        return render_batch_and_cache(
+            app, {key: messages_by_key[key] for key in keys}, voice
+        )
+
     try:
-        if not os.path.isfile(file_path):
-            return False
+        while True:
+            try:
+                failed = await app["render_jobs"].run_batch(
+                    list(messages_by_key), render
+                )
+                break
+            except RenderQueueFull:
+                await asyncio.sleep(BATCH_RETRY_SECONDS)
+    except Exception as err:
+        logging.exception(f"Unable to pre-render a group of messages: '{err}'")
+        failed = list(messages_by_key)
+    batch.failed.extend(messages_by_key[key] for key in failed)
+    batch.rendered += len(messages_by_key) - len(failed)
 
-        if os.path.getsize(file_path) == 0:
-            return False
 
-        with open(file_path, "rb") as f:
-            header = f.read(44)  # Read WAV header
-            if len(header) < 44 or not header.startswith(b"RIFF"):
-                return False
+async def run_batch(app, batch, voice):
+    """
+    Renders the messages of a batch missing from the cache, with bounded parallelism.
 
-        return True
-    except (OSError, IOError):
-        return False
+    At most `batch_render_concurrency` renderings of the batch run at the same time. All the
+    running batches together never hold more than half of `max_pending_renders` rendering jobs
+    (see `BatchRenders.reserve`), the rest is left to the calls. With an engine supporting it,
+    the messages are rendered in groups of `batch_inference_size` by batched inferences, a
+    group holding a job per message.
 
+    Args:
+        app (aiohttp.web.Application): The application.
+        batch (BatchRender): The batch to render.
+        voice (Voice): The engine and voice of the batch.
 
-async def is_audio_ready(request):
+    Returns:
+        None
     """
-    Checks if the audio file for the given message checksum exists and is ready to be served.
+    audio_cache = app["audio_cache"]
+    missing = {}
+    for message in batch.messages:
+        key = message_key(message, voice)
+        if audio_cache.lookup(key):
+            batch.cached += 1
+        else:
+            missing[key] = message
+
+    semaphore = asyncio.Semaphore(
+        max(1, min(BATCH_RENDER_CONCURRENCY, MAX_PENDING_RENDERS // 2))
+    )
+
+    async def bounded(render, jobs):
+        async with semaphore, app["batch_renders"].reserve(jobs):
+            await render
+
+    if supports_batched_inference(voice):
+        items = list(missing.items())
+        # A group larger than half of the jobs in flight could never start
+        group_size = max(1, min(BATCH_INFERENCE_SIZE, MAX_PENDING_RENDERS // 2))
+        groups = [
+            dict(items[start : start + group_size])
+            for start in range(0, len(items), group_size)
+        ]
+        renders = [
+            (render_batch_group(app, batch, group, voice), len(group))
+            for group in groups
+        ]
+    else:
+        renders = [
+            (render_batch_message(app, batch, key, message, voice), 1)
+            for key, message in missing.items()
+        ]
+
+    try:
+        await asyncio.gather(*(bounded(render, jobs) for render, jobs in renders))
+    finally:
+        batch.finished_at = time.time()
+        logging.info(f"Batch {batch.batch_id} finished: {batch.progress()}")
 
-    This asynchronous function retrieves the 'msg_chk_sum' parameter from the request, checks for the existence and validity of the corresponding audio file, and returns a JSON response.
+
+async def create_audio_batch(request):
+    """
+    Handles the requests to pre-render a batch of messages, to warm the audio cache.
+
+    The body is a JSON object with the 'messages' to render, and optionally the 'engine',
+    'voice' or 'language' to render them with (see `request_voice`). The rendering runs in
+    the background: the response returns at once with the 'batch_id', whose progress is
+    then answered by `batch_progress`.
 
     Args:
-        request: The incoming HTTP request containing the 'msg_chk_sum' parameter.
+        request: The incoming HTTP request, with the JSON body {"messages": [...]}.
 
     Returns:
-        aiohttp.web.Response: A JSON response indicating whether the audio file exists.
+        aiohttp.web.Response: A '202' JSON response with the progress of the new batch.
 
     Raises:
-        web.HTTPBadRequest: If the 'msg_chk_sum' parameter is missing from the request.
+        web.HTTPBadRequest: If the body is not a list of messages, or a too long one, or the
+            engine or voice is not available.
     """
     try:
-        msg_chk_sum = request.rel_url.query["msg_chk_sum"]
-    except KeyError as err:
-        logging.exception(f"No 'msg_chk_sum' parameter passed on: '{request.rel_url}'")
+        body = await request.json()
+        messages = body["messages"]
+        if not isinstance(messages, list) or not all(
+            isinstance(message, str) for message in messages
+        ):
+            raise TypeError("'messages' is not a list of strings")
+    except (ValueError, KeyError, TypeError) as err:
+        logging.exception(f"Invalid batch of messages on: '{request.rel_url}'")
         raise web.HTTPBadRequest(
-            reason="Missing msg_chk_sum parameter",
+            reason=GENERATE_AUDIO_ERROR, body=None, text=None, content_type=None
+        ) from err
+
+    messages = [message.strip() for message in messages if message.strip()]
+    if len(messages) > BATCH_MAX_MESSAGES:
+        raise web.HTTPBadRequest(
+            reason=f"More than {BATCH_MAX_MESSAGES} messages in the batch",
             body=None,
             text=None,
             content_type=None,
-        ) from err
+        )
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(script_dir, SERVING_AUDIO_FOLDER, f"{msg_chk_sum}.wav")
-    exists = await asyncio.to_thread(wave_file_exists, output_path)
+    voice = request_voice(body)
+    batch = request.app["batch_renders"].create(messages)
+    batch.task = asyncio.create_task(run_batch(request.app, batch, voice))
+    logging.info(
+        f"Batch {batch.batch_id} of {batch.total} messages started with {voice}"
+    )
+    return web.json_response(batch.progress(), status=202)
 
-    return web.json_response({"exists": exists})
+
+async def batch_progress(request):
+    """
+    Answers the progress of a batch started by `create_audio_batch`.
+
+    Args:
+        request: The incoming HTTP request, with the 'batch_id' in its path.
+
+    Returns:
+        aiohttp.web.Response: A JSON response with the progress of the batch.
+
+    Raises:
+        web.HTTPNotFound: If the batch is unknown (or finished long ago).
+    """
+    batch = request.app["batch_renders"].get(request.match_info["batch_id"])
+    if batch is None:
+        raise web.HTTPNotFound(reason="Unknown batch")
+    return web.json_response(batch.progress())
+
+
+async def close_batch_renders(app):
+    """
+    Cancels the batches still rendering.
+
+    Args:
+        app (aiohttp.web.Application): The application.
+
+    Returns:
+        None
+    """
+    for batch in app["batch_renders"].running():
+        if batch.task is not None:
+            batch.task.cancel()
 
 
 async def create_audio(request):
     """
-    Handles incoming requests to generate an audio file from text using the configured TTS engine.
+    Handles incoming requests to generate an audio file from text using a TTS engine.
+
+    This asynchronous function extracts the message and checksum from the request, looks the audio file up in the
+    cache, generates the audio if needed, and returns a JSON response indicating the status, the cache state and the
+    'audio_key' naming the file (`<audio_key>.wav`, and `<audio_key>.ulaw` etc. for its telephony variants). The key covers the message, the engine, the voice and the sample
+    rate, so an audio file rendered with another voice is never reused.
 
-    This asynchronous function extracts the message and checksum from the request, checks for an existing audio file,
-    generates the audio if needed, and returns a JSON response indicating the status and cache state.
+    Concurrent requests for the same audio share a single rendering, written to a
+    temporary file and then renamed, so a partially written file is never served.
+
+    The optional 'engine', 'voice' and 'language' parameters pick the engine and voice of the audio, the
+    configured ones by default (see `request_voice`). With 'stream=true' the message is rendered as sentence
+    chunks instead, see `create_audio_stream`.
 
     Args:
-        request: The incoming HTTP request containing 'message' and 'msg_chk_sum' parameters.
+        request: The incoming HTTP request containing 'message' and 'msg_chk_sum' parameters, and the optional
+            'engine', 'voice', 'language' and 'stream' parameters.
 
     Returns:
-        aiohttp.web.Response: A JSON response indicating the status and whether the audio was cached.
+        aiohttp.web.Response: A JSON response indicating the status, whether the audio was cached, its key and
+            the formats of the telephony 'variants' written for it (a failed encoding leaves only the WAV file).
 
     Raises:
-        web.HTTPBadRequest: If any required parameter is missing from the request.
+        web.HTTPBadRequest: If any required parameter is missing from the request, or the engine or voice is
+            not available.
+        web.HTTPServiceUnavailable: If too many renderings are already in progress.
     """
     try:
         message = request.rel_url.query["message"]
@@ -466,32 +1227,57 @@ async def create_audio(request):
             content_type=None,
         ) from err
 
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(script_dir, SERVING_AUDIO_FOLDER, f"{msg_chk_sum}.wav")
+    voice = request_voice(request.rel_url.query)
+    if request.rel_url.query.get("stream", "false").lower() == "true":
+        return await create_audio_stream(request.app, message, voice)
+
+    audio_cache = request.app["audio_cache"]
+    key = message_key(message, voice)
 
-    exists = await asyncio.to_thread(wave_file_exists, output_path)
-    if exists:
+    if audio_cache.lookup(key):
         logging.info(
-            f"Audio file already exists for message checksum {msg_chk_sum}, skipping generation"
+            f"Audio file {key} already exists for message checksum {msg_chk_sum}, skipping generation"
+        )
+        audio_cache.link(msg_chk_sum, key)
+        if audio_cache.missing_variants(key, AUDIO_VARIANT_FORMATS):
+            try:
+                await request.app["render_jobs"].run(
+                    key, lambda: add_missing_variants(request.app, key)
+                )
+            except RenderQueueFull as err:
+                logging.warning(f"Variants of {key} not written for now: {err}")
+        return web.json_response(
+            {
+                "status": 200,
+                "cached": True,
+                "audio_key": key,
+                "variants": audio_cache.variant_formats(key),
+            }
         )
-        return web.json_response({"status": 200, "cached": True})
-
-    inner_loop = asyncio.get_running_loop()
-    executor = ThreadPoolExecutor(max_workers=NUM_OF_CPUS)
 
     try:
-        futures = inner_loop.run_in_executor(
-            executor, generate_tts_audio, message, output_path
+        await request.app["render_jobs"].run(
+            key,
+            lambda: render_and_cache(request.app, message, key, voice, msg_chk_sum),
         )
-        await asyncio.ensure_future(futures)
         status_code = 200
+    except RenderQueueFull as err:
+        logging.warning(f"Audio generation for {msg_chk_sum} rejected: {err}")
+        raise web.HTTPServiceUnavailable(
+            reason=str(err), headers={"Retry-After": "1"}
+        ) from err
     except Exception as err:
         status_code = 500
-        logging.exception(
-            f"Unable to generate the audio file using {TTS_ENGINE.value}: '{err}'"
-        )
-
-    return web.json_response({"status": status_code, "cached": False})
+        logging.exception(f"Unable to generate the audio file using {voice}: '{err}'")
+
+    return web.json_response(
+        {
+            "status": status_code,
+            "cached": False,
+            "audio_key": key,
+            "variants": audio_cache.variant_formats(key),
+        }
+    )
 
 
 async def ensure_models_present():
@@ -624,18 +1410,35 @@ async def init_app():
 
     await ensure_models_present()
 
+    app.on_startup.append(start_audio_cache)
+    app.on_startup.append(start_tts_executor)
+    app.on_startup.append(preload_tts_models)
+    app.on_startup.append(start_tts_worker_pools)
+    app.on_startup.append(start_audio_sync)
+    app.on_cleanup.append(close_batch_renders)
+    app.on_cleanup.append(close_tts_worker_pools)
+    app.on_cleanup.append(close_tts_executor)
+    app.on_cleanup.append(close_audio_cache)
+    app.on_cleanup.append(close_audio_sync)
+
     app.router.add_route("POST", f"/{GENERATE_AUDIO_APP_ROUTE}", create_audio)
 
     app.router.add_route("GET", f"/{IS_AUDIO_READY_ENDPOINT}", is_audio_ready)
 
-    path_to_static_folder = abs_serving_audio
-    try:
-        app.router.add_static("/audio", path_to_static_folder, show_index=True)
-    except ValueError:
-        logging.exception(
-            f"No '{path_to_static_folder}' folder present... I can't serve the audio files"
+    app.router.add_route("GET", f"/{GENERATE_AUDIO_ENGINES_ROUTE}", list_engines)
+
+    app["batch_renders"] = BatchRenders(max_jobs=MAX_PENDING_RENDERS // 2)
+    app.router.add_route("POST", f"/{GENERATE_AUDIO_BATCH_ROUTE}", create_audio_batch)
+    app.router.add_route(
+        "GET", f"/{GENERATE_AUDIO_BATCH_ROUTE}/{{batch_id}}", batch_progress
+    )
+
+    if not os.path.isdir(abs_serving_audio):
+        logging.error(
+            f"No '{abs_serving_audio}' folder present... I can't serve the audio files"
         )
         exit(1)
+    add_audio_routes(app)
 
     return app
 
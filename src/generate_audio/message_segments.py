@@ -0,0 +1,146 @@
+"""
+Phrase-level segments of the templated alert messages.
+
+The alerts are mostly templates ("Alert HighLoad on host web-01 is firing"):
+the static parts are the same across thousands of messages, only the variable
+tokens (host names, numbers, identifiers) change. A message is split into
+static and variable segments, each rendered and cached as its own audio file;
+the audio of the message is the concatenation of the segments, with a short
+crossfade at each junction, so a new message mostly costs the rendering of its
+variable tokens.
+"""
+
+import re
+
+import numpy as np
+from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+    wav_bytes,
+)
+
+from generate_audio.telephony_formats import SAMPLE_RATE, read_wav_pcm
+
+# Numbers, and the words with digits or inner separators: host names, IPs, paths, ids
+VARIABLE_TOKEN = re.compile(r"(?<![\w/])(?:/?(?:\w+[.\-_:/])+\w+/?|\w*\d\w*)(?!\w)")
+# The punctuation starting a piece of text, kept with the previous segment
+LEADING_PUNCTUATION = re.compile(r"^[^\w\s]+")
+# Below this amplitude a sample at the edges of a segment is silence
+SILENCE_THRESHOLD = 328
+
+
+def split_segments(text):
+    """
+    Splits a message into its static and variable segments, in order.
+
+    The punctuation between two tokens is kept with the previous segment, so
+    every segment has something to say.
+
+    Args:
+        text (str): The text of the message.
+
+    Returns:
+        list: The segments, as stripped strings; a single one if the message has no variable token.
+    """
+    pieces = []
+    position = 0
+    for match in VARIABLE_TOKEN.finditer(text):
+        pieces.append(text[position : match.start()])
+        pieces.append(match.group(0))
+        position = match.end()
+    pieces.append(text[position:])
+
+    segments = []
+    # The pieces alternate: static text, variable token, static text...
+    for index, piece in enumerate(pieces):
+        piece = piece.strip()
+        punctuation = index % 2 == 0 and LEADING_PUNCTUATION.match(piece)
+        if segments and punctuation:
+            segments[-1] = f"{segments[-1]}{punctuation.group(0)}"
+            piece = piece[punctuation.end() :].strip()
+        if piece:
+            segments.append(piece)
+    return segments or [text.strip()]
+
+
+def trim_silence(pcm, keep):
+    """
+    Trims the silence at the edges of a segment, keeping a little of it.
+
+    Args:
+        pcm (numpy.ndarray): The int16 samples of the segment.
+        keep (int): The samples of silence to keep at each edge.
+
+    Returns:
+        numpy.ndarray: A view of the samples, trimmed.
+    """
+    loud = np.flatnonzero(np.abs(pcm.astype(np.int32)) > SILENCE_THRESHOLD)
+    if not len(loud):
+        return pcm[:0]
+    return pcm[max(0, loud[0] - keep) : loud[-1] + 1 + keep]
+
+
+def crossfade_concat(segments, overlap):
+    """
+    Concatenates the audio of some segments, crossfading them at each junction.
+
+    The end of a segment fades out while the start of the next one fades in,
+    over `overlap` samples (fewer if a segment is shorter), in a single output
+    buffer.
+
+    Args:
+        segments (list): The int16 samples of every segment, in order.
+        overlap (int): The samples of the crossfades.
+
+    Returns:
+        numpy.ndarray: The int16 samples of the message.
+    """
+    segments = [segment for segment in segments if len(segment)]
+    if not segments:
+        return np.zeros(0, dtype=np.int16)
+
+    overlaps = [
+        min(overlap, len(previous), len(following))
+        for previous, following in zip(segments, segments[1:])
+    ]
+    output = np.zeros(
+        sum(len(segment) for segment in segments) - sum(overlaps), dtype=np.float32
+    )
+
+    position = 0
+    for index, segment in enumerate(segments):
+        samples = segment.astype(np.float32)
+        fade_in = overlaps[index - 1] if index else 0
+        fade_out = overlaps[index] if index < len(overlaps) else 0
+        if fade_in:
+            samples[:fade_in] *= np.linspace(0.0, 1.0, fade_in, dtype=np.float32)
+        if fade_out:
+            samples[len(samples) - fade_out :] *= np.linspace(
+                1.0, 0.0, fade_out, dtype=np.float32
+            )
+        # The fade in overlaps the fade out of the previous segment
+        position -= fade_in
+        output[position : position + len(samples)] += samples
+        position += len(samples)
+
+    np.clip(output, -32768, 32767, out=output)
+    return np.rint(output).astype(np.int16)
+
+
+def join_segment_files(segment_paths, output_path, overlap, keep):
+    """
+    Joins the audio files of the segments of a message into its audio file.
+
+    Args:
+        segment_paths (list): The WAV files of the segments, in order.
+        output_path (str): The WAV file of the message.
+        overlap (int): The samples of the crossfades.
+        keep (int): The samples of silence kept at the edges of every segment.
+
+    Returns:
+        int: The number of samples written.
+    """
+    samples = crossfade_concat(
+        [trim_silence(read_wav_pcm(path), keep) for path in segment_paths], overlap
+    )
+    with open(output_path, "wb") as output:
+        output.write(wav_bytes(samples, SAMPLE_RATE))
+    return len(samples)
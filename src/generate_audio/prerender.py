@@ -0,0 +1,201 @@
+"""
+Pre-renders a batch of messages through the GenerateAudio service, to warm its cache.
+
+    python -m generate_audio.prerender alerts.rules.yml messages.txt --message "Server down"
+    python -m generate_audio.prerender messages.txt --engine piper_tts --language en
+
+The messages are read from:
+
+- Prometheus rule files (.yml/.yaml): the 'description' annotation of every
+  alerting rule, as spoken by `caller_prometheus_webhook`. The templated parts
+  ("{{ $labels.instance }}") are only known when the alert fires: of a
+  templated description only the static segments are rendered, which the
+  segment cache (`segment_audio`) reuses;
+- JSON files (.json): a list of messages;
+- any other file: one message per line, the lines starting with '#' ignored.
+
+The messages are rendered with the engine and voice configured in the service,
+or the ones given with '--engine', '--voice' or '--language'. The batch renders
+in the background of the service; its progress is printed until it is done. The exit code is 1 if some messages failed to render.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+
+import yaml
+from aiohttp import ClientSession, ClientTimeout
+from py_phone_caller_utils.config import settings
+
+from generate_audio.constants import (
+    GENERATE_AUDIO_BATCH_ROUTE,
+    LOG_FORMATTER,
+    LOG_LEVEL,
+)
+from generate_audio.message_segments import LEADING_PUNCTUATION, split_segments
+
+logging.basicConfig(format=LOG_FORMATTER, level=LOG_LEVEL, force=True)
+
+GENERATE_AUDIO_URL = f"{settings.generate_audio.generate_audio_http_scheme}://{settings.generate_audio.generate_audio_host}:{settings.generate_audio.generate_audio_port}"
+# The Go templates of the Prometheus annotations
+TEMPLATE = re.compile(r"\{\{.*?\}\}", re.DOTALL)
+REQUEST_TIMEOUT_SECONDS = 30
+
+
+def template_messages(description):
+    """
+    Returns the messages to pre-render for an alert description.
+
+    Args:
+        description (str): The description, possibly templated.
+
+    Returns:
+        list: The description itself, or the static segments of a templated one.
+    """
+    if not TEMPLATE.search(description):
+        return [description.strip()]
+    messages = []
+    for static_part in TEMPLATE.split(description):
+        # The punctuation following a template value is spoken with the value
+        static_part = LEADING_PUNCTUATION.sub("", static_part.strip())
+        if static_part:
+            messages.extend(split_segments(static_part))
+    return messages
+
+
+def rule_messages(content):
+    """
+    Extracts the messages of the alerting rules of a Prometheus rule file.
+
+    Args:
+        content (dict): The parsed rule file.
+
+    Returns:
+        list: The messages of the alert descriptions.
+    """
+    messages = []
+    for group in (content or {}).get("groups", []):
+        for rule in group.get("rules", []):
+            description = (rule.get("annotations") or {}).get("description")
+            if rule.get("alert") and description:
+                messages.extend(template_messages(description))
+    return messages
+
+
+def read_messages(path):
+    """
+    Reads the messages of a file, according to its extension.
+
+    Args:
+        path (str): The path of the file.
+
+    Returns:
+        list: The messages.
+    """
+    with open(path, encoding="utf-8") as messages_file:
+        if path.endswith((".yml", ".yaml")):
+            return rule_messages(yaml.safe_load(messages_file))
+        if path.endswith(".json"):
+            return [str(message) for message in json.load(messages_file)]
+        return [
+            line.strip()
+            for line in messages_file
+            if line.strip() and not line.lstrip().startswith("#")
+        ]
+
+
+def format_progress(progress):
+    return (
+        f"{progress['done']}/{progress['total']} messages "
+        + f"({progress['cached']} cached, {progress['rendered']} rendered, "
+        + f"{progress['failed']} failed) in {progress['elapsed_seconds']}s"
+    )
+
+
+async def prerender(messages, url=GENERATE_AUDIO_URL, poll_seconds=2.0, voice=None):
+    """
+    Sends a batch of messages to the GenerateAudio service and follows its progress.
+
+    Args:
+        messages (list): The messages to pre-render.
+        url (str): The base URL of the GenerateAudio service.
+        poll_seconds (float): The interval between two progress requests.
+        voice (dict): The 'engine', 'voice' or 'language' of the batch, the ones of the service by default.
+
+    Returns:
+        dict: The final progress of the batch.
+    """
+    batch_url = f"{url}/{GENERATE_AUDIO_BATCH_ROUTE}"
+    async with ClientSession(
+        timeout=ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+    ) as session:
+        async with session.post(
+            batch_url, json={**(voice or {}), "messages": messages}
+        ) as response:
+            response.raise_for_status()
+            progress = await response.json()
+        logging.info(f"Batch {progress['batch_id']}: {format_progress(progress)}")
+
+        while not progress["finished"]:
+            await asyncio.sleep(poll_seconds)
+            async with session.get(f"{batch_url}/{progress['batch_id']}") as response:
+                response.raise_for_status()
+                progress = await response.json()
+            logging.info(f"Batch {progress['batch_id']}: {format_progress(progress)}")
+
+    for message in progress["failed_messages"]:
+        logging.error(f"Unable to pre-render: '{message}'")
+    return progress
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-render messages with the GenerateAudio service."
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="Prometheus rule files (.yml), JSON lists (.json) or text files (one message per line)",
+    )
+    parser.add_argument(
+        "--message",
+        action="append",
+        default=[],
+        help="A message to pre-render, can be repeated",
+    )
+    parser.add_argument(
+        "--engine", help="The TTS engine, the configured one by default"
+    )
+    parser.add_argument("--voice", help="A voice of the engine")
+    parser.add_argument(
+        "--language", help="The language, to pick a voice of the engine"
+    )
+    parser.add_argument("--url", default=GENERATE_AUDIO_URL)
+    parser.add_argument("--poll-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    messages = list(args.message)
+    for path in args.files:
+        messages.extend(read_messages(path))
+    messages = list(dict.fromkeys(message for message in messages if message))
+    if not messages:
+        parser.error("No message to pre-render")
+
+    voice = {
+        name: value
+        for name, value in (
+            ("engine", args.engine),
+            ("voice", args.voice),
+            ("language", args.language),
+        )
+        if value
+    }
+    progress = asyncio.run(prerender(messages, args.url, args.poll_seconds, voice))
+    sys.exit(1 if progress["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
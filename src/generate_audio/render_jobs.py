@@ -0,0 +1,245 @@
+"""
+Bounded, de-duplicated rendering jobs of the audio files.
+
+Every message is rendered once at a time: the requests for a message already
+being rendered (same checksum) wait for the job in flight instead of starting a
+new one. The number of jobs in flight is bounded, so a burst of requests is
+rejected early instead of piling up in front of the TTS engine.
+"""
+
+import asyncio
+import logging
+import os
+import uuid
+
+
+class RenderQueueFull(RuntimeError):
+    """
+    Raised when a new rendering job exceeds the number of jobs allowed in flight.
+    """
+
+
+class RenderJobs:
+    """
+    The rendering jobs in flight, keyed by the audio file they render.
+    """
+
+    def __init__(self, max_pending):
+        """
+        Args:
+            max_pending (int): The number of distinct jobs allowed in flight.
+        """
+        self.max_pending = max(1, int(max_pending))
+        self._jobs = {}
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def has_room(self, count=1):
+        """
+        Tells whether some new jobs can be started.
+
+        Args:
+            count (int): The number of new jobs.
+
+        Returns:
+            bool: True if the jobs would not exceed the number of jobs allowed in flight.
+        """
+        return len(self._jobs) + count <= self.max_pending
+
+    def submit(self, key, render):
+        """
+        Starts a rendering job, unless one is already in flight for the same key.
+
+        The job runs in its own task: a requester going away does not cancel it
+        for the others.
+
+        Args:
+            key (str): The key of the job (the key of the audio file).
+            render (Callable[[], Awaitable]): Starts the rendering.
+
+        Returns:
+            tuple: The task of the job, and True if it was started by this call.
+
+        Raises:
+            RenderQueueFull: If too many jobs are in flight.
+        """
+        job = self._jobs.get(key)
+        if job is not None:
+            return job, False
+        if not self.has_room():
+            raise RenderQueueFull(
+                f"{len(self._jobs)} audio renderings already in progress"
+            )
+        job = asyncio.ensure_future(render())
+        self._jobs[key] = job
+        job.add_done_callback(lambda done: self._job_done(key, done))
+        return job, True
+
+    async def run(self, key, render):
+        """
+        Runs a rendering job, or joins the one in flight for the same key.
+
+        Args:
+            key (str): The key of the job (the key of the audio file).
+            render (Callable[[], Awaitable]): Starts the rendering.
+
+        Returns:
+            bool: True if the job was started by this call, False if it was joined.
+
+        Raises:
+            RenderQueueFull: If too many jobs are in flight.
+            Exception: Any error raised by the rendering.
+        """
+        job, started = self.submit(key, render)
+        await asyncio.shield(job)
+        return started
+
+    def submit_batch(self, keys, render):
+        """
+        Starts a job rendering several keys at once (e.g. one batched inference), for the keys not in flight.
+
+        Every key of the batch is registered as a job of its own, joined by `run` and `wait` like
+        the others and counted in the jobs allowed in flight; it ends with the batch, failed if
+        the batch reports it failed.
+
+        Args:
+            keys (list): The keys of the jobs.
+            render (Callable[[list], Awaitable[list]]): Renders the given keys, returning the failed ones.
+
+        Returns:
+            tuple: The task of the batch (None if every key is already in flight), and the tasks of the
+                keys already in flight, by key.
+
+        Raises:
+            RenderQueueFull: If the keys would exceed the number of jobs allowed in flight.
+        """
+        in_flight = {key: self._jobs[key] for key in keys if key in self._jobs}
+        new_keys = [key for key in dict.fromkeys(keys) if key not in in_flight]
+        if not new_keys:
+            return None, in_flight
+        if not self.has_room(len(new_keys)):
+            raise RenderQueueFull(
+                f"{len(self._jobs)} audio renderings already in progress"
+            )
+        loop = asyncio.get_running_loop()
+        key_jobs = {key: loop.create_future() for key in new_keys}
+        for key, job in key_jobs.items():
+            self._jobs[key] = job
+            job.add_done_callback(lambda done, key=key: self._job_done(key, done))
+        batch = asyncio.ensure_future(render(new_keys))
+        batch.add_done_callback(lambda done: self._batch_done(key_jobs, done))
+        return batch, in_flight
+
+    async def run_batch(self, keys, render):
+        """
+        Renders several keys with one job, joining the jobs already in flight for some of them.
+
+        Args:
+            keys (list): The keys of the jobs.
+            render (Callable[[list], Awaitable[list]]): Renders the given keys, returning the failed ones.
+
+        Returns:
+            list: The failed keys.
+
+        Raises:
+            RenderQueueFull: If the keys would exceed the number of jobs allowed in flight.
+            Exception: Any error raised by the rendering of the batch.
+        """
+        batch, in_flight = self.submit_batch(keys, render)
+        failed = list(await asyncio.shield(batch)) if batch is not None else []
+        for key, job in in_flight.items():
+            try:
+                await asyncio.shield(job)
+            except Exception:
+                failed.append(key)
+        return failed
+
+    async def wait(self, key, timeout):
+        """
+        Waits for the job in flight for a key, if any, to end.
+
+        Args:
+            key (str): The key of the job.
+            timeout (float): The maximum seconds to wait.
+
+        Returns:
+            None
+        """
+        job = self._jobs.get(key)
+        if job is None:
+            return
+        await asyncio.wait([job], timeout=timeout)
+
+    @staticmethod
+    def _batch_done(key_jobs, batch):
+        if batch.cancelled():
+            for job in key_jobs.values():
+                job.cancel()
+            return
+        error = batch.exception()
+        failed = set() if error is not None else set(batch.result())
+        for key, job in key_jobs.items():
+            if error is not None:
+                job.set_exception(error)
+            elif key in failed:
+                job.set_exception(
+                    RuntimeError(f"No valid audio file rendered for '{key}'")
+                )
+            else:
+                job.set_result(None)
+
+    def _job_done(self, key, job):
+        self._jobs.pop(key, None)
+        if not job.cancelled() and job.exception() is not None:
+            # Reported to the requesters, if they are still waiting.
+            logging.debug(f"Rendering job '{key}' failed: {job.exception()}")
+
+
+def temporary_path(output_path):
+    """
+    Returns a unique temporary path, next to the final one, to render an audio file.
+
+    Being in the same folder, the temporary file can then be renamed atomically.
+
+    Args:
+        output_path (str): The final path of the audio file.
+
+    Returns:
+        str: The temporary path, hidden and with the same extension.
+    """
+    folder, file_name = os.path.split(output_path)
+    base_name, extension = os.path.splitext(file_name)
+    return os.path.join(folder, f".{base_name}.{uuid.uuid4().hex}.tmp{extension}")
+
+
+async def render_atomically(render, output_path, is_valid):
+    """
+    Renders an audio file in a temporary file, then moves it to its final path.
+
+    The readers never see a partially written file: the final path appears only
+    once the file is complete and valid.
+
+    Args:
+        render (Callable[[str], Awaitable]): Renders the audio file at the given path.
+        output_path (str): The final path of the audio file.
+        is_valid (Callable[[str], bool]): Validates the rendered file.
+
+    Returns:
+        None
+
+    Raises:
+        RuntimeError: If the rendered file is missing or invalid.
+    """
+    tmp_path = temporary_path(output_path)
+    try:
+        await render(tmp_path)
+        if not await asyncio.to_thread(is_valid, tmp_path):
+            raise RuntimeError(f"No valid audio file rendered for '{output_path}'")
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError as err:
+                logging.warning(f"Unable to remove '{tmp_path}': {err}")
@@ -0,0 +1,44 @@
+"""
+Metrics of the renderings of the GenerateAudio service.
+
+Every rendering records the engine that produced the audio and its latency, so
+the fallbacks of the engine chain (see `engine_fallback`) show on the
+dashboards. The instruments are created on the OpenTelemetry meter, exported
+through the Prometheus reader set up by `init_telemetry` (they are no-ops when
+the telemetry is disabled).
+"""
+
+from opentelemetry import metrics
+
+meter = metrics.get_meter("generate_audio")
+
+render_seconds = meter.create_histogram(
+    "generate_audio_render_seconds",
+    unit="s",
+    description="Time to render an audio file, by the engine that rendered it",
+)
+engine_attempts = meter.create_counter(
+    "generate_audio_engine_attempts",
+    description="Renderings started on an engine, by outcome (rendered, failed, abandoned)",
+)
+
+
+def record_render(outcome):
+    """
+    Records the engine and the latency of a rendering.
+
+    Args:
+        outcome (dict): The outcome of `render_with_fallback`, whose candidates are voices.
+
+    Returns:
+        None
+    """
+    voice = outcome["candidate"]
+    render_seconds.record(
+        outcome["seconds"],
+        {"engine": voice.engine, "fallback": outcome["fallback"]},
+    )
+    for attempt in outcome["attempts"]:
+        engine_attempts.add(
+            1, {"engine": attempt["candidate"].engine, "outcome": attempt["outcome"]}
+        )
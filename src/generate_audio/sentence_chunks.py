@@ -0,0 +1,39 @@
+"""
+Splitting of the long messages into sentence chunks, rendered and played in turn.
+"""
+
+import re
+
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+
+def split_sentences(text, min_chars=40):
+    """
+    Splits a text into sentence chunks.
+
+    The sentences shorter than `min_chars` are merged with the next ones, so the
+    playback is not broken into many short fragments.
+
+    Args:
+        text (str): The text of the message.
+        min_chars (int): The minimum length of a chunk (the last one excepted).
+
+    Returns:
+        list: The chunks, in order; a single chunk for a short text.
+    """
+    chunks = []
+    current = ""
+    for sentence in SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        current = f"{current} {sentence}" if current else sentence
+        if len(current) >= min_chars:
+            chunks.append(current)
+            current = ""
+    if current:
+        if chunks and len(current) < min_chars:
+            chunks[-1] = f"{chunks[-1]} {current}"
+        else:
+            chunks.append(current)
+    return chunks or [text]
@@ -0,0 +1,131 @@
+"""
+Process pool running the in-process TTS engines (Facebook MMS, gTTS, AWS Polly).
+
+The inference and the resampling hold the GIL: run in threads, concurrent
+renderings serialize and stall the event loop serving the HTTP requests. In
+the 'process' render mode they run in a pool of `num_of_cpus` worker
+processes instead, each pinned to its own CPU (when the platform allows it)
+and owning its own copy of the models.
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+_worker = {"cpu": None}
+
+
+def available_cpus():
+    """
+    Returns the CPUs the service is allowed to run on.
+
+    Returns:
+        list: The CPU numbers, sorted.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def init_worker(cpus, counter, preload_mms):
+    """
+    Initializes a worker process: pins it to a CPU and loads its models.
+
+    Args:
+        cpus (list): The CPUs to pin the workers to, one each in turn; empty to not pin them.
+        counter (multiprocessing.Value): The number of workers started, shared by the workers.
+        preload_mms (bool): Whether to load the Facebook MMS models now.
+
+    Returns:
+        None
+    """
+    with counter.get_lock():
+        number = counter.value
+        counter.value += 1
+
+    if cpus and hasattr(os, "sched_setaffinity"):
+        cpu = cpus[number % len(cpus)]
+        try:
+            os.sched_setaffinity(0, {cpu})
+            _worker["cpu"] = cpu
+        except OSError as err:
+            logging.warning(f"Unable to pin the synthesis worker to CPU {cpu}: {err}")
+
+    if preload_mms:
+        from py_phone_caller_utils.py_phone_caller_voices.facebook_mms import (
+            preload_facebook_mms_models,
+        )
+
+        preload_facebook_mms_models()
+
+    logging.info(f"Synthesis worker {os.getpid()} ready (CPU {_worker['cpu']})")
+
+
+def worker_ready():
+    """
+    Answers once the worker process is initialized.
+
+    Returns:
+        int: The PID of the worker.
+    """
+    return os.getpid()
+
+
+def render(message, output_path, voice=None):
+    """
+    Renders a message with a TTS engine, in a worker process.
+
+    Args:
+        message (str): The text to convert to speech.
+        output_path (str): The path where the generated audio file will be saved.
+        voice (Voice): The engine and voice to use, the configured ones by default.
+
+    Returns:
+        None
+    """
+    from generate_audio.tts_renderers import generate_tts_audio
+
+    generate_tts_audio(message, output_path, voice)
+
+
+def render_batch(messages, output_paths, voice=None):
+    """
+    Renders several messages with one batched inference of the engine, in a worker process.
+
+    Args:
+        messages (list): The texts to convert to speech.
+        output_paths (list): The paths where the audio files will be saved, one per message.
+        voice (Voice): The engine and voice to use, the configured ones by default.
+
+    Returns:
+        None
+    """
+    from generate_audio.tts_renderers import generate_tts_audio_batch
+
+    generate_tts_audio_batch(messages, output_paths, voice)
+
+
+def create_synthesis_pool(workers, pin_workers, preload_mms):
+    """
+    Creates the pool of synthesis worker processes.
+
+    The workers are spawned (not forked) so they don't inherit the event loop,
+    the sockets and the threads of the service.
+
+    Args:
+        workers (int): The number of worker processes.
+        pin_workers (bool): Whether to pin every worker to its own CPU.
+        preload_mms (bool): Whether the workers load the Facebook MMS models at start.
+
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: The pool of worker processes.
+    """
+    context = multiprocessing.get_context("spawn")
+    cpus = available_cpus() if pin_workers else []
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(cpus, context.Value("i", 0), preload_mms),
+    )
@@ -0,0 +1,162 @@
+"""
+Telephony-native variants of the rendered audio files.
+
+Asterisk plays a sound in the format of its file extension: a WAV file is
+transcoded for every playback on a G.711 trunk, while a raw file in the codec
+of the trunk is streamed as is. Next to every `<key>.wav` of the cache the
+service writes the configured variants:
+
+- 'ulaw': G.711 μ-law, one byte per sample;
+- 'alaw': G.711 A-law, one byte per sample;
+- 'sln': signed linear, the raw 16-bit PCM of the WAV file.
+
+All of them are headerless, mono, at 8000 Hz. The G.711 companding is the
+reference algorithm of the ITU (as in Sun's g711.c), vectorized with NumPy.
+"""
+
+import os
+import wave
+
+import numpy as np
+
+TELEPHONY_FORMATS = ("ulaw", "alaw", "sln")
+SAMPLE_RATE = 8000
+
+# The upper bounds of the segments of the G.711 companding
+ULAW_SEGMENT_ENDS = np.array(
+    [0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF], dtype=np.int32
+)
+ALAW_SEGMENT_ENDS = np.array(
+    [0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF], dtype=np.int32
+)
+ULAW_BIAS = 0x21
+ULAW_CLIP = 8159
+
+
+def linear_to_ulaw(pcm):
+    """
+    Encodes 16-bit PCM samples to G.711 μ-law.
+
+    Args:
+        pcm (numpy.ndarray): The int16 samples.
+
+    Returns:
+        numpy.ndarray: The uint8 μ-law samples.
+    """
+    values = np.asarray(pcm, dtype=np.int32) >> 2
+    mask = np.where(values < 0, 0x7F, 0xFF)
+    values = np.minimum(np.abs(values), ULAW_CLIP) + ULAW_BIAS
+    segments = np.searchsorted(ULAW_SEGMENT_ENDS, values)
+    encoded = np.where(
+        segments >= 8, 0x7F, (segments << 4) | ((values >> (segments + 1)) & 0x0F)
+    )
+    return (encoded ^ mask).astype(np.uint8)
+
+
+def linear_to_alaw(pcm):
+    """
+    Encodes 16-bit PCM samples to G.711 A-law.
+
+    Args:
+        pcm (numpy.ndarray): The int16 samples.
+
+    Returns:
+        numpy.ndarray: The uint8 A-law samples.
+    """
+    values = np.asarray(pcm, dtype=np.int32) >> 3
+    negative = values < 0
+    mask = np.where(negative, 0x55, 0xD5)
+    values = np.where(negative, -values - 1, values)
+    segments = np.searchsorted(ALAW_SEGMENT_ENDS, values)
+    # The first two segments share the same step
+    shifts = np.maximum(segments, 1)
+    encoded = np.where(
+        segments >= 8, 0x7F, (segments << 4) | ((values >> shifts) & 0x0F)
+    )
+    return (encoded ^ mask).astype(np.uint8)
+
+
+def encode(pcm, audio_format):
+    """
+    Encodes 16-bit PCM samples in a telephony format.
+
+    Args:
+        pcm (numpy.ndarray): The int16 samples.
+        audio_format (str): One of `TELEPHONY_FORMATS`.
+
+    Returns:
+        bytes: The headerless encoded audio.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if audio_format == "ulaw":
+        return linear_to_ulaw(pcm).tobytes()
+    if audio_format == "alaw":
+        return linear_to_alaw(pcm).tobytes()
+    if audio_format == "sln":
+        return np.asarray(pcm, dtype="<i2").tobytes()
+    raise ValueError(f"Unknown telephony audio format: {audio_format}")
+
+
+def read_wav_pcm(wav_path):
+    """
+    Reads the samples of a rendered audio file.
+
+    Args:
+        wav_path (str): The path of the 8000 Hz, 16-bit mono WAV file.
+
+    Returns:
+        numpy.ndarray: The int16 samples.
+
+    Raises:
+        ValueError: If the WAV file is not 8000 Hz, 16-bit mono.
+    """
+    with wave.open(wav_path, "rb") as wav_file:
+        if (
+            wav_file.getnchannels() != 1
+            or wav_file.getsampwidth() != 2
+            or wav_file.getframerate() != SAMPLE_RATE
+        ):
+            raise ValueError(f"'{wav_path}' is not a 8000 Hz, 16-bit mono WAV file")
+        return np.frombuffer(wav_file.readframes(wav_file.getnframes()), dtype="<i2")
+
+
+def variant_path(wav_path, audio_format):
+    """
+    Returns the path of a variant of a WAV file.
+
+    Args:
+        wav_path (str): The path of the WAV file.
+        audio_format (str): The telephony format.
+
+    Returns:
+        str: The path of the variant, next to the WAV file.
+    """
+    return f"{os.path.splitext(wav_path)[0]}.{audio_format}"
+
+
+def write_variants(wav_path, audio_formats, output_path=None):
+    """
+    Writes the telephony variants of a WAV file, each atomically.
+
+    Args:
+        wav_path (str): The path of the WAV file to encode.
+        audio_formats (Iterable[str]): The telephony formats to write.
+        output_path (str): The path the variants are named after, `wav_path` by default
+            (e.g. the final path of a WAV file still being written to a temporary one).
+
+    Returns:
+        dict: The size in bytes of every variant written, by format.
+    """
+    pcm = read_wav_pcm(wav_path)
+    sizes = {}
+    for audio_format in audio_formats:
+        content = encode(pcm, audio_format)
+        path = variant_path(output_path or wav_path, audio_format)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as output:
+            output.write(content)
+        os.replace(tmp_path, path)
+        sizes[audio_format] = len(content)
+    return sizes
@@ -0,0 +1,260 @@
+"""
+Registry of the TTS engines, imported at their first use.
+
+Every engine is registered with its capabilities: the voice used by default,
+the voices known to be available (e.g. the downloaded models), whether it
+accepts any other voice name, how a language maps to one of its voices and
+whether it renders several messages in one batched inference. A request can
+then pick the engine and the voice (or the language) of its audio.
+
+The in-process engines pull heavy dependencies (torch and transformers for
+Facebook MMS, boto3 for AWS Polly, gTTS and soundfile for Google): importing all
+of them at startup costs seconds and hundreds of MB of memory to a service
+using only one of them. An engine is registered as a 'module:function' target,
+and the module is only imported the first time the engine renders a message.
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+
+def resolve(target):
+    """
+    Imports the object named by a 'module:attribute' target.
+
+    Args:
+        target (str): The module and the attribute, separated by a colon.
+
+    Returns:
+        object: The attribute of the module.
+    """
+    module_name, _, attribute = target.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class Voice:
+    """
+    An engine and one of its voices: what renders the audio of a message.
+
+    Attributes:
+        engine (str): The name of the engine (e.g. 'piper_tts').
+        name (str): The voice, model or language of the engine (e.g. 'it_IT').
+        language (str): The language asked by the request, if any: it picks the voices of
+            the fallback engines. Not part of the identity of the voice.
+    """
+
+    def __init__(self, engine, name, language=None):
+        self.engine = engine
+        self.name = name
+        self.language = language
+
+    def __eq__(self, other):
+        return isinstance(other, Voice) and (self.engine, self.name) == (
+            other.engine,
+            other.name,
+        )
+
+    def __hash__(self):
+        return hash((self.engine, self.name))
+
+    def __repr__(self):
+        return f"{self.engine}:{self.name}"
+
+
+class TTSEngineSpec:
+    """
+    An engine of the registry: how it renders a message and what it can do.
+    """
+
+    def __init__(
+        self,
+        name,
+        target,
+        default_voice,
+        voices=None,
+        any_voice=False,
+        language_voice=None,
+        batch_target=None,
+        runs_as_script=False,
+    ):
+        """
+        Args:
+            name (str): The name of the engine.
+            target (str | Callable): The function rendering a message, (message, output_path, voice) -> None,
+                or its 'module:function'.
+            default_voice (str): The voice used when a request names none.
+            voices (list | Callable[[], list]): The voices known to be available, or the function listing them.
+            any_voice (bool): Whether the engine accepts voices not listed (e.g. any language of gTTS).
+            language_voice (Callable[[str], str]): Returns the voice of a language, None if none; by
+                default the language itself is the voice.
+            batch_target (str | Callable): The function rendering several messages in one inference,
+                (messages, output_paths, voice) -> None, or its 'module:function'.
+            runs_as_script (bool): Whether the engine runs as a script, in its own processes.
+        """
+        self.name = name
+        self.target = target
+        self.default_voice = default_voice
+        self.voices = voices
+        self.any_voice = any_voice
+        self.language_voice = language_voice
+        self.batch_target = batch_target
+        self.runs_as_script = runs_as_script
+
+    def available_voices(self):
+        """
+        Lists the voices known to be available, the default one first.
+
+        Returns:
+            list: The voices.
+        """
+        voices = self.voices() if callable(self.voices) else (self.voices or [])
+        return list(dict.fromkeys([self.default_voice, *voices]))
+
+    def accepts_voice(self, voice):
+        return self.any_voice or voice in self.available_voices()
+
+    def voice_for_language(self, language):
+        """
+        Returns the voice of the engine speaking a language.
+
+        Args:
+            language (str): The language, in the codes of the engine.
+
+        Returns:
+            str: The voice, or None if the engine has none for the language.
+        """
+        if self.language_voice is None:
+            return language
+        return self.language_voice(language)
+
+    def capabilities(self):
+        """
+        Describes the engine, for the clients choosing one.
+
+        Returns:
+            dict: The name, the default voice, the known voices and the features of the engine.
+        """
+        return {
+            "engine": self.name,
+            "default_voice": self.default_voice,
+            "voices": self.available_voices(),
+            "any_voice": self.any_voice,
+            "batch": self.batch_target is not None,
+            "runs_as_script": self.runs_as_script,
+        }
+
+
+class EngineRegistry:
+    """
+    The TTS engines by name, the module of each one imported once, at its first use.
+
+    The engines are used from the threads of the executor: the imports are locked.
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, target, default_voice, **capabilities):
+        """
+        Registers an engine.
+
+        Args:
+            name (str): The name of the engine (e.g. 'facebook_mms').
+            target (str | Callable): The function rendering a message, or its 'module:function'.
+            default_voice (str): The voice used when a request names none.
+            **capabilities: The other arguments of `TTSEngineSpec`.
+
+        Returns:
+            TTSEngineSpec: The engine.
+        """
+        engine = TTSEngineSpec(name, target, default_voice, **capabilities)
+        self._engines[name] = engine
+        self._loaded = {
+            key: function for key, function in self._loaded.items() if key[0] != name
+        }
+        return engine
+
+    def names(self):
+        return list(self._engines)
+
+    def loaded(self):
+        return list(dict.fromkeys(name for name, _ in self._loaded))
+
+    def get(self, name):
+        """
+        Returns a registered engine.
+
+        Args:
+            name (str): The name of the engine.
+
+        Returns:
+            TTSEngineSpec: The engine.
+
+        Raises:
+            ValueError: If the engine is not registered.
+        """
+        try:
+            return self._engines[name]
+        except KeyError as err:
+            raise ValueError(
+                f"Unsupported TTS engine: {name}. Valid options are: {self.names()}"
+            ) from err
+
+    def function(self, name):
+        """
+        Returns the function rendering a message with an engine, importing its module the first time.
+
+        Args:
+            name (str): The name of the engine.
+
+        Returns:
+            Callable: The function: (message, output_path, voice) -> None.
+
+        Raises:
+            ValueError: If the engine is not registered.
+        """
+        return self._load(name, "render", self.get(name).target)
+
+    def batch_function(self, name):
+        """
+        Returns the function rendering several messages in one inference with an engine.
+
+        Args:
+            name (str): The name of the engine.
+
+        Returns:
+            Callable: The function: (messages, output_paths, voice) -> None.
+
+        Raises:
+            ValueError: If the engine is not registered or has no batched inference.
+        """
+        engine = self.get(name)
+        if engine.batch_target is None:
+            raise ValueError(f"No batched inference with the TTS engine: {name}")
+        return self._load(name, "batch", engine.batch_target)
+
+    def capabilities(self):
+        return [engine.capabilities() for engine in self._engines.values()]
+
+    def _load(self, name, kind, target):
+        function = self._loaded.get((name, kind))
+        if function is not None:
+            return function
+        with self._lock:
+            if (name, kind) in self._loaded:
+                return self._loaded[(name, kind)]
+            if callable(target):
+                function = target
+            else:
+                started = time.perf_counter()
+                function = resolve(target)
+                logging.info(
+                    f"TTS engine '{name}' loaded in "
+                    + f"{time.perf_counter() - started:.2f}s"
+                )
+            self._loaded[(name, kind)] = function
+            return function
@@ -0,0 +1,489 @@
+"""
+The TTS engines of the Generate Audio service and the functions rendering a message with them.
+
+The module has no side effect at import (no logging configuration, no
+telemetry): it is imported both by the service and by the synthesis worker
+processes (see `synthesis_worker`), which only need the engines.
+"""
+
+import importlib.util
+import logging
+import os
+import site
+import subprocess
+from enum import Enum
+
+from generate_audio.constants import (
+    AUDIO_SAMPLE_RATE,
+    AWS_POLLY_VOICE,
+    CONFIG_TTS_ENGINE,
+    FACEBOOK_MMS_EXTRA_LANGUAGE_CODES,
+    FACEBOOK_MMS_LANGUAGE_CODE,
+    GCLOUD_TTS_LANGUAGE_CODE,
+    KOKORO_LANG,
+    KOKORO_PYTHON_INTERPRETER,
+    PIPER_LANGUAGE_CODE,
+    PIPER_MODELS_FOLDER,
+    PIPER_PYTHON_INTERPRETER,
+    PRE_TRAINED_MODELS_FOLDER,
+)
+from generate_audio.tts_engines import EngineRegistry, Voice, resolve
+
+
+class TTSEngine(Enum):
+    """
+    Enumeration of supported Text-to-Speech (TTS) engines for audio generation.
+
+    This enum provides a method to convert a string configuration value to a TTSEngine member.
+
+    Attributes:
+        GOOGLE_GTTS: Google Text-to-Speech engine.
+        FACEBOOK_MMS: Facebook MMS TTS engine.
+        PIPER: Piper TTS engine.
+        AWS_POLLY: Amazon Polly TTS engine.
+        KOKORO: Kokoro TTS engine (on-premise ONNX model).
+    """
+
+    GOOGLE_GTTS = "google_gtts"
+    FACEBOOK_MMS = "facebook_mms"
+    PIPER = "piper_tts"
+    AWS_POLLY = "aws_polly"
+    KOKORO = "kokoro_tts"
+
+    @classmethod
+    def from_string(cls, value: str):
+        """
+        Converts a string configuration value to a TTSEngine enum member.
+
+        This class method matches the provided string to a supported TTS engine, raising a ValueError if the value is invalid.
+
+        Args:
+            value (str): The string representation of the TTS engine.
+
+        Returns:
+            TTSEngine: The corresponding TTSEngine enum member.
+
+        Raises:
+            ValueError: If the provided value does not match any supported TTS engine.
+        """
+        try:
+            return next(engine for engine in cls if engine.value == value.lower())
+        except StopIteration:
+            raise ValueError(
+                f"Invalid TTS engine: {value}. Valid options are: {[e.value for e in cls]}"
+            )
+
+
+try:
+    TTS_ENGINE = TTSEngine.from_string(CONFIG_TTS_ENGINE)
+except ValueError as e:
+    logging.error(f"Invalid TTS engine configuration: {e}")
+    TTS_ENGINE = TTSEngine.GOOGLE_GTTS
+
+
+VOICES_PACKAGE = "py_phone_caller_utils.py_phone_caller_voices"
+
+
+def text_to_speech_facebook_mms(message, output_path, lang_code=None):
+    """
+    Generates speech audio from text with the Facebook MMS model of a language.
+
+    torch and transformers are imported at the first call; the model of the language is
+    loaded at its first use and kept in the registry of the `facebook_mms_max_loaded_models`
+    most recently used ones.
+
+    Args:
+        message (str): The text to convert to speech.
+        output_path (str): The path where the generated audio file will be saved.
+        lang_code (str): The language of the model, the configured one by default.
+
+    Returns:
+        None
+    """
+    resolve(f"{VOICES_PACKAGE}.facebook_mms:text_to_speech_facebook_mms")(
+        message, lang_code or FACEBOOK_MMS_LANGUAGE_CODE, output_path
+    )
+
+
+def text_to_speech_facebook_mms_batch(messages, output_paths, lang_code=None):
+    resolve(f"{VOICES_PACKAGE}.facebook_mms:text_to_speech_facebook_mms_batch")(
+        messages, lang_code or FACEBOOK_MMS_LANGUAGE_CODE, output_paths
+    )
+
+
+def preload_facebook_mms_models():
+    resolve(f"{VOICES_PACKAGE}.facebook_mms:preload_facebook_mms_models")()
+
+
+def text_to_speech_aws_polly(message, output_path, voice_id=None):
+    """
+    Generates speech audio from text with an AWS Polly voice, at the sample rate of the service.
+
+    boto3 is imported at the first call.
+
+    Args:
+        message (str): The text to convert to speech.
+        output_path (str): The path where the generated audio file will be saved.
+        voice_id (str): The Polly voice (e.g. 'Joanna'), the configured one by default.
+
+    Returns:
+        None
+    """
+    resolve(f"{VOICES_PACKAGE}.aws_polly:aws_polly_text_to_wave")(
+        message, output_path, AUDIO_SAMPLE_RATE, voice_id or AWS_POLLY_VOICE
+    )
+
+
+def generate_tts_audio(message: str, output_path: str, voice: Voice = None) -> None:
+    """
+    Generate audio file using the specified TTS engine and voice
+
+    The engine is taken from `TTS_ENGINES`, which imports its module at the first use:
+    only the modules of the engines actually used are ever loaded.
+
+    Args:
+        message: Text to convert to speech
+        output_path: Path where to save the audio file
+        voice: Engine and voice to use (defaults to the configured ones)
+    """
+    voice = voice or DEFAULT_VOICE
+    TTS_ENGINES.function(voice.engine)(message, output_path, voice.name)
+
+
+def generate_tts_audio_batch(messages, output_paths, voice=None):
+    """
+    Generate the audio files of several messages with one batched inference of the TTS engine
+
+    Only the Facebook MMS engine supports it, see `supports_batched_inference`.
+
+    Args:
+        messages: Texts to convert to speech
+        output_paths: Paths where to save the audio files, one per message
+        voice: Engine and voice to use (defaults to the configured ones)
+    """
+    voice = voice or DEFAULT_VOICE
+    TTS_ENGINES.batch_function(voice.engine)(messages, output_paths, voice.name)
+
+
+def file_not_found_error(error_text, file_location):
+    """
+    Raises a FileNotFoundError with a formatted error message and logs the error.
+
+    This function constructs an error message from the provided text and file location, logs it, and raises the exception.
+
+    Args:
+        error_text (str): The error message prefix.
+        file_location (str): The file path or location related to the error.
+
+    Returns:
+        None
+
+    Raises:
+        FileNotFoundError: Always raised with the constructed error message.
+    """
+    error_msg = f"{error_text}{file_location}"
+    logging.error(error_msg)
+    raise FileNotFoundError(error_msg)
+
+
+def voice_script_path(script_name):
+    """
+    Finds the path of a TTS script of the `py_phone_caller_voices` package.
+
+    The script is looked up next to the sources first, then in the installed package.
+
+    Args:
+        script_name (str): The file name of the script (e.g. 'piper_tts.py').
+
+    Returns:
+        str: The absolute path of the script.
+
+    Raises:
+        FileNotFoundError: If the script can't be found.
+    """
+    current_file_dir = os.path.dirname(os.path.abspath(__file__))
+    local_script = os.path.join(
+        current_file_dir,
+        "..",
+        "py_phone_caller_utils",
+        "py_phone_caller_voices",
+        script_name,
+    )
+
+    if os.path.exists(local_script):
+        script_path = os.path.abspath(local_script)
+    else:
+        spec = importlib.util.find_spec(
+            f"py_phone_caller_utils.py_phone_caller_voices.{script_name[:-3]}"
+        )
+        if spec and spec.origin:
+            script_path = spec.origin
+        else:
+            # Fallback to the old method
+            script_path = os.path.join(
+                site.getsitepackages()[0],
+                "py_phone_caller_utils",
+                "py_phone_caller_voices",
+                script_name,
+            )
+
+    if not os.path.exists(script_path):
+        file_not_found_error(f"{script_name} script not found at: ", script_path)
+
+    return script_path
+
+
+def piper_models_path():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, PRE_TRAINED_MODELS_FOLDER, PIPER_MODELS_FOLDER)
+
+
+def piper_voices():
+    """
+    Lists the Piper models downloaded in the models folder.
+
+    Returns:
+        list: The codes of the models (e.g. 'it_IT'), sorted.
+    """
+    models_path = piper_models_path()
+    try:
+        names = os.listdir(models_path)
+    except OSError:
+        return []
+    return sorted(
+        name
+        for name in names
+        if os.path.exists(os.path.join(models_path, name, f"{name}.onnx"))
+    )
+
+
+def piper_language_voice(language):
+    """
+    Returns the downloaded Piper model speaking a language.
+
+    Args:
+        language (str): The language, as a model code ('en_GB') or a language code ('en').
+
+    Returns:
+        str: The code of the model, or None if no model speaks the language.
+    """
+    language = language.lower().replace("-", "_")
+    voices = piper_voices()
+    for voice in voices:
+        if voice.lower() == language:
+            return voice
+    for voice in voices:
+        if voice.lower().split("_")[0] == language.split("_")[0]:
+            return voice
+    return None
+
+
+def piper_tts_command(model_code=None):
+    """
+    Builds the command running the Piper TTS script with the model and configuration files of a voice.
+
+    Args:
+        model_code (str): The code of the Piper model (e.g. 'it_IT'), the configured one by default.
+
+    Returns:
+        list: The command, to be completed with the text and the output or with '--serve'.
+
+    Raises:
+        FileNotFoundError: If the Piper script, model, or config file is missing.
+    """
+    piper_script = voice_script_path("piper_tts.py")
+
+    model_code = model_code or PIPER_LANGUAGE_CODE
+    model_dir = os.path.join(piper_models_path(), model_code)
+    model_path = os.path.join(model_dir, f"{model_code}.onnx")
+    config_path = os.path.join(model_dir, f"{model_code}.onnx.json")
+
+    if not os.path.exists(model_path):
+        file_not_found_error("Piper model file not found at: ", model_path)
+    if not os.path.exists(config_path):
+        file_not_found_error("Piper config file not found at: ", config_path)
+
+    return [
+        PIPER_PYTHON_INTERPRETER,
+        piper_script,
+        "--model",
+        model_path,
+        "--config",
+        config_path,
+    ]
+
+
+# Voice name mapping based on language code (matches get_kokoro_tts_model.py)
+KOKORO_VOICE_NAMES = {
+    "a": "af_heart",  # American English
+    "b": "bf_emma",  # British English
+    "e": "ef_dora",  # Spanish
+    "f": "ff_siwis",  # French
+    "h": "hf_alpha",  # Hindi
+    "i": "if_sara",  # Italian
+    "j": "jf_alpha",  # Japanese
+    "p": "pf_dora",  # Brazilian Portuguese
+    "z": "zf_xiaobei",  # Mandarin Chinese
+}
+
+
+def kokoro_tts_command(voice_name=None):
+    """
+    Builds the command running the Kokoro TTS script with a voice, speaking its language.
+
+    The language is the first letter of the voice name. Supported language codes
+    (configured via kokoro_lang in settings.toml):
+        'a' => American English
+        'b' => British English
+        'e' => Spanish (es)
+        'f' => French (fr-fr)
+        'h' => Hindi (hi)
+        'i' => Italian (it)
+        'j' => Japanese (requires: pip install misaki[ja])
+        'p' => Brazilian Portuguese (pt-br)
+        'z' => Mandarin Chinese (requires: pip install misaki[zh])
+
+    Args:
+        voice_name (str): The Kokoro voice (e.g. 'if_sara'), the one of the configured language by default.
+
+    Returns:
+        list: The command, to be completed with the text and the output or with '--serve'.
+
+    Raises:
+        FileNotFoundError: If the Kokoro script is missing.
+    """
+    kokoro_script = voice_script_path("kokoro_tts.py")
+    voice_name = voice_name or KOKORO_VOICE_NAMES.get(KOKORO_LANG, "af_heart")
+
+    return [
+        KOKORO_PYTHON_INTERPRETER,
+        kokoro_script,
+        "--voice-name",
+        voice_name,
+        "--lang",
+        voice_name[0],
+    ]
+
+
+def run_tts_script(engine_name, cmd, output_path):
+    """
+    Runs a TTS script in a new process, for a single message.
+
+    Args:
+        engine_name (str): The name of the engine, used in the logs.
+        cmd (list): The complete command to run.
+        output_path (str): The path where the generated audio file will be saved.
+
+    Returns:
+        None
+
+    Raises:
+        RuntimeError: If the TTS process fails to execute successfully.
+    """
+    logging.info(f"Running {engine_name} with command: {' '.join(cmd)}")
+
+    try:
+        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        logging.info(f"{engine_name} completed successfully for output: {output_path}")
+        if result.stdout:
+            logging.debug(f"{engine_name} output: {result.stdout}")
+    except subprocess.CalledProcessError as e:
+        error_msg = (
+            f"{engine_name} process failed with exit code {e.returncode}: {e.stderr}"
+        )
+        logging.error(error_msg)
+        raise RuntimeError(error_msg) from e
+    except Exception as e:
+        error_msg = f"Error running {engine_name}: {str(e)}"
+        logging.error(error_msg)
+        raise RuntimeError(error_msg) from e
+
+
+def text_to_speech_piper_tts(message, output_path, model_code=None):
+    """
+    Generates an audio file from text using the Piper TTS engine, in a new process.
+
+    This function runs the Piper TTS script with the appropriate model and configuration files and logs the process.
+    The warm worker pools (see `start_tts_worker_pools`) are used instead when enabled.
+
+    Args:
+        message (str): The text to convert to speech.
+        output_path (str): The path where the generated audio file will be saved.
+        model_code (str): The code of the Piper model, the configured one by default.
+
+    Returns:
+        None
+
+    Raises:
+        FileNotFoundError: If the Piper script, model, or config file is missing.
+        RuntimeError: If the Piper TTS process fails to execute successfully.
+    """
+    cmd = piper_tts_command(model_code) + [message, "--output", output_path]
+    run_tts_script("Piper TTS", cmd, output_path)
+
+
+def text_to_speech_kokoro_tts(message, output_path, voice_name=None):
+    """
+    Generates an audio file from text using the Kokoro TTS engine, in a new process.
+
+    This function runs the Kokoro TTS script with the language and voice and logs the process.
+    The warm worker pools (see `start_tts_worker_pools`) are used instead when enabled.
+
+    Args:
+        message (str): The text to convert to speech.
+        output_path (str): The path where the generated audio file will be saved.
+        voice_name (str): The Kokoro voice, the one of the configured language by default.
+
+    Returns:
+        None
+
+    Raises:
+        FileNotFoundError: If the Kokoro script is missing.
+        RuntimeError: If the Kokoro TTS process fails to execute successfully.
+    """
+    cmd = kokoro_tts_command(voice_name) + [message, "--output", output_path]
+    run_tts_script("Kokoro TTS", cmd, output_path)
+
+
+# The engines rendering a message: (message, output_path, voice) -> None
+TTS_ENGINES = EngineRegistry()
+TTS_ENGINES.register(
+    TTSEngine.GOOGLE_GTTS.value,
+    f"{VOICES_PACKAGE}.google_gtts:text_to_wave",
+    GCLOUD_TTS_LANGUAGE_CODE,
+    any_voice=True,
+)
+TTS_ENGINES.register(
+    TTSEngine.FACEBOOK_MMS.value,
+    text_to_speech_facebook_mms,
+    FACEBOOK_MMS_LANGUAGE_CODE,
+    voices=FACEBOOK_MMS_EXTRA_LANGUAGE_CODES,
+    batch_target=text_to_speech_facebook_mms_batch,
+)
+TTS_ENGINES.register(
+    TTSEngine.PIPER.value,
+    text_to_speech_piper_tts,
+    PIPER_LANGUAGE_CODE,
+    voices=piper_voices,
+    language_voice=piper_language_voice,
+    runs_as_script=True,
+)
+TTS_ENGINES.register(
+    TTSEngine.AWS_POLLY.value,
+    text_to_speech_aws_polly,
+    AWS_POLLY_VOICE,
+    any_voice=True,
+    # A Polly voice speaks a single language, no mapping is configured
+    language_voice=lambda language: None,
+)
+TTS_ENGINES.register(
+    TTSEngine.KOKORO.value,
+    text_to_speech_kokoro_tts,
+    KOKORO_VOICE_NAMES.get(KOKORO_LANG, "af_heart"),
+    voices=list(KOKORO_VOICE_NAMES.values()),
+    language_voice=KOKORO_VOICE_NAMES.get,
+    runs_as_script=True,
+)
+
+# The engine and voice of the requests naming none
+DEFAULT_VOICE = Voice(TTS_ENGINE.value, TTS_ENGINES.get(TTS_ENGINE.value).default_voice)
@@ -0,0 +1,373 @@
+"""
+Pool of long-lived TTS worker processes.
+
+Every worker runs one of the TTS scripts (piper_tts.py, kokoro_tts.py) with
+'--serve': the model is loaded once, then the synthesis jobs are exchanged as
+JSON lines over the stdin/stdout pipes of the worker. The pool checks the idle
+workers periodically and restarts the ones that crashed, hung or failed a job.
+
+A pool serves one voice (one model); `TTSWorkerPools` keeps the pools of the
+most recently used voices warm, starting the others on demand.
+"""
+
+import asyncio
+import itertools
+from collections import OrderedDict
+import json
+import logging
+
+
+class TTSWorkerError(RuntimeError):
+    """
+    Raised when a TTS worker can't complete a job.
+    """
+
+
+class TTSJobError(TTSWorkerError):
+    """
+    Raised when a TTS worker, still healthy, reports the failure of a job.
+    """
+
+
+class TTSWorker:
+    """
+    A TTS worker process, serving one job at a time.
+    """
+
+    def __init__(self, name, command, start_timeout):
+        self.name = name
+        self.command = command
+        self.start_timeout = start_timeout
+        self.process = None
+        self._ids = itertools.count(1)
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        """
+        Starts the worker process and waits until its model is loaded.
+
+        Returns:
+            None
+
+        Raises:
+            TTSWorkerError: If the worker does not get ready within the start timeout.
+        """
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        ready = await self._read_response(self.start_timeout)
+        if not ready.get("ready"):
+            raise TTSWorkerError(f"Worker '{self.name}' did not get ready: {ready}")
+        logging.info(f"TTS worker '{self.name}' ready (PID {self.process.pid})")
+
+    async def stop(self):
+        """
+        Stops the worker process, killing it if it does not exit on its own.
+
+        Returns:
+            None
+        """
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.close()
+            await asyncio.wait_for(self.process.wait(), timeout=5)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.process.kill()
+            await self.process.wait()
+
+    async def request(self, job, timeout):
+        """
+        Sends a job to the worker and waits for its answer.
+
+        Args:
+            job (dict): The job, without its 'id'.
+            timeout (float): The seconds to wait for the answer.
+
+        Returns:
+            None
+
+        Raises:
+            TTSWorkerError: If the worker is dead, times out or fails the job.
+        """
+        if not self.alive:
+            raise TTSWorkerError(f"Worker '{self.name}' is not running")
+
+        job_id = next(self._ids)
+        try:
+            self.process.stdin.write(
+                (json.dumps({**job, "id": job_id}) + "\n").encode()
+            )
+            await self.process.stdin.drain()
+        except ConnectionError as err:
+            raise TTSWorkerError(f"Worker '{self.name}' pipe closed: {err}") from err
+
+        response = await self._read_response(timeout)
+        if response.get("id") != job_id:
+            raise TTSWorkerError(
+                f"Worker '{self.name}' answered out of order: {response}"
+            )
+        if not response.get("ok"):
+            raise TTSJobError(
+                f"Worker '{self.name}' failed the job: {response.get('error')}"
+            )
+
+    async def _read_response(self, timeout):
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        except asyncio.TimeoutError as err:
+            raise TTSWorkerError(f"Worker '{self.name}' timed out") from err
+        if not line:
+            raise TTSWorkerError(
+                f"Worker '{self.name}' exited (code {self.process.returncode})"
+            )
+        try:
+            return json.loads(line)
+        except ValueError as err:
+            raise TTSWorkerError(
+                f"Worker '{self.name}' sent an invalid answer: {line!r}"
+            ) from err
+
+
+class TTSWorkerPool:
+    """
+    A fixed-size pool of TTS worker processes running the same command.
+
+    The jobs are dispatched to the idle workers; a worker failing a job, timing out
+    or crashing is restarted, and the idle workers are pinged every
+    `health_check_seconds`.
+    """
+
+    def __init__(
+        self,
+        name,
+        command,
+        size,
+        job_timeout=60,
+        start_timeout=300,
+        health_check_seconds=30,
+    ):
+        """
+        Args:
+            name (str): The name of the pool, used in the logs.
+            command (list): The command starting a worker in serving mode.
+            size (int): The number of worker processes.
+            job_timeout (float): The seconds to wait for a synthesis.
+            start_timeout (float): The seconds to wait for a worker to load its model.
+            health_check_seconds (float): The interval of the health checks of the idle workers.
+        """
+        self.name = name
+        self.job_timeout = job_timeout
+        self.health_check_seconds = health_check_seconds
+        self._workers = [
+            TTSWorker(f"{name}-{number}", command, start_timeout)
+            for number in range(max(1, int(size)))
+        ]
+        self._idle = asyncio.Queue()
+        self._health_check_task = None
+        self._restarts = set()
+        self._active = 0
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._closed = False
+
+    async def start(self):
+        """
+        Starts all the workers and the health checks.
+
+        Returns:
+            None
+        """
+        for worker in self._workers:
+            await self._restart(worker)
+            self._idle.put_nowait(worker)
+        self._health_check_task = asyncio.create_task(self._health_checks())
+
+    async def close(self, drain=False):
+        """
+        Stops the health checks and all the workers.
+
+        Args:
+            drain (bool): Whether to wait for the jobs in progress to end first.
+
+        Returns:
+            None
+        """
+        self._closed = True
+        if drain:
+            await self._drained.wait()
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+        await asyncio.gather(*(worker.stop() for worker in self._workers))
+
+    async def synthesize(self, text, output_path):
+        """
+        Synthesizes a text into a WAV file on the first idle worker.
+
+        Args:
+            text (str): The text to synthesize.
+            output_path (str): The path of the WAV file to write.
+
+        Returns:
+            None
+
+        Raises:
+            TTSJobError: If the worker reports the failure of the job.
+            TTSWorkerError: If the worker crashes or hangs (it is restarted in the background),
+                or the pool is closed.
+        """
+        if self._closed:
+            raise TTSWorkerError(f"Pool '{self.name}' is closed")
+        self._active += 1
+        self._drained.clear()
+        try:
+            await self._synthesize(text, output_path)
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._drained.set()
+
+    async def _synthesize(self, text, output_path):
+        worker = await self._idle.get()
+        try:
+            await worker.request(
+                {"op": "synthesize", "text": text, "output": output_path},
+                self.job_timeout,
+            )
+        except TTSJobError:
+            self._idle.put_nowait(worker)
+            raise
+        except (TTSWorkerError, asyncio.CancelledError):
+            # If cancelled while waiting, the answer would be read by the next job.
+            self._recycle(worker)
+            raise
+        self._idle.put_nowait(worker)
+
+    def _recycle(self, worker):
+        task = asyncio.create_task(self._restart(worker))
+        self._restarts.add(task)
+        task.add_done_callback(self._restarts.discard)
+        task.add_done_callback(lambda _: self._idle.put_nowait(worker))
+
+    async def _restart(self, worker):
+        try:
+            await worker.stop()
+            await worker.start()
+        except Exception as err:
+            # The health checks will try again.
+            logging.exception(f"Unable to start the TTS worker '{worker.name}': {err}")
+
+    async def _health_checks(self):
+        while True:
+            await asyncio.sleep(self.health_check_seconds)
+            for _ in range(self._idle.qsize()):
+                worker = self._idle.get_nowait()
+                try:
+                    await worker.request({"op": "ping"}, self.job_timeout)
+                except TTSWorkerError as err:
+                    logging.warning(f"Restarting the unhealthy TTS worker: {err}")
+                    self._recycle(worker)
+                    continue
+                self._idle.put_nowait(worker)
+
+
+class TTSWorkerPools:
+    """
+    The warm worker pools of several voices, the least recently used ones stopped.
+
+    The pool of a voice (e.g. another Piper model) is started by its first job, and
+    shared by the jobs arriving while it starts. At most `max_pools` pools are kept
+    running: an evicted pool is closed once its jobs in progress are done.
+    """
+
+    def __init__(self, create_pool, max_pools=2):
+        """
+        Args:
+            create_pool (Callable[[object], TTSWorkerPool]): Creates the pool of a voice, not started.
+            max_pools (int): The number of pools kept running.
+        """
+        self.create_pool = create_pool
+        self.max_pools = max(1, int(max_pools))
+        self._pools = OrderedDict()
+        self._starting = {}
+        self._retiring = set()
+
+    def keys(self):
+        return list(self._pools)
+
+    async def get(self, key):
+        """
+        Returns the running pool of a voice, starting it if needed.
+
+        The pool is returned only while it is among the running ones: a job started on it
+        right away is waited for by its eviction (see `TTSWorkerPool.close`). A pool evicted
+        by the start of another voice before the waiting jobs resume is started again.
+
+        Args:
+            key (object): The voice of the pool.
+
+        Returns:
+            TTSWorkerPool: The pool.
+        """
+        while True:
+            pool = self._pools.get(key)
+            if pool is not None:
+                self._pools.move_to_end(key)
+                return pool
+            starting = self._starting.get(key)
+            if starting is None:
+                starting = asyncio.ensure_future(self._start(key))
+                self._starting[key] = starting
+                starting.add_done_callback(lambda _: self._starting.pop(key, None))
+            # A cancelled job does not cancel the start shared with the other ones
+            await asyncio.shield(starting)
+
+    async def synthesize(self, key, text, output_path):
+        """
+        Synthesizes a text into a WAV file with the pool of a voice.
+
+        Args:
+            key (object): The voice of the pool.
+            text (str): The text to synthesize.
+            output_path (str): The path of the WAV file to write.
+
+        Returns:
+            None
+
+        Raises:
+            TTSWorkerError: If the synthesis fails, see `TTSWorkerPool.synthesize`.
+        """
+        pool = await self.get(key)
+        # No await in between: the job is counted by the pool before any eviction can close it
+        await pool.synthesize(text, output_path)
+
+    async def close(self):
+        """
+        Stops all the pools.
+
+        Returns:
+            None
+        """
+        pools = list(self._pools.values())
+        self._pools.clear()
+        await asyncio.gather(*(pool.close() for pool in pools), *self._retiring)
+
+    async def _start(self, key):
+        pool = self.create_pool(key)
+        logging.info(f"Starting the TTS worker pool '{pool.name}'")
+        await pool.start()
+        self._pools[key] = pool
+        while len(self._pools) > self.max_pools:
+            _, evicted = self._pools.popitem(last=False)
+            logging.info(
+                f"Stopping the least recently used TTS worker pool '{evicted.name}'"
+            )
+            task = asyncio.create_task(evicted.close(drain=True))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+        return pool
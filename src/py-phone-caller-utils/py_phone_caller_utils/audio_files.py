@@ -0,0 +1,11 @@
+"""
+Names of the audio files served by the GenerateAudio service.
+
+Shared by the service and by the agents mirroring its files (see
+`asterisk_audio_sync`), so both accept exactly the same names.
+"""
+
+import re
+
+# A cache key or a message checksum, with the extension of a format: no hidden or temporary file
+AUDIO_FILE_NAME = re.compile(r"^[A-Za-z0-9_-]+\.(wav|ulaw|alaw|sln)$")
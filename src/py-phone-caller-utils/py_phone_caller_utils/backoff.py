@@ -0,0 +1,28 @@
+"""
+Reconnect backoff helpers shared by the long-running services.
+"""
+
+import random
+
+
+def backoff_delay(attempt, base_seconds=1.0, max_seconds=60.0, rng=random):
+    """
+    Computes the delay before the next reconnection attempt using exponential backoff with "full jitter".
+
+    The upper bound grows as `base_seconds * 2 ** attempt` and is capped at `max_seconds`; the returned
+    delay is drawn uniformly between zero and that bound, so many clients that lost the same peer do not
+    reconnect in lockstep.
+
+    Args:
+        attempt (int): The number of consecutive failed attempts so far (0 for the first retry).
+        base_seconds (float): The bound used for the first retry.
+        max_seconds (float): The maximum bound, regardless of the number of attempts.
+        rng: The random generator to draw from (anything exposing `uniform`).
+
+    Returns:
+        float: The number of seconds to wait before retrying.
+    """
+    attempt = max(0, int(attempt))
+    # Avoid huge integers for very long outages, the cap is reached well before 2 ** 32.
+    bound = min(float(max_seconds), float(base_seconds) * (2 ** min(attempt, 32)))
+    return rng.uniform(0, bound)
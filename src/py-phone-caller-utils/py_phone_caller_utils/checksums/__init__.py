@@ -1,16 +1,79 @@
 """
 Checksum helpers used across services to generate compact, stable identifiers
 for calls and messages.
+
+The checksums are versioned:
+
+- version 1 (legacy): 4-byte Blake2b digest of the concatenated fields, as 8
+  hexadecimal characters. With thousands of distinct messages the birthday
+  collisions are likely, and the concatenation without delimiter is ambiguous
+  ('+3912' + '3 alert' == '+39123' + ' alert').
+- version 2: 16-byte Blake2b digest of the length-prefixed fields, as 'v2-'
+  followed by 32 hexadecimal characters.
+
+The existing records are converted by `migrate_checksums`.
 """
 
 from hashlib import blake2b
 
-DIGEST_SIZE = 4
+CHECKSUM_VERSION = 2
+DIGEST_SIZE = 16
+LEGACY_DIGEST_SIZE = 4
 ENCODING = "utf-8"
+PERSON = b"py-phone-caller"
+
+
+def checksum(*fields, version=CHECKSUM_VERSION):
+    """
+    Computes the checksum of some fields.
+
+    Args:
+        *fields (str): The fields to hash, in order.
+        version (int): The version of the checksum scheme.
+
+    Returns:
+        str: The checksum, prefixed by its version from version 2 on.
+
+    Raises:
+        ValueError: If the version is unknown.
+    """
+    encoded = [bytes(str(field), encoding=ENCODING) for field in fields]
+    if version == 1:
+        return blake2b(b"".join(encoded), digest_size=LEGACY_DIGEST_SIZE).hexdigest()
+    if version == 2:
+        digest = blake2b(digest_size=DIGEST_SIZE, person=PERSON)
+        for field in encoded:
+            # Each field is delimited by its length: 'a' + 'bc' != 'ab' + 'c'
+            digest.update(f"{len(field)}:".encode(ENCODING))
+            digest.update(field)
+        return f"v2-{digest.hexdigest()}"
+    raise ValueError(f"Unknown checksum version: {version}")
+
+
+def checksum_version(value):
+    """
+    Tells the version of the scheme that computed a checksum.
+
+    Args:
+        value (str): The checksum.
+
+    Returns:
+        int: The version, or None if the value is not a checksum.
+    """
+    value = value or ""
+    if value.startswith("v2-") and len(value) == 3 + DIGEST_SIZE * 2:
+        return 2
+    if len(value) == LEGACY_DIGEST_SIZE * 2:
+        try:
+            int(value, 16)
+            return 1
+        except ValueError:
+            return None
+    return None
 
 
 # Checksum functions
-async def gen_call_chk_sum(phone, message):
+async def gen_call_chk_sum(phone, message, version=CHECKSUM_VERSION):
     """
     Generates a checksum to uniquely identify a call based on the phone number and message.
 
@@ -19,17 +82,15 @@ async def gen_call_chk_sum(phone, message):
     Args:
         phone (str): The recipient's phone number.
         message (str): The message content.
+        version (int): The version of the checksum scheme.
 
     Returns:
-        str: The hexadecimal string representation of the checksum.
+        str: The checksum.
     """
-    return blake2b(
-        bytes(phone, encoding=ENCODING) + bytes(message, encoding=ENCODING),
-        digest_size=DIGEST_SIZE,
-    ).hexdigest()
+    return checksum(phone, message, version=version)
 
 
-async def gen_msg_chk_sum(message):
+async def gen_msg_chk_sum(message, version=CHECKSUM_VERSION):
     """
     Generates a checksum to uniquely identify a message based on its content.
 
@@ -37,16 +98,15 @@ async def gen_msg_chk_sum(message):
 
     Args:
         message (str): The message content.
+        version (int): The version of the checksum scheme.
 
     Returns:
-        str: The hexadecimal string representation of the checksum.
+        str: The checksum.
     """
-    return blake2b(
-        bytes(message, encoding=ENCODING), digest_size=DIGEST_SIZE
-    ).hexdigest()
+    return checksum(message, version=version)
 
 
-async def gen_unique_chk_sum(phone, message, first_dial):
+async def gen_unique_chk_sum(phone, message, first_dial, version=CHECKSUM_VERSION):
     """
     Generates a unique checksum for a call attempt based on the phone number, message, and first dial timestamp.
 
@@ -56,13 +116,9 @@ async def gen_unique_chk_sum(phone, message, first_dial):
         phone (str): The recipient's phone number.
         message (str): The message content.
         first_dial (Any): The timestamp of the first dial attempt.
+        version (int): The version of the checksum scheme.
 
     Returns:
-        str: The hexadecimal string representation of the unique checksum.
+        str: The checksum.
     """
-    return blake2b(
-        bytes(phone, encoding=ENCODING)
-        + bytes(message, encoding=ENCODING)
-        + bytes(str(first_dial), encoding=ENCODING),
-        digest_size=DIGEST_SIZE,
-    ).hexdigest()
+    return checksum(phone, message, str(first_dial), version=version)
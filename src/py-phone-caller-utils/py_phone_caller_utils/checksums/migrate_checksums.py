@@ -0,0 +1,268 @@
+"""
+Migration and verification of the checksums stored in the database.
+
+    python -m py_phone_caller_utils.checksums.migrate_checksums verify --audio-folder PATH
+    python -m py_phone_caller_utils.checksums.migrate_checksums migrate --audio-folder PATH
+
+'verify' reports the checksums of the 'calls' and 'scheduled_calls' tables shared by
+different contents (collisions) and the audio files named after a colliding message
+checksum, which may hold the audio of another message. 'migrate' recomputes the
+checksums of the older versions with the current one and deletes those audio files:
+they are rendered again on the next call.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+
+from py_phone_caller_utils.checksums import (
+    CHECKSUM_VERSION,
+    checksum,
+    checksum_version,
+)
+from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import (
+    Calls,
+    ScheduledCalls,
+)
+
+logging.basicConfig(
+    format=settings.logs.log_formatter, level=settings.logs.log_level, force=True
+)
+
+# The fields hashed by each checksum column
+CALL_CHECKSUM_FIELDS = {
+    "msg_chk_sum": ("message",),
+    "call_chk_sum": ("phone", "message"),
+    "unique_chk_sum": ("phone", "message", "first_dial"),
+}
+SCHEDULED_CALL_CHECKSUM_FIELDS = {
+    "call_chk_sum": ("phone", "message"),
+}
+
+
+def checksum_sources(row, fields):
+    """
+    Returns the values hashed by a checksum column of a record.
+
+    Args:
+        row (dict): The record.
+        fields (tuple): The names of the hashed fields.
+
+    Returns:
+        tuple: The hashed values, as strings.
+    """
+    return tuple(str(row.get(field, "")) for field in fields)
+
+
+def upgraded_checksums(row, columns, version=CHECKSUM_VERSION):
+    """
+    Recomputes the checksums of a record not computed with a given version.
+
+    Args:
+        row (dict): The record.
+        columns (dict): The checksum columns and their hashed fields.
+        version (int): The version to upgrade to.
+
+    Returns:
+        dict: The new values of the outdated checksum columns.
+    """
+    return {
+        column: checksum(*checksum_sources(row, fields), version=version)
+        for column, fields in columns.items()
+        if checksum_version(row.get(column)) != version
+    }
+
+
+def find_collisions(rows, columns):
+    """
+    Finds the checksums shared by records with different hashed values.
+
+    Args:
+        rows (list): The records.
+        columns (dict): The checksum columns and their hashed fields.
+
+    Returns:
+        dict: For each column, the colliding checksums and their distinct hashed values.
+    """
+    collisions = {}
+    for column, fields in columns.items():
+        sources = {}
+        for row in rows:
+            value = row.get(column)
+            if value:
+                sources.setdefault(value, set()).add(checksum_sources(row, fields))
+        collisions[column] = {
+            value: sorted(values)
+            for value, values in sources.items()
+            if len(values) > 1
+        }
+    return collisions
+
+
+def colliding_audio_files(audio_folder, msg_chk_sums):
+    """
+    Lists the audio files named after some message checksums.
+
+    Args:
+        audio_folder (str): The folder of the audio files.
+        msg_chk_sums (Iterable[str]): The message checksums.
+
+    Returns:
+        list: The paths of the existing audio files.
+    """
+    if not audio_folder:
+        return []
+    paths = [os.path.join(audio_folder, f"{value}.wav") for value in msg_chk_sums]
+    return [path for path in paths if os.path.isfile(path)]
+
+
+async def select_checksum_rows():
+    """
+    Selects the checksums, and the values they hash, of the calls and the scheduled calls.
+
+    Returns:
+        tuple: The rows of the 'calls' and of the 'scheduled_calls' tables.
+    """
+    calls = await Calls.select(
+        Calls.id,
+        Calls.phone,
+        Calls.message,
+        Calls.first_dial,
+        Calls.msg_chk_sum,
+        Calls.call_chk_sum,
+        Calls.unique_chk_sum,
+    )
+    scheduled_calls = await ScheduledCalls.select(
+        ScheduledCalls.id,
+        ScheduledCalls.phone,
+        ScheduledCalls.message,
+        ScheduledCalls.call_chk_sum,
+    )
+    return calls, scheduled_calls
+
+
+def log_collisions(table, collisions):
+    count = 0
+    for column, values in collisions.items():
+        for value, sources in values.items():
+            count += 1
+            logging.warning(
+                f"Collision in '{table}.{column}': '{value}' hashes {len(sources)} "
+                + f"different values: {sources}"
+            )
+    return count
+
+
+async def verify(audio_folder=None):
+    """
+    Reports the checksum collisions and the audio files they may have corrupted.
+
+    Args:
+        audio_folder (str): The folder of the audio files, not scanned if None.
+
+    Returns:
+        int: The number of collisions and of colliding audio files found.
+    """
+    calls, scheduled_calls = await select_checksum_rows()
+    call_collisions = find_collisions(calls, CALL_CHECKSUM_FIELDS)
+    count = log_collisions("calls", call_collisions)
+    count += log_collisions(
+        "scheduled_calls",
+        find_collisions(scheduled_calls, SCHEDULED_CALL_CHECKSUM_FIELDS),
+    )
+
+    audio_files = colliding_audio_files(
+        audio_folder, call_collisions["msg_chk_sum"].keys()
+    )
+    for path in audio_files:
+        logging.warning(f"The audio file '{path}' may hold another message")
+
+    outdated = sum(
+        1 for row in calls if checksum_version(row["msg_chk_sum"]) != CHECKSUM_VERSION
+    )
+    logging.info(
+        f"Checked {len(calls)} calls ({outdated} with outdated checksums) and "
+        + f"{len(scheduled_calls)} scheduled calls: {count} collisions, "
+        + f"{len(audio_files)} colliding audio files"
+    )
+    return count + len(audio_files)
+
+
+async def migrate(audio_folder=None, dry_run=False):
+    """
+    Upgrades the outdated checksums and deletes the audio files of the colliding ones.
+
+    Args:
+        audio_folder (str): The folder of the audio files, not scanned if None.
+        dry_run (bool): Only log what would be changed.
+
+    Returns:
+        int: The number of updated records.
+    """
+    calls, scheduled_calls = await select_checksum_rows()
+    audio_files = colliding_audio_files(
+        audio_folder,
+        find_collisions(calls, CALL_CHECKSUM_FIELDS)["msg_chk_sum"].keys(),
+    )
+
+    updates = [
+        (Calls, row["id"], upgraded_checksums(row, CALL_CHECKSUM_FIELDS))
+        for row in calls
+    ] + [
+        (
+            ScheduledCalls,
+            row["id"],
+            upgraded_checksums(row, SCHEDULED_CALL_CHECKSUM_FIELDS),
+        )
+        for row in scheduled_calls
+    ]
+    updates = [update for update in updates if update[2]]
+
+    logging.info(
+        f"{len(updates)} records to upgrade to checksum version {CHECKSUM_VERSION}, "
+        + f"{len(audio_files)} colliding audio files to delete"
+    )
+    if dry_run:
+        return len(updates)
+
+    async with Calls._meta.db.transaction():
+        for table, row_id, values in updates:
+            await table.update(
+                {getattr(table, column): value for column, value in values.items()}
+            ).where(table.id == row_id)
+
+    for path in audio_files:
+        try:
+            os.remove(path)
+            logging.info(f"Deleted the colliding audio file '{path}'")
+        except OSError as err:
+            logging.error(f"Unable to delete '{path}': {err}")
+
+    return len(updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Verify or migrate the checksums of the calls."
+    )
+    parser.add_argument("command", choices=["verify", "migrate"])
+    parser.add_argument(
+        "--audio-folder",
+        default=None,
+        help="The serving folder of the GenerateAudio service, to check its audio files",
+    )
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Only report what 'migrate' would do"
+    )
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        found = asyncio.run(verify(args.audio_folder))
+        raise SystemExit(1 if found else 0)
+    asyncio.run(migrate(args.audio_folder, args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,12 @@ from datetime import UTC, datetime
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_db.db_notify import (
+    CONTACT_ADDED,
+    CONTACT_DELETED,
+    CONTACT_MODIFIED,
+    notify_address_book,
+)
 from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import (
     AddressBook,
 )
@@ -81,6 +87,7 @@ async def add_contact(payload: Dict[str, Any]) -> str:
     )
 
     await AddressBook.insert(record)
+    await notify_address_book(CONTACT_ADDED, [record.id])
     return str(record.id)
 
 
@@ -128,6 +135,7 @@ async def modify_contact(contact_id: str, changes: Dict[str, Any]) -> int:
         return 0
 
     result = await AddressBook.update(update_dict).where(AddressBook.id == contact_id)
+    await notify_address_book(CONTACT_MODIFIED, [contact_id])
     if isinstance(result, int):
         return result
     if isinstance(result, list):
@@ -153,6 +161,7 @@ async def delete_contacts(contact_ids: Iterable[str]) -> int:
     if not ids:
         return 0
     result = await AddressBook.delete().where(AddressBook.id.is_in(ids))
+    await notify_address_book(CONTACT_DELETED, ids)
     if isinstance(result, int):
         return result
     if isinstance(result, list):
@@ -202,18 +211,53 @@ def _availability_windows(
     return windows
 
 
-async def get_on_call_contacts(
-    now: Optional[datetime] = None,
+def on_call_entries(
+    row: Dict[str, Any],
+) -> List[Tuple[datetime, datetime, Tuple[Any, ...], Dict[str, Any]]]:
+    """
+    Builds the on-call entries of a contact, one for each of its availability windows.
+
+    Each entry carries the sorting key used to order the on-call contacts: priority, start of
+    the window, creation time of the contact and then its name.
+
+    :param row: The contact record, as selected by `select_enabled_contacts`.
+    :type row: Dict[str, Any]
+    :return: A list of tuples with the start and end of the window (both included),
+        the sorting key and the contact details.
+    :rtype: List[Tuple[datetime, datetime, Tuple[Any, ...], Dict[str, Any]]]
+    """
+
+    entries = []
+    for start, end, prio in _availability_windows(row):
+        key = (
+            prio,
+            start,
+            row.get("created_time") or datetime.min,
+            f"{row.get('name', '')}{row.get('surname', '')}",
+        )
+        contact = {
+            "id": str(row.get("id")),
+            "name": row.get("name"),
+            "surname": row.get("surname"),
+            "phone_number": row.get("phone_number"),
+            "created_time": row.get("created_time"),
+            "priority": prio,
+        }
+        entries.append((start, end, key, contact))
+    return entries
+
+
+async def select_enabled_contacts(
+    contact_ids: Optional[Iterable[str]] = None,
 ) -> List[Dict[str, Any]]:
     """
-    Fetches all currently on-call contacts, ordered by priority and other criteria.
+    Selects the enabled contacts with the fields needed to evaluate their on-call availability.
 
-    :param now: The current datetime to evaluate on-call availability.
-    :return: A list of dictionaries containing the on-call contacts' details.
+    :param contact_ids: Restricts the selection to these contacts, optional.
+    :return: A list of dictionaries with the contacts' details.
     """
-    now = now or datetime.now(UTC)
 
-    rows = await AddressBook.select(
+    query = AddressBook.select(
         AddressBook.id,
         AddressBook.name,
         AddressBook.surname,
@@ -221,29 +265,35 @@ async def get_on_call_contacts(
         AddressBook.created_time,
         AddressBook.on_call_availability,
     ).where(AddressBook.enabled == True)
+    if contact_ids is not None:
+        ids = list(contact_ids)
+        if not ids:
+            return []
+        query = query.where(AddressBook.id.is_in(ids))
+    return await query
+
+
+async def get_on_call_contacts(
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetches all currently on-call contacts, ordered by priority and other criteria.
+
+    The long-running services should rather keep an `OnCallIndex`, which answers without
+    reading the database.
+
+    :param now: The current datetime to evaluate on-call availability.
+    :return: A list of dictionaries containing the on-call contacts' details.
+    """
+    now = now or datetime.now(UTC)
+
+    rows = await select_enabled_contacts()
 
     contacts_with_keys = []
     for row in rows:
-        windows = _availability_windows(row)
-        for start, end, prio in windows:
+        for start, end, key, contact in on_call_entries(row):
             if start <= now <= end:
-                key = (
-                    prio,
-                    start,
-                    row.get("created_time") or datetime.min,
-                    f"{row.get('name', '')}{row.get('surname', '')}",
-                )
-                contacts_with_keys.append({
-                    "key": key,
-                    "contact": {
-                        "id": str(row.get("id")),
-                        "name": row.get("name"),
-                        "surname": row.get("surname"),
-                        "phone_number": row.get("phone_number"),
-                        "created_time": row.get("created_time"),
-                        "priority": prio,
-                    }
-                })
+                contacts_with_keys.append({"key": key, "contact": contact})
 
     contacts_with_keys.sort(key=lambda x: x["key"])
     return [x["contact"] for x in contacts_with_keys]
@@ -3,38 +3,121 @@ from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables
 )
 
 
-async def select_to_recall(
-    times_to_dial, lesser_seconds_to_forget, greater_sleep_and_retry
-):
+async def select_to_recall(times_to_dial, lesser_seconds_to_forget):
     """
     Selects call records that are eligible for recall based on dial attempts and timing criteria.
 
     This asynchronous function queries the Calls table for records that have not reached the maximum dial attempts,
-    are within the specified time window, and have not completed their call cycle.
+    are still within the retry window, and have not completed their call cycle. The records not yet due are
+    returned too, so the caller can schedule them on their next-due time.
 
     Args:
         times_to_dial (int): The maximum number of allowed dial attempts.
         lesser_seconds_to_forget (datetime): The lower bound of the time window for first dial.
-        greater_sleep_and_retry (datetime): The upper bound of the time window for first dial.
 
     Returns:
         list: A list of call records matching the recall criteria.
     """
 
     result = await Calls.select(
-        Calls.phone, Calls.message, Calls.seconds_to_forget
+        Calls.id,
+        Calls.phone,
+        Calls.message,
+        Calls.seconds_to_forget,
+        Calls.first_dial,
+        Calls.last_dial,
+        Calls.dialed_times,
     ).where(
         (Calls.dialed_times < times_to_dial)
         & (Calls.first_dial >= lesser_seconds_to_forget)
-        & (Calls.first_dial <= greater_sleep_and_retry)
         & (Calls.cycle_done == False)
     )
     return result
 
 
-async def select_backup_calls(max_backup_calls):
+async def select_to_recall_by_id(call_ids, times_to_dial, lesser_seconds_to_forget):
     """
-    Selects call records that are eligible for backup recall.
+    Selects, among the given call records, the ones eligible for recall.
+
+    This asynchronous function applies the same criteria as `select_to_recall`, restricted to the given
+    IDs, to refresh the schedule of the recalls when the caller register notifies some changes.
+
+    Args:
+        call_ids (list): The IDs of the call records to select.
+        times_to_dial (int): The maximum number of allowed dial attempts.
+        lesser_seconds_to_forget (datetime): The lower bound of the time window for first dial.
+
+    Returns:
+        list: A list of call records matching the recall criteria.
+    """
+
+    if not call_ids:
+        return []
+
+    result = await Calls.select(
+        Calls.id,
+        Calls.phone,
+        Calls.message,
+        Calls.seconds_to_forget,
+        Calls.first_dial,
+        Calls.last_dial,
+        Calls.dialed_times,
+    ).where(
+        (Calls.id.is_in(list(call_ids)))
+        & (Calls.dialed_times < times_to_dial)
+        & (Calls.first_dial >= lesser_seconds_to_forget)
+        & (Calls.cycle_done == False)
+    )
+    return result
+
+
+async def claim_recall(call_id, dialed_times, owner, lease_seconds):
+    """
+    Atomically reserves the next recall attempt of a call record for a recaller instance.
+
+    The attempt is identified by the dial count: the claim succeeds only if the record still has that
+    count, is not done and is not leased by another instance. The lease is released by the caller
+    register when it records the attempt, or expires after `lease_seconds` (e.g. if the instance
+    crashed before placing the call), so that another instance can take it over.
+
+    Args:
+        call_id (uuid): The ID of the call record.
+        dialed_times (int): The dial count of the call record when it was scheduled.
+        owner (str): The identifier of the recaller instance.
+        lease_seconds (int): The duration of the lease.
+
+    Returns:
+        bool: True if the recall has been reserved by this instance, False otherwise.
+    """
+
+    result = await Calls.raw(
+        """
+        UPDATE calls
+        SET recall_lease_until = timezone('utc', now()) + ({} * interval '1 second'),
+            recall_lease_owner = {}
+        WHERE id IN (
+            SELECT id
+            FROM calls
+            WHERE id = {}
+              AND dialed_times = {}
+              AND cycle_done = FALSE
+              AND (recall_lease_until IS NULL
+                   OR recall_lease_until < timezone('utc', now()))
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id
+        """,
+        int(lease_seconds),
+        owner,
+        call_id,
+        int(dialed_times),
+    )
+    return bool(result)
+
+
+async def claim_backup_calls(max_backup_calls, owner, lease_seconds):
+    """
+    Atomically reserves the call records that are eligible for backup recall.
 
     A call is eligible for backup when:
     - It has not been acknowledged
@@ -42,41 +125,77 @@ async def select_backup_calls(max_backup_calls):
     - The backup call count is below the maximum allowed
     - The call cycle is not marked as done
     - The call was originally an on-call request
+    - It is not leased by another recaller instance
+
+    The rows locked by a concurrent claim are skipped, so several recaller instances never reserve
+    the same record. A lease not completed by `complete_backup_call` expires after `lease_seconds`.
 
     Args:
         max_backup_calls (int): Maximum number of backup calls allowed per record.
+        owner (str): The identifier of the recaller instance.
+        lease_seconds (int): The duration of the lease.
 
     Returns:
-        list: A list of call records matching the backup criteria.
+        list: A list of the reserved call records.
     """
-    # Select calls where the main retry window has expired (first_dial + seconds_to_forget < now)
-    # We use raw SQL to compare first_dial + seconds_to_forget interval with current time
-    # Note: Using string formatting for the integer parameter as Piccolo's raw() doesn't
-    # support $1 style placeholders. The value comes from configuration, not user input.
+    # We compare first_dial + seconds_to_forget interval with the current time.
+    # Note: Using string formatting for the integer parameter as it comes from
+    # the configuration, not from user input.
     result = await Calls.raw(
         f"""
-        SELECT id, phone, message, call_backup_callee_number_calls, seconds_to_forget
-        FROM calls
-        WHERE acknowledge_at = '-infinity'
-          AND (first_dial + (seconds_to_forget || ' seconds')::interval) < NOW()
-          AND call_backup_callee_number_calls < {int(max_backup_calls)}
-          AND cycle_done = FALSE
-          AND oncall = TRUE
-        """
+        UPDATE calls
+        SET backup_lease_until = timezone('utc', now()) + ({{}} * interval '1 second'),
+            backup_lease_owner = {{}}
+        WHERE id IN (
+            SELECT id
+            FROM calls
+            WHERE acknowledge_at = '-infinity'
+              AND (first_dial + (seconds_to_forget || ' seconds')::interval) < NOW()
+              AND call_backup_callee_number_calls < {int(max_backup_calls)}
+              AND cycle_done = FALSE
+              AND oncall = TRUE
+              AND (backup_lease_until IS NULL
+                   OR backup_lease_until < timezone('utc', now()))
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING id, phone, message, msg_chk_sum, call_backup_callee_number_calls, seconds_to_forget
+        """,
+        int(lease_seconds),
+        owner,
     )
     return result
 
 
-async def increment_backup_call_count(call_id):
+async def complete_backup_call(call_id, owner, cooldown_seconds, number_calls):
     """
-    Increments the call_backup_callee_number_calls for a specific call record.
+    Records the backup calls placed for a reserved call record.
+
+    The progress of the escalation (`number_calls`, the number of tiers done) is stored only now, after
+    the calls have been placed, and the lease is kept for `cooldown_seconds` more, so that no instance
+    escalates to the next tier too early.
 
     Args:
         call_id (uuid): The ID of the call record to update.
+        owner (str): The identifier of the recaller instance holding the lease.
+        cooldown_seconds (float): The seconds before the next tier of the escalation.
+        number_calls (int): The new value of 'call_backup_callee_number_calls'.
+
+    Returns:
+        bool: True if the lease was still held by this instance, False otherwise.
     """
-    await Calls.update(
-        {
-            Calls.call_backup_callee_number_calls: Calls.call_backup_callee_number_calls
-            + 1
-        }
-    ).where(Calls.id == call_id)
+
+    result = await Calls.raw(
+        """
+        UPDATE calls
+        SET call_backup_callee_number_calls = {},
+            backup_lease_until = timezone('utc', now()) + ({} * interval '1 second')
+        WHERE id = {}
+          AND backup_lease_owner = {}
+        RETURNING id
+        """,
+        int(number_calls),
+        float(cooldown_seconds),
+        call_id,
+        owner,
+    )
+    return bool(result)
@@ -1,12 +1,142 @@
-from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import \
-    AsteriskWsEvents
+import json
+import logging
+from datetime import UTC, datetime, timedelta
+
+from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import (
+    AsteriskWsChannelSummaries,
+    AsteriskWsEvents,
+    AsteriskWsPlayRequests,
+)
+
+ROLLUP_BATCH_SIZE = 5000
+
+# Moves a batch of old events out of 'asterisk_ws_events' and merges them into
+# the per-channel summaries, in a single statement (and so atomically).
+ROLLUP_WS_EVENTS = """
+WITH old_events AS (
+    DELETE FROM asterisk_ws_events
+    WHERE id IN (
+        SELECT id FROM asterisk_ws_events
+        WHERE event_ts < {}
+        LIMIT {}
+    )
+    RETURNING asterisk_chan, event_type, event_ts, channel_state, playback_id
+),
+per_type AS (
+    SELECT asterisk_chan, event_type, COUNT(*) AS events_count
+    FROM old_events
+    GROUP BY asterisk_chan, event_type
+),
+per_chan AS (
+    SELECT asterisk_chan,
+           MIN(event_ts) AS first_event_ts,
+           MAX(event_ts) AS last_event_ts,
+           COUNT(*) AS events_count,
+           (ARRAY_AGG(channel_state ORDER BY event_ts DESC)
+               FILTER (WHERE channel_state <> ''))[1] AS last_channel_state,
+           -- One 'PlaybackStarted' per playback: a count that adds up across the batches
+           COUNT(*) FILTER (WHERE event_type = 'PlaybackStarted') AS playbacks_count
+    FROM old_events
+    GROUP BY asterisk_chan
+),
+summaries AS (
+    INSERT INTO asterisk_ws_channel_summaries AS summary (
+        id, asterisk_chan, first_event_ts, last_event_ts, events_count,
+        event_types, last_channel_state, playbacks_count
+    )
+    SELECT uuid_generate_v4(),
+           per_chan.asterisk_chan,
+           per_chan.first_event_ts,
+           per_chan.last_event_ts,
+           per_chan.events_count,
+           (SELECT jsonb_object_agg(per_type.event_type, per_type.events_count)
+            FROM per_type WHERE per_type.asterisk_chan = per_chan.asterisk_chan),
+           COALESCE(per_chan.last_channel_state, ''),
+           per_chan.playbacks_count
+    FROM per_chan
+    ON CONFLICT (asterisk_chan) DO UPDATE SET
+        first_event_ts = LEAST(summary.first_event_ts, EXCLUDED.first_event_ts),
+        last_event_ts = GREATEST(summary.last_event_ts, EXCLUDED.last_event_ts),
+        events_count = summary.events_count + EXCLUDED.events_count,
+        event_types = (
+            SELECT jsonb_object_agg(
+                type_name,
+                COALESCE((summary.event_types ->> type_name)::int, 0)
+                + COALESCE((EXCLUDED.event_types ->> type_name)::int, 0)
+            )
+            FROM jsonb_object_keys(summary.event_types || EXCLUDED.event_types) AS type_name
+        ),
+        last_channel_state = CASE
+            WHEN EXCLUDED.last_event_ts >= summary.last_event_ts
+                 AND EXCLUDED.last_channel_state <> ''
+            THEN EXCLUDED.last_channel_state
+            ELSE summary.last_channel_state
+        END,
+        playbacks_count = summary.playbacks_count + EXCLUDED.playbacks_count
+    RETURNING asterisk_chan
+)
+SELECT (SELECT COUNT(*) FROM old_events) AS compacted,
+       (SELECT COUNT(*) FROM summaries) AS channels
+"""
+
+
+def _parse_event_ts(timestamp):
+    """
+    Parses the timestamp of an Asterisk event into a naive UTC datetime.
+
+    Asterisk sends timestamps like '2024-04-14T21:26:37.661+0200'.
+
+    Args:
+        timestamp (str): The timestamp of the event.
+
+    Returns:
+        datetime or None: The naive UTC datetime, or None if it can't be parsed.
+    """
+    if not timestamp:
+        return None
+    try:
+        event_ts = datetime.fromisoformat(timestamp)
+    except ValueError:
+        try:
+            event_ts = datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%S.%f%z")
+        except ValueError:
+            return None
+    if event_ts.tzinfo is None:
+        return event_ts
+    return event_ts.astimezone(UTC).replace(tzinfo=None)
+
+
+def ws_event_typed_fields(json_data):
+    """
+    Extracts the typed columns stored alongside the JSON data of an Asterisk WebSocket event.
+
+    Args:
+        json_data (str or dict): The JSON-encoded (or already decoded) event data.
+
+    Returns:
+        dict: The 'event_ts', 'channel_state' and 'playback_id' values for the event.
+    """
+    if isinstance(json_data, str):
+        try:
+            json_data = json.loads(json_data)
+        except ValueError:
+            json_data = {}
+    if not isinstance(json_data, dict):
+        json_data = {}
+
+    return {
+        "event_ts": _parse_event_ts(json_data.get("timestamp")),
+        "channel_state": str((json_data.get("channel") or {}).get("state") or "")[:32],
+        "playback_id": str((json_data.get("playback") or {}).get("id") or "")[:64],
+    }
 
 
 async def insert_ws_event(asterisk_chan, event_type, json_data):
     """
     Inserts a new event record into the Asterisk WebSocket events table.
 
-    This asynchronous function ensures the table exists and inserts the provided channel, event type, and JSON data.
+    This asynchronous function inserts the provided channel, event type, and JSON data,
+    along with the event timestamp, channel state and playback ID extracted from the JSON data.
 
     Args:
         asterisk_chan (str): The identifier of the Asterisk channel.
@@ -16,21 +146,72 @@ async def insert_ws_event(asterisk_chan, event_type, json_data):
     Returns:
         None
     """
-    
+
     await AsteriskWsEvents.insert(
         AsteriskWsEvents(
-            asterisk_chan=asterisk_chan, event_type=event_type, json_data=json_data
+            asterisk_chan=asterisk_chan,
+            event_type=event_type,
+            json_data=json_data,
+            **ws_event_typed_fields(json_data),
         )
     )
 
 
+async def insert_play_request(asterisk_chan, audio_key):
+    """
+    Records a playback about to be requested on an Asterisk channel.
+
+    The requests are kept in `AsteriskWsPlayRequests`, out of the events sent by Asterisk.
+
+    Args:
+        asterisk_chan (str): The identifier of the Asterisk channel.
+        audio_key (str): The cache key of the audio file to play, if any.
+
+    Returns:
+        None
+    """
+
+    await AsteriskWsPlayRequests.insert(
+        AsteriskWsPlayRequests(asterisk_chan=asterisk_chan, audio_key=audio_key or "")
+    )
+
+
+async def select_played_channels(asterisk_chans):
+    """
+    Selects, among the given Asterisk channels, the ones that already requested or started a playback.
+
+    This asynchronous function looks for 'PlaybackStarted' events, and the play requests recorded
+    before each playback request (see `insert_play_request`), for the provided channels, so callers
+    can tell apart the channels that still need their message played (a request sent just before a
+    disconnection has no 'PlaybackStarted' received yet).
+
+    Args:
+        asterisk_chans (list): The identifiers of the Asterisk channels to check.
+
+    Returns:
+        set: The identifiers of the channels with at least one recorded playback or playback request.
+    """
+
+    if not asterisk_chans:
+        return set()
+
+    rows = await AsteriskWsEvents.select(AsteriskWsEvents.asterisk_chan).where(
+        (AsteriskWsEvents.asterisk_chan.is_in(list(asterisk_chans)))
+        & (AsteriskWsEvents.event_type == "PlaybackStarted")
+    )
+    requests = await AsteriskWsPlayRequests.select(
+        AsteriskWsPlayRequests.asterisk_chan
+    ).where(AsteriskWsPlayRequests.asterisk_chan.is_in(list(asterisk_chans)))
+    return {row.get("asterisk_chan") for row in rows + requests}
+
+
 def insert_ws_event_sync(asterisk_chan, event_type, json_data):
     """
     Insert a WebSocket event into the database synchronously.
 
-    This function creates the `AsteriskWsEvents` table if it does not exist and
-    inserts a new WebSocket event record into the table. The inserted data includes
-    the asterisk channel, event type, and JSON data representing the event details.
+    This function inserts a new WebSocket event record into the `AsteriskWsEvents` table.
+    The inserted data includes the asterisk channel, event type, JSON data representing
+    the event details and the typed columns extracted from it.
 
     :param asterisk_chan: The identifier of the asterisk channel associated with
                           the event.
@@ -41,10 +222,13 @@ def insert_ws_event_sync(asterisk_chan, event_type, json_data):
     :type json_data: dict
     :return: None
     """
-    
+
     AsteriskWsEvents.insert(
         AsteriskWsEvents(
-            asterisk_chan=asterisk_chan, event_type=event_type, json_data=json_data
+            asterisk_chan=asterisk_chan,
+            event_type=event_type,
+            json_data=json_data,
+            **ws_event_typed_fields(json_data),
         )
     ).run_sync()
 
@@ -59,7 +243,7 @@ async def select_ws_events():
     :return: A list of selected WebSocket events from the `AsteriskWsEvents` table.
     :rtype: list
     """
-    
+
     return await AsteriskWsEvents.select()
 
 
@@ -73,5 +257,72 @@ def select_ws_events_sync():
     :return: A list of all selected records from the Asterisk WebSocket events table.
     :rtype: list
     """
-    
-    return AsteriskWsEvents.select().run_sync()
+
+    return (
+        AsteriskWsEvents.select()
+        .order_by(AsteriskWsEvents.event_ts, ascending=False)
+        .run_sync()
+    )
+
+
+def select_ws_events_between_sync(start_ts, end_ts):
+    """
+    Selects the Asterisk WebSocket events in a time range in a synchronous manner.
+
+    The query is driven by the index on the `event_ts` column.
+
+    :param start_ts: The (naive UTC) beginning of the range, included.
+    :type start_ts: datetime
+    :param end_ts: The (naive UTC) end of the range, excluded.
+    :type end_ts: datetime
+    :return: The events in the range, ordered by their timestamp.
+    :rtype: list
+    """
+
+    return (
+        AsteriskWsEvents.select()
+        .where(
+            (AsteriskWsEvents.event_ts >= start_ts)
+            & (AsteriskWsEvents.event_ts < end_ts)
+        )
+        .order_by(AsteriskWsEvents.event_ts)
+        .run_sync()
+    )
+
+
+async def rollup_ws_events(retention_days, batch_size=ROLLUP_BATCH_SIZE):
+    """
+    Compacts the Asterisk WebSocket events older than the retention period into per-channel summaries.
+
+    This asynchronous function moves the old events, batch by batch, out of the events table and merges
+    them into `AsteriskWsChannelSummaries`, so the events table only keeps the recent history. The old
+    play requests are deleted.
+
+    Args:
+        retention_days (int): The number of days of events to keep in full.
+        batch_size (int): The maximum number of events compacted by each statement.
+
+    Returns:
+        int: The number of events compacted.
+    """
+    cutoff = datetime.now(UTC).replace(tzinfo=None) - timedelta(days=retention_days)
+    compacted = 0
+
+    while True:
+        result = await AsteriskWsChannelSummaries.raw(
+            ROLLUP_WS_EVENTS, cutoff, int(batch_size)
+        )
+        compacted_now = result[0].get("compacted", 0) if result else 0
+        compacted += compacted_now
+        if compacted_now < batch_size:
+            break
+
+    await AsteriskWsPlayRequests.delete().where(
+        AsteriskWsPlayRequests.requested_at < cutoff
+    )
+
+    if compacted:
+        logging.info(
+            f"Compacted {compacted} Asterisk WebSocket events older than {cutoff} into per-channel summaries"
+        )
+    return compacted
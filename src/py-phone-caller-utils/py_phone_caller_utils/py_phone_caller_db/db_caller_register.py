@@ -2,6 +2,13 @@ import logging
 from datetime import UTC, datetime, timedelta
 
 from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_db.db_notify import (
+    CALL_ACKNOWLEDGED,
+    CALL_CYCLE_DONE,
+    CALL_DIALED,
+    CALL_REGISTERED,
+    notify_calls,
+)
 from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import (
     Calls,
 )
@@ -30,7 +37,8 @@ async def insert_into_db(
     """
     Inserts a new call record into the database with the provided call details.
 
-    This asynchronous function inserts a new call record and logs the operation.
+    This asynchronous function inserts a new call record, logs the operation and notifies
+    the listeners of the calls channel (e.g. the recaller).
 
     Args:
         phone (str): The recipient's phone number.
@@ -50,7 +58,7 @@ async def insert_into_db(
     """
 
     try:
-        await Calls.insert(
+        inserted = await Calls.insert(
             Calls(
                 phone=phone,
                 message=message,
@@ -68,7 +76,8 @@ async def insert_into_db(
                 oncall=oncall,
                 backup_callee=backup_callee,
             )
-        )
+        ).returning(Calls.id)
+        await notify_calls(CALL_REGISTERED, [row.get("id") for row in inserted])
         logging.info(
             f"New cycle for the number '{phone}' with the message '{message}' starting at '{first_dial}'."
         )
@@ -89,7 +98,7 @@ async def update_the_call_db_record(
     Updates an existing call record in the database with new dial information.
 
     This asynchronous function updates the last dial time, increments the dialed times (if not exceeding times_to_dial),
-    and sets the current Asterisk channel for the specified call.
+    sets the current Asterisk channel for the specified call and releases the lease taken by the recaller on the attempt.
 
     Args:
         call_chk_sum (str): The checksum of the call.
@@ -128,8 +137,11 @@ async def update_the_call_db_record(
                 Calls.last_dial: datetime.now(UTC).replace(tzinfo=None),
                 Calls.dialed_times: new_dialed_times,
                 Calls.asterisk_chan: asterisk_chan,
+                # The attempt is recorded, the recaller that placed it can release it.
+                Calls.recall_lease_until: None,
             }
         ).where((Calls.call_chk_sum == call_chk_sum) & (Calls.id == current_call_id))
+        await notify_calls(CALL_DIALED, [current_call_id])
         logging.info(
             f"Updating the call status for the number '{phone}' with the message '{message}'. UUID: '{current_call_id}'"
         )
@@ -317,12 +329,19 @@ async def update_acknowledgement(asterisk_chan):
             firing_end_time = first_dial + timedelta(seconds=seconds_to_forget)
 
             if current_time <= firing_end_time:
-                await Calls.update(
-                    {
-                        Calls.acknowledge_at: current_time,
-                        Calls.cycle_done: True,
-                    }
-                ).where(Calls.asterisk_chan == asterisk_chan)
+                acknowledged = (
+                    await Calls.update(
+                        {
+                            Calls.acknowledge_at: current_time,
+                            Calls.cycle_done: True,
+                        }
+                    )
+                    .where(Calls.asterisk_chan == asterisk_chan)
+                    .returning(Calls.id)
+                )
+                await notify_calls(
+                    CALL_ACKNOWLEDGED, [row.get("id") for row in acknowledged]
+                )
                 logging.info(
                     f"Call with asterisk_chan {asterisk_chan} acknowledged within firing period."
                 )
@@ -372,15 +391,20 @@ async def _mark_related_oncall_records_done(msg_chk_sum, current_time):
         None
     """
     try:
-        result = await Calls.update(
-            {
-                Calls.cycle_done: True,
-            }
-        ).where(
-            (Calls.msg_chk_sum == msg_chk_sum)
-            & (Calls.oncall == True)
-            & (Calls.cycle_done == False)
+        result = (
+            await Calls.update(
+                {
+                    Calls.cycle_done: True,
+                }
+            )
+            .where(
+                (Calls.msg_chk_sum == msg_chk_sum)
+                & (Calls.oncall == True)
+                & (Calls.cycle_done == False)
+            )
+            .returning(Calls.id)
         )
+        await notify_calls(CALL_CYCLE_DONE, [row.get("id") for row in result])
         logging.info(
             f"Marked related oncall records as done for msg_chk_sum: {msg_chk_sum}"
         )
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+
+from py_phone_caller_utils.backoff import backoff_delay
+from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import (
+    Calls,
+)
+
+logging.basicConfig(
+    format=settings.logs.log_formatter, level=settings.logs.log_level, force=True
+)
+
+CALLS_CHANNEL = "py_phone_caller_calls"
+
+CALL_REGISTERED = "registered"
+CALL_DIALED = "dialed"
+CALL_ACKNOWLEDGED = "acknowledged"
+CALL_CYCLE_DONE = "cycle_done"
+
+ADDRESS_BOOK_CHANNEL = "py_phone_caller_address_book"
+
+CONTACT_ADDED = "added"
+CONTACT_MODIFIED = "modified"
+CONTACT_DELETED = "deleted"
+
+
+async def notify(channel, event, record_ids):
+    """
+    Sends a PostgreSQL NOTIFY about some records.
+
+    The notification is best-effort: the listeners run a periodic consistency sweep, so a
+    failure is only logged.
+
+    :param channel: The name of the channel to notify.
+    :type channel: str
+    :param event: The kind of event (e.g. 'registered', 'acknowledged').
+    :type event: str
+    :param record_ids: The IDs of the records involved.
+    :type record_ids: list
+    :return: None
+    """
+
+    payload = json.dumps(
+        {"event": event, "ids": [str(record_id) for record_id in record_ids]}
+    )
+    try:
+        await Calls.raw("SELECT pg_notify({}, {})", channel, payload)
+    except Exception as err:
+        logging.error(f"Unable to notify '{event}' on the channel '{channel}': {err}")
+
+
+async def notify_calls(event, call_ids):
+    """
+    Sends a PostgreSQL NOTIFY about some call records on the calls channel.
+
+    :param event: The kind of event (e.g. 'registered', 'acknowledged').
+    :type event: str
+    :param call_ids: The IDs of the call records involved.
+    :type call_ids: list
+    :return: None
+    """
+
+    if call_ids:
+        await notify(CALLS_CHANNEL, event, call_ids)
+
+
+async def notify_address_book(event, contact_ids):
+    """
+    Sends a PostgreSQL NOTIFY about some contacts on the address book channel.
+
+    :param event: The kind of event (e.g. 'added', 'deleted').
+    :type event: str
+    :param contact_ids: The IDs of the contacts involved.
+    :type contact_ids: list
+    :return: None
+    """
+
+    if contact_ids:
+        await notify(ADDRESS_BOOK_CHANNEL, event, contact_ids)
+
+
+async def listen(channel, callback, on_connect=None, base_seconds=1, max_seconds=60):
+    """
+    Listens forever to a PostgreSQL channel, reconnecting when the connection is lost.
+
+    A dedicated connection is used, outside the connection pool. Since the notifications sent while
+    disconnected are lost, `on_connect` is awaited after every (re)connection, so the listener can
+    catch up with a full query.
+
+    :param channel: The name of the channel to listen to.
+    :type channel: str
+    :param callback: Called with the decoded payload of every notification (a coroutine function).
+    :type callback: callable
+    :param on_connect: Awaited after the connection is (re)established, optional.
+    :type on_connect: callable
+    :param base_seconds: The reconnection backoff bound for the first retry.
+    :type base_seconds: float
+    :param max_seconds: The maximum reconnection backoff bound.
+    :type max_seconds: float
+    :return: None
+    """
+
+    loop = asyncio.get_running_loop()
+    callbacks = set()
+    failed_attempts = 0
+    while True:
+        connection = None
+        try:
+            connection = await Calls._meta.db.get_new_connection()
+            closed = loop.create_future()
+
+            def on_notification(_connection, _pid, _channel, payload):
+                try:
+                    decoded = json.loads(payload)
+                except ValueError:
+                    logging.error(f"Invalid notification on '{channel}': '{payload}'")
+                    return
+                task = loop.create_task(callback(decoded))
+                callbacks.add(task)
+                task.add_done_callback(callbacks.discard)
+
+            def on_termination(_connection):
+                if not closed.done():
+                    closed.set_result(None)
+
+            await connection.add_listener(channel, on_notification)
+            connection.add_termination_listener(on_termination)
+            logging.info(f"Listening to the PostgreSQL channel '{channel}'")
+            failed_attempts = 0
+
+            if on_connect is not None:
+                await on_connect()
+
+            await closed
+            logging.warning(f"Connection listening to '{channel}' closed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            logging.exception(f"Unable to listen to the channel '{channel}': '{err}'")
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+        delay = backoff_delay(failed_attempts, base_seconds, max_seconds)
+        failed_attempts += 1
+        await asyncio.sleep(delay)
@@ -0,0 +1,216 @@
+import logging
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_db.db_address_book import (
+    on_call_entries,
+    select_enabled_contacts,
+)
+from py_phone_caller_utils.py_phone_caller_db.db_notify import CONTACT_DELETED
+
+logging.basicConfig(
+    format=settings.logs.log_formatter, level=settings.logs.log_level, force=True
+)
+
+# The windows include their end, the boundaries are half-open: [start, end + RESOLUTION).
+RESOLUTION = timedelta(microseconds=1)
+
+
+class OnCallIndex:
+    """
+    In-memory index of the on-call availability windows of the enabled contacts.
+
+    The start and end of every window are kept in a sorted list of boundaries. Between two
+    consecutive boundaries the set of on-call contacts does not change, so the ordered list of
+    contacts is precomputed for each of these segments: a lookup is a binary search on the
+    boundaries, without any database access.
+
+    The contacts are updated one by one (`upsert_contacts`, `remove_contacts`): only the
+    segments covered by their old and new windows are updated, and a boundary is dropped once
+    no window starts or ends on it. The whole index is built at once by `replace_contacts`.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._boundaries = []
+        self._segments = []
+        self._edges = {}
+        self._contacts = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def upsert_contacts(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Adds or replaces the availability windows of some contacts.
+
+        :param rows: The contact records, as selected by `select_enabled_contacts`.
+        :return: None
+        """
+
+        for row in rows:
+            contact_id = str(row.get("id"))
+            self._remove_windows(contact_id)
+            windows = _windows(contact_id, on_call_entries(row))
+            self._entries[contact_id] = windows
+            for window in windows:
+                self._add_window(*window)
+
+    def remove_contacts(self, contact_ids: Iterable[Any]) -> None:
+        """
+        Removes some contacts (e.g. deleted or disabled ones) from the index.
+
+        :param contact_ids: The IDs of the contacts to remove.
+        :return: None
+        """
+
+        for contact_id in contact_ids:
+            self._remove_windows(str(contact_id))
+
+    def replace_contacts(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Replaces the whole content of the index.
+
+        :param rows: The records of all the enabled contacts.
+        :return: None
+        """
+
+        self._entries = {
+            str(row.get("id")): _windows(str(row.get("id")), on_call_entries(row))
+            for row in rows
+        }
+        self._rebuild()
+
+    def on_call_contacts(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Returns the contacts on call at a given time, in priority order.
+
+        The result is the same as the one of `get_on_call_contacts`.
+
+        :param now: The (timezone-aware) datetime to evaluate, the current time by default.
+        :return: A list of dictionaries containing the on-call contacts' details.
+        """
+
+        now = now or datetime.now(UTC)
+        idx = bisect_right(self._boundaries, now) - 1
+        if idx < 0:
+            return []
+        return [self._contacts[item] for item in self._segments[idx]]
+
+    def _add_window(self, start, end, item, contact):
+        self._contacts[item] = contact
+        first = self._split(start)
+        last = self._split(end + RESOLUTION)
+        for idx in range(first, last):
+            insort(self._segments[idx], item)
+
+    def _remove_windows(self, contact_id):
+        for start, end, item, _ in self._entries.pop(contact_id, ()):
+            del self._contacts[item]
+            first = bisect_left(self._boundaries, start)
+            last = bisect_left(self._boundaries, end + RESOLUTION)
+            for idx in range(first, last):
+                segment = self._segments[idx]
+                del segment[bisect_left(segment, item)]
+            self._release(end + RESOLUTION)
+            self._release(start)
+
+    def _split(self, boundary):
+        # The segment starting on a new boundary has the contacts of the one it is cut from
+        idx = bisect_left(self._boundaries, boundary)
+        if idx == len(self._boundaries) or self._boundaries[idx] != boundary:
+            self._boundaries.insert(idx, boundary)
+            self._segments.insert(idx, list(self._segments[idx - 1]) if idx else [])
+        self._edges[boundary] = self._edges.get(boundary, 0) + 1
+        return idx
+
+    def _release(self, boundary):
+        # Without any window starting or ending on it, a boundary separates two equal segments
+        self._edges[boundary] -= 1
+        if self._edges[boundary]:
+            return
+        del self._edges[boundary]
+        idx = bisect_left(self._boundaries, boundary)
+        del self._boundaries[idx]
+        del self._segments[idx]
+
+    def _rebuild(self):
+        windows = [window for windows in self._entries.values() for window in windows]
+        edges = {}
+        for start, end, _, _ in windows:
+            edges[start] = edges.get(start, 0) + 1
+            edges[end + RESOLUTION] = edges.get(end + RESOLUTION, 0) + 1
+        boundaries = sorted(edges)
+
+        starting = [[] for _ in boundaries]
+        ending = [[] for _ in boundaries]
+        positions = {boundary: idx for idx, boundary in enumerate(boundaries)}
+        for start, end, item, _ in windows:
+            starting[positions[start]].append(item)
+            ending[positions[end + RESOLUTION]].append(item)
+
+        segments = []
+        active = set()
+        for idx in range(len(boundaries)):
+            active.difference_update(ending[idx])
+            active.update(starting[idx])
+            segments.append(sorted(active))
+
+        self._boundaries = boundaries
+        self._segments = segments
+        self._edges = edges
+        self._contacts = {item: contact for _, _, item, contact in windows}
+
+
+def _windows(contact_id, entries):
+    # The ID of the contact and the number of the window break the ties of the sorting keys
+    return [
+        (start, end, (key, contact_id, number), contact)
+        for number, (start, end, key, contact) in enumerate(entries)
+    ]
+
+
+async def load_on_call_index(index: OnCallIndex) -> None:
+    """
+    Loads all the enabled contacts of the address book into an on-call index.
+
+    :param index: The index to (re)load.
+    :return: None
+    """
+
+    index.replace_contacts(await select_enabled_contacts())
+    logging.info(f"On-call index loaded with {len(index)} contacts")
+
+
+async def refresh_on_call_index(index: OnCallIndex, payload: Dict[str, Any]) -> None:
+    """
+    Updates an on-call index after a notification of the address book.
+
+    The notified contacts are selected again: the ones no longer enabled are removed.
+
+    :param index: The index to update.
+    :param payload: The notification, with the 'event' and 'ids' keys.
+    :return: None
+    """
+
+    contact_ids = [str(contact_id) for contact_id in payload.get("ids", [])]
+    if payload.get("event") == CONTACT_DELETED:
+        index.remove_contacts(contact_ids)
+        return
+
+    try:
+        rows = await select_enabled_contacts(
+            [uuid.UUID(contact_id) for contact_id in contact_ids]
+        )
+    except Exception as err:
+        logging.exception(f"Unable to refresh the on-call index: '{err}'")
+        return
+
+    enabled = {str(row.get("id")) for row in rows}
+    index.remove_contacts(
+        [contact_id for contact_id in contact_ids if contact_id not in enabled]
+    )
+    index.upsert_contacts(rows)
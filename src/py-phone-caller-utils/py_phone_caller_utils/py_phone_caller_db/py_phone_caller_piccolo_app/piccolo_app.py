@@ -8,7 +8,7 @@ import os
 from piccolo.conf.apps import AppConfig
 
 from py_phone_caller_utils.py_phone_caller_db.py_phone_caller_piccolo_app.tables import (
-    AsteriskWsEvents, Calls, ScheduledCalls, Users, AddressBook)
+    AsteriskWsEvents, AsteriskWsChannelSummaries, AsteriskWsPlayRequests, Calls, ScheduledCalls, Users, AddressBook)
 
 CURRENT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
 
@@ -16,7 +16,15 @@ CURRENT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
 APP_CONFIG = AppConfig(
     app_name="py_phone_caller_piccolo_app",
     migrations_folder_path=os.path.join(CURRENT_DIRECTORY, "piccolo_migrations"),
-    table_classes=[Calls, ScheduledCalls, AsteriskWsEvents, Users, AddressBook],
+    table_classes=[
+        Calls,
+        ScheduledCalls,
+        AsteriskWsEvents,
+        AsteriskWsChannelSummaries,
+        AsteriskWsPlayRequests,
+        Users,
+        AddressBook,
+    ],
     migration_dependencies=[],
     commands=[],
 )
@@ -0,0 +1,273 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.columns.column_types import UUID, Integer, JSONB, Timestamp, Varchar
+from piccolo.columns.defaults.uuid import UUID4
+from piccolo.columns.indexes import IndexMethod
+
+
+ID = "2026-10-19T09:12:04:118532"
+VERSION = "1.28.0"
+DESCRIPTION = "Add typed columns to AsteriskWsEvents and the AsteriskWsChannelSummaries table"
+
+
+async def forwards():
+    manager = MigrationManager(
+        migration_id=ID,
+        app_name="py_phone_caller_piccolo_app",
+        description=DESCRIPTION,
+    )
+
+    manager.add_table(
+        class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        schema=None,
+        columns=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsEvents",
+        tablename="asterisk_ws_events",
+        column_name="event_ts",
+        db_column_name="event_ts",
+        column_class_name="Timestamp",
+        column_class=Timestamp,
+        params={
+            "default": None,
+            "null": True,
+            "primary_key": False,
+            "unique": False,
+            "index": True,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsEvents",
+        tablename="asterisk_ws_events",
+        column_name="channel_state",
+        db_column_name="channel_state",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 32,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsEvents",
+        tablename="asterisk_ws_events",
+        column_name="playback_id",
+        db_column_name="playback_id",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 64,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="id",
+        db_column_name="id",
+        column_class_name="UUID",
+        column_class=UUID,
+        params={
+            "default": UUID4(),
+            "null": False,
+            "primary_key": True,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="asterisk_chan",
+        db_column_name="asterisk_chan",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 64,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": True,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="first_event_ts",
+        db_column_name="first_event_ts",
+        column_class_name="Timestamp",
+        column_class=Timestamp,
+        params={
+            "default": None,
+            "null": True,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="last_event_ts",
+        db_column_name="last_event_ts",
+        column_class_name="Timestamp",
+        column_class=Timestamp,
+        params={
+            "default": None,
+            "null": True,
+            "primary_key": False,
+            "unique": False,
+            "index": True,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="events_count",
+        db_column_name="events_count",
+        column_class_name="Integer",
+        column_class=Integer,
+        params={
+            "default": 0,
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="event_types",
+        db_column_name="event_types",
+        column_class_name="JSONB",
+        column_class=JSONB,
+        params={
+            "default": "{}",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="last_channel_state",
+        db_column_name="last_channel_state",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 32,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsChannelSummaries",
+        tablename="asterisk_ws_channel_summaries",
+        column_name="playbacks_count",
+        db_column_name="playbacks_count",
+        column_class_name="Integer",
+        column_class=Integer,
+        params={
+            "default": 0,
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.alter_column(
+        table_class_name="AsteriskWsEvents",
+        tablename="asterisk_ws_events",
+        column_name="asterisk_chan",
+        db_column_name="asterisk_chan",
+        params={"index": True},
+        old_params={"index": False},
+        column_class=Varchar,
+        old_column_class=Varchar,
+        schema=None,
+    )
+
+    return manager
@@ -0,0 +1,46 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.engine.finder import engine_finder
+
+
+ID = "2026-10-19T09:12:05:000000"
+VERSION = "1.28.0"
+DESCRIPTION = "Backfill the AsteriskWsEvents typed columns and compress the JSON data"
+
+
+BACKFILL_TYPED_COLUMNS = """
+UPDATE asterisk_ws_events
+SET event_ts = ((json_data ->> 'timestamp')::timestamptz AT TIME ZONE 'UTC'),
+    channel_state = COALESCE(json_data -> 'channel' ->> 'state', ''),
+    playback_id = COALESCE(json_data -> 'playback' ->> 'id', '')
+WHERE event_ts IS NULL
+  AND jsonb_typeof(json_data) = 'object'
+  AND json_data ? 'timestamp'
+"""
+
+# LZ4 is faster than the default 'pglz' TOAST compression, but it needs
+# PostgreSQL 14+ built with LZ4 support: keep the default when not available.
+JSON_DATA_LZ4_COMPRESSION = """
+DO $$
+BEGIN
+    ALTER TABLE asterisk_ws_events ALTER COLUMN json_data SET COMPRESSION lz4;
+EXCEPTION WHEN OTHERS THEN
+    RAISE NOTICE 'LZ4 compression not available, keeping the default one';
+END $$
+"""
+
+
+async def forwards():
+    manager = MigrationManager(
+        migration_id=ID,
+        app_name="py_phone_caller_piccolo_app",
+        description=DESCRIPTION,
+    )
+
+    async def run():
+        engine = engine_finder()
+        await engine.run_ddl(BACKFILL_TYPED_COLUMNS)
+        await engine.run_ddl(JSON_DATA_LZ4_COMPRESSION)
+
+    manager.add_raw(run)
+
+    return manager
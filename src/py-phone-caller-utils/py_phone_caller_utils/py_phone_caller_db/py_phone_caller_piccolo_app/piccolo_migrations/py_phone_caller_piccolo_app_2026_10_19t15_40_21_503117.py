@@ -0,0 +1,104 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.columns.column_types import Timestamp, Varchar
+from piccolo.columns.indexes import IndexMethod
+
+
+ID = "2026-10-19T15:40:21:503117"
+VERSION = "1.28.0"
+DESCRIPTION = "Add the recall and backup call leases to Calls"
+
+
+async def forwards():
+    manager = MigrationManager(
+        migration_id=ID,
+        app_name="py_phone_caller_piccolo_app",
+        description=DESCRIPTION,
+    )
+
+    manager.add_column(
+        table_class_name="Calls",
+        tablename="calls",
+        column_name="recall_lease_until",
+        db_column_name="recall_lease_until",
+        column_class_name="Timestamp",
+        column_class=Timestamp,
+        params={
+            "default": None,
+            "null": True,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="Calls",
+        tablename="calls",
+        column_name="recall_lease_owner",
+        db_column_name="recall_lease_owner",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 128,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="Calls",
+        tablename="calls",
+        column_name="backup_lease_until",
+        db_column_name="backup_lease_until",
+        column_class_name="Timestamp",
+        column_class=Timestamp,
+        params={
+            "default": None,
+            "null": True,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="Calls",
+        tablename="calls",
+        column_name="backup_lease_owner",
+        db_column_name="backup_lease_owner",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 128,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    return manager
@@ -0,0 +1,125 @@
+from piccolo.apps.migrations.auto.migration_manager import MigrationManager
+from piccolo.columns.column_types import UUID, Timestamp, Varchar
+from piccolo.columns.defaults.timestamp import TimestampNow
+from piccolo.columns.defaults.uuid import UUID4
+from piccolo.columns.indexes import IndexMethod
+from piccolo.engine.finder import engine_finder
+
+
+ID = "2026-10-19T17:05:12:482917"
+VERSION = "1.28.0"
+DESCRIPTION = "Add the AsteriskWsPlayRequests table, out of the Asterisk events"
+
+
+# The play requests were first recorded as events: keep only the ones sent by Asterisk
+DELETE_PLAY_REQUEST_EVENTS = """
+DELETE FROM asterisk_ws_events WHERE event_type = 'PlaybackRequested'
+"""
+
+
+async def forwards():
+    manager = MigrationManager(
+        migration_id=ID,
+        app_name="py_phone_caller_piccolo_app",
+        description=DESCRIPTION,
+    )
+
+    manager.add_table(
+        class_name="AsteriskWsPlayRequests",
+        tablename="asterisk_ws_play_requests",
+        schema=None,
+        columns=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsPlayRequests",
+        tablename="asterisk_ws_play_requests",
+        column_name="id",
+        db_column_name="id",
+        column_class_name="UUID",
+        column_class=UUID,
+        params={
+            "default": UUID4(),
+            "null": False,
+            "primary_key": True,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsPlayRequests",
+        tablename="asterisk_ws_play_requests",
+        column_name="asterisk_chan",
+        db_column_name="asterisk_chan",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 64,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": True,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsPlayRequests",
+        tablename="asterisk_ws_play_requests",
+        column_name="audio_key",
+        db_column_name="audio_key",
+        column_class_name="Varchar",
+        column_class=Varchar,
+        params={
+            "length": 128,
+            "default": "",
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": False,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    manager.add_column(
+        table_class_name="AsteriskWsPlayRequests",
+        tablename="asterisk_ws_play_requests",
+        column_name="requested_at",
+        db_column_name="requested_at",
+        column_class_name="Timestamp",
+        column_class=Timestamp,
+        params={
+            "default": TimestampNow(),
+            "null": False,
+            "primary_key": False,
+            "unique": False,
+            "index": True,
+            "index_method": IndexMethod.btree,
+            "choices": None,
+            "db_column_name": None,
+            "secret": False,
+        },
+        schema=None,
+    )
+
+    async def run():
+        await engine_finder().run_ddl(DELETE_PLAY_REQUEST_EVENTS)
+
+    manager.add_raw(run)
+
+    return manager
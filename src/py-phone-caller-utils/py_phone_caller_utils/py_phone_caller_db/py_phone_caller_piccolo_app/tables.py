@@ -9,12 +9,49 @@ class AsteriskWsEvents(Table):
     Represents an event received from the Asterisk WebSocket interface.
 
     This Piccolo ORM table stores the channel, event type, and associated JSON data for each event.
+    The event timestamp, channel state and playback ID are extracted at insert time into typed columns,
+    so time-range queries can use the index instead of parsing the JSON data.
     """
 
     id = UUID(primary_key=True, default=UUID4())
-    asterisk_chan = Varchar(length=64, default="")
+    asterisk_chan = Varchar(length=64, default="", index=True)
     event_type = Varchar(length=64, default="")
     json_data = JSONB(default="{}")
+    event_ts = Timestamp(null=True, default=None, index=True)
+    channel_state = Varchar(length=32, default="")
+    playback_id = Varchar(length=64, default="")
+
+
+class AsteriskWsChannelSummaries(Table):
+    """
+    Represents the per-channel summary of the Asterisk WebSocket events compacted by the retention job.
+
+    This Piccolo ORM table keeps, for each channel, the time span, the number of events by type,
+    the last known channel state and the number of playbacks of the events that were rolled up.
+    """
+
+    id = UUID(primary_key=True, default=UUID4())
+    asterisk_chan = Varchar(length=64, default="", unique=True)
+    first_event_ts = Timestamp(null=True, default=None)
+    last_event_ts = Timestamp(null=True, default=None, index=True)
+    events_count = Integer(default=0)
+    event_types = JSONB(default="{}")
+    last_channel_state = Varchar(length=32, default="")
+    playbacks_count = Integer(default=0)
+
+
+class AsteriskWsPlayRequests(Table):
+    """
+    Represents a playback requested by the WebSocket monitor on an Asterisk channel.
+
+    This Piccolo ORM table is kept apart from the events sent by Asterisk: the recovery of the channels
+    after a disconnection skips the ones with a request, even when their 'PlaybackStarted' event was lost.
+    """
+
+    id = UUID(primary_key=True, default=UUID4())
+    asterisk_chan = Varchar(length=64, default="", index=True)
+    audio_key = Varchar(length=128, default="")
+    requested_at = Timestamp(default=TimestampNow(), index=True)
 
 
 class ScheduledCalls(Table):
@@ -74,6 +111,10 @@ class Calls(Table):
     oncall = Boolean(default=False)
     backup_callee = Boolean(default=False)
     call_backup_callee_number_calls = SmallInt(default=0)
+    recall_lease_until = Timestamp(null=True, default=None)
+    recall_lease_owner = Varchar(length=128, default="")
+    backup_lease_until = Timestamp(null=True, default=None)
+    backup_lease_owner = Varchar(length=128, default="")
 
 
 class AddressBook(Table):
@@ -0,0 +1,138 @@
+"""
+Audio post-processing shared by the TTS engines.
+
+Every engine ends with the same steps: resampling its native rate to the 8 kHz
+played by Asterisk, converting the float samples to 16-bit PCM and writing a
+mono WAV file. The resampling is a rational polyphase filter (24 kHz -> 8 kHz
+is 1/3, 22.05 kHz -> 8 kHz is 160/441): linear in the length of the clip,
+without the memory of an FFT over the whole clip nor its ringing at the edges.
+
+This module only depends on numpy and scipy: the TTS scripts run as separate
+processes import it as a sibling module.
+"""
+
+import io
+import wave
+from math import gcd
+
+import numpy as np
+
+ASTERISK_SAMPLE_RATE = 8000
+SAMPLE_WIDTH = 2
+INT16_SCALE = 32767
+
+
+def resample(samples, original_rate, target_rate=ASTERISK_SAMPLE_RATE):
+    """
+    Resamples float samples with a rational polyphase filter.
+
+    Args:
+        samples (numpy.ndarray): The mono float samples, in [-1, 1].
+        original_rate (int): The sample rate of the samples.
+        target_rate (int): The sample rate to resample to.
+
+    Returns:
+        numpy.ndarray: The resampled float32 samples (the input itself if the rates match).
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim != 1:
+        samples = samples.reshape(-1)
+    original_rate, target_rate = int(original_rate), int(target_rate)
+    if original_rate == target_rate:
+        return samples
+    # Imported here: the services only writing WAV files don't load scipy
+    from scipy.signal import resample_poly
+
+    divisor = gcd(original_rate, target_rate)
+    return resample_poly(
+        samples, target_rate // divisor, original_rate // divisor
+    ).astype(np.float32, copy=False)
+
+
+def int16_to_float(pcm_data):
+    """
+    Converts 16-bit PCM data to float32 samples in [-1, 1].
+
+    Args:
+        pcm_data (bytes): The little-endian 16-bit PCM data.
+
+    Returns:
+        numpy.ndarray: The float32 samples.
+    """
+    samples = np.frombuffer(pcm_data, dtype="<i2").astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
+
+
+def float_to_int16(samples, out=None, overwrite=False):
+    """
+    Converts float samples to 16-bit PCM, clipping them to [-1, 1].
+
+    The samples are scaled in a single float32 work buffer, then cast into the
+    output buffer, without any other temporary array.
+
+    Args:
+        samples (numpy.ndarray): The float samples.
+        out (numpy.ndarray): A preallocated int16 buffer of the same length, allocated if None.
+        overwrite (bool): Use the float32 samples themselves as work buffer.
+
+    Returns:
+        numpy.ndarray: The int16 samples.
+    """
+    if overwrite:
+        work = np.asarray(samples, dtype=np.float32).reshape(-1)
+    else:
+        work = np.array(samples, dtype=np.float32).reshape(-1)
+    if out is None:
+        out = np.empty(work.shape, dtype=np.int16)
+    np.clip(work, -1.0, 1.0, out=work)
+    np.multiply(work, INT16_SCALE, out=work)
+    np.rint(work, out=work)
+    np.copyto(out, work, casting="unsafe")
+    return out
+
+
+def wav_bytes(pcm_samples, sample_rate=ASTERISK_SAMPLE_RATE):
+    """
+    Builds a mono 16-bit WAV file in memory.
+
+    Args:
+        pcm_samples (numpy.ndarray | bytes): The int16 samples.
+        sample_rate (int): The sample rate of the samples.
+
+    Returns:
+        bytes: The content of the WAV file.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(SAMPLE_WIDTH)
+        wav_file.setframerate(int(sample_rate))
+        wav_file.writeframes(
+            pcm_samples.astype("<i2", copy=False).tobytes()
+            if isinstance(pcm_samples, np.ndarray)
+            else pcm_samples
+        )
+    return buffer.getvalue()
+
+
+def write_asterisk_wav(
+    output_path, samples, original_rate, target_rate=ASTERISK_SAMPLE_RATE
+):
+    """
+    Resamples float samples and writes them as a mono 16-bit WAV file, in a single write.
+
+    Args:
+        output_path (str | Path): The path of the WAV file.
+        samples (numpy.ndarray): The mono float samples, in [-1, 1].
+        original_rate (int): The sample rate of the samples.
+        target_rate (int): The sample rate of the WAV file.
+
+    Returns:
+        int: The number of samples written.
+    """
+    resampled = resample(samples, original_rate, target_rate)
+    pcm_samples = float_to_int16(resampled, overwrite=resampled is not samples)
+    with open(output_path, "wb") as output:
+        output.write(wav_bytes(pcm_samples, target_rate))
+    return len(pcm_samples)
@@ -1,12 +1,18 @@
 import logging
 import os
+import re
+import tempfile
+import threading
 import wave
-
-import boto3
-import numpy as np
-from scipy.signal import resample
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
 
 from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+    float_to_int16,
+    int16_to_float,
+    resample,
+)
 
 logging.basicConfig(
     format=settings.logs.log_formatter, level=settings.logs.log_level, force=True
@@ -15,8 +21,49 @@ logging.basicConfig(
 SERVING_AUDIO_FOLDER = settings.generate_audio.serving_audio_folder
 AWS_POLLY_REGION_NAME = settings.generate_audio.aws_polly_region_name
 AWS_POLLY_VOICE = settings.generate_audio.aws_polly_voice
+AWS_POLLY_CHUNK_CHARS = int(settings.generate_audio.get("aws_polly_chunk_chars", 600))
+AWS_POLLY_CONCURRENCY = int(settings.generate_audio.get("aws_polly_concurrency", 4))
+AWS_POLLY_MAX_ATTEMPTS = int(settings.generate_audio.get("aws_polly_max_attempts", 6))
+
+# Read size of the audio streams: a whole number of 16-bit samples
+STREAM_CHUNK_BYTES = 8192
+# The chunks synthesized ahead of their turn stay in memory up to this size, then go to a file
+SPOOL_MAX_BYTES = 1 << 20
+SENTENCE_END = re.compile(r"(?<=[.!?;:])\s+|\n+")
+
+_polly_client = None
+_polly_client_lock = threading.Lock()
+
+
+def polly_client():
+    """
+    Returns the Polly client shared by the synthesis threads, created at the first call.
+
+    The client retries in the 'adaptive' mode of botocore: on throttling it backs off and
+    limits its own request rate, so the concurrent chunks of long messages slow down
+    together instead of failing.
+
+    Returns:
+    botocore.client.Polly: The client.
+    """
+    global _polly_client
+    with _polly_client_lock:
+        if _polly_client is None:
+            import boto3
+            from botocore.config import Config
 
-polly_client = boto3.client("polly", region_name=AWS_POLLY_REGION_NAME)
+            _polly_client = boto3.client(
+                "polly",
+                region_name=AWS_POLLY_REGION_NAME,
+                config=Config(
+                    retries={
+                        "max_attempts": AWS_POLLY_MAX_ATTEMPTS,
+                        "mode": "adaptive",
+                    },
+                    max_pool_connections=max(10, AWS_POLLY_CONCURRENCY),
+                ),
+            )
+    return _polly_client
 
 
 def text_to_pcm(message, voice_id="Salli", output_format="pcm", sample_rate="16000"):
@@ -33,7 +80,7 @@ def text_to_pcm(message, voice_id="Salli", output_format="pcm", sample_rate="160
     bytes: The raw PCM audio data as bytes, or None if an error occurs.
     """
     try:
-        response = polly_client.synthesize_speech(
+        response = polly_client().synthesize_speech(
             VoiceId=voice_id,
             OutputFormat=output_format,
             SampleRate=sample_rate,
@@ -48,43 +95,26 @@ def text_to_pcm(message, voice_id="Salli", output_format="pcm", sample_rate="160
         return None
 
 
-def normalize_pcm_sample_rate(
-    pcm_data, original_rate, target_rate, sample_width=2, num_channels=1
-):
+# The sample rates Polly renders PCM at
+POLLY_PCM_SAMPLE_RATES = (8000, 16000)
+
+
+def normalize_pcm_sample_rate(pcm_data, original_rate, target_rate):
     """
-    Normalizes the sample rate of PCM data using resampling.
+    Normalizes the sample rate of 16-bit mono PCM data with the polyphase resampler.
 
     Args:
     pcm_data (bytes): The raw PCM audio data.
     original_rate (int): The original sample rate of the PCM data.
     target_rate (int): The desired target sample rate (e.g., 8000).
-    sample_width (int): The sample width in bytes.
-    num_channels (int): The number of audio channels.
 
     Returns:
     bytes: The PCM data resampled to the target rate.
     """
-    if sample_width == 2:
-        dtype = np.int16
-    elif sample_width == 1:
-        dtype = np.uint8
-    else:
-        raise ValueError("Unsupported sample width")
-
-    samples = np.frombuffer(pcm_data, dtype=dtype)
-    if num_channels > 1:
-        samples = samples.reshape(-1, num_channels)
-
-    num_original_samples = len(samples)
-    num_target_samples = int(num_original_samples * (target_rate / original_rate))
-
-    resampled_audio = resample(samples, num_target_samples)
-    resampled_audio = resampled_audio.astype(dtype)
-
-    if num_channels > 1:
-        resampled_audio = resampled_audio.flatten()
-
-    return resampled_audio.tobytes()
+    if original_rate == target_rate:
+        return pcm_data
+    resampled = resample(int16_to_float(pcm_data), original_rate, target_rate)
+    return float_to_int16(resampled, overwrite=True).tobytes()
 
 
 def create_wave_file_from_pcm(
@@ -108,45 +138,196 @@ def create_wave_file_from_pcm(
         wf.writeframes(pcm_data)
 
 
+def split_ssml_chunks(message, max_chars=AWS_POLLY_CHUNK_CHARS):
+    """
+    Splits a message into SSML documents of at most `max_chars` characters of text.
+
+    The sentences are packed in order; a sentence longer than `max_chars` is cut at
+    its spaces. The text is escaped, so a message with '<' or '&' is spoken as it is.
+
+    Args:
+    message (str): The text to synthesize.
+    max_chars (int): The maximum length of the text of a chunk.
+
+    Returns:
+    list: The '<speak>' documents, in order; a single one for a short message.
+    """
+    pieces = []
+    for sentence in SENTENCE_END.split(message.strip()):
+        words = sentence.split()
+        current = ""
+        for word in words:
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        if current:
+            pieces.append(current)
+
+    chunks = []
+    for piece in pieces:
+        if chunks and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] = f"{chunks[-1]} {piece}"
+        else:
+            chunks.append(piece)
+    return [f"<speak>{escape(chunk)}</speak>" for chunk in chunks or [message]]
+
+
+def stream_ssml_to(client, ssml, voice_id, sample_rate, write):
+    """
+    Synthesizes an SSML document with Polly, passing the PCM stream to `write` as it arrives.
+
+    Args:
+    client: The Polly client.
+    ssml (str): The '<speak>' document.
+    voice_id (str): The ID of the voice to use in Polly.
+    sample_rate (int): The sample rate of the PCM, one of `POLLY_PCM_SAMPLE_RATES`.
+    write (Callable[[bytes], None]): Receives the chunks of the stream, in order.
+    """
+    response = client.synthesize_speech(
+        VoiceId=voice_id,
+        OutputFormat="pcm",
+        SampleRate=str(sample_rate),
+        Text=ssml,
+        TextType="ssml",
+    )
+    stream = response["AudioStream"]
+    try:
+        for data in stream.iter_chunks(STREAM_CHUNK_BYTES):
+            write(data)
+    finally:
+        stream.close()
+
+
+def spool_ssml(client, ssml, voice_id, sample_rate):
+    """
+    Synthesizes an SSML document with Polly ahead of its turn, to a spooled temporary file.
+
+    Returns:
+    tempfile.SpooledTemporaryFile: The PCM, rewound.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    try:
+        stream_ssml_to(client, ssml, voice_id, sample_rate, spool.write)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def stream_polly_to_wave(message, output_filename, sample_rate, voice_id, client):
+    """
+    Writes the WAV file of a message from the PCM streams of Polly, at a native Polly rate.
+
+    The message is split into SSML chunks (see `split_ssml_chunks`): the first one is
+    streamed straight into the WAV file, while the next ones are synthesized at the same
+    time, `aws_polly_concurrency` at most, and copied in order once their turn comes. No
+    buffer holds the whole audio, nor is it resampled.
+
+    Args:
+    message (str): The text to synthesize.
+    output_filename (str): The name of the output WAV file.
+    sample_rate (int): The sample rate of the WAV file, one of `POLLY_PCM_SAMPLE_RATES`.
+    voice_id (str): The ID of the voice to use in Polly.
+    client: The Polly client.
+    """
+    chunks = split_ssml_chunks(message)
+    executor = (
+        ThreadPoolExecutor(max_workers=min(AWS_POLLY_CONCURRENCY, len(chunks) - 1))
+        if len(chunks) > 1
+        else None
+    )
+    spools = [
+        executor.submit(spool_ssml, client, ssml, voice_id, sample_rate)
+        for ssml in chunks[1:]
+    ]
+    try:
+        with wave.open(output_filename, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            stream_ssml_to(client, chunks[0], voice_id, sample_rate, wf.writeframesraw)
+            for spooled in spools:
+                with spooled.result() as spool:
+                    for data in iter(lambda: spool.read(STREAM_CHUNK_BYTES), b""):
+                        wf.writeframesraw(data)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            for spooled in spools:
+                if (
+                    spooled.done()
+                    and not spooled.cancelled()
+                    and not spooled.exception()
+                ):
+                    spooled.result().close()
+
+
 def aws_polly_text_to_wave(
     message,
     output_filename=f"{SERVING_AUDIO_FOLDER}/asterisk_audio.wav",
     target_sample_rate=8000,
     voice_id=AWS_POLLY_VOICE,
+    client=None,
 ):
     """
     Generates a mono WAV file at the specified sample rate (default 8000 Hz) from text using AWS Polly.
 
+    At the rates Polly renders itself (8000 Hz for Asterisk) the PCM is streamed into the WAV
+    file, the long messages as concurrent chunks (see `stream_polly_to_wave`). Other rates are
+    rendered at 16000 Hz and resampled.
+
     Args:
     message (str): The text to synthesize.
     output_filename (str): The name of the output WAV file.
     target_sample_rate (int): The desired sample rate for the final WAV file (default 8000 Hz).
     voice_id (str): The ID of the voice to use in Polly.
+    client: The Polly client, the shared one by default (e.g. a local stand-in for the tests).
     """
+    os.makedirs(os.path.dirname(output_filename) or ".", exist_ok=True)
 
+    if target_sample_rate in POLLY_PCM_SAMPLE_RATES:
+        try:
+            stream_polly_to_wave(
+                message,
+                output_filename,
+                target_sample_rate,
+                voice_id,
+                client or polly_client(),
+            )
+        except Exception as e:
+            logging.exception(f"Error during Polly synthesis: {e}")
+            try:
+                os.remove(output_filename)
+            except FileNotFoundError:
+                pass
+            return
+        logging.info(
+            f"Successfully created '{output_filename}' with a sample rate of {target_sample_rate} Hz."
+        )
+        return
+
+    original_sample_rate = max(POLLY_PCM_SAMPLE_RATES)
     original_pcm_data = text_to_pcm(
-        message, voice_id=voice_id, output_format="pcm", sample_rate="16000"
+        message,
+        voice_id=voice_id,
+        output_format="pcm",
+        sample_rate=str(original_sample_rate),
     )
     if original_pcm_data is None:
         return
 
-    original_sample_rate = 16000
     num_channels = 1
     sample_width = 2
 
-    if original_sample_rate != target_sample_rate:
-        logging.info(
-            f"Resampling from {original_sample_rate} Hz to {target_sample_rate} Hz."
-        )
-        normalized_pcm_data = normalize_pcm_sample_rate(
-            original_pcm_data,
-            original_sample_rate,
-            target_sample_rate,
-            sample_width,
-            num_channels,
-        )
-    else:
-        normalized_pcm_data = original_pcm_data
+    logging.info(
+        f"Resampling from {original_sample_rate} Hz to {target_sample_rate} Hz."
+    )
+    normalized_pcm_data = normalize_pcm_sample_rate(
+        original_pcm_data, original_sample_rate, target_sample_rate
+    )
 
     create_wave_file_from_pcm(
         normalized_pcm_data,
@@ -2,14 +2,16 @@ import logging
 import os
 import re
 
-import numpy as np
-import scipy.io.wavfile
 import torch
 from num2words import num2words
-from scipy import signal
 from transformers import AutoTokenizer, VitsModel
 
 from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+    ASTERISK_SAMPLE_RATE,
+    write_asterisk_wav,
+)
+from py_phone_caller_utils.py_phone_caller_voices.model_registry import ModelRegistry
 
 SERVING_AUDIO_FOLDER = settings.generate_audio.serving_audio_folder
 PRE_TRAINED_MODELS_FOLDER = settings.generate_audio.pre_trained_models_folder
@@ -18,6 +20,12 @@ FACEBOOK_MMS_LANGUAGE_CODE = settings.generate_audio.facebook_mms_language_code
 FACEBOOK_MMS_NUM2WORDS_LANGUAGE_CODE = (
     settings.generate_audio.facebook_mms_num2words_language_code
 )
+FACEBOOK_MMS_EXTRA_LANGUAGE_CODES = settings.generate_audio.get(
+    "facebook_mms_extra_language_codes", []
+)
+FACEBOOK_MMS_MAX_LOADED_MODELS = int(
+    settings.generate_audio.get("facebook_mms_max_loaded_models", 1)
+)
 
 logging.basicConfig(
     format=settings.logs.log_formatter, level=settings.logs.log_level, force=True
@@ -53,11 +61,75 @@ def convert_numbers_in_string(text, lang):
     return re.sub(pattern, replace_number, text)
 
 
+def facebook_mms_model_path(lang_code):
+    """
+    Returns the folder of the pre-trained MMS model of a language.
+
+    Args:
+        lang_code (str): The language code of the model (e.g. 'spa').
+
+    Returns:
+        str: The folder of the model, or None if the language is not configured.
+    """
+    if lang_code not in [
+        FACEBOOK_MMS_LANGUAGE_CODE,
+        *FACEBOOK_MMS_EXTRA_LANGUAGE_CODES,
+    ]:
+        return None
+    return (
+        f"{PRE_TRAINED_MODELS_FOLDER}/{FACEBOOK_MMS_MODELS_FOLDER}/mms-tts-{lang_code}"
+    )
+
+
+def load_facebook_mms_model(lang_code):
+    """
+    Loads the MMS model and tokenizer of a language, on the GPU when available.
+
+    Args:
+        lang_code (str): The language code of the model.
+
+    Returns:
+        tuple: The model (in evaluation mode), its tokenizer and the device.
+
+    Raises:
+        ValueError: If the language is not configured.
+    """
+    model_path = facebook_mms_model_path(lang_code)
+    if model_path is None:
+        raise ValueError(f"Language code '{lang_code}' not configured")
+
+    logging.info(f"MMS: loading model for language '{lang_code}' from {model_path}...")
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = VitsModel.from_pretrained(model_path, low_cpu_mem_usage=False)
+    model.to(device)
+    model.eval()
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    return model, tokenizer, device
+
+
+MMS_MODELS = ModelRegistry(
+    "MMS", load_facebook_mms_model, max_models=FACEBOOK_MMS_MAX_LOADED_MODELS
+)
+
+
+def preload_facebook_mms_models(lang_codes=None):
+    """
+    Loads the MMS models ahead of the first message, so it is not slowed by the loading.
+
+    Args:
+        lang_codes (list): The languages to load, the configured one by default.
+
+    Returns:
+        None
+    """
+    MMS_MODELS.preload(lang_codes or [FACEBOOK_MMS_LANGUAGE_CODE])
+
+
 def text_to_speech_facebook_mms(text, lang_code, output_path):
     """
     Generates speech audio from text using a Facebook MMS TTS model for the specified language.
 
-    This function loads the appropriate pre-trained MMS model, converts numbers in the text to words,
+    This function takes the pre-trained MMS model of the language from the registry, converts numbers in the text to words,
     generates the audio, and saves it to the specified output path. It logs errors if the language is not supported or if audio generation fails.
 
     Args:
@@ -69,19 +141,13 @@ def text_to_speech_facebook_mms(text, lang_code, output_path):
         None
     """
 
-    model_paths = {
-        f"{FACEBOOK_MMS_LANGUAGE_CODE}": f"{PRE_TRAINED_MODELS_FOLDER}/{FACEBOOK_MMS_MODELS_FOLDER}/mms-tts-{FACEBOOK_MMS_LANGUAGE_CODE}",
-    }
-
-    if lang_code not in model_paths:
+    if facebook_mms_model_path(lang_code) is None:
         logging.error(
             f"MMS: error: Language code '{lang_code}' not supported or model not downloaded."
         )
         return
 
-    model_path = model_paths[lang_code]
-    logging.info(f"MMS: loading model for language '{lang_code}' from {model_path}...")
-
+    numbers_in_text = text
     try:
         numbers_in_text = convert_numbers_in_string(
             text, FACEBOOK_MMS_NUM2WORDS_LANGUAGE_CODE
@@ -92,59 +158,103 @@ def text_to_speech_facebook_mms(text, lang_code, output_path):
         )
 
     try:
-        create_audio_through_facebook_mms(model_path, numbers_in_text, output_path)
+        create_audio_through_facebook_mms(lang_code, numbers_in_text, output_path)
     except Exception as e:
         logging.exception(f"MMS: an error occurred: {e}")
 
 
-def create_audio_through_facebook_mms(model_path, text, output_path):
+def create_audio_through_facebook_mms(lang_code, text, output_path):
     """Generates speech audio from text using a Facebook MMS model.
 
-    Loads a pre-trained Facebook MMS model, tokenizes the input text,
+    Takes the pre-trained Facebook MMS model from the registry (loading it
+    only the first time), tokenizes the input text,
     generates the corresponding waveform, and saves it as a WAV file
     in 16-bit PCM format at 8000 Hz to be compliant with Asterisk's
     WAV format.
 
     Args:
-        model_path (str): The path to the pre-trained Facebook MMS model.
+        lang_code (str): The language code of the Facebook MMS model.
         text (str): The input text to convert to speech.
         output_path (str): The path where the generated audio file will be saved.
 
     Returns:
         None
     """
-    model = VitsModel.from_pretrained(model_path, low_cpu_mem_usage=False)
-    tokenizer = AutoTokenizer.from_pretrained(model_path)
-
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model.to(device)
+    loaded_model = MMS_MODELS.get(lang_code)
+    model, tokenizer, device = loaded_model.model
 
-    logging.info("MMS: tokenizing input...")
-    inputs = tokenizer(text, return_tensors="pt").to(device)
+    # The model is shared by the threads of the executor: one inference at a time.
+    with loaded_model.lock:
+        logging.info("MMS: tokenizing input...")
+        inputs = tokenizer(text, return_tensors="pt").to(device)
 
-    logging.info("MMS: generating speech...")
-    with torch.no_grad():
-        output_waveform = model(**inputs).waveform
+        logging.info("MMS: generating speech...")
+        with torch.no_grad():
+            output_waveform = model(**inputs).waveform
 
     waveform_np = output_waveform.squeeze().cpu().numpy()
 
     original_sampling_rate = model.config.sampling_rate
-    target_sampling_rate = 8000
-
-    logging.info(
-        f"MMS: Resampling from {original_sampling_rate}Hz to {target_sampling_rate}Hz..."
-    )
-    number_of_samples = round(
-        len(waveform_np) * target_sampling_rate / original_sampling_rate
-    )
-    waveform_resampled = signal.resample(waveform_np, number_of_samples)
-
-    waveform_normalized = np.clip(waveform_resampled, -1, 1)
-    waveform_pcm = (waveform_normalized * 32767).astype(np.int16)
 
     logging.info(
-        f"MMS: Saving audio to {output_path} as 16-bit PCM at {target_sampling_rate}Hz..."
+        f"MMS: Resampling from {original_sampling_rate}Hz to {ASTERISK_SAMPLE_RATE}Hz, "
+        + f"saving audio to {output_path} as 16-bit PCM..."
     )
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    scipy.io.wavfile.write(output_path, rate=target_sampling_rate, data=waveform_pcm)
+    write_asterisk_wav(output_path, waveform_np, original_sampling_rate)
     logging.info("MMS: audio generation done.")
+
+
+def text_to_speech_facebook_mms_batch(texts, lang_code, output_paths):
+    """
+    Generates the speech audio of several texts with a single batched inference.
+
+    The texts are tokenized together (padded to the longest one) and go through the
+    model at once, which amortizes the inference over the batch; every waveform is
+    then cut to its own length and saved like `create_audio_through_facebook_mms` does.
+
+    Args:
+        texts (list): The input texts to convert to speech.
+        lang_code (str): The language code for the TTS model.
+        output_paths (list): The paths where the audio files will be saved, one per text.
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: If the language is not configured.
+    """
+    if facebook_mms_model_path(lang_code) is None:
+        raise ValueError(f"Language code '{lang_code}' not configured")
+
+    numbers_in_texts = []
+    for text in texts:
+        try:
+            numbers_in_texts.append(
+                convert_numbers_in_string(text, FACEBOOK_MMS_NUM2WORDS_LANGUAGE_CODE)
+            )
+        except Exception as e:
+            logging.exception(
+                f"MMS: an error occurred when converting numbers in text: {e}"
+            )
+            numbers_in_texts.append(text)
+
+    loaded_model = MMS_MODELS.get(lang_code)
+    model, tokenizer, device = loaded_model.model
+
+    with loaded_model.lock:
+        logging.info(f"MMS: generating speech for a batch of {len(texts)} texts...")
+        inputs = tokenizer(numbers_in_texts, return_tensors="pt", padding=True).to(
+            device
+        )
+        with torch.no_grad():
+            outputs = model(**inputs)
+
+    waveforms = outputs.waveform.cpu().numpy()
+    lengths = outputs.sequence_lengths.cpu().numpy()
+    for waveform, length, output_path in zip(waveforms, lengths, output_paths):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        write_asterisk_wav(
+            output_path, waveform[: int(length)], model.config.sampling_rate
+        )
+    logging.info("MMS: batch audio generation done.")
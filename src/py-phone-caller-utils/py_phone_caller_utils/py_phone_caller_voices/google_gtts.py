@@ -1,11 +1,15 @@
 import logging
 import os
 import argparse
+from io import BytesIO
 
+import soundfile as sf
 from gtts import gTTS
-from pydub import AudioSegment
 
 from py_phone_caller_utils.config import settings
+from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+    write_asterisk_wav,
+)
 
 logging.basicConfig(
     format=settings.logs.log_formatter, level=settings.logs.log_level, force=True
@@ -15,22 +19,46 @@ SERVING_AUDIO_FOLDER = settings.generate_audio.serving_audio_folder
 GCLOUD_TTS_LANGUAGE_CODE = settings.generate_audio.gcloud_tts_language_code
 
 
-def mp3_to_wave(an_audio_file):
+def decode_mp3(mp3_data):
     """
-    Converts an MP3 audio file to a WAV file with 8000 Hz sample rate and mono channel.
+    Decodes MP3 data in memory to mono float samples.
 
-    This function loads the specified MP3 file, exports it as a WAV file, and applies the required audio parameters.
+    The MP3 is decoded in the process by libsndfile (1.1.0 or later, bundled with the
+    soundfile wheels), without running ffmpeg.
 
     Args:
-        an_audio_file (str): The base filename (without extension) of the audio file to convert.
+        mp3_data (bytes): The content of the MP3 file.
 
     Returns:
-        None
+        tuple: The float32 samples, in [-1, 1], and their sample rate.
     """
-    sound = AudioSegment.from_mp3(f"{an_audio_file}.mp3")
-    sound.export(
-        f"{an_audio_file}.wav", format="wav", parameters=["-ar", "8000", "-ac", "1"]
+    samples, sample_rate = sf.read(
+        BytesIO(mp3_data), dtype="float32", always_2d=True, format="MP3"
     )
+    return samples.mean(axis=1, dtype="float32"), sample_rate
+
+
+def text_to_wave(message_text, output_path, lang=None):
+    """
+    Creates a WAV audio file at the given path from the provided text using Google Text-to-Speech (gTTS).
+
+    The MP3 rendered by gTTS is decoded in memory and resampled to 8000 Hz mono,
+    without any intermediate file.
+
+    Args:
+        message_text (str): The text to convert to speech.
+        output_path (str): The path of the WAV file to create.
+        lang (str): The language of the speech, the configured one by default.
+
+    Returns:
+        None
+    """
+    tts = gTTS(message_text, lang=lang or GCLOUD_TTS_LANGUAGE_CODE)
+    mp3_buffer = BytesIO()
+    tts.write_to_fp(mp3_buffer)
+    samples, sample_rate = decode_mp3(mp3_buffer.getvalue())
+    write_asterisk_wav(output_path, samples, sample_rate)
+    logging.info(f'Audio content written to file "{output_path}"')
 
 
 def create_audio_file(message_text, file_name):
@@ -50,24 +78,8 @@ def create_audio_file(message_text, file_name):
 
     if not os.path.exists(f"{SERVING_AUDIO_FOLDER}/{file_name}.wav"):
         os.makedirs(SERVING_AUDIO_FOLDER, exist_ok=True)
-        name_of_file = f"{SERVING_AUDIO_FOLDER}/{file_name}"
-
-        def audio_creation():
-            """
-            Generates an MP3 file from the provided text using Google Text-to-Speech and converts it to WAV format.
-
-            This function saves the MP3 file, converts it to a WAV file with the required parameters, and logs the operation.
-
-            Returns:
-                None
-            """
-            tts = gTTS(message_text, lang=GCLOUD_TTS_LANGUAGE_CODE)
-            tts.save(f"{name_of_file}.mp3")
-            mp3_to_wave(f"{name_of_file}")
-            logging.info(f'Audio content written to file "{file_name}.wav"')
-
         try:
-            audio_creation()
+            text_to_wave(message_text, f"{SERVING_AUDIO_FOLDER}/{file_name}.wav")
         except Exception as e:
             print(f"Unable to create the audio file {e}")
 
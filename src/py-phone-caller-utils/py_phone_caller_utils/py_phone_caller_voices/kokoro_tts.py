@@ -1,11 +1,18 @@
 import argparse
+import json
 import logging
 import sys
 import numpy as np
-import soundfile as sf
-import scipy.signal
 from pathlib import Path
 
+try:
+    from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+        write_asterisk_wav,
+    )
+except ImportError:
+    # Run as a script, next to the module
+    from audio_postprocessing import write_asterisk_wav
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
 logger = logging.getLogger("kokoro")
 
@@ -23,7 +30,7 @@ def parse_arguments():
     parser = argparse.ArgumentParser(
         description="Text-to-Speech using Kokoro TTS (PyTorch)"
     )
-    parser.add_argument("text", type=str, help="Text to synthesize")
+    parser.add_argument("text", type=str, nargs="?", help="Text to synthesize")
     parser.add_argument(
         "--voice-name",
         type=str,
@@ -37,7 +44,7 @@ def parse_arguments():
         help="Language code: a=American English, b=British English, e=Spanish, f=French, h=Hindi, i=Italian, j=Japanese, p=Portuguese, z=Chinese",
     )
     parser.add_argument(
-        "--output", type=Path, required=True, help="Output WAV file path"
+        "--output", type=Path, default=None, help="Output WAV file path"
     )
     parser.add_argument(
         "--model", type=str, help="Ignored (handled by KPipeline)", default=None
@@ -45,58 +52,97 @@ def parse_arguments():
     parser.add_argument(
         "--voices", type=str, help="Ignored (handled by KPipeline)", default=None
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the pipeline loaded and read the jobs as JSON lines on stdin",
+    )
 
     return parser.parse_args()
 
 
-def resample_for_asterisk(audio_data, original_rate, target_rate=8000):
+def synthesize_to_file(pipeline, text, voice_name, output):
     """
-    Resamples audio data to the target sample rate using scipy.
+    Synthesizes the text with a loaded pipeline and saves it as an 8000 Hz, 16-bit mono WAV file.
     """
-    if original_rate == target_rate:
-        return audio_data
+    logger.info(f"Synthesizing text: '{text}'")
 
-    samples = len(audio_data)
-    new_samples = int(samples * target_rate / original_rate)
-    return scipy.signal.resample(audio_data, new_samples)
+    generator = pipeline(text, voice=voice_name, speed=1)
+
+    full_audio = []
+    for _, _, audio in generator:
+        full_audio.append(audio)
+
+    if not full_audio:
+        raise RuntimeError("No audio generated")
+
+    native_rate = 24000
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    logger.info(f"Resampling from {native_rate}Hz to 8000Hz, saving to {output}")
+    write_asterisk_wav(output, np.concatenate(full_audio), native_rate)
+
+    logger.info("Audio saved successfully.")
+
+
+def serve(pipeline, voice_name):
+    """
+    Serves synthesis jobs read as JSON lines on stdin, with the pipeline loaded once.
+
+    Each job is either {"id": ..., "op": "synthesize", "text": ..., "output": ...} or
+    {"id": ..., "op": "ping"}; the answer is {"id": ..., "ok": true} or
+    {"id": ..., "ok": false, "error": ...}. Anything else printed on stdout by the
+    libraries is redirected to stderr, to keep the protocol stream clean.
+    """
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+
+    def answer(response):
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+    answer({"id": None, "ok": True, "ready": True})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            if job.get("op") == "synthesize":
+                synthesize_to_file(
+                    pipeline, job["text"], voice_name, Path(job["output"])
+                )
+            elif job.get("op") != "ping":
+                raise ValueError(f"Unknown operation: {job.get('op')}")
+            answer({"id": job_id, "ok": True})
+        except Exception as e:
+            logger.exception(f"Error serving the job {job_id}: {e}")
+            answer({"id": job_id, "ok": False, "error": str(e)})
 
 
 def main():
     """
     Main entry point for the Kokoro TTS script.
+
+    With '--serve', the pipeline is kept loaded and the synthesis jobs are read on stdin.
     """
     args = parse_arguments()
 
-    logger.info(f"Synthesizing text: '{args.text}'")
     logger.info(f"Language: {args.lang}, Voice: {args.voice_name}")
 
     try:
         pipeline = KPipeline(lang_code=args.lang)
 
-        generator = pipeline(args.text, voice=args.voice_name, speed=1)
-
-        full_audio = []
-        for _, _, audio in generator:
-            full_audio.append(audio)
+        if args.serve:
+            serve(pipeline, args.voice_name)
+            return
 
-        if not full_audio:
-            logger.error("No audio generated")
+        if args.text is None or args.output is None:
+            logger.error("The text and the '--output' path are required")
             sys.exit(1)
 
-        audio_concat = np.concatenate(full_audio)
-
-        native_rate = 24000
-        target_rate = 8000
-
-        logger.info(f"Resampling from {native_rate}Hz to {target_rate}Hz...")
-        audio_8k = resample_for_asterisk(audio_concat, native_rate, target_rate)
-
-        args.output.parent.mkdir(parents=True, exist_ok=True)
-
-        logger.info(f"Saving to {args.output}")
-        sf.write(str(args.output), audio_8k, target_rate, subtype="PCM_16")
-
-        logger.info("Audio saved successfully.")
+        synthesize_to_file(pipeline, args.text, args.voice_name, args.output)
 
     except Exception as e:
         logger.critical(f"Error generating audio: {e}")
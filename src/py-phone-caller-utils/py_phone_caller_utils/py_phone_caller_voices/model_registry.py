@@ -0,0 +1,129 @@
+"""
+Process-wide registry of the loaded TTS models.
+
+Loading a model (reading the weights from disk, building the network) costs far
+more than synthesizing a message, so the registry loads every model once and
+shares it among the threads of the process. The inference on a shared model is
+serialized by a per-model lock; when more models than `max_models` are in use
+the least recently used one is evicted.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+
+class LoadedModel:
+    """
+    A model loaded by the registry, with the lock serializing its use.
+
+    Attributes:
+        key (str): The key of the model (e.g. the language code).
+        model (Any): The object returned by the loader.
+        lock (threading.Lock): Held while the model is in use.
+    """
+
+    def __init__(self, key, model):
+        self.key = key
+        self.model = model
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    A thread-safe, bounded cache of loaded models.
+
+    `get` returns the model of a key, loading it with the `loader` function the first
+    time; concurrent requests of a model being loaded wait for that single load.
+    """
+
+    def __init__(self, name, loader, max_models=1):
+        """
+        Args:
+            name (str): The name of the registry, used in the logs.
+            loader (Callable[[str], Any]): Loads the model of a key.
+            max_models (int): The number of models kept loaded.
+        """
+        self.name = name
+        self.loader = loader
+        self.max_models = max(1, int(max_models))
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._models
+
+    def __len__(self):
+        with self._lock:
+            return len(self._models)
+
+    def get(self, key):
+        """
+        Returns the loaded model of a key, loading it if needed.
+
+        Args:
+            key (str): The key of the model.
+
+        Returns:
+            LoadedModel: The model, to be used while holding its `lock`.
+
+        Raises:
+            Exception: Any error raised by the loader.
+        """
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._models.move_to_end(key)
+                return entry
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                entry = self._models.get(key)
+                if entry is not None:
+                    self._models.move_to_end(key)
+                    return entry
+
+            logging.info(f"{self.name}: loading model '{key}'...")
+            try:
+                entry = LoadedModel(key, self.loader(key))
+            except Exception:
+                with self._lock:
+                    self._loading.pop(key, None)
+                raise
+
+            with self._lock:
+                self._loading.pop(key, None)
+                self._models[key] = entry
+                while len(self._models) > self.max_models:
+                    evicted, _ = self._models.popitem(last=False)
+                    logging.info(f"{self.name}: evicted model '{evicted}'")
+            return entry
+
+    def preload(self, keys):
+        """
+        Loads some models ahead of the first request, e.g. at startup.
+
+        Args:
+            keys (Iterable[str]): The keys of the models to load.
+
+        Returns:
+            None
+        """
+        for key in keys:
+            try:
+                self.get(key)
+            except Exception as e:
+                logging.exception(f"{self.name}: unable to preload model '{key}': {e}")
+
+    def clear(self):
+        """
+        Unloads all the models.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._models.clear()
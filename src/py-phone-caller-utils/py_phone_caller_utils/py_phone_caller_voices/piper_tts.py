@@ -1,18 +1,35 @@
 import argparse
+import json
 import logging
-import wave
+import sys
 from pathlib import Path
 
-import numpy as np
-from scipy import signal
 from piper.voice import PiperVoice
 
+try:
+    from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+        ASTERISK_SAMPLE_RATE,
+        int16_to_float,
+        write_asterisk_wav,
+    )
+except ImportError:
+    # Run as a script, next to the module
+    from audio_postprocessing import (
+        ASTERISK_SAMPLE_RATE,
+        int16_to_float,
+        write_asterisk_wav,
+    )
+
 """
 Warning:
     This script generates audio using the Piper TTS engine.
 
     Example usage:
     # python3 piper_tts.py "Your text to speak" --model ./it_IT.onnx --config ./it_IT.onnx.json --output ./output.wav
+
+    With '--serve' the voice is loaded once and the script reads synthesis jobs as JSON lines on stdin,
+    answering with one JSON line per job on stdout (see 'serve'):
+    # python3 piper_tts.py --serve --model ./it_IT.onnx --config ./it_IT.onnx.json
 """
 
 logging.basicConfig()
@@ -20,33 +37,6 @@ logger = logging.getLogger("piper")
 logger.setLevel(logging.INFO)
 
 
-def resample_audio(audio_bytes, orig_sr, target_sr=8000):
-    """
-    Resamples raw audio bytes from the original sample rate to the target sample rate.
-
-    This function converts the audio bytes to float, resamples using scipy.signal, and returns the result as int16 bytes.
-
-    Args:
-        audio_bytes (bytes): The raw audio data in int16 format.
-        orig_sr (int): The original sample rate of the audio.
-        target_sr (int, optional): The target sample rate. Defaults to 8000.
-
-    Returns:
-        bytes: The resampled audio data in int16 format.
-    """
-    if orig_sr == target_sr:
-        return audio_bytes
-
-    audio_np = np.frombuffer(audio_bytes, dtype=np.int16)
-    audio_float = audio_np.astype(np.float32) / 32768.0
-
-    number_of_samples = round(len(audio_float) * target_sr / orig_sr)
-    audio_resampled = signal.resample(audio_float, number_of_samples)
-
-    audio_int16 = (audio_resampled * 32768.0).astype(np.int16)
-    return audio_int16.tobytes()
-
-
 MODEL_PATH = None
 CONFIG_PATH = None
 OUTPUT_WAV_PATH = None
@@ -62,7 +52,7 @@ def parse_arguments():
         argparse.Namespace: The parsed command-line arguments.
     """
     parser = argparse.ArgumentParser(description="Text-to-Speech using Piper TTS")
-    parser.add_argument("text", type=str, help="Text to synthesize")
+    parser.add_argument("text", type=str, nargs="?", help="Text to synthesize")
     parser.add_argument(
         "--model", type=Path, default=MODEL_PATH, help="Path to the .onnx model file"
     )
@@ -75,15 +65,90 @@ def parse_arguments():
     parser.add_argument(
         "--output", type=Path, default=OUTPUT_WAV_PATH, help="Output WAV file path"
     )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Keep the voice loaded and read the jobs as JSON lines on stdin",
+    )
     return parser.parse_args()
 
 
+def synthesize_to_file(voice, text, output):
+    """
+    Synthesizes the text with a loaded voice and saves it as an 8000 Hz, 16-bit mono WAV file.
+
+    Args:
+        voice (PiperVoice): The loaded voice.
+        text (str): The text to synthesize.
+        output (Path): The output WAV file path.
+
+    Returns:
+        None
+    """
+    logger.info(f"Synthesizing text: '{text}'")
+    audio_bytes = b"".join(chunk.audio_int16_bytes for chunk in voice.synthesize(text))
+
+    logger.info(f"Synthesized {len(audio_bytes)} bytes of audio.")
+
+    sample_rate = voice.config.sample_rate
+    logger.info(f"Saving audio to: {output}")
+    logger.info(
+        f"Audio Parameters: Rate={sample_rate} -> {ASTERISK_SAMPLE_RATE}, Width=2, Channels=1"
+    )
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    write_asterisk_wav(output, int16_to_float(audio_bytes), sample_rate)
+
+    logger.info("Audio saved successfully.")
+
+
+def serve(voice):
+    """
+    Serves synthesis jobs read as JSON lines on stdin, with the voice loaded once.
+
+    Each job is either {"id": ..., "op": "synthesize", "text": ..., "output": ...} or
+    {"id": ..., "op": "ping"}; the answer is {"id": ..., "ok": true} or
+    {"id": ..., "ok": false, "error": ...}. Anything else printed on stdout by the
+    libraries is redirected to stderr, to keep the protocol stream clean.
+
+    Args:
+        voice (PiperVoice): The loaded voice.
+
+    Returns:
+        None
+    """
+    protocol = sys.stdout
+    sys.stdout = sys.stderr
+
+    def answer(response):
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+    answer({"id": None, "ok": True, "ready": True})
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        job_id = None
+        try:
+            job = json.loads(line)
+            job_id = job.get("id")
+            if job.get("op") == "synthesize":
+                synthesize_to_file(voice, job["text"], Path(job["output"]))
+            elif job.get("op") != "ping":
+                raise ValueError(f"Unknown operation: {job.get('op')}")
+            answer({"id": job_id, "ok": True})
+        except Exception as e:
+            logger.exception(f"Error serving the job {job_id}: {e}")
+            answer({"id": job_id, "ok": False, "error": str(e)})
+
+
 def main() -> None:
     """
     Main entry point for the Piper TTS script.
 
     This function parses command-line arguments, loads the TTS model and config, synthesizes speech from text,
     resamples the audio to 8000 Hz, and saves it as a WAV file. It logs each step and handles errors gracefully.
+    With '--serve', it keeps the model loaded and serves the synthesis jobs read on stdin.
 
     Returns:
         None
@@ -106,36 +171,15 @@ def main() -> None:
         logger.critical(f"Error loading voice: {e}")
         return
 
-    logger.info(f"Synthesizing text: '{args.text}'")
-    audio_bytes = b"".join(
-        chunk.audio_int16_bytes for chunk in voice.synthesize(args.text)
-    )
-
-    logger.info(f"Synthesized {len(audio_bytes)} bytes of audio.")
-
-    sample_rate = voice.config.sample_rate
-    sample_width = 2
-    channels = 1
-
-    logger.info(f"Saving audio to: {args.output}")
-    logger.info(
-        f"Audio Parameters: Rate={sample_rate}, Width={sample_width}, Channels={channels}"
-    )
-
-    target_sample_rate = 8000
-    audio_resampled = resample_audio(
-        audio_bytes, voice.config.sample_rate, target_sample_rate
-    )
-
-    args.output.parent.mkdir(parents=True, exist_ok=True)
+    if args.serve:
+        serve(voice)
+        return
 
-    with wave.open(str(args.output), "wb") as wav_file:
-        wav_file.setnchannels(channels)
-        wav_file.setsampwidth(sample_width)
-        wav_file.setframerate(target_sample_rate)
-        wav_file.writeframes(audio_resampled)
+    if args.text is None or args.output is None:
+        logger.critical("The text and the '--output' path are required")
+        return
 
-    logger.info("Audio saved successfully.")
+    synthesize_to_file(voice, args.text, args.output)
 
 
 if __name__ == "__main__":
@@ -13,7 +13,7 @@ from opentelemetry.sdk.metrics import MeterProvider
 from opentelemetry.sdk.resources import Resource, SERVICE_NAME
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import generate_latest, start_http_server, CONTENT_TYPE_LATEST
 
 from opentelemetry.instrumentation.aiohttp_client import AioHttpClientInstrumentor
 from opentelemetry.instrumentation.aiohttp_server import AioHttpServerInstrumentor
@@ -113,6 +113,16 @@ def instrument_aiohttp_app(app):
         logger.error(f"Failed to instrument aiohttp app: {e}")
 
 
+def serve_metrics(port: int, addr: str = "0.0.0.0"):
+    """Helper to expose the /metrics endpoint of a service that is not a web app, on a dedicated port."""
+    try:
+        if trace.get_tracer_provider():
+            start_http_server(int(port), addr=addr)
+            logger.info(f"Exposing metrics on {addr}:{port}/metrics")
+    except Exception as e:
+        logger.error(f"Failed to expose the metrics: {e}")
+
+
 def instrument_flask_app(app):
     """Helper to instrument a specific flask application and add /metrics route."""
     try:
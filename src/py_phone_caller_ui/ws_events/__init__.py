@@ -6,16 +6,15 @@ Provides routes for viewing and searching Asterisk WebSocket events.
 
 import logging
 import json
-import re
 
 from flask import Blueprint, render_template, request, url_for, Response
 from flask_login import login_required
 import csv
 import io
 import datetime
-import time
 
 from py_phone_caller_utils.py_phone_caller_db.db_asterisk_ws_monitor import (
+    select_ws_events_between_sync,
     select_ws_events_sync,
 )
 
@@ -32,8 +31,8 @@ def export_csv():
     """
     Exports WebSocket events for a specific month as a CSV file.
 
-    This asynchronous view retrieves event data, filters it by the selected month,
-    and returns a CSV file for download.
+    This view retrieves the events of the selected month through the indexed event
+    timestamp, and returns a CSV file for download.
 
     Returns:
         flask.Response: A CSV file download response.
@@ -53,55 +52,10 @@ def export_csv():
     except ValueError:
         return "Invalid month format. Use YYYY-MM", 400
 
-    start_timestamp = int(start_date.timestamp())
-    end_timestamp = int(end_date.timestamp())
-
-    all_events = select_ws_events_sync()
-
-    logging.info(f"Retrieved {len(all_events)} events from the database")
-
-    filtered_events = []
-    for event in all_events:
-        event_dict = {
-            "id": str(event["id"]),
-            "asterisk_chan": event["asterisk_chan"],
-            "event_type": event["event_type"],
-            "json_data": str(event["json_data"]),
-        }
-
-        event_added = False
-
-        try:
-            chan_parts = event["asterisk_chan"].split("-")
-            for part in chan_parts:
-                if part.isdigit() and len(part) >= 10:
-                    timestamp = int(part)
-                    if start_timestamp <= timestamp < end_timestamp:
-                        filtered_events.append(event)
-                        event_added = True
-                        break
-
-            if not event_added and event["json_data"]:
-                json_str = str(event["json_data"])
-                import re
-
-                unix_timestamps = re.findall(r"\b\d{10,}\b", json_str)
-                for ts_str in unix_timestamps:
-                    timestamp = int(ts_str)
-                    if start_timestamp <= timestamp < end_timestamp:
-                        filtered_events.append(event)
-                        event_added = True
-                        break
-        except (ValueError, AttributeError):
-            pass
-
-        if not event_added:
-            month_year_str = f"{year}-{month:02d}"
-            if any(month_year_str in str(value) for value in event_dict.values()):
-                filtered_events.append(event)
+    filtered_events = select_ws_events_between_sync(start_date, end_date)
 
     logging.info(
-        f"Filtered to {len(filtered_events)} events for month {year}-{month:02d}"
+        f"Retrieved {len(filtered_events)} events for month {year}-{month:02d}"
     )
 
     output = io.StringIO()
@@ -160,43 +114,7 @@ def ws_events():
 
     processed_events = []
     for idx, event in enumerate(all_events):
-        event_time = None
-
-        json_data = event["json_data"]
-        if isinstance(json_data, str):
-            try:
-                json_data = json.loads(json_data)
-            except:
-                pass
-
-        if isinstance(json_data, dict) and "timestamp" in json_data:
-            ts_str = json_data["timestamp"]
-            try:
-                if "+" in ts_str and ":" not in ts_str.split("+")[1]:
-                    offset = ts_str.split("+")[1]
-                    ts_str = ts_str.split("+")[0] + "+" + offset[:2] + ":" + offset[2:]
-                elif (
-                    "-" in ts_str and "T" in ts_str and ":" not in ts_str.split("-")[-1]
-                ):
-                    # Be careful not to split the date dashes
-                    parts = ts_str.rsplit("-", 1)
-                    if len(parts) == 2 and len(parts[1]) == 4:
-                        ts_str = parts[0] + "-" + parts[1][:2] + ":" + parts[1][2:]
-
-                event_time = datetime.datetime.fromisoformat(ts_str)
-            except:
-                pass
-
-        if not event_time:
-            match = re.search(r"(\d{10})", event["asterisk_chan"])
-            if match:
-                try:
-                    event_time = datetime.datetime.fromtimestamp(int(match.group(1)))
-                except:
-                    pass
-
-        if not event_time:
-            event_time = datetime.datetime.fromtimestamp(0)
+        event_time = event["event_ts"] or datetime.datetime.fromtimestamp(0)
 
         try:
             if isinstance(event["json_data"], str):
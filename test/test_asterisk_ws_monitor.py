@@ -0,0 +1,164 @@
+import asyncio
+import importlib
+import importlib.util
+import sys
+import types
+
+import pytest
+from aiohttp import web
+
+
+class NoOp:
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        return NoOp
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    # Without OpenTelemetry installed, the telemetry of the service is replaced by no-ops
+    if importlib.util.find_spec("opentelemetry") is None:
+        telemetry = types.ModuleType("py_phone_caller_utils.telemetry")
+        telemetry.init_telemetry = NoOp
+        monkeypatch.setitem(sys.modules, telemetry.__name__, telemetry)
+    module = importlib.import_module("asterisk_ws_monitor.asterisk_ws_monitor")
+
+    async def registered_message(asterisk_chan):
+        return {"message": "Disk full on db-01", "msg_chk_sum": "1234"}
+
+    async def record_play_request(asterisk_chan, audio_key):
+        pass
+
+    monkeypatch.setattr(module, "querying_call_register", registered_message)
+    monkeypatch.setattr(module, "record_play_request", record_play_request)
+    monkeypatch.setattr(module, "claimed_channels", set())
+    return module
+
+
+async def fake_services(aiohttp_server, monkeypatch, monitor, busy_answers):
+    """
+    A GenerateAudio rejecting the first `busy_answers` requests, with the ARI and the caller.
+    """
+    requests = []
+
+    async def create_audio(request):
+        requests.append("create_audio")
+        if requests.count("create_audio") <= busy_answers:
+            raise web.HTTPServiceUnavailable(
+                reason="Too many audio renderings in progress",
+                headers={"Retry-After": "0"},
+            )
+        return web.json_response(
+            {"status": 200, "audio_key": "abc", "variants": ["alaw", "ulaw"]}
+        )
+
+    async def is_audio_ready(request):
+        return web.json_response({"exists": True})
+
+    async def play(request):
+        query = request.rel_url.query
+        requests.append(f"play {query['asterisk_chan']} {query.get('variants')}")
+        return web.Response(text="ok")
+
+    async def ari_continue(request):
+        requests.append(f"continue {request.match_info['chan']}")
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_route("POST", f"/{monitor.GENERATE_AUDIO_APP_ROUTE}", create_audio)
+    app.router.add_route("GET", f"/{monitor.IS_AUDIO_READY_ENDPOINT}", is_audio_ready)
+    app.router.add_route("POST", f"/{monitor.ASTERISK_CALL_APP_ROUTE_PLAY}", play)
+    app.router.add_route("POST", "/ari/channels/{chan}/continue", ari_continue)
+    server = await aiohttp_server(app)
+    url = str(server.make_url("")).rstrip("/")
+    for name in ("GENERATE_AUDIO_URL", "ASTERISK_CALL_URL", "ASTERISK_URL"):
+        monkeypatch.setattr(monitor, name, url)
+    return requests
+
+
+async def test_busy_generate_audio_is_retried(aiohttp_server, monkeypatch, monitor):
+    requests = await fake_services(aiohttp_server, monkeypatch, monitor, 2)
+
+    await monitor.play_message_to_channel("chan-1")
+
+    assert requests == ["create_audio"] * 3 + ["play chan-1 alaw,ulaw"]
+
+
+async def test_rejected_message_continues_the_channel(
+    aiohttp_server, monkeypatch, monitor
+):
+    requests = await fake_services(aiohttp_server, monkeypatch, monitor, 100)
+
+    await monitor.play_message_to_channel("chan-1")
+
+    retries = monitor.GENERATE_AUDIO_BUSY_RETRIES
+    assert requests == ["create_audio"] * (retries + 1) + ["continue chan-1"]
+
+
+async def test_recovery_skips_the_channel_played_live(
+    aiohttp_server, monkeypatch, monitor
+):
+    requests = await fake_services(aiohttp_server, monkeypatch, monitor, 0)
+
+    async def stasis_app_channels():
+        return [{"id": "chan-1", "state": "Up"}]
+
+    async def played_channels(asterisk_chans):
+        # The live playback is not recorded yet
+        return set()
+
+    monkeypatch.setattr(monitor, "get_stasis_app_channels", stasis_app_channels)
+    monkeypatch.setattr(monitor, "select_played_channels", played_channels)
+
+    await asyncio.gather(
+        monitor.play_message_to_channel("chan-1"),
+        monitor.recover_unplayed_channels(),
+    )
+
+    assert requests == ["create_audio", "play chan-1 alaw,ulaw"]
+
+
+async def test_late_chunk_resumes_the_sequence(aiohttp_server, monkeypatch, monitor):
+    requests = []
+    ready_checks = []
+
+    async def create_audio_stream(request):
+        requests.append(f"create_audio stream={request.rel_url.query.get('stream')}")
+        return web.json_response({"status": 200, "audio_keys": ["c0", "c1", "c2"]})
+
+    async def is_audio_ready(request):
+        audio_key = request.rel_url.query["audio_key"]
+        ready_checks.append(audio_key)
+        # The second chunk is late the first time only
+        return web.json_response({"exists": ready_checks != ["c0", "c1"]})
+
+    async def play(request):
+        query = request.rel_url.query
+        requests.append(f"play {query['audio_key']} {query.get('continue_dialplan')}")
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_route(
+        "POST", f"/{monitor.GENERATE_AUDIO_APP_ROUTE}", create_audio_stream
+    )
+    app.router.add_route("GET", f"/{monitor.IS_AUDIO_READY_ENDPOINT}", is_audio_ready)
+    app.router.add_route("POST", f"/{monitor.ASTERISK_CALL_APP_ROUTE_PLAY}", play)
+    server = await aiohttp_server(app)
+    url = str(server.make_url("")).rstrip("/")
+    monkeypatch.setattr(monitor, "GENERATE_AUDIO_URL", url)
+    monkeypatch.setattr(monitor, "ASTERISK_CALL_URL", url)
+    monkeypatch.setattr(monitor, "STREAM_AUDIO_MIN_CHARS", 1)
+    monkeypatch.setattr(monitor, "STREAM_CHUNK_READY_RETRIES", 1)
+
+    await monitor.play_message_to_channel("chan-1")
+
+    # Every chunk is played once, the first one is not heard again
+    assert requests == [
+        "create_audio stream=true",
+        "play c0 false",
+        "create_audio stream=true",
+        "play c1 false",
+        "play c2 None",
+    ]
@@ -0,0 +1,100 @@
+import os
+
+from generate_audio.audio_cache import AudioCache, audio_key
+
+VOICE = "piper_tts:it_IT:8000"
+
+
+def write_audio(cache, key, size):
+    with open(cache.path(key), "wb") as audio_file:
+        audio_file.write(b"\0" * size)
+
+
+def test_key_changes_with_the_voice():
+    key = audio_key("Server down", "piper_tts", "it_IT", 8000)
+
+    assert key == audio_key("Server down", "piper_tts", "it_IT", 8000)
+    assert key != audio_key("Server down", "kokoro_tts", "it_IT", 8000)
+    assert key != audio_key("Server down", "piper_tts", "en_US", 8000)
+    assert key != audio_key("Server down", "piper_tts", "it_IT", 16000)
+
+
+def test_least_recently_used_files_are_evicted(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    for key in ("a", "b"):
+        write_audio(cache, key, 100)
+        cache.add(key, VOICE)
+    cache.entries["a"]["last_access"] += 10
+    assert cache.lookup("a")
+
+    write_audio(cache, "c", 100)
+    assert cache.add("c", VOICE) == ["b"]
+    assert not os.path.exists(cache.path("b"))
+    assert not cache.lookup("b")
+    assert (cache.hits, cache.misses, cache.evictions) == (1, 1, 1)
+
+
+def test_checksum_alias_follows_the_voice(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=0)
+    write_audio(cache, "a", 10)
+    cache.add("a", VOICE, msg_chk_sum="1234abcd")
+
+    assert os.path.samefile(cache.path("1234abcd"), cache.path("a"))
+    assert cache.alias_key("1234abcd", VOICE) == "a"
+    assert cache.alias_key("1234abcd", "kokoro_tts:e:8000") is None
+
+
+def test_manifest_is_reloaded_with_the_untracked_files(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=0)
+    write_audio(cache, "a", 10)
+    cache.add("a", VOICE, msg_chk_sum="1234abcd")
+    write_audio(cache, "legacy", 20)
+    cache.flush()
+
+    reloaded = AudioCache(str(tmp_path), max_bytes=0)
+    reloaded.load()
+
+    assert set(reloaded.entries) == {"a", "legacy"}
+    assert reloaded.aliases == {"1234abcd": "a"}
+    assert reloaded.size == 30
+
+
+def test_variants_are_counted_and_evicted_with_their_file(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=250)
+    write_audio(cache, "a", 100)
+    with open(cache.variant_path("a", "ulaw"), "wb") as variant:
+        variant.write(b"\0" * 50)
+    cache.add("a", VOICE, variants={"ulaw": 50})
+    assert cache.size == 150
+    assert cache.missing_variants("a", ["ulaw", "alaw"]) == ["alaw"]
+    assert cache.variant_formats("a") == ["ulaw"]
+
+    write_audio(cache, "b", 150)
+    assert cache.add("b", VOICE) == ["a"]
+    assert not os.path.exists(cache.variant_path("a", "ulaw"))
+
+
+def test_fallback_render_is_rendered_again(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=0)
+    write_audio(cache, "a", 10)
+    cache.add("a", VOICE, rendered_by="kokoro_tts:if_sara:8000", render_seconds=0.4)
+
+    assert not cache.lookup("a")
+    assert os.path.exists(cache.path("a"))
+
+    cache.add("a", VOICE, render_seconds=2.1)
+    assert cache.lookup("a")
+    assert cache.entries["a"]["rendered_by"] == VOICE
+
+
+async def test_manifest_is_saved_in_the_background(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=0)
+    write_audio(cache, "a", 10)
+    cache.add("a", VOICE, variants={"ulaw": 5})
+    assert not os.path.exists(cache.manifest_path)
+
+    await cache.save()
+
+    reloaded = AudioCache(str(tmp_path), max_bytes=0)
+    reloaded.load()
+    assert reloaded.entries["a"]["voice_id"] == VOICE
@@ -0,0 +1,98 @@
+import os
+
+from aiohttp import ClientSession, web
+
+from asterisk_audio_sync.audio_mirror import AudioMirror, OriginUnavailable, sound_name
+from generate_audio.audio_cache import AudioCache
+from generate_audio.audio_serving import AudioFiles, add_audio_routes
+
+VOICE = "piper_tts:it_IT:8000"
+CONTENT = b"RIFF" + bytes(range(256)) * 4
+
+
+async def origin_server(aiohttp_server, folder, requests):
+    folder.mkdir()
+    cache = AudioCache(str(folder), max_bytes=0)
+    with open(cache.path("abc"), "wb") as audio_file:
+        audio_file.write(CONTENT)
+    cache.add("abc", VOICE, msg_chk_sum="1234")
+
+    @web.middleware
+    async def count(request, handler):
+        requests.append(request.headers.get("If-None-Match"))
+        return await handler(request)
+
+    app = web.Application(middlewares=[count])
+    app["audio_cache"] = cache
+    app["audio_files"] = AudioFiles(str(folder))
+    add_audio_routes(app)
+    return await aiohttp_server(app), cache
+
+
+async def test_mirror_downloads_once_and_revalidates_aliases(aiohttp_server, tmp_path):
+    requests = []
+    server, cache = await origin_server(aiohttp_server, tmp_path / "origin", requests)
+    mirror_folder = tmp_path / "sounds"
+    mirror_folder.mkdir()
+
+    async with ClientSession() as session:
+        mirror = AudioMirror(
+            str(mirror_folder), str(server.make_url("/audio")), session
+        )
+        path = await mirror.ensure("abc.wav")
+        assert open(path, "rb").read() == CONTENT
+        assert sound_name(path) == str(mirror_folder / "abc")
+
+        # The file of a cache key never changes: served without asking again
+        assert await mirror.ensure("abc.wav") == path
+        assert requests == [None]
+
+        # The checksum alias is revalidated with its ETag
+        await mirror.ensure("1234.wav")
+        await mirror.ensure("1234.wav")
+        assert requests[1] is None and requests[2] is not None
+        assert (mirror.downloads, mirror.revalidations) == (2, 1)
+
+        assert await mirror.ensure("missing.wav") is None
+
+        # GenerateAudio down: the local copies are still played
+        await server.close()
+        assert await mirror.ensure("1234.wav") == str(mirror_folder / "1234.wav")
+        try:
+            await mirror.ensure("other.wav")
+            assert False, "OriginUnavailable not raised"
+        except OriginUnavailable:
+            pass
+
+    mirror.flush()
+    reloaded = AudioMirror(str(mirror_folder), "http://unused/audio", None)
+    os.remove(mirror_folder / "1234.wav")
+    reloaded.load()
+    assert list(reloaded.entries) == ["abc.wav"]
+    assert reloaded.entries["abc.wav"]["immutable"]
+
+
+async def test_mirror_evicts_the_least_recently_played(aiohttp_server, tmp_path):
+    server, cache = await origin_server(aiohttp_server, tmp_path / "origin", [])
+    mirror_folder = tmp_path / "sounds"
+    mirror_folder.mkdir()
+
+    async with ClientSession() as session:
+        mirror = AudioMirror(
+            str(mirror_folder),
+            str(server.make_url("/audio")),
+            session,
+            max_bytes=len(CONTENT) + 1,
+            evict_grace_seconds=60,
+        )
+        assert await mirror.sync(["abc.wav", "../abc.wav"]) == 1
+        await mirror.ensure("1234.wav")
+
+    # Just played: kept over the cap, Asterisk may still be reading it
+    assert sorted(mirror.entries) == ["1234.wav", "abc.wav"]
+    assert mirror.evict() == []
+
+    mirror.entries["abc.wav"]["last_access"] -= 120
+    assert mirror.evict() == ["abc.wav"]
+    assert list(mirror.entries) == ["1234.wav"]
+    assert not os.path.exists(mirror_folder / "abc.wav")
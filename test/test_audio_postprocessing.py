@@ -0,0 +1,121 @@
+import io
+import time
+import wave
+
+import numpy as np
+import pytest
+from scipy.signal import resample as fft_resample
+
+from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+    float_to_int16,
+    int16_to_float,
+    resample,
+    wav_bytes,
+    write_asterisk_wav,
+)
+
+
+def tone(seconds, sample_rate, frequency=440.0):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+@pytest.mark.parametrize("original_rate", [24000, 22050, 16000])
+def test_resample_to_8khz_keeps_the_duration(original_rate):
+    samples = tone(2, original_rate)
+
+    resampled = resample(samples, original_rate, 8000)
+
+    assert resampled.dtype == np.float32
+    assert len(resampled) == 16000
+
+
+def test_resample_keeps_the_tone():
+    resampled = resample(tone(1, 24000), 24000, 8000)
+
+    spectrum = np.abs(np.fft.rfft(resampled))
+    assert np.argmax(spectrum) == 440
+
+
+def test_resample_at_the_same_rate_is_a_no_op():
+    samples = tone(1, 8000)
+
+    assert resample(samples, 8000, 8000) is samples
+
+
+def test_float_to_int16_clips():
+    pcm = float_to_int16(np.array([-2.0, -1.0, 0.0, 0.5, 1.0, 2.0]))
+
+    assert pcm.tolist() == [-32767, -32767, 0, 16384, 32767, 32767]
+
+
+def test_float_to_int16_does_not_modify_the_input():
+    samples = np.array([2.0, 0.25], dtype=np.float32)
+
+    float_to_int16(samples)
+
+    assert samples.tolist() == [2.0, 0.25]
+
+
+def test_int16_round_trip():
+    pcm = np.array([-32768, -1000, 0, 1000, 32767], dtype="<i2")
+
+    samples = int16_to_float(pcm.tobytes())
+
+    assert samples.min() >= -1.0 and samples.max() < 1.0
+    assert np.abs(float_to_int16(samples).astype(int) - pcm).max() <= 1
+
+
+def test_wav_header():
+    with wave.open(io.BytesIO(wav_bytes(np.zeros(80, dtype=np.int16)))) as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getsampwidth() == 2
+        assert wav.getframerate() == 8000
+        assert wav.getnframes() == 80
+
+
+def test_write_asterisk_wav(tmp_path):
+    output = tmp_path / "message.wav"
+
+    written = write_asterisk_wav(output, tone(1.5, 22050), 22050)
+
+    with wave.open(str(output)) as wav:
+        assert wav.getframerate() == 8000
+        assert wav.getnframes() == written == 12000
+
+
+def best_time(function, *args, runs=3):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+@pytest.mark.parametrize("seconds", [1, 10, 60])
+def test_benchmark_polyphase_against_fft(seconds):
+    """Both resamplers agree; on the long clips the polyphase one is not the slower."""
+    samples = tone(seconds, 22050)
+    target_length = round(len(samples) * 8000 / 22050)
+
+    expected, fft_time = best_time(fft_resample, samples, target_length)
+    resampled, polyphase_time = best_time(resample, samples, 22050, 8000)
+
+    print(
+        f"\n{seconds}s at 22050 Hz -> 8000 Hz: FFT {fft_time * 1000:.1f} ms, "
+        + f"polyphase {polyphase_time * 1000:.1f} ms"
+    )
+    assert len(resampled) == target_length
+    # Away from the edges, where the two filters differ the most
+    assert np.abs(resampled[100:-100] - expected[100:-100]).max() < 1e-2
+    if seconds == 60:
+        assert polyphase_time <= fft_time
+
+
+def test_write_asterisk_wav_does_not_modify_the_input(tmp_path):
+    samples = np.array([2.0, 0.25], dtype=np.float32)
+
+    write_asterisk_wav(tmp_path / "message.wav", samples, 8000)
+
+    assert samples.tolist() == [2.0, 0.25]
@@ -0,0 +1,99 @@
+from hashlib import blake2b
+
+from aiohttp import web
+
+from generate_audio.audio_cache import AudioCache
+from generate_audio.audio_serving import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    AudioFiles,
+    add_audio_routes,
+)
+
+VOICE = "piper_tts:it_IT:8000"
+CONTENT = b"RIFF" + bytes(range(256)) * 4
+
+
+async def audio_client(aiohttp_client, tmp_path, hot_set_bytes=0):
+    cache = AudioCache(str(tmp_path), max_bytes=0)
+    with open(cache.path("abc"), "wb") as audio_file:
+        audio_file.write(CONTENT)
+    cache.add("abc", VOICE, msg_chk_sum="1234")
+
+    app = web.Application()
+    app["audio_cache"] = cache
+    app["audio_files"] = AudioFiles(str(tmp_path), hot_set_bytes, hot_min_plays=2)
+    add_audio_routes(app)
+    return await aiohttp_client(app), app
+
+
+async def test_content_etag_and_revalidation(aiohttp_client, tmp_path):
+    client, _ = await audio_client(aiohttp_client, tmp_path)
+    etag = f'"{blake2b(CONTENT, digest_size=16).hexdigest()}"'
+
+    response = await client.get("/audio/abc.wav")
+    assert response.status == 200
+    assert await response.read() == CONTENT
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["Content-Type"] == "audio/wav"
+
+    response = await client.get("/audio/abc.wav", headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    # The checksum alias may point to another rendering later
+    response = await client.get("/audio/1234.wav")
+    assert response.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+
+
+async def test_ranges_from_disk_and_from_the_hot_set(aiohttp_client, tmp_path):
+    client, app = await audio_client(aiohttp_client, tmp_path, hot_set_bytes=1 << 20)
+
+    for _ in range(3):
+        response = await client.get("/audio/abc.wav", headers={"Range": "bytes=4-9"})
+        assert response.status == 206
+        assert await response.read() == CONTENT[4:10]
+        assert response.headers["Content-Range"] == f"bytes 4-9/{len(CONTENT)}"
+    assert app["audio_files"].hot_size == len(CONTENT)
+
+    response = await client.get("/audio/abc.wav", headers={"Range": "bytes=-4"})
+    assert await response.read() == CONTENT[-4:]
+    response = await client.get("/audio/abc.wav", headers={"Range": "bytes=5000-"})
+    assert response.status == 416
+
+
+async def test_if_match_and_if_range_use_the_content_etag(aiohttp_client, tmp_path):
+    client, _ = await audio_client(aiohttp_client, tmp_path, hot_set_bytes=1 << 20)
+    etag = f'"{blake2b(CONTENT, digest_size=16).hexdigest()}"'
+
+    # From disk first, then from the hot set
+    for _ in range(3):
+        response = await client.get(
+            "/audio/abc.wav", headers={"Range": "bytes=4-9", "If-Range": etag}
+        )
+        assert response.status == 206
+        assert await response.read() == CONTENT[4:10]
+        assert response.headers["ETag"] == etag
+
+        response = await client.get(
+            "/audio/abc.wav", headers={"Range": "bytes=4-9", "If-Range": '"old"'}
+        )
+        assert response.status == 200
+        assert await response.read() == CONTENT
+
+        response = await client.get("/audio/abc.wav", headers={"If-Match": etag})
+        assert response.status == 200
+        response = await client.get("/audio/abc.wav", headers={"If-Match": '"old"'})
+        assert response.status == 412
+
+
+async def test_head_and_no_listing(aiohttp_client, tmp_path):
+    client, _ = await audio_client(aiohttp_client, tmp_path)
+
+    response = await client.head("/audio/abc.wav")
+    assert response.status == 200
+    assert int(response.headers["Content-Length"]) == len(CONTENT)
+    assert await response.read() == b""
+
+    for path in ("/audio/", "/audio/.manifest.json", "/audio/..%2Fsecret.wav"):
+        assert (await client.get(path)).status == 404
@@ -0,0 +1,81 @@
+import threading
+import wave
+
+from py_phone_caller_utils.py_phone_caller_voices.aws_polly import (
+    aws_polly_text_to_wave,
+    split_ssml_chunks,
+)
+
+
+class FakeStream:
+    def __init__(self, pcm):
+        self.pcm = pcm
+        self.closed = False
+
+    def iter_chunks(self, chunk_size):
+        for start in range(0, len(self.pcm), chunk_size):
+            yield self.pcm[start : start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakePolly:
+    """
+    A local stand-in of the Polly client: the PCM of a chunk is made of its text.
+    """
+
+    def __init__(self, fail_on=None):
+        self.requests = []
+        self.fail_on = fail_on
+        self.lock = threading.Lock()
+
+    def synthesize_speech(self, **request):
+        with self.lock:
+            self.requests.append(request)
+        if self.fail_on and self.fail_on in request["Text"]:
+            raise RuntimeError("ThrottlingException")
+        return {"AudioStream": FakeStream(pcm_of(request["Text"]))}
+
+
+def pcm_of(ssml):
+    return ssml.encode("utf-8").ljust(20000, b"\0")[:20000]
+
+
+def test_split_ssml_chunks():
+    message = "Disk full on db-01. " * 40 + "x" * 30
+    chunks = split_ssml_chunks(message, max_chars=100)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith("<speak>") and chunk.endswith("</speak>")
+        assert len(chunk) - len("<speak></speak>") <= 100
+    assert split_ssml_chunks("CPU > 90% & rising") == [
+        "<speak>CPU &gt; 90% &amp; rising</speak>"
+    ]
+
+
+def test_streams_chunks_in_order_at_8khz(tmp_path):
+    message = ". ".join(f"Sentence number {index} of the alert" for index in range(80))
+    output = tmp_path / "audio" / "message.wav"
+    client = FakePolly()
+
+    aws_polly_text_to_wave(message, str(output), 8000, "Joanna", client=client)
+
+    chunks = split_ssml_chunks(message)
+    assert len(chunks) > 2
+    assert {request["SampleRate"] for request in client.requests} == {"8000"}
+    assert {request["TextType"] for request in client.requests} == {"ssml"}
+    with wave.open(str(output), "rb") as wf:
+        assert (wf.getframerate(), wf.getnchannels(), wf.getsampwidth()) == (8000, 1, 2)
+        assert wf.readframes(wf.getnframes()) == b"".join(map(pcm_of, chunks))
+
+
+def test_failed_chunk_leaves_no_file(tmp_path):
+    message = ". ".join(f"Sentence number {index} of the alert" for index in range(80))
+    output = tmp_path / "message.wav"
+
+    aws_polly_text_to_wave(
+        message, str(output), 8000, "Joanna", client=FakePolly(fail_on="number 70")
+    )
+
+    assert not output.exists()
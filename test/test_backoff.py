@@ -0,0 +1,28 @@
+import random
+
+from py_phone_caller_utils.backoff import backoff_delay
+
+
+class UpperBound:
+    """Deterministic stand-in for 'random' always returning the upper bound."""
+
+    @staticmethod
+    def uniform(low, high):
+        return high
+
+
+def test_backoff_delay_grows_exponentially():
+    delays = [backoff_delay(attempt, 1, 60, rng=UpperBound) for attempt in range(5)]
+    assert delays == [1, 2, 4, 8, 16]
+
+
+def test_backoff_delay_is_capped():
+    assert backoff_delay(10, 1, 60, rng=UpperBound) == 60
+    assert backoff_delay(10_000, 1, 60, rng=UpperBound) == 60
+
+
+def test_backoff_delay_is_jittered():
+    rng = random.Random(42)
+    delays = {backoff_delay(6, 1, 60, rng=rng) for _ in range(20)}
+    assert len(delays) > 1
+    assert all(0 <= delay <= 60 for delay in delays)
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from py_phone_caller_utils.checksums import (
+    checksum,
+    checksum_version,
+    gen_call_chk_sum,
+    gen_msg_chk_sum,
+)
+from py_phone_caller_utils.checksums.migrate_checksums import (
+    CALL_CHECKSUM_FIELDS,
+    colliding_audio_files,
+    find_collisions,
+    upgraded_checksums,
+)
+
+
+async def test_legacy_checksums_are_unchanged():
+    assert await gen_msg_chk_sum("Server down", version=1) == checksum(
+        "Server down", version=1
+    )
+    assert len(await gen_msg_chk_sum("Server down", version=1)) == 8
+    assert checksum("+3912", "3 alert", version=1) == checksum(
+        "+39123", " alert", version=1
+    )
+
+
+async def test_current_checksums_are_wide_and_delimited():
+    msg_chk_sum = await gen_msg_chk_sum("Server down")
+
+    assert msg_chk_sum.startswith("v2-") and len(msg_chk_sum) == 35
+    assert checksum_version(msg_chk_sum) == 2
+    assert checksum_version(await gen_msg_chk_sum("Server down", version=1)) == 1
+    assert checksum_version("not a checksum") is None
+    assert await gen_call_chk_sum("+3912", "3 alert") != await gen_call_chk_sum(
+        "+39123", " alert"
+    )
+
+
+def call(phone, message, msg_chk_sum=None):
+    row = {
+        "phone": phone,
+        "message": message,
+        "first_dial": datetime(2026, 1, 1, 12, 0, 0, 123456),
+    }
+    row["msg_chk_sum"] = msg_chk_sum or checksum(message, version=1)
+    row["call_chk_sum"] = checksum(phone, message, version=1)
+    row["unique_chk_sum"] = checksum(phone, message, str(row["first_dial"]), version=1)
+    return row
+
+
+def test_outdated_checksums_are_upgraded():
+    row = call("+39123", "Server down")
+    upgraded = upgraded_checksums(row, CALL_CHECKSUM_FIELDS)
+
+    assert upgraded == {
+        "msg_chk_sum": checksum("Server down"),
+        "call_chk_sum": checksum("+39123", "Server down"),
+        "unique_chk_sum": checksum(
+            "+39123", "Server down", "2026-01-01 12:00:00.123456"
+        ),
+    }
+    assert upgraded_checksums({**row, **upgraded}, CALL_CHECKSUM_FIELDS) == {}
+
+
+def test_collisions_and_their_audio_files_are_found(tmp_path):
+    rows = [
+        call("+39123", "Server down", msg_chk_sum="deadbeef"),
+        call("+39456", "Server down", msg_chk_sum="deadbeef"),
+        call("+39123", "Disk full", msg_chk_sum="deadbeef"),
+        call("+39123", "Load high"),
+    ]
+    (tmp_path / "deadbeef.wav").write_bytes(b"RIFF")
+
+    collisions = find_collisions(rows, CALL_CHECKSUM_FIELDS)
+
+    assert collisions["msg_chk_sum"] == {"deadbeef": [("Disk full",), ("Server down",)]}
+    assert collisions["call_chk_sum"] == {}
+    assert colliding_audio_files(str(tmp_path), collisions["msg_chk_sum"]) == [
+        str(tmp_path / "deadbeef.wav")
+    ]
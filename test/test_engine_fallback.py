@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+import pytest
+
+from generate_audio.engine_fallback import _abandoned, render_with_fallback
+
+
+@pytest.fixture(autouse=True)
+async def cancel_abandoned_renderings():
+    yield
+    abandoned = list(_abandoned)
+    for task in abandoned:
+        task.cancel()
+    await asyncio.gather(*abandoned, return_exceptions=True)
+
+
+def engine(delay, fails=False):
+    async def render(path):
+        await asyncio.sleep(delay)
+        if fails:
+            raise RuntimeError("throttled")
+        with open(path, "wb") as audio_file:
+            audio_file.write(b"RIFF")
+
+    return render
+
+
+async def render_chain(tmp_path, engines, budget=0.05):
+    output_path = str(tmp_path / "message.wav")
+    outcome = await render_with_fallback(
+        [(name, budget) for name in engines],
+        lambda name, path: engines[name](path),
+        output_path,
+        os.path.isfile,
+    )
+    return outcome, output_path
+
+
+async def test_primary_within_its_budget(tmp_path):
+    outcome, _ = await render_chain(
+        tmp_path, {"aws_polly": engine(0), "piper_tts": engine(0)}
+    )
+
+    assert outcome["candidate"] == "aws_polly" and not outcome["fallback"]
+    assert [attempt["outcome"] for attempt in outcome["attempts"]] == ["rendered"]
+
+
+async def test_failed_primary_falls_back_at_once(tmp_path):
+    outcome, output_path = await render_chain(
+        tmp_path, {"aws_polly": engine(0, fails=True), "piper_tts": engine(0)}
+    )
+
+    assert outcome["candidate"] == "piper_tts" and outcome["fallback"]
+    assert [attempt["outcome"] for attempt in outcome["attempts"]] == [
+        "failed",
+        "rendered",
+    ]
+    assert os.path.isfile(output_path)
+
+
+async def test_slow_primary_is_raced_by_the_fallback(tmp_path):
+    outcome, output_path = await render_chain(
+        tmp_path, {"aws_polly": engine(0.5), "piper_tts": engine(0.01)}
+    )
+
+    assert outcome["candidate"] == "piper_tts"
+    assert outcome["seconds"] < 0.5
+    assert outcome["attempts"][0]["outcome"] == "abandoned"
+    await asyncio.sleep(0.6)
+    # The late rendering of the primary is deleted
+    assert os.listdir(tmp_path) == ["message.wav"]
+
+
+async def test_failed_fallback_starts_the_next_one_at_once(tmp_path):
+    outcome, _ = await render_chain(
+        tmp_path,
+        {
+            "aws_polly": engine(1),
+            "google_gtts": engine(0.01, fails=True),
+            "piper_tts": engine(0),
+        },
+        budget=0.2,
+    )
+
+    assert outcome["candidate"] == "piper_tts"
+    # Without waiting for the budget of the failed engine, spent at 0.4s
+    assert outcome["seconds"] < 0.35
+    assert [attempt["outcome"] for attempt in outcome["attempts"]] == [
+        "abandoned",
+        "failed",
+        "rendered",
+    ]
+
+
+async def test_slow_primary_still_wins_the_race(tmp_path):
+    outcome, _ = await render_chain(
+        tmp_path, {"aws_polly": engine(0.1), "piper_tts": engine(1)}
+    )
+
+    assert outcome["candidate"] == "aws_polly" and not outcome["fallback"]
+
+
+async def test_no_engine_renders(tmp_path):
+    with pytest.raises(RuntimeError):
+        await render_chain(
+            tmp_path,
+            {"aws_polly": engine(0, fails=True), "piper_tts": engine(0, fails=True)},
+        )
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,50 @@
+from asterisk_recaller.escalation import (
+    default_escalation_policy,
+    parse_escalation_policies,
+    policy_for_message,
+    tier_contacts,
+)
+
+CONTACTS = [{"phone_number": f"+39{number}"} for number in range(5)]
+
+
+def phones(contacts):
+    return [contact["phone_number"] for contact in contacts]
+
+
+def test_default_policy_calls_one_backup_contact_at_a_time():
+    tiers = default_escalation_policy(3, 45)["tiers"]
+    assert [phones(tier_contacts(CONTACTS[:3], tiers, idx)) for idx in range(3)] == [
+        ["+391"],
+        ["+392"],
+        ["+390"],
+    ]
+
+
+def test_tiers_ring_contacts_in_parallel():
+    policies = parse_escalation_policies(
+        [
+            {
+                "name": "critical",
+                "match": "critical",
+                "tiers": [
+                    {"parallel": 2, "escalate_after_seconds": 60},
+                    {"parallel": 10, "escalate_after_seconds": 120},
+                ],
+            }
+        ]
+    )
+    policy = policy_for_message(policies, None, "CRITICAL: disk full")
+    assert policy["name"] == "critical"
+    assert phones(tier_contacts(CONTACTS, policy["tiers"], 0)) == ["+391", "+392"]
+    # Never more calls than on-call contacts
+    assert len(tier_contacts(CONTACTS, policy["tiers"], 1)) == 5
+
+
+def test_unmatched_and_invalid_policies():
+    default = default_escalation_policy(3, 45)
+    policies = parse_escalation_policies(
+        [{"name": "broken", "match": "(", "tiers": [{"parallel": 1}]}]
+    )
+    assert policies == []
+    assert policy_for_message(policies, default, "warning") is default
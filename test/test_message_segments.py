@@ -0,0 +1,63 @@
+import numpy as np
+
+from generate_audio.message_segments import (
+    crossfade_concat,
+    join_segment_files,
+    split_segments,
+    trim_silence,
+)
+from generate_audio.telephony_formats import read_wav_pcm
+from py_phone_caller_utils.py_phone_caller_voices.audio_postprocessing import (
+    wav_bytes,
+)
+
+
+def test_template_is_split_into_static_and_variable_segments():
+    assert split_segments("Alert HighLoad on host web-01.example.com is firing.") == [
+        "Alert HighLoad on host",
+        "web-01.example.com",
+        "is firing.",
+    ]
+    assert split_segments("Disk /var/log is 90 % full!") == [
+        "Disk",
+        "/var/log",
+        "is",
+        "90%",
+        "full!",
+    ]
+
+
+def test_message_without_variable_token_is_a_single_segment():
+    assert split_segments("Server down.") == ["Server down."]
+
+
+def test_crossfade_overlaps_the_junctions():
+    first = np.full(100, 1000, dtype=np.int16)
+    second = np.full(50, -1000, dtype=np.int16)
+
+    joined = crossfade_concat([first, second], overlap=10)
+
+    assert len(joined) == 140
+    assert joined[:90].tolist() == [1000] * 90
+    assert joined[-40:].tolist() == [-1000] * 40
+    assert -1000 < joined[95] < 1000
+
+
+def test_silence_is_trimmed_at_the_edges():
+    pcm = np.zeros(1000, dtype=np.int16)
+    pcm[400:600] = 5000
+
+    assert len(trim_silence(pcm, keep=50)) == 300
+    assert len(trim_silence(np.zeros(10, dtype=np.int16), keep=50)) == 0
+
+
+def test_segment_files_are_joined(tmp_path):
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"segment{index}.wav"
+        path.write_bytes(wav_bytes(np.full(800, 4000, dtype=np.int16)))
+        paths.append(str(path))
+
+    written = join_segment_files(paths, str(tmp_path / "message.wav"), 80, 40)
+
+    assert written == len(read_wav_pcm(str(tmp_path / "message.wav"))) == 3 * 800 - 160
@@ -0,0 +1,54 @@
+import threading
+import time
+
+from py_phone_caller_utils.py_phone_caller_voices.model_registry import ModelRegistry
+
+
+def test_model_is_loaded_once_by_concurrent_threads():
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        time.sleep(0.05)
+        return object()
+
+    registry = ModelRegistry("test", loader)
+    models = []
+    threads = [
+        threading.Thread(target=lambda: models.append(registry.get("spa")))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loads == ["spa"]
+    assert len({id(model) for model in models}) == 1
+
+
+def test_least_recently_used_model_is_evicted():
+    registry = ModelRegistry("test", lambda key: key.upper(), max_models=2)
+
+    assert registry.get("spa").model == "SPA"
+    registry.get("eng")
+    registry.get("spa")
+    registry.get("ita")
+
+    assert "spa" in registry and "ita" in registry
+    assert "eng" not in registry
+
+
+def test_failed_load_is_retried():
+    attempts = []
+
+    def loader(key):
+        attempts.append(key)
+        if len(attempts) == 1:
+            raise OSError("model not downloaded")
+        return key
+
+    registry = ModelRegistry("test", loader)
+    registry.preload(["spa"])
+    assert "spa" not in registry
+    assert registry.get("spa").model == "spa"
@@ -0,0 +1,115 @@
+import json
+import random
+import uuid
+from datetime import UTC, datetime, timedelta
+
+from py_phone_caller_utils.py_phone_caller_db.db_address_book import on_call_entries
+from py_phone_caller_utils.py_phone_caller_db.on_call_index import OnCallIndex
+
+T0 = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+def contact(name, windows):
+    return {
+        "id": uuid.uuid4(),
+        "name": name,
+        "surname": "",
+        "phone_number": f"+39{name}",
+        "created_time": datetime(2025, 1, 1),
+        "on_call_availability": json.dumps(
+            [
+                {
+                    "start_at": start.isoformat(),
+                    "end_at": end.isoformat(),
+                    "priority": priority,
+                }
+                for start, end, priority in windows
+            ]
+        ),
+    }
+
+
+def brute_force(rows, now):
+    entries = [
+        (key, contact)
+        for row in rows
+        for start, end, key, contact in on_call_entries(row)
+        if start <= now <= end
+    ]
+    entries.sort(key=lambda entry: entry[0])
+    return [contact for _, contact in entries]
+
+
+def test_window_bounds_are_included():
+    row = contact("alice", [(T0, T0 + timedelta(hours=8), 1)])
+    index = OnCallIndex()
+    index.upsert_contacts([row])
+
+    assert index.on_call_contacts(T0 - timedelta(microseconds=1)) == []
+    assert len(index.on_call_contacts(T0)) == 1
+    assert len(index.on_call_contacts(T0 + timedelta(hours=8))) == 1
+    assert index.on_call_contacts(T0 + timedelta(hours=8, microseconds=1)) == []
+
+
+def test_priority_order_and_removal():
+    alice = contact("alice", [(T0, T0 + timedelta(days=1), 2)])
+    bob = contact("bob", [(T0, T0 + timedelta(days=1), 1)])
+    index = OnCallIndex()
+    index.upsert_contacts([alice, bob])
+
+    now = T0 + timedelta(hours=1)
+    assert [c["name"] for c in index.on_call_contacts(now)] == ["bob", "alice"]
+
+    index.remove_contacts([bob["id"]])
+    assert [c["name"] for c in index.on_call_contacts(now)] == ["alice"]
+
+
+def test_index_matches_the_database_lookup():
+    rng = random.Random(7)
+    rows = []
+    for number in range(40):
+        windows = []
+        for _ in range(rng.randint(0, 3)):
+            start = T0 + timedelta(hours=rng.randint(0, 96))
+            end = start + timedelta(hours=rng.randint(0, 24))
+            windows.append((start, end, rng.randint(1, 3)))
+        rows.append(contact(f"c{number}", windows))
+
+    index = OnCallIndex()
+    index.replace_contacts(rows)
+    for hours in range(-2, 130):
+        now = T0 + timedelta(hours=hours, minutes=rng.choice([0, 30]))
+        assert index.on_call_contacts(now) == brute_force(rows, now)
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(11)
+
+    def random_contact(name, contact_id=None):
+        windows = []
+        for _ in range(rng.randint(0, 3)):
+            start = T0 + timedelta(hours=rng.randint(0, 48))
+            windows.append((start, start + timedelta(hours=rng.randint(0, 12)), 1))
+        row = contact(name, windows)
+        row["id"] = contact_id or row["id"]
+        return row
+
+    rows = {}
+    index = OnCallIndex()
+    for step in range(200):
+        if rows and rng.random() < 0.3:
+            contact_id = rng.choice(list(rows))
+            index.remove_contacts([contact_id])
+            rows.pop(contact_id)
+        else:
+            existing = rng.choice(list(rows)) if rows and rng.random() < 0.5 else None
+            row = random_contact(f"c{step}", existing)
+            index.upsert_contacts([row])
+            rows[row["id"]] = row
+
+    rebuilt = OnCallIndex()
+    rebuilt.replace_contacts(rows.values())
+    assert index._boundaries == rebuilt._boundaries
+    for hours in range(-1, 62):
+        now = T0 + timedelta(hours=hours, minutes=rng.choice([0, 30]))
+        assert index.on_call_contacts(now) == brute_force(rows.values(), now)
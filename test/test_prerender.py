@@ -0,0 +1,85 @@
+import asyncio
+
+from generate_audio.batch_renders import BatchRenders
+from generate_audio.prerender import read_messages, rule_messages, template_messages
+
+RULES = {
+    "groups": [
+        {
+            "name": "hosts",
+            "rules": [
+                {
+                    "alert": "HostDown",
+                    "annotations": {"description": "The backup server is down."},
+                },
+                {
+                    "alert": "HighLoad",
+                    "annotations": {
+                        "description": "Alert HighLoad on host {{ $labels.instance }}, "
+                        "load is {{ $value }}."
+                    },
+                },
+                {"record": "job:load:avg", "expr": "avg(load1)"},
+            ],
+        }
+    ]
+}
+
+
+def test_static_description_is_rendered_whole():
+    assert template_messages("The backup server is down.") == [
+        "The backup server is down."
+    ]
+
+
+def test_templated_description_renders_its_static_segments():
+    assert rule_messages(RULES) == [
+        "The backup server is down.",
+        "Alert HighLoad on host",
+        "load is",
+    ]
+
+
+def test_text_file_has_one_message_per_line(tmp_path):
+    path = tmp_path / "messages.txt"
+    path.write_text("# Deploy warm-up\nServer down.\n\nDisk full.\n")
+
+    assert read_messages(str(path)) == ["Server down.", "Disk full."]
+
+
+def test_batch_progress():
+    batches = BatchRenders(max_finished=1)
+    batch = batches.create(["Server down.", "Disk full.", "Server down."])
+    batch.cached += 1
+    batch.failed.append("Disk full.")
+
+    progress = batches.get(batch.batch_id).progress()
+
+    assert (progress["total"], progress["done"], progress["finished"]) == (2, 2, False)
+    assert batches.running() == [batch]
+
+
+async def test_batches_share_one_job_budget():
+    batches = BatchRenders(max_jobs=8)
+    started = []
+
+    async def group(name, jobs, release):
+        async with batches.reserve(jobs):
+            started.append(name)
+            await release.wait()
+
+    first, second = asyncio.Event(), asyncio.Event()
+    tasks = [
+        asyncio.create_task(group("first", 8, first)),
+        asyncio.create_task(group("second", 8, second)),
+    ]
+    await asyncio.sleep(0.01)
+    # A second batch waits for the jobs held by the first one
+    assert (started, batches.jobs_in_use) == (["first"], 8)
+
+    first.set()
+    await asyncio.sleep(0.01)
+    assert started == ["first", "second"]
+    second.set()
+    await asyncio.gather(*tasks)
+    assert batches.jobs_in_use == 0
@@ -0,0 +1,113 @@
+import asyncio
+import datetime
+
+from asterisk_recaller.recall_scheduler import RecallScheduler, next_due_time
+
+T0 = datetime.datetime(2026, 1, 1, 12, 0, 0)
+NEVER = datetime.datetime.min
+
+
+def row(call_id, first_dial=T0, last_dial=NEVER, dialed_times=1):
+    return {
+        "id": call_id,
+        "phone": f"+39{call_id}",
+        "message": "test",
+        "seconds_to_forget": 300,
+        "first_dial": first_dial,
+        "last_dial": last_dial,
+        "dialed_times": dialed_times,
+    }
+
+
+class Clock:
+    def __init__(self, now):
+        self.current = now
+
+    def __call__(self):
+        return self.current
+
+
+def make_scheduler(clock):
+    async def place_call(item):
+        pass
+
+    return RecallScheduler(place_call, 75, 300, 3, concurrency=2, now=clock)
+
+
+def test_next_due_time():
+    assert next_due_time(T0, NEVER, 1, 75) == T0 + datetime.timedelta(seconds=75)
+    assert next_due_time(T0, NEVER, 2, 75) == T0 + datetime.timedelta(seconds=150)
+    # A late attempt pushes the next one
+    late = T0 + datetime.timedelta(seconds=140)
+    assert next_due_time(T0, late, 2, 75) == late + datetime.timedelta(seconds=75)
+
+
+def test_all_due_recalls_are_popped_together():
+    clock = Clock(T0)
+    scheduler = make_scheduler(clock)
+    scheduler.refresh([row(i) for i in range(20)])
+    assert scheduler.pop_due() == []
+
+    clock.current = T0 + datetime.timedelta(seconds=75)
+    assert len(scheduler.pop_due()) == 20
+
+
+def test_dispatched_attempt_is_not_repeated():
+    clock = Clock(T0 + datetime.timedelta(seconds=80))
+    scheduler = make_scheduler(clock)
+    scheduler.refresh([row(1)])
+    assert [item["id"] for item in scheduler.pop_due()] == [1]
+
+    # The caller register did not record the attempt yet
+    scheduler.refresh([row(1)])
+    assert scheduler.pop_due() == []
+
+    # Once recorded, the next attempt is scheduled from the last dial
+    scheduler.refresh([row(1, last_dial=clock.current, dialed_times=2)])
+    assert scheduler.next_due() == clock.current + datetime.timedelta(seconds=75)
+
+
+def test_acknowledged_and_exhausted_calls_are_dropped():
+    clock = Clock(T0)
+    scheduler = make_scheduler(clock)
+    scheduler.refresh([row(1), row(2)])
+    assert len(scheduler) == 2
+
+    scheduler.refresh([row(2, dialed_times=3)])
+    assert len(scheduler) == 0
+    assert scheduler.next_due() is None
+
+
+async def test_run_places_recalls_when_due():
+    placed = []
+    lateness = []
+    now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    scheduler = RecallScheduler(
+        lambda item: asyncio.sleep(0, placed.append(item["id"])),
+        0.05,
+        300,
+        3,
+        observe_lateness=lateness.append,
+    )
+    scheduler.refresh([row(1, first_dial=now), row(2, first_dial=now)])
+
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(0.2)
+    task.cancel()
+
+    assert sorted(placed) == [1, 2]
+    assert len(lateness) == 2 and all(0 <= late < 0.2 for late in lateness)
+
+
+def test_upsert_and_discard_leave_other_recalls_untouched():
+    clock = Clock(T0)
+    scheduler = make_scheduler(clock)
+    scheduler.refresh([row(1), row(2)])
+
+    scheduler.upsert([row(3, first_dial=T0 - datetime.timedelta(seconds=60))])
+    assert len(scheduler) == 3
+    assert scheduler.next_due() == T0 + datetime.timedelta(seconds=15)
+
+    scheduler.discard([3, 1])
+    assert len(scheduler) == 1
+    assert scheduler.next_due() == T0 + datetime.timedelta(seconds=75)
@@ -0,0 +1,93 @@
+import asyncio
+import os
+
+import pytest
+
+from generate_audio.render_jobs import RenderJobs, RenderQueueFull, render_atomically
+
+
+async def test_concurrent_requests_share_one_rendering():
+    renders = []
+    release = asyncio.Event()
+
+    async def render():
+        renders.append(1)
+        await release.wait()
+
+    jobs = RenderJobs(max_pending=4)
+    requests = [asyncio.create_task(jobs.run("abc", render)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert sorted(await asyncio.gather(*requests)) == [False] * 4 + [True]
+    assert renders == [1]
+    assert len(jobs) == 0
+
+
+async def test_too_many_renderings_are_rejected():
+    release = asyncio.Event()
+    jobs = RenderJobs(max_pending=1)
+    first = asyncio.create_task(jobs.run("abc", release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(RenderQueueFull):
+        await jobs.run("def", release.wait)
+
+    release.set()
+    await first
+
+
+async def test_batch_keys_are_jobs_of_their_own():
+    release = asyncio.Event()
+    rendered = []
+
+    async def render_batch(keys):
+        rendered.append(keys)
+        await release.wait()
+        return ["b"]
+
+    jobs = RenderJobs(max_pending=4)
+    single = asyncio.create_task(jobs.run("c", release.wait))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(jobs.run_batch(["a", "b", "c"], render_batch))
+    await asyncio.sleep(0)
+
+    assert len(jobs) == 3
+    with pytest.raises(RenderQueueFull):
+        await jobs.run_batch(["d", "e"], render_batch)
+    # A request for a key of the batch waits for it instead of rendering it again
+    joined = asyncio.create_task(jobs.run("a", release.wait))
+    failed_join = asyncio.create_task(jobs.run("b", release.wait))
+    release.set()
+
+    assert await batch == ["b"]
+    assert rendered == [["a", "b"]]
+    assert await joined is False
+    with pytest.raises(RuntimeError):
+        await failed_join
+    await single
+    assert len(jobs) == 0
+
+
+async def test_audio_file_appears_only_when_complete(tmp_path):
+    output_path = str(tmp_path / "abc.wav")
+
+    async def render(path):
+        assert path != output_path
+        with open(path, "wb") as audio_file:
+            audio_file.write(b"RIFF" + b"\0" * 40)
+        assert not os.path.exists(output_path)
+
+    await render_atomically(render, output_path, os.path.isfile)
+    assert os.listdir(tmp_path) == ["abc.wav"]
+
+
+async def test_invalid_rendering_leaves_no_file(tmp_path):
+    output_path = str(tmp_path / "abc.wav")
+
+    async def render(path):
+        open(path, "wb").close()
+
+    with pytest.raises(RuntimeError):
+        await render_atomically(render, output_path, lambda path: False)
+    assert os.listdir(tmp_path) == []
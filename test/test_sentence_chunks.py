@@ -0,0 +1,25 @@
+from generate_audio.sentence_chunks import split_sentences
+
+
+def test_short_message_is_a_single_chunk():
+    assert split_sentences("Server down.") == ["Server down."]
+
+
+def test_long_message_is_split_by_sentence():
+    message = (
+        "The primary database is down since 3 minutes. "
+        "Replication lag on the replica is 45 seconds! "
+        "Check it. Then page the database administrator on call."
+    )
+
+    assert split_sentences(message, min_chars=40) == [
+        "The primary database is down since 3 minutes.",
+        "Replication lag on the replica is 45 seconds!",
+        "Check it. Then page the database administrator on call.",
+    ]
+
+
+def test_short_tail_is_merged_with_the_previous_chunk():
+    message = "The primary database is down since 3 minutes. Check it."
+
+    assert split_sentences(message, min_chars=40) == [message]
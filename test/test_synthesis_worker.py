@@ -0,0 +1,17 @@
+import asyncio
+import os
+
+from generate_audio.synthesis_worker import create_synthesis_pool, worker_ready
+
+
+async def test_workers_are_started_in_their_own_processes():
+    pool = create_synthesis_pool(2, pin_workers=True, preload_mms=False)
+    loop = asyncio.get_running_loop()
+    try:
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(pool, worker_ready) for _ in range(2))
+        )
+    finally:
+        pool.shutdown()
+
+    assert os.getpid() not in pids
@@ -0,0 +1,51 @@
+import wave
+
+import numpy as np
+import pytest
+
+from generate_audio.telephony_formats import (
+    encode,
+    linear_to_alaw,
+    linear_to_ulaw,
+    write_variants,
+)
+
+ALL_SAMPLES = np.arange(-32768, 32768, dtype=np.int16)
+
+
+def test_g711_silence_and_peaks():
+    pcm = np.array([0, 32767, -32768], dtype=np.int16)
+
+    assert linear_to_ulaw(pcm).tolist() == [0xFF, 0x80, 0x00]
+    assert linear_to_alaw(pcm).tolist() == [0xD5, 0xAA, 0x2A]
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_g711_matches_the_reference_encoder():
+    audioop = pytest.importorskip("audioop")
+    pcm_bytes = ALL_SAMPLES.astype("<i2").tobytes()
+
+    assert linear_to_ulaw(ALL_SAMPLES).tobytes() == audioop.lin2ulaw(pcm_bytes, 2)
+    assert linear_to_alaw(ALL_SAMPLES).tobytes() == audioop.lin2alaw(pcm_bytes, 2)
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        encode(ALL_SAMPLES, "gsm")
+
+
+def test_variants_are_written_next_to_the_final_path(tmp_path):
+    wav_path = tmp_path / ".message.wav.tmp"
+    with wave.open(str(wav_path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(np.zeros(800, dtype="<i2").tobytes())
+
+    sizes = write_variants(
+        str(wav_path), ["ulaw", "alaw", "sln"], str(tmp_path / "message.wav")
+    )
+
+    assert sizes == {"ulaw": 800, "alaw": 800, "sln": 1600}
+    assert (tmp_path / "message.ulaw").read_bytes() == b"\xff" * 800
+    assert (tmp_path / "message.alaw").read_bytes() == b"\xd5" * 800
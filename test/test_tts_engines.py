@@ -0,0 +1,122 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from generate_audio.tts_engines import EngineRegistry, Voice
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src")
+HEAVY_MODULES = ["torch", "transformers", "boto3", "gtts", "soundfile"]
+
+
+def test_engine_module_is_imported_at_first_use(tmp_path, monkeypatch):
+    (tmp_path / "fake_tts_engine.py").write_text(
+        "def speak(message, output_path, voice):\n    return message\n"
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    registry = EngineRegistry()
+    registry.register("fake", "fake_tts_engine:speak", "en")
+
+    assert "fake_tts_engine" not in sys.modules
+    assert registry.function("fake")("Server down", "out.wav", "en") == "Server down"
+    assert "fake_tts_engine" in sys.modules
+    assert registry.loaded() == ["fake"]
+    monkeypatch.delitem(sys.modules, "fake_tts_engine")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        EngineRegistry().get("espeak")
+
+
+def test_engine_capabilities():
+    registry = EngineRegistry()
+    registry.register(
+        "piper",
+        print,
+        "it_IT",
+        voices=lambda: ["en_GB", "it_IT"],
+        language_voice=lambda language: {"en": "en_GB"}.get(language),
+        runs_as_script=True,
+    )
+    registry.register("gtts", print, "en", any_voice=True)
+    piper, gtts = registry.get("piper"), registry.get("gtts")
+
+    assert piper.available_voices() == ["it_IT", "en_GB"]
+    assert piper.accepts_voice("en_GB") and not piper.accepts_voice("fr_FR")
+    assert piper.voice_for_language("en") == "en_GB"
+    assert piper.voice_for_language("fr") is None
+    assert gtts.accepts_voice("fr") and gtts.voice_for_language("fr") == "fr"
+    assert registry.capabilities()[0] == {
+        "engine": "piper",
+        "default_voice": "it_IT",
+        "voices": ["it_IT", "en_GB"],
+        "any_voice": False,
+        "batch": False,
+        "runs_as_script": True,
+    }
+    with pytest.raises(ValueError):
+        registry.batch_function("gtts")
+    assert Voice("piper", "it_IT") == Voice("piper", "it_IT")
+
+
+# Without OpenTelemetry installed, the telemetry of the service is replaced by no-ops
+TELEMETRY_STUB = """
+import importlib.util, types
+if importlib.util.find_spec("opentelemetry") is None:
+    class NoOp:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __getattr__(self, name):
+            return NoOp
+
+    telemetry = types.ModuleType("py_phone_caller_utils.telemetry")
+    telemetry.init_telemetry = telemetry.instrument_aiohttp_app = NoOp
+    opentelemetry = types.ModuleType("opentelemetry")
+    opentelemetry.metrics = types.ModuleType("opentelemetry.metrics")
+    opentelemetry.metrics.get_meter = opentelemetry.metrics.Observation = NoOp
+    sys.modules.update({
+        telemetry.__name__: telemetry,
+        "opentelemetry": opentelemetry,
+        "opentelemetry.metrics": opentelemetry.metrics,
+    })
+"""
+
+
+def test_startup_does_not_import_the_unused_engines():
+    """Benchmarks the import of the service with Piper: no in-process engine is loaded."""
+    pytest.importorskip("aiohttp")
+    code = (
+        "import json, sys, time\n" + TELEMETRY_STUB + "started = time.perf_counter()\n"
+        "import generate_audio.generate_audio\n"
+        "print(json.dumps([time.perf_counter() - started, "
+        f"[name for name in {HEAVY_MODULES!r} if name in sys.modules]]))\n"
+    )
+    env = dict(
+        os.environ,
+        DYNACONF_GENERATE_AUDIO__TTS_ENGINE="piper_tts",
+        PYTHONPATH=os.pathsep.join(
+            [SRC_DIR, os.path.join(SRC_DIR, "py-phone-caller-utils")]
+        ),
+    )
+
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    import_seconds, heavy_modules = json.loads(result.stdout.strip().splitlines()[-1])
+
+    print(
+        f"\ngenerate_audio import: {import_seconds:.2f}s "
+        + f"(process {time.perf_counter() - started:.2f}s)"
+    )
+    assert heavy_modules == []
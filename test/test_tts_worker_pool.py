@@ -0,0 +1,69 @@
+import asyncio
+
+from generate_audio.tts_worker_pool import TTSWorkerPools
+
+
+class FakePool:
+    def __init__(self, name):
+        self.name = name
+        self.started = 0
+        self.closed = False
+        self.jobs = []
+
+    async def start(self):
+        self.started += 1
+        await asyncio.sleep(0)
+
+    async def close(self, drain=False):
+        self.closed = True
+
+    async def synthesize(self, text, output_path):
+        self.jobs.append(text)
+
+
+async def test_voices_share_their_pool_and_the_least_recently_used_is_stopped():
+    created = {}
+
+    def create_pool(voice):
+        created[voice] = FakePool(voice)
+        return created[voice]
+
+    pools = TTSWorkerPools(create_pool, max_pools=2)
+    await asyncio.gather(
+        pools.synthesize("it_IT", "Uno", "1.wav"),
+        pools.synthesize("it_IT", "Due", "2.wav"),
+    )
+    await pools.synthesize("en_GB", "Three", "3.wav")
+    await pools.synthesize("it_IT", "Quattro", "4.wav")
+    await pools.synthesize("es_ES", "Cinco", "5.wav")
+    await asyncio.sleep(0)
+
+    assert created["it_IT"].started == 1
+    assert created["it_IT"].jobs == ["Uno", "Due", "Quattro"]
+    assert created["en_GB"].closed and not created["it_IT"].closed
+    assert pools.keys() == ["it_IT", "es_ES"]
+
+    await pools.close()
+    assert created["it_IT"].closed and created["es_ES"].closed
+
+
+async def test_a_pool_evicted_while_starting_is_not_used():
+    created = []
+
+    class ClosingPool(FakePool):
+        async def synthesize(self, text, output_path):
+            assert not self.closed, f"pool '{self.name}' used once closed"
+            await super().synthesize(text, output_path)
+
+    def create_pool(voice):
+        created.append(ClosingPool(voice))
+        return created[-1]
+
+    pools = TTSWorkerPools(create_pool, max_pools=1)
+    await asyncio.gather(
+        pools.synthesize("it_IT", "Uno", "1.wav"),
+        pools.synthesize("en_GB", "Two", "2.wav"),
+    )
+    await pools.close()
+
+    assert sorted(job for pool in created for job in pool.jobs) == ["Two", "Uno"]